@@ -0,0 +1,89 @@
+#!/usr/bin/env node
+/**
+ * Note Render Backfill
+ *
+ * Fills in the precomputed excerpt and rendered HTML for notes written before
+ * they were stored (or re-renders every note with --all, e.g. after changing the
+ * markdown sanitizer settings). Notes keep their updated_at.
+ *
+ * Usage:
+ *   node scripts/backfill_note_render.js [--all] [--batch-size=500]
+ *   npm run backfill:render
+ */
+
+import path from 'node:path';
+import { fileURLToPath } from 'node:url';
+
+// ESM compatibility
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+
+// Load environment variables
+import dotenv from 'dotenv';
+
+dotenv.config({ path: path.resolve(__dirname, '../../.env') });
+
+import db from '../src/config/database.js';
+import { runMigrations } from '../src/config/migrations.js';
+import NoteService from '../src/services/noteService.js';
+
+const renderAll = process.argv.includes('--all');
+const batchArg = process.argv.find((arg) => arg.startsWith('--batch-size='));
+const batchSize = parseInt(batchArg?.split('=')[1] || '500', 10);
+
+/**
+ * Render and store one batch of notes without touching their updated_at.
+ */
+async function backfillBatch(notes) {
+  await db.transaction(async (tx) => {
+    for (const note of notes) {
+      const rendered = NoteService.renderContent(note.body);
+      // Assigning updated_at explicitly stops MySQL's ON UPDATE CURRENT_TIMESTAMP
+      await tx.run(
+        `UPDATE notes SET excerpt = ?, body_html = ?, updated_at = updated_at WHERE id = ?`,
+        [rendered.excerpt, rendered.html, note.id],
+      );
+      if (tx.isSQLite) {
+        // The SQLite timestamp trigger bumps updated_at on every update; restore it
+        await tx.run(`UPDATE notes SET updated_at = ? WHERE id = ?`, [note.updated_at, note.id]);
+      }
+    }
+  });
+}
+
+async function run() {
+  await db.connect();
+  await runMigrations(db.db, db.isSQLite);
+
+  const pendingFilter = renderAll ? '' : 'AND (excerpt IS NULL OR body_html IS NULL)';
+  const { total } = await db.queryOne(
+    `SELECT COUNT(*) as total FROM notes WHERE 1 = 1 ${pendingFilter}`,
+  );
+  console.log(`🖋️  Rendering ${total} note(s) in batches of ${batchSize}\n`);
+
+  let lastId = 0;
+  let processed = 0;
+  while (true) {
+    const notes = await db.query(
+      `SELECT id, body, updated_at FROM notes WHERE id > ? ${pendingFilter} ORDER BY id LIMIT ?`,
+      [lastId, batchSize],
+    );
+    if (notes.length === 0) break;
+
+    await backfillBatch(notes);
+    lastId = notes[notes.length - 1].id;
+    processed += notes.length;
+    console.log(`  ${processed}/${total}`);
+  }
+
+  console.log(`\n✅ Backfilled ${processed} note(s)`);
+}
+
+try {
+  await run();
+} catch (error) {
+  console.error('❌ Backfill failed:', error.message);
+  process.exitCode = 1;
+} finally {
+  await db.close();
+}
@@ -0,0 +1,148 @@
+#!/usr/bin/env node
+/**
+ * Note Save Benchmark
+ *
+ * Measures the tag-update part of a note save against a seeded SQLite database,
+ * comparing the previous per-tag statements plus full orphan scan with the
+ * batched, diff-based NoteService.updateNoteTags.
+ *
+ * Each save keeps most of the note's tags and swaps one, which is the common
+ * edit pattern. Latencies are printed as mean / p50 / p95 / p99.
+ *
+ * Usage:
+ *   node scripts/bench_note_save.js [notes] [saves]
+ *   (defaults: 100000 notes, 500 saves; uses a temporary database file)
+ */
+
+import fs from 'node:fs';
+import os from 'node:os';
+import path from 'node:path';
+import { performance } from 'node:perf_hooks';
+
+const noteCount = parseInt(process.argv[2] || '100000', 10);
+const saveCount = parseInt(process.argv[3] || '500', 10);
+const TAG_VOCABULARY = 5000;
+const TAGS_PER_NOTE = 3;
+
+const dbPath = path.join(os.tmpdir(), `notehub-bench-note-save-${process.pid}.db`);
+process.env.NOTES_DB_PATH = dbPath;
+
+const { default: db } = await import('../src/config/database.js');
+const { default: NoteService } = await import('../src/services/noteService.js');
+
+/**
+ * Update tags the way NoteService did before batching: delete every link, look up or
+ * insert each tag, link it, then scan note_tag for orphaned tags.
+ */
+async function legacyUpdateNoteTags(noteId, tagNames) {
+  await db.run(`DELETE FROM note_tag WHERE note_id = ?`, [noteId]);
+
+  for (const tagName of tagNames) {
+    let tag = await db.queryOne(`SELECT * FROM tags WHERE name = ?`, [tagName]);
+    if (!tag) {
+      const result = await db.run(`INSERT INTO tags (name) VALUES (?)`, [tagName]);
+      tag = { id: result.insertId, name: tagName };
+    }
+    await db.run(`INSERT OR IGNORE INTO note_tag (note_id, tag_id) VALUES (?, ?)`, [
+      noteId,
+      tag.id,
+    ]);
+  }
+
+  await db.run(`DELETE FROM tags WHERE id NOT IN (SELECT DISTINCT tag_id FROM note_tag)`);
+}
+
+function randomTagNames(count) {
+  const names = new Set();
+  while (names.size < count) {
+    names.add(`tag-${Math.floor(Math.random() * TAG_VOCABULARY)}`);
+  }
+  return [...names];
+}
+
+/**
+ * Seed users, notes, tags and links directly through better-sqlite3 in one transaction.
+ */
+function seed() {
+  const sqlite = db.db;
+  const insertUser = sqlite.prepare(
+    `INSERT INTO users (username, password_hash, email) VALUES (?, 'x', ?)`,
+  );
+  const insertNote = sqlite.prepare(`INSERT INTO notes (title, body, owner_id) VALUES (?, ?, ?)`);
+  const insertTag = sqlite.prepare(`INSERT INTO tags (name) VALUES (?)`);
+  const insertLink = sqlite.prepare(
+    `INSERT OR IGNORE INTO note_tag (note_id, tag_id) VALUES (?, ?)`,
+  );
+
+  sqlite.transaction(() => {
+    const userIds = [];
+    for (let i = 0; i < 100; i++) {
+      userIds.push(insertUser.run(`bench${i}`, `bench${i}@example.com`).lastInsertRowid);
+    }
+    const tagIds = [];
+    for (let i = 0; i < TAG_VOCABULARY; i++) {
+      tagIds.push(insertTag.run(`tag-${i}`).lastInsertRowid);
+    }
+    for (let i = 0; i < noteCount; i++) {
+      const noteId = insertNote.run(`Note ${i}`, 'Body', userIds[i % userIds.length])
+        .lastInsertRowid;
+      for (let t = 0; t < TAGS_PER_NOTE; t++) {
+        insertLink.run(noteId, tagIds[Math.floor(Math.random() * tagIds.length)]);
+      }
+    }
+  })();
+}
+
+/**
+ * Save saveCount random notes with one swapped tag each and print latency stats.
+ */
+async function measure(label, updateTags) {
+  const samples = [];
+  for (let i = 0; i < saveCount; i++) {
+    const noteId = 1 + Math.floor(Math.random() * noteCount);
+    const current = db.db
+      .prepare(
+        `SELECT t.name FROM note_tag nt INNER JOIN tags t ON nt.tag_id = t.id WHERE nt.note_id = ?`,
+      )
+      .all(noteId)
+      .map((row) => row.name);
+    const next = [...current.slice(1), ...randomTagNames(1)];
+
+    const start = performance.now();
+    await updateTags(noteId, next);
+    samples.push(performance.now() - start);
+  }
+
+  samples.sort((a, b) => a - b);
+  const pct = (p) => samples[Math.min(samples.length - 1, Math.floor(samples.length * p))];
+  const mean = samples.reduce((sum, value) => sum + value, 0) / samples.length;
+  console.log(
+    `  ${label.padEnd(10)} mean ${mean.toFixed(2).padStart(8)} ms` +
+      `  p50 ${pct(0.5).toFixed(2).padStart(8)} ms` +
+      `  p95 ${pct(0.95).toFixed(2).padStart(8)} ms` +
+      `  p99 ${pct(0.99).toFixed(2).padStart(8)} ms`,
+  );
+}
+
+async function run() {
+  await db.connect();
+  await db.initSchema();
+
+  console.log(`Seeding ${noteCount} notes (${TAGS_PER_NOTE} tags each)...`);
+  seed();
+
+  console.log(`\nTag update latency over ${saveCount} saves:`);
+  await measure('before', legacyUpdateNoteTags);
+  await measure('after', (noteId, tags) =>
+    db.transaction((tx) => NoteService.updateNoteTags(tx, noteId, tags.join(','))),
+  );
+}
+
+try {
+  await run();
+} finally {
+  await db.close();
+  for (const suffix of ['', '-wal', '-shm']) {
+    fs.rmSync(`${dbPath}${suffix}`, { force: true });
+  }
+}
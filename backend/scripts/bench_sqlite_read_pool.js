@@ -0,0 +1,153 @@
+#!/usr/bin/env node
+/**
+ * SQLite Read Pool Benchmark
+ *
+ * Runs a mixed workload against a seeded SQLite database twice, first with every
+ * query on the main connection and then with reads on the worker-thread read pool:
+ *
+ * - fast readers: note lookups by primary key, back to back
+ * - one slow reader: a GROUP_CONCAT aggregate over all notes, like the admin stats
+ * - one writer: note title updates
+ *
+ * Latencies are printed as p50 / p95 / p99 together with the event loop delay, which
+ * is what every other request and socket waits on while a synchronous query runs.
+ *
+ * Usage:
+ *   node scripts/bench_sqlite_read_pool.js [notes] [seconds] [workers]
+ *   (defaults: 50000 notes, 10 seconds per phase, 4 workers; uses a temporary database)
+ */
+
+import fs from 'node:fs';
+import os from 'node:os';
+import path from 'node:path';
+import { monitorEventLoopDelay, performance } from 'node:perf_hooks';
+
+const noteCount = parseInt(process.argv[2] || '50000', 10);
+const seconds = parseInt(process.argv[3] || '10', 10);
+const workers = parseInt(process.argv[4] || '4', 10);
+const FAST_READERS = 8;
+
+const dbPath = path.join(os.tmpdir(), `notehub-bench-read-pool-${process.pid}.db`);
+process.env.NOTES_DB_PATH = dbPath;
+
+const { default: db } = await import('../src/config/database.js');
+
+const SLOW_QUERY = `
+  SELECT n.owner_id, COUNT(*) as notes, GROUP_CONCAT(DISTINCT t.name) as tags
+  FROM notes n
+  LEFT JOIN note_tag nt ON n.id = nt.note_id
+  LEFT JOIN tags t ON nt.tag_id = t.id
+  GROUP BY n.owner_id
+`;
+
+/**
+ * Seed users, notes, tags and links directly through better-sqlite3 in one transaction.
+ */
+function seed() {
+  const sqlite = db.db;
+  const insertUser = sqlite.prepare(
+    `INSERT INTO users (username, password_hash, email) VALUES (?, 'x', ?)`,
+  );
+  const insertNote = sqlite.prepare(`INSERT INTO notes (title, body, owner_id) VALUES (?, ?, ?)`);
+  const insertTag = sqlite.prepare(`INSERT INTO tags (name) VALUES (?)`);
+  const insertLink = sqlite.prepare(
+    `INSERT OR IGNORE INTO note_tag (note_id, tag_id) VALUES (?, ?)`,
+  );
+
+  sqlite.transaction(() => {
+    const userIds = [];
+    for (let i = 0; i < 100; i++) {
+      userIds.push(insertUser.run(`bench${i}`, `bench${i}@example.com`).lastInsertRowid);
+    }
+    const tagIds = [];
+    for (let i = 0; i < 1000; i++) {
+      tagIds.push(insertTag.run(`tag-${i}`).lastInsertRowid);
+    }
+    for (let i = 0; i < noteCount; i++) {
+      const noteId = insertNote.run(`Note ${i}`, 'Body text', userIds[i % userIds.length])
+        .lastInsertRowid;
+      for (let t = 0; t < 3; t++) {
+        insertLink.run(noteId, tagIds[Math.floor(Math.random() * tagIds.length)]);
+      }
+    }
+  })();
+}
+
+function percentiles(samples) {
+  samples.sort((a, b) => a - b);
+  const pct = (p) => samples[Math.min(samples.length - 1, Math.floor(samples.length * p))] ?? 0;
+  const format = (p) => `p${p * 100} ${pct(p).toFixed(2).padStart(8)} ms`;
+  return `${[0.5, 0.95, 0.99].map(format).join('  ')}  (${samples.length} ops)`;
+}
+
+/**
+ * Call op in a loop until the deadline and collect per-call latencies.
+ */
+async function loop(deadline, samples, op) {
+  while (performance.now() < deadline) {
+    const start = performance.now();
+    await op();
+    samples.push(performance.now() - start);
+    // Yield so timers and other clients get a turn, as network I/O would
+    await new Promise((resolve) => setImmediate(resolve));
+  }
+}
+
+async function measure(label) {
+  const fast = [];
+  const slow = [];
+  const writes = [];
+  const loopDelay = monitorEventLoopDelay({ resolution: 1 });
+  const deadline = performance.now() + seconds * 1000;
+  const randomId = () => 1 + Math.floor(Math.random() * noteCount);
+
+  loopDelay.enable();
+  await Promise.all([
+    ...Array.from({ length: FAST_READERS }, () =>
+      loop(deadline, fast, () =>
+        db.queryOne(`SELECT id, title FROM notes WHERE id = ?`, [randomId()]),
+      ),
+    ),
+    loop(deadline, slow, () => db.query(SLOW_QUERY)),
+    loop(deadline, writes, () =>
+      db.run(`UPDATE notes SET title = ? WHERE id = ?`, [`Edited ${Date.now()}`, randomId()]),
+    ),
+  ]);
+  loopDelay.disable();
+
+  console.log(`\n${label}`);
+  console.log(`  fast reads  ${percentiles(fast)}`);
+  console.log(`  slow reads  ${percentiles(slow)}`);
+  console.log(`  writes      ${percentiles(writes)}`);
+  console.log(
+    `  event loop delay  p99 ${(loopDelay.percentile(99) / 1e6).toFixed(2)} ms` +
+      `  max ${(loopDelay.max / 1e6).toFixed(2)} ms`,
+  );
+}
+
+async function run() {
+  await db.connect();
+  await db.initSchema();
+
+  console.log(`Seeding ${noteCount} notes...`);
+  seed();
+
+  console.log(
+    `Mixed load for ${seconds}s per phase (${FAST_READERS} fast readers, 1 slow, 1 writer)`,
+  );
+  await measure('Main thread (SQLITE_READ_POOL=false)');
+
+  db.startReadPool(dbPath, workers);
+  // Warm up so worker startup is not measured
+  await Promise.all(Array.from({ length: workers * 2 }, () => db.query(`SELECT 1`)));
+  await measure(`Read pool (SQLITE_READ_POOL=true, ${workers} workers)`);
+}
+
+try {
+  await run();
+} finally {
+  await db.close();
+  for (const suffix of ['', '-wal', '-shm']) {
+    fs.rmSync(`${dbPath}${suffix}`, { force: true });
+  }
+}
@@ -0,0 +1,122 @@
+#!/usr/bin/env node
+/**
+ * Login Storm Load Test
+ *
+ * Fires concurrent password logins at a running backend while two probes measure
+ * how the rest of the API holds up:
+ *
+ * - liveness: GET /api/health/live, which only waits on the event loop
+ * - api: GET /api/v1/auth/validate with a token, the cheapest authenticated request
+ *
+ * With hashing on the event loop, probe latencies climb to seconds during the storm.
+ * With the password hashing pool they stay flat, and logins beyond what the pool can
+ * queue are answered 503 with Retry-After, which the clients here honour.
+ *
+ * Requests from localhost skip the API rate limiter, so run it on the server host.
+ *
+ * Usage:
+ *   node scripts/loadtest_login_storm.js [url] [clients] [seconds]
+ *   npm run loadtest:login
+ *   (defaults: http://localhost:5000, 50 clients, 20 seconds)
+ */
+
+import { performance } from 'node:perf_hooks';
+import { setTimeout as sleep } from 'node:timers/promises';
+
+const baseUrl = process.argv[2] || 'http://localhost:5000';
+const clients = parseInt(process.argv[3] || '50', 10);
+const seconds = parseInt(process.argv[4] || '20', 10);
+const PROBE_INTERVAL = 100; // ms
+
+const username = `storm_${process.pid}`;
+const password = 'StormTest12345';
+
+function percentiles(samples) {
+  samples.sort((a, b) => a - b);
+  const pct = (p) => samples[Math.min(samples.length - 1, Math.floor(samples.length * p))] ?? 0;
+  const format = (p) => `p${p * 100} ${pct(p).toFixed(1).padStart(8)} ms`;
+  return `${[0.5, 0.95, 0.99].map(format).join('  ')}  (${samples.length} requests)`;
+}
+
+async function post(path, body) {
+  return fetch(`${baseUrl}${path}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body),
+  });
+}
+
+/**
+ * POST until the server accepts it, waiting out 503 Retry-After answers.
+ */
+async function postWithRetry(path, body) {
+  let response = await post(path, body);
+  while (response.status === 503) {
+    await sleep(Number(response.headers.get('retry-after') || 1) * 1000);
+    response = await post(path, body);
+  }
+  return response;
+}
+
+async function setup() {
+  const registered = await postWithRetry('/api/v1/auth/register', { username, password });
+  if (!registered.ok) {
+    throw new Error(`Registration failed: ${registered.status} ${await registered.text()}`);
+  }
+  const login = await postWithRetry('/api/v1/auth/login', { username, password });
+  const { data } = await login.json();
+  return data.access_token;
+}
+
+async function loginClient(deadline, results) {
+  while (performance.now() < deadline) {
+    const start = performance.now();
+    const response = await post('/api/v1/auth/login', { username, password });
+    await response.arrayBuffer();
+    const elapsed = performance.now() - start;
+
+    results.statuses[response.status] = (results.statuses[response.status] || 0) + 1;
+    if (response.status === 503) {
+      results.shed.push(elapsed);
+      await sleep(Number(response.headers.get('retry-after') || 1) * 1000);
+    } else {
+      results.accepted.push(elapsed);
+    }
+  }
+}
+
+async function probe(deadline, samples, path, headers = {}) {
+  while (performance.now() < deadline) {
+    const start = performance.now();
+    const response = await fetch(`${baseUrl}${path}`, { headers });
+    await response.arrayBuffer();
+    samples.push(performance.now() - start);
+    await sleep(PROBE_INTERVAL);
+  }
+}
+
+async function run() {
+  console.log(`Registering ${username} on ${baseUrl}...`);
+  const token = await setup();
+
+  const results = { accepted: [], shed: [], statuses: {} };
+  const liveness = [];
+  const api = [];
+  const deadline = performance.now() + seconds * 1000;
+
+  console.log(`Login storm: ${clients} clients for ${seconds}s`);
+  await Promise.all([
+    ...Array.from({ length: clients }, () => loginClient(deadline, results)),
+    probe(deadline, liveness, '/api/health/live'),
+    probe(deadline, api, '/api/v1/auth/validate', { Authorization: `Bearer ${token}` }),
+  ]);
+
+  console.log(`\n  logins      ${percentiles(results.accepted)}`);
+  console.log(`  shed (503)  ${percentiles(results.shed)}`);
+  console.log(`  statuses    ${JSON.stringify(results.statuses)}`);
+  console.log(`  liveness    ${percentiles(liveness)}`);
+  console.log(`  api         ${percentiles(api)}`);
+  console.log(`\nDelete the test user ${username} when done.`);
+}
+
+await run();
@@ -0,0 +1,214 @@
+#!/usr/bin/env node
+/**
+ * Search Reindex
+ *
+ * Rebuilds the Elasticsearch notes index without downtime: notes are streamed from
+ * the database into a new versioned index, the `notehub-notes` alias is swapped to
+ * it atomically, and notes changed or deleted while the copy ran are reconciled.
+ * Use it after changing mappings/analyzers or to backfill after Elasticsearch was
+ * offline. Searches keep hitting the old index until the swap.
+ *
+ * Progress is checkpointed after every batch, so an interrupted run continues where
+ * it stopped when started again (pass --restart to start over with a fresh index).
+ *
+ * Usage:
+ *   node scripts/reindex_search.js [--batch-size=500] [--rate=2000] [--restart]
+ *     [--delete-old] [--state=/path/to/checkpoint.json]
+ *   npm run reindex:search
+ *
+ *   --rate        Maximum notes per second (0 = unthrottled)
+ *   --delete-old  Delete the indices the alias pointed at before (kept by default for rollback)
+ */
+
+import fs from 'node:fs';
+import os from 'node:os';
+import path from 'node:path';
+import { setTimeout as sleep } from 'node:timers/promises';
+import { fileURLToPath } from 'node:url';
+
+// ESM compatibility
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+
+// Load environment variables
+import dotenv from 'dotenv';
+
+dotenv.config({ path: path.resolve(__dirname, '../../.env') });
+
+import db from '../src/config/database.js';
+import elasticsearch from '../src/config/elasticsearch.js';
+import searchOutbox from '../src/services/searchOutbox.js';
+
+function getArg(name, fallback) {
+  const arg = process.argv.find((value) => value.startsWith(`--${name}=`));
+  return arg ? arg.slice(name.length + 3) : fallback;
+}
+
+const batchSize = parseInt(getArg('batch-size', '500'), 10);
+const rate = parseInt(getArg('rate', '2000'), 10);
+const statePath = getArg('state', path.join(os.tmpdir(), 'notehub-reindex-search.json'));
+const restart = process.argv.includes('--restart');
+const deleteOld = process.argv.includes('--delete-old');
+
+function loadState() {
+  if (restart || !fs.existsSync(statePath)) return null;
+  return JSON.parse(fs.readFileSync(statePath, 'utf8'));
+}
+
+function saveState(state) {
+  fs.writeFileSync(statePath, JSON.stringify(state, null, 2));
+}
+
+/**
+ * Current database time in the format updated_at is stored in.
+ */
+async function getDatabaseTime() {
+  const sql = db.isSQLite
+    ? `SELECT CURRENT_TIMESTAMP as now`
+    : `SELECT DATE_FORMAT(NOW(), '%Y-%m-%d %H:%i:%s') as now`;
+  return (await db.queryOne(sql)).now;
+}
+
+/**
+ * Index notes matching `filter` in id order, starting after `afterId`.
+ * Calls onBatch with the last id and batch size after each successful bulk request.
+ */
+async function copyNotes(index, { filter = '', params = [], afterId = 0, onBatch }) {
+  const startedAt = Date.now();
+  let lastId = afterId;
+  let copied = 0;
+
+  while (true) {
+    const rows = await db.query(
+      `SELECT id FROM notes WHERE id > ? ${filter} ORDER BY id LIMIT ?`,
+      [lastId, ...params, batchSize],
+    );
+    if (rows.length === 0) break;
+
+    const notes = await searchOutbox.loadNotes(rows.map((row) => row.id));
+    if (notes.length > 0 && !(await elasticsearch.bulkIndexNotes(notes, index))) {
+      throw new Error(`Bulk index into ${index} failed after note ${lastId}`);
+    }
+
+    lastId = rows[rows.length - 1].id;
+    copied += rows.length;
+    await onBatch?.(lastId, rows.length);
+
+    // Throttle to `rate` notes per second on average
+    if (rate > 0) {
+      const ahead = (copied / rate) * 1000 - (Date.now() - startedAt);
+      if (ahead > 0) await sleep(ahead);
+    }
+  }
+
+  return copied;
+}
+
+/**
+ * Delete documents from `index` whose note no longer exists.
+ */
+async function pruneDeletedNotes(index) {
+  let afterId = 0;
+  let pruned = 0;
+
+  while (true) {
+    const ids = await elasticsearch.getIndexedNoteIds(index, afterId, batchSize);
+    if (ids.length === 0) break;
+
+    const existing = await db.query(
+      `SELECT id FROM notes WHERE id IN (${ids.map(() => '?').join(',')})`,
+      ids,
+    );
+    const existingIds = new Set(existing.map((row) => row.id));
+    const missing = ids.filter((id) => !existingIds.has(id));
+    if (missing.length > 0 && !(await elasticsearch.bulkDeleteNotes(missing, index))) {
+      throw new Error(`Bulk delete from ${index} failed`);
+    }
+
+    pruned += missing.length;
+    afterId = ids[ids.length - 1];
+  }
+
+  return pruned;
+}
+
+async function run() {
+  await db.connect();
+  await elasticsearch.connect();
+  if (!elasticsearch.isEnabled()) {
+    throw new Error('Elasticsearch is not configured or unreachable (ELASTICSEARCH_NODE)');
+  }
+
+  let state = loadState();
+  if (state && !(await elasticsearch.client.indices.exists({ index: state.index }))) {
+    console.log(`⚠️  Checkpointed index ${state.index} no longer exists, starting over`);
+    state = null;
+  }
+
+  if (state) {
+    console.log(`🔁 Resuming reindex into ${state.index} after note ${state.lastId}`);
+  } else {
+    state = {
+      // Disable refresh and replicas while bulk loading; restored before the swap
+      index: await elasticsearch.createVersionedIndex({
+        refresh_interval: '-1',
+        number_of_replicas: 0,
+      }),
+      startedAt: await getDatabaseTime(),
+      lastId: 0,
+      copied: 0,
+    };
+    saveState(state);
+    console.log(`🆕 Created index ${state.index}`);
+  }
+
+  const { total } = await db.queryOne(`SELECT COUNT(*) as total FROM notes`);
+  const throttle = rate > 0 ? ` at up to ${rate}/s` : '';
+  console.log(`📦 Copying ${total} note(s) in batches of ${batchSize}${throttle}\n`);
+
+  await copyNotes(state.index, {
+    afterId: state.lastId,
+    onBatch: (lastId, count) => {
+      state.lastId = lastId;
+      state.copied += count;
+      saveState(state);
+      console.log(`  ${state.copied}/${total}`);
+    },
+  });
+
+  await elasticsearch.finishBulkLoad(state.index);
+  const previous = await elasticsearch.swapAlias(state.index);
+  console.log(`\n🔀 Alias ${elasticsearch.indexName} now points at ${state.index}`);
+
+  // Writes before the swap went to the old index; reapply them to the new one.
+  // Tag-only edits count, since updateNoteTags bumps the note's updated_at.
+  const updated = await copyNotes(state.index, {
+    filter: 'AND updated_at >= ?',
+    params: [state.startedAt],
+  });
+  const pruned = await pruneDeletedNotes(state.index);
+  console.log(`🔄 Caught up ${updated} changed and ${pruned} deleted note(s)`);
+
+  for (const index of previous) {
+    if (deleteOld) {
+      await elasticsearch.client.indices.delete({ index });
+      console.log(`🗑️  Deleted old index ${index}`);
+    } else {
+      console.log(`ℹ️  Old index ${index} kept; delete it once the new one is verified`);
+    }
+  }
+
+  fs.rmSync(statePath, { force: true });
+  console.log(`\n✅ Reindexed ${state.copied} note(s) into ${state.index}`);
+}
+
+try {
+  await run();
+} catch (error) {
+  console.error('❌ Reindex failed:', error.message);
+  console.error(`   Run again to resume from ${statePath}`);
+  process.exitCode = 1;
+} finally {
+  await db.close();
+  await elasticsearch.close();
+}
@@ -5,12 +5,113 @@
 // Search configuration
 export const SEARCH_MIN_LENGTH = parseInt(process.env.SEARCH_MIN_LENGTH || '3', 10);
 
+// Prepared statements cached per SQLite connection (see config/statementCache.js)
+export const DB_STATEMENT_CACHE_SIZE = parseInt(process.env.DB_STATEMENT_CACHE_SIZE || '500', 10);
+
+// Per-query latency metrics: distinct fingerprints labelled before the rest become 'other'
+export const DB_QUERY_FINGERPRINTS = {
+  MAX_LABELS: parseInt(process.env.DB_QUERY_FINGERPRINT_MAX_LABELS || '200', 10),
+};
+
+// Slow-query log (see Database.recordQuery)
+export const DB_SLOW_QUERY = {
+  THRESHOLD: parseInt(process.env.DB_SLOW_QUERY_THRESHOLD || '500', 10), // ms, 0 disables
+  EXPLAIN: process.env.DB_SLOW_QUERY_EXPLAIN === 'true',
+  EXPLAIN_INTERVAL: parseInt(process.env.DB_SLOW_QUERY_EXPLAIN_INTERVAL || '300', 10), // seconds
+};
+
+// Read-your-writes for replica routing: after a write, reads of the same request and user go
+// to the primary until a replica has caught up (see DatabaseReplication.canServe)
+export const DB_READ_YOUR_WRITES = {
+  WINDOW: parseInt(process.env.DB_READ_YOUR_WRITES_WINDOW || '5000', 10), // ms
+  MAX_USERS: parseInt(process.env.DB_READ_YOUR_WRITES_MAX_USERS || '10000', 10),
+};
+
+// Replica health checks and lag measurement (see config/databaseReplication.js)
+export const DB_REPLICATION = {
+  HEALTH_CHECK_INTERVAL: parseInt(process.env.DB_REPLICA_HEALTH_CHECK_INTERVAL || '5000', 10), // ms
+  HEARTBEAT_INTERVAL: parseInt(process.env.DB_REPLICA_HEARTBEAT_INTERVAL || '1000', 10), // ms
+  MAX_LAG: parseInt(process.env.DB_REPLICA_MAX_LAG || '30000', 10), // ms, unhealthy above
+};
+
+// MySQL connection pools (see config/mysqlPool.js). SIZE is the fixed size, or the upper
+// bound when ADAPTIVE sizing grows and shrinks the pool between MIN_SIZE and SIZE.
+export const MYSQL_POOL = {
+  SIZE: parseInt(process.env.MYSQL_POOL_SIZE || '10', 10),
+  REPLICA_SIZE: parseInt(process.env.MYSQL_REPLICA_POOL_SIZE || '5', 10),
+  ADAPTIVE: process.env.MYSQL_POOL_ADAPTIVE === 'true',
+  MIN_SIZE: parseInt(process.env.MYSQL_POOL_MIN_SIZE || '2', 10),
+  ADAPT_INTERVAL: parseInt(process.env.MYSQL_POOL_ADAPT_INTERVAL || '10000', 10), // ms
+  GROW_WAIT: parseInt(process.env.MYSQL_POOL_GROW_WAIT || '5', 10), // ms of acquire wait
+};
+
+// Optional worker-thread pool for SQLite reads (see config/sqliteReadPool.js)
+export const SQLITE_READ_POOL = {
+  ENABLED: process.env.SQLITE_READ_POOL === 'true',
+  SIZE: parseInt(process.env.SQLITE_READ_POOL_SIZE || '4', 10),
+  MAX_QUEUE: parseInt(process.env.SQLITE_READ_POOL_MAX_QUEUE || '1000', 10),
+};
+
+// Worker-thread pool for bcrypt password hashing (see services/passwordHashPool.js)
+export const PASSWORD_HASH_POOL = {
+  SIZE: parseInt(process.env.PASSWORD_HASH_POOL_SIZE || '2', 10), // 0 hashes on the event loop
+  // Jobs waiting for a worker; beyond this, logins get 503 with Retry-After
+  MAX_QUEUE: parseInt(process.env.PASSWORD_HASH_POOL_MAX_QUEUE || '32', 10),
+  RETRY_AFTER: parseInt(process.env.PASSWORD_HASH_RETRY_AFTER || '5', 10), // seconds
+};
+
+// API rate limiting (see middleware/rateLimiter.js): a token bucket per user, or per IP
+// for anonymous requests, holding CAPACITY tokens and refilling them over WINDOW seconds
+export const RATE_LIMIT = {
+  CAPACITY: parseInt(process.env.RATE_LIMIT_CAPACITY || '100', 10),
+  WINDOW: parseInt(process.env.RATE_LIMIT_WINDOW || '900', 10), // seconds
+  // Tokens taken per request by route class; every other request takes 1
+  COSTS: {
+    search: parseInt(process.env.RATE_LIMIT_COST_SEARCH || '5', 10),
+    import: parseInt(process.env.RATE_LIMIT_COST_IMPORT || '10', 10),
+    ai: parseInt(process.env.RATE_LIMIT_COST_AI || '10', 10),
+  },
+  // Buckets kept in process when Redis is unavailable
+  LOCAL_MAX_ENTRIES: parseInt(process.env.RATE_LIMIT_LOCAL_MAX_ENTRIES || '10000', 10),
+};
+
+// Notes list pagination (GET /api/notes?limit=&cursor=)
+export const NOTES_PAGE = {
+  DEFAULT_LIMIT: parseInt(process.env.NOTES_PAGE_DEFAULT_LIMIT || '50', 10),
+  MAX_LIMIT: parseInt(process.env.NOTES_PAGE_MAX_LIMIT || '200', 10),
+};
+
+// Periodic sweep for tags orphaned outside NoteService (e.g. by user deletion cascades)
+export const TAG_CLEANUP = {
+  INTERVAL: parseInt(process.env.TAG_CLEANUP_INTERVAL || '3600', 10), // seconds
+  BATCH_SIZE: parseInt(process.env.TAG_CLEANUP_BATCH_SIZE || '500', 10),
+};
+
 // Cache TTL (Time To Live) in seconds
 export const CACHE_TTL = {
   NOTES_LIST: parseInt(process.env.CACHE_TTL_NOTES || '600', 10), // 10 minutes
   NOTES_SEARCH: parseInt(process.env.CACHE_TTL_SEARCH || '300', 10), // 5 minutes
   TAGS: parseInt(process.env.CACHE_TTL_TAGS || '1800', 10), // 30 minutes
   USER_SESSION: parseInt(process.env.CACHE_TTL_SESSION || '3600', 10), // 1 hour
+  FOLDERS: parseInt(process.env.CACHE_TTL_FOLDERS || '1800', 10), // 30 minutes
+  // Must outlive every cached entry; see RedisCache.getNamespaceVersion
+  NAMESPACE_VERSION: parseInt(process.env.CACHE_TTL_NAMESPACE_VERSION || '86400', 10), // 1 day
+};
+
+// Soft TTL in seconds: entries older than this are served stale while one
+// background refresh runs (see RedisCache.getOrCompute). Must be below CACHE_TTL.
+export const CACHE_SOFT_TTL = {
+  NOTES_LIST: parseInt(process.env.CACHE_SOFT_TTL_NOTES || '300', 10), // 5 minutes
+  TAGS: parseInt(process.env.CACHE_SOFT_TTL_TAGS || '900', 10), // 15 minutes
+  FOLDERS: parseInt(process.env.CACHE_SOFT_TTL_FOLDERS || '900', 10), // 15 minutes
+};
+
+// Cache namespaces, invalidated by bumping a per-namespace generation counter
+export const CACHE_NAMESPACE = {
+  NOTES: (userId) => `notes:user:${userId}`,
+  TAGS: (userId) => `tags:user:${userId}`,
+  FOLDERS: (userId) => `folders:user:${userId}`,
+  PRINCIPAL: (userId) => `principal:user:${userId}`,
 };
 
 // Redis configuration
@@ -21,6 +122,15 @@ export const REDIS = {
   SCAN_COUNT: parseInt(process.env.REDIS_SCAN_COUNT || '100', 10),
 };
 
+// In-process L1 cache in front of Redis (also usable without Redis as a local-only cache)
+export const CACHE_L1 = {
+  ENABLED: process.env.CACHE_L1_ENABLED === 'true',
+  MAX_ENTRIES: parseInt(process.env.CACHE_L1_MAX_ENTRIES || '5000', 10),
+  MAX_BYTES: parseInt(process.env.CACHE_L1_MAX_BYTES || '33554432', 10), // 32 MB
+  MAX_TTL: parseInt(process.env.CACHE_L1_MAX_TTL || '30', 10), // seconds, bounds staleness
+  INVALIDATION_CHANNEL: process.env.CACHE_L1_CHANNEL || 'notehub:cache:invalidate',
+};
+
 // Elasticsearch configuration
 export const ELASTICSEARCH = {
   REFRESH_STRATEGY: process.env.ES_REFRESH_STRATEGY || 'wait_for', // 'wait_for' or 'false'
@@ -28,3 +138,53 @@ export const ELASTICSEARCH = {
   REPLICAS_DEV: parseInt(process.env.ES_REPLICAS_DEV || '0', 10),
   REPLICAS_PROD: parseInt(process.env.ES_REPLICAS_PROD || '1', 10),
 };
+
+// Asynchronous search indexing (notes are queued in search_outbox and drained in bulk)
+export const SEARCH_OUTBOX = {
+  POLL_INTERVAL: parseInt(process.env.SEARCH_OUTBOX_POLL_INTERVAL || '1000', 10), // ms
+  BATCH_SIZE: parseInt(process.env.SEARCH_OUTBOX_BATCH_SIZE || '200', 10),
+  RETRY_BASE_DELAY: parseInt(process.env.SEARCH_OUTBOX_RETRY_BASE_DELAY || '1000', 10), // ms
+  RETRY_MAX_DELAY: parseInt(process.env.SEARCH_OUTBOX_RETRY_MAX_DELAY || '300000', 10), // ms
+  // How long a worker owns the entries it claimed; must outlast a batch's bulk requests
+  CLAIM_TTL: parseInt(process.env.SEARCH_OUTBOX_CLAIM_TTL || '300000', 10), // ms
+};
+
+// Write-behind audit log buffer (services/auditBuffer.js)
+export const AUDIT_LOG = {
+  // ms between flushes, 0 writes every entry immediately
+  FLUSH_INTERVAL: parseInt(process.env.AUDIT_LOG_FLUSH_INTERVAL || '1000', 10),
+  BATCH_SIZE: parseInt(process.env.AUDIT_LOG_BATCH_SIZE || '100', 10), // flush early at this size
+  MAX_BUFFERED: parseInt(process.env.AUDIT_LOG_MAX_BUFFERED || '10000', 10),
+  // When the buffer is full: 'drop' the entry (it is still in the application log) or
+  // 'write' it immediately like an unbuffered entry
+  OVERFLOW: process.env.AUDIT_LOG_OVERFLOW || 'drop',
+};
+
+// Per-user and per-folder counters (config/counters.js)
+export const COUNTERS = {
+  // Seconds between reconciliation runs, 0 disables
+  RECONCILE_INTERVAL: parseInt(process.env.COUNTERS_RECONCILE_INTERVAL || '3600', 10),
+  RECONCILE_BATCH_SIZE: parseInt(process.env.COUNTERS_RECONCILE_BATCH_SIZE || '500', 10),
+};
+
+// Authenticated-principal cache (services/principalCache.js)
+export const PRINCIPAL_CACHE = {
+  // Seconds a user row is reused in process, 0 disables. Bounds staleness on other
+  // instances if an invalidation broadcast is missed.
+  TTL: parseInt(process.env.PRINCIPAL_CACHE_TTL || '30', 10),
+  REDIS_TTL: parseInt(process.env.PRINCIPAL_CACHE_REDIS_TTL || '300', 10), // seconds
+  MAX_ENTRIES: parseInt(process.env.PRINCIPAL_CACHE_MAX_ENTRIES || '10000', 10),
+  INVALIDATION_CHANNEL: process.env.PRINCIPAL_CACHE_CHANNEL || 'notehub:principal:invalidate',
+};
+
+// Refresh token storage: 'sql' (default), or 'redis' to keep tokens in Redis with TTL
+// expiry while refresh_tokens rows are written in the background as an audit trail
+export const REFRESH_TOKENS = {
+  STORE: process.env.REFRESH_TOKEN_STORE || 'sql',
+};
+
+// Chat encryption configuration
+export const CHAT_ENCRYPTION = {
+  PBKDF2_ITERATIONS: 100000,
+  KEY_CACHE_SIZE: parseInt(process.env.CHAT_KEY_CACHE_SIZE || '1000', 10), // derived room keys
+};
@@ -0,0 +1,249 @@
+/**
+ * Per-user and per-folder counters (notes, archived, favorites, tasks, shares).
+ *
+ * Each counter column is defined once, as a count of rows in a source table whose ref
+ * column points at the counter row, optionally filtered by `when` (column = value).
+ * From that definition this module builds the counter tables, the triggers that keep
+ * them current on every insert, delete and relevant update of the source tables, and
+ * the SQL that recomputes them from scratch (backfill and reconciliation).
+ *
+ * The same triggers keep app_stats, the whole-table row counts behind the application
+ * gauges, so those never need a COUNT(*) over the tables.
+ */
+
+export const COUNTER_TABLES = {
+  user_counters: {
+    key: 'user_id',
+    parent: 'users',
+    columns: {
+      notes: { source: 'notes', ref: 'owner_id' },
+      archived_notes: { source: 'notes', ref: 'owner_id', when: ['archived', 1] },
+      favorite_notes: { source: 'notes', ref: 'owner_id', when: ['favorite', 1] },
+      tasks: { source: 'tasks', ref: 'owner_id' },
+      tasks_completed: { source: 'tasks', ref: 'owner_id', when: ['completed', 1] },
+      tasks_active: { source: 'tasks', ref: 'owner_id', when: ['completed', 0] },
+      shares_sent: { source: 'share_notes', ref: 'shared_by_id' },
+      shares_received: { source: 'share_notes', ref: 'shared_with_id' },
+    },
+  },
+  folder_counters: {
+    key: 'folder_id',
+    parent: 'folders',
+    columns: {
+      notes: { source: 'notes', ref: 'folder_id' },
+      archived_notes: { source: 'notes', ref: 'folder_id', when: ['archived', 1] },
+      favorite_notes: { source: 'notes', ref: 'folder_id', when: ['favorite', 1] },
+      tasks: { source: 'tasks', ref: 'folder_id' },
+      tasks_completed: { source: 'tasks', ref: 'folder_id', when: ['completed', 1] },
+      tasks_active: { source: 'tasks', ref: 'folder_id', when: ['completed', 0] },
+    },
+  },
+};
+
+const SOURCE_TABLES = ['notes', 'tasks', 'share_notes'];
+
+/**
+ * CREATE TABLE statements for the counter tables.
+ */
+export function counterSchemaStatements(isSQLite) {
+  return Object.entries(COUNTER_TABLES).map(([table, { key, parent, columns }]) => {
+    const type = isSQLite ? 'INTEGER' : 'INT';
+    const counters = Object.keys(columns).map((column) => `${column} ${type} NOT NULL DEFAULT 0`);
+    return `CREATE TABLE IF NOT EXISTS ${table} (
+      ${key} ${type} PRIMARY KEY,
+      ${counters.join(',\n      ')},
+      FOREIGN KEY (${key}) REFERENCES ${parent}(id) ON DELETE CASCADE
+    )`;
+  });
+}
+
+/**
+ * Counter updates for one source row: (row = 'NEW' or 'OLD', sign = '+' or '-').
+ * One UPDATE per counter row the source row points at.
+ */
+function counterUpdates(source, row, sign) {
+  const updates = [];
+  for (const [table, { key, columns }] of Object.entries(COUNTER_TABLES)) {
+    const byRef = new Map();
+    for (const [column, { source: columnSource, ref, when }] of Object.entries(columns)) {
+      if (columnSource !== source) continue;
+      const delta = when ? `COALESCE(${row}.${when[0]} = ${when[1]}, 0)` : '1';
+      byRef.set(ref, [...(byRef.get(ref) ?? []), `${column} = ${column} ${sign} ${delta}`]);
+    }
+    for (const [ref, assignments] of byRef) {
+      updates.push(`UPDATE ${table} SET ${assignments.join(', ')} WHERE ${key} = ${row}.${ref};`);
+    }
+  }
+  return updates;
+}
+
+/**
+ * Columns of a source table that counters depend on.
+ */
+function watchedColumns(source) {
+  const watched = new Set();
+  for (const { columns } of Object.values(COUNTER_TABLES)) {
+    for (const { source: columnSource, ref, when } of Object.values(columns)) {
+      if (columnSource !== source) continue;
+      watched.add(ref);
+      if (when) watched.add(when[0]);
+    }
+  }
+  return [...watched];
+}
+
+// Whole-table row counts for the application gauges (app_stats). Each count is spread
+// over STAT_SHARDS rows picked by row id, so concurrent inserts rarely wait on one row.
+export const STAT_TABLES = ['users', 'notes', 'tags'];
+export const STAT_SHARDS = 16;
+
+/**
+ * Names of all counter and stats triggers, to check they exist.
+ */
+export const COUNTER_TRIGGERS = [
+  ...Object.values(COUNTER_TABLES).map(({ parent }) => `${parent}_counters_insert`),
+  ...SOURCE_TABLES.flatMap((source) =>
+    ['insert', 'delete', 'update'].map((event) => `${source}_counters_${event}`),
+  ),
+  ...STAT_TABLES.flatMap((table) => [`${table}_stats_insert`, `${table}_stats_delete`]),
+];
+
+/**
+ * Statements creating one AFTER trigger running body (a list of statements), only for
+ * rows matching condition ({ sqlite, mysql } expressions) when given.
+ */
+function triggerStatements(isSQLite, name, event, table, body, condition = null) {
+  if (isSQLite) {
+    const when = condition ? ` WHEN ${condition.sqlite}` : '';
+    return [
+      `CREATE TRIGGER IF NOT EXISTS ${name} ${event} ON ${table} FOR EACH ROW${when}
+        BEGIN ${body.join(' ')} END`,
+    ];
+  }
+  const statements = condition ? [`IF ${condition.mysql} THEN ${body.join(' ')} END IF;`] : body;
+  return [
+    `DROP TRIGGER IF EXISTS ${name}`,
+    `CREATE TRIGGER ${name} ${event} ON ${table} FOR EACH ROW
+        BEGIN ${statements.join(' ')} END`,
+  ];
+}
+
+/**
+ * Statements creating the counter triggers: a counter row for every new user and
+ * folder, and counter updates for every change to notes, tasks and shares.
+ * Updates only touch counters when a watched column actually changed.
+ */
+export function counterTriggerStatements(isSQLite) {
+  const triggers = [];
+  const create = (...args) => triggers.push(...triggerStatements(isSQLite, ...args));
+
+  const ignore = isSQLite ? 'INSERT OR IGNORE' : 'INSERT IGNORE';
+  for (const [table, { key, parent }] of Object.entries(COUNTER_TABLES)) {
+    create(`${parent}_counters_insert`, 'AFTER INSERT', parent, [
+      `${ignore} INTO ${table} (${key}) VALUES (NEW.id);`,
+    ]);
+  }
+
+  for (const source of SOURCE_TABLES) {
+    const watched = watchedColumns(source);
+    create(`${source}_counters_insert`, 'AFTER INSERT', source, counterUpdates(source, 'NEW', '+'));
+    create(`${source}_counters_delete`, 'AFTER DELETE', source, counterUpdates(source, 'OLD', '-'));
+    create(
+      `${source}_counters_update`,
+      isSQLite ? `AFTER UPDATE OF ${watched.join(', ')}` : 'AFTER UPDATE',
+      source,
+      [...counterUpdates(source, 'OLD', '-'), ...counterUpdates(source, 'NEW', '+')],
+      {
+        sqlite: watched.map((column) => `OLD.${column} IS NOT NEW.${column}`).join(' OR '),
+        mysql: `NOT (${watched.map((column) => `OLD.${column} <=> NEW.${column}`).join(' AND ')})`,
+      },
+    );
+  }
+  return triggers;
+}
+
+/**
+ * Subquery counting the source rows of one counter column for the row of `table`.
+ */
+function actualCount(table, column) {
+  const { key, columns } = COUNTER_TABLES[table];
+  const { source, ref, when } = columns[column];
+  const filter = when ? ` AND src.${when[0]} = ${when[1]}` : '';
+  return `(SELECT COUNT(*) FROM ${source} src WHERE src.${ref} = ${table}.${key}${filter})`;
+}
+
+/**
+ * UPDATE recomputing every counter of `table` from the source tables.
+ * Callers append a WHERE clause to limit it to some rows.
+ */
+export function counterRefreshSql(table) {
+  const assignments = Object.keys(COUNTER_TABLES[table].columns).map(
+    (column) => `${column} = ${actualCount(table, column)}`,
+  );
+  return `UPDATE ${table} SET ${assignments.join(', ')}`;
+}
+
+/**
+ * Condition that is true for rows of `table` whose counters differ from the source tables.
+ */
+export function counterDriftCondition(table) {
+  const columns = Object.keys(COUNTER_TABLES[table].columns);
+  return `(${columns.map((column) => `${column} <> ${actualCount(table, column)}`).join(' OR ')})`;
+}
+
+/**
+ * SELECT computing the counters of the rows whose keys `keysSql` selects (as `${key}`)
+ * straight from the source tables, for when the counter triggers are missing.
+ */
+export function counterComputeSql(table, keysSql) {
+  const { key, columns } = COUNTER_TABLES[table];
+  const counts = Object.keys(columns).map((column) => `${actualCount(table, column)} AS ${column}`);
+  return `SELECT ${table}.${key}, ${counts.join(', ')} FROM (${keysSql}) ${table}`;
+}
+
+/**
+ * Statements creating app_stats and seeding its shards with the current row counts.
+ */
+export function statSchemaStatements(isSQLite) {
+  const ignore = isSQLite ? 'INSERT OR IGNORE' : 'INSERT IGNORE';
+  const statements = [
+    `CREATE TABLE IF NOT EXISTS app_stats (
+      name VARCHAR(50) NOT NULL,
+      shard INT NOT NULL,
+      value BIGINT NOT NULL DEFAULT 0,
+      PRIMARY KEY (name, shard)
+    )`,
+  ];
+  for (const table of STAT_TABLES) {
+    const rows = Array.from({ length: STAT_SHARDS }, (_, shard) => `('${table}', ${shard}, 0)`);
+    statements.push(`${ignore} INTO app_stats (name, shard, value) VALUES ${rows.join(', ')}`);
+    statements.push(
+      `UPDATE app_stats
+       SET value = CASE shard WHEN 0 THEN (SELECT COUNT(*) FROM ${table}) ELSE 0 END
+       WHERE name = '${table}'`,
+    );
+  }
+  return statements;
+}
+
+/**
+ * Statements creating the triggers that add or remove one on a shard of app_stats for
+ * every row inserted into or deleted from the counted tables.
+ */
+export function statTriggerStatements(isSQLite) {
+  const triggers = [];
+  for (const table of STAT_TABLES) {
+    for (const [event, row, sign] of [
+      ['insert', 'NEW', '+'],
+      ['delete', 'OLD', '-'],
+    ]) {
+      const name = `${table}_stats_${event}`;
+      const update = `UPDATE app_stats SET value = value ${sign} 1
+           WHERE name = '${table}' AND shard = ${row}.id % ${STAT_SHARDS};`;
+      triggers.push(
+        ...triggerStatements(isSQLite, name, `AFTER ${event.toUpperCase()}`, table, [update]),
+      );
+    }
+  }
+  return triggers;
+}
@@ -6,31 +6,56 @@
 
 import fs from 'node:fs';
 import path from 'node:path';
+import { getRequestId } from '../middleware/requestId.js';
+import {
+  DB_SLOW_QUERY,
+  DB_STATEMENT_CACHE_SIZE,
+  MYSQL_POOL,
+  SQLITE_READ_POOL,
+} from './constants.js';
 import replication from './databaseReplication.js';
 import logger from './logger.js';
 import { runMigrations } from './migrations.js';
-
-// Import metrics recording function - use lazy loading to avoid circular dependency
-let recordDbQuery = null;
+import MonitoredPool from './mysqlPool.js';
+import { fingerprintQuery } from './queryFingerprint.js';
+import SQLiteLock from './sqliteLock.js';
+import SqliteReadPool from './sqliteReadPool.js';
+import StatementCache from './statementCache.js';
+
+// Import metrics recording functions - use lazy loading to avoid circular dependency
+let metrics = null;
 async function getMetrics() {
-  if (!recordDbQuery) {
+  if (!metrics) {
     try {
-      const metrics = await import('../middleware/metrics.js');
-      recordDbQuery = metrics.recordDbQuery;
+      metrics = await import('../middleware/metrics.js');
     } catch (_error) {
-      // Metrics not available yet, use noop
+      // Metrics not available yet, use noops
       // biome-ignore lint/suspicious/noEmptyBlockStatements: Intentional noop for lazy loading
-      recordDbQuery = () => {};
+      const noop = () => {};
+      metrics = { recordDbQuery: noop, recordSlowQuery: noop };
     }
   }
-  return recordDbQuery;
+  return metrics;
 }
 
+// Statements EXPLAIN accepts on both SQLite and MySQL
+const EXPLAINABLE_OPERATIONS = new Set(['SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE']);
+
 class Database {
   constructor() {
     this.db = null;
     this.isSQLite = true;
     this.replication = replication;
+    // Prepared statements on the SQLite connection, keyed by SQL text
+    this.statements = null;
+    // Worker threads for SQLite reads when SQLITE_READ_POOL is enabled
+    this.readPool = null;
+    // Last EXPLAIN time per slow query fingerprint
+    this.explainedAt = new Map();
+    // Held by the open SQLite transaction; other statements wait for it (see transaction())
+    this.sqliteLock = new SQLiteLock();
+    // Whether the notes_fts full-text index exists (SQLite only)
+    this.hasNotesFts = false;
   }
 
   /**
@@ -48,7 +73,7 @@ class Database {
       const resolvedPath = path.isAbsolute(dbPath) ? dbPath : path.resolve(process.cwd(), dbPath);
       await this.connectSQLite(resolvedPath);
       // Initialize SQLite replication if enabled
-      await this.replication.initialize(this.db, true);
+      await this.replication.initialize(this.db, true, this.statements);
       return this.db;
     }
 
@@ -64,7 +89,7 @@ class Database {
     const defaultPath = path.resolve(process.cwd(), 'data', 'notes.db');
     await this.connectSQLite(defaultPath);
     // Initialize SQLite replication if enabled
-    await this.replication.initialize(this.db, true);
+    await this.replication.initialize(this.db, true, this.statements);
     return this.db;
   }
 
@@ -84,11 +109,37 @@ class Database {
     this.db.pragma('journal_mode = WAL');
     this.db.pragma('foreign_keys = ON');
     this.isSQLite = true;
+    this.statements = new StatementCache(this.db, 'primary', DB_STATEMENT_CACHE_SIZE);
 
     logger.info(`📦 Connected to SQLite database: ${dbPath}`);
+
+    if (SQLITE_READ_POOL.ENABLED) {
+      this.startReadPool(dbPath);
+    }
     return this.db;
   }
 
+  /**
+   * Run SELECTs outside transactions on worker threads with read-only connections,
+   * so slow reads no longer block the event loop. Writes stay on this.db.
+   */
+  startReadPool(dbPath, size = SQLITE_READ_POOL.SIZE) {
+    if (this.readPool || !this.isSQLite || dbPath === ':memory:') return;
+
+    this.readPool = new SqliteReadPool(dbPath, {
+      size,
+      maxQueue: SQLITE_READ_POOL.MAX_QUEUE,
+      statementCacheSize: DB_STATEMENT_CACHE_SIZE,
+      // Used if every worker keeps crashing
+      fallback: (sql, params, mode) =>
+        this.sqliteLock.run(() => {
+          const statement = this.statements.prepare(sql);
+          return mode === 'one' ? statement.get(...params) : statement.all(...params);
+        }),
+    });
+    this.readPool.start();
+  }
+
   /**
    * Connect to MySQL database.
    */
@@ -102,7 +153,6 @@ class Database {
       password: process.env.MYSQL_PASSWORD || '',
       database: process.env.MYSQL_DATABASE || 'notehub',
       waitForConnections: true,
-      connectionLimit: 10,
       queueLimit: 0,
     };
 
@@ -120,7 +170,14 @@ class Database {
       config.ssl = { rejectUnauthorized: true };
     }
 
-    this.db = await mysql.createPool(config);
+    this.db = new MonitoredPool(mysql, config, {
+      name: 'primary',
+      minSize: MYSQL_POOL.MIN_SIZE,
+      maxSize: MYSQL_POOL.SIZE,
+      adaptive: MYSQL_POOL.ADAPTIVE,
+      adaptInterval: MYSQL_POOL.ADAPT_INTERVAL,
+      growWait: MYSQL_POOL.GROW_WAIT,
+    });
     this.isSQLite = false;
 
     logger.info(`🐬 Connected to MySQL database: ${config.host}:${config.port}/${config.database}`);
@@ -144,6 +201,13 @@ class Database {
 
     // Run new centralized migration system
     await runMigrations(this.db, this.isSQLite);
+
+    // Full-text index is optional: SQLite builds without FTS5 skip its migration
+    this.hasNotesFts =
+      this.isSQLite &&
+      !!this.db
+        .prepare(`SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'notes_fts'`)
+        .get();
   }
 
   /**
@@ -1250,9 +1314,10 @@ class Database {
 
   /**
    * Execute a query with parameters.
-   * Routes read queries to replicas if replication is enabled.
+   * Routes read queries to replicas if replication is enabled; options.maxStalenessMs
+   * sends the read to the primary unless a replica lags by at most that much.
    */
-  async query(sql, params = []) {
+  async query(sql, params = [], options = {}) {
     const startTime = Date.now();
     const operation = sql.trim().split(/\s+/)[0].toUpperCase(); // Extract operation (SELECT, INSERT, etc.)
     let success = true;
@@ -1260,14 +1325,19 @@ class Database {
     try {
       // Use replication for SELECT queries if enabled
       if (this.replication.isEnabled() && operation === 'SELECT') {
-        const result = await this.replication.query(sql, params);
+        const read = () => this.replication.query(sql, params, options);
+        return this.isSQLite ? await this.sqliteLock.run(read) : await read();
+      }
+
+      if (this.readPool && operation === 'SELECT') {
+        const result = await this.readPool.query(sql, params, 'all');
         return result;
       }
 
       // Otherwise use primary connection
       let result;
       if (this.isSQLite) {
-        result = this.db.prepare(sql).all(...params);
+        result = await this.sqliteLock.run(() => this.statements.prepare(sql).all(...params));
       } else {
         const [rows] = await this.db.execute(sql, params);
         result = rows;
@@ -1277,18 +1347,15 @@ class Database {
       success = false;
       throw error;
     } finally {
-      // Record metrics
-      const duration = Date.now() - startTime;
-      const recordMetrics = await getMetrics();
-      recordMetrics(operation, duration, success);
+      await this.recordQuery(sql, params, operation, Date.now() - startTime, success);
     }
   }
 
   /**
    * Execute a single query and return one row.
-   * Routes read queries to replicas if replication is enabled.
+   * Routes read queries like query().
    */
-  async queryOne(sql, params = []) {
+  async queryOne(sql, params = [], options = {}) {
     const startTime = Date.now();
     const operation = sql.trim().split(/\s+/)[0].toUpperCase(); // Extract operation (SELECT, INSERT, etc.)
     let success = true;
@@ -1296,14 +1363,19 @@ class Database {
     try {
       // Use replication for SELECT queries if enabled
       if (this.replication.isEnabled() && operation === 'SELECT') {
-        const result = await this.replication.queryOne(sql, params);
+        const read = () => this.replication.queryOne(sql, params, options);
+        return this.isSQLite ? await this.sqliteLock.run(read) : await read();
+      }
+
+      if (this.readPool && operation === 'SELECT') {
+        const result = await this.readPool.query(sql, params, 'one');
         return result;
       }
 
       // Otherwise use primary connection
       let result;
       if (this.isSQLite) {
-        result = this.db.prepare(sql).get(...params);
+        result = await this.sqliteLock.run(() => this.statements.prepare(sql).get(...params));
       } else {
         const [rows] = await this.db.execute(sql, params);
         result = rows[0];
@@ -1313,10 +1385,7 @@ class Database {
       success = false;
       throw error;
     } finally {
-      // Record metrics
-      const duration = Date.now() - startTime;
-      const recordMetrics = await getMetrics();
-      recordMetrics(operation, duration, success);
+      await this.recordQuery(sql, params, operation, Date.now() - startTime, success);
     }
   }
 
@@ -1331,24 +1400,161 @@ class Database {
     try {
       let result;
       if (this.isSQLite) {
-        const runResult = this.db.prepare(sql).run(...params);
+        const runResult = await this.sqliteLock.run(() =>
+          this.statements.prepare(sql).run(...params),
+        );
         result = { insertId: runResult.lastInsertRowid, affectedRows: runResult.changes };
       } else {
         const [execResult] = await this.db.execute(sql, params);
         result = { insertId: execResult.insertId, affectedRows: execResult.affectedRows };
       }
+      this.replication.recordWrite();
       return result;
     } catch (error) {
       success = false;
       throw error;
     } finally {
-      // Record metrics
-      const duration = Date.now() - startTime;
-      const recordMetrics = await getMetrics();
-      recordMetrics(operation, duration, success);
+      await this.recordQuery(sql, params, operation, Date.now() - startTime, success);
+    }
+  }
+
+  /**
+   * Record metrics for a finished query, labelled by operation and fingerprint.
+   * Queries slower than DB_SLOW_QUERY.THRESHOLD also go to the slow-query log.
+   */
+  async recordQuery(sql, params, operation, duration, success) {
+    const fingerprint = fingerprintQuery(sql);
+    const { recordDbQuery, recordSlowQuery } = await getMetrics();
+    recordDbQuery(operation, duration, success, fingerprint);
+
+    if (DB_SLOW_QUERY.THRESHOLD > 0 && duration >= DB_SLOW_QUERY.THRESHOLD) {
+      recordSlowQuery(fingerprint);
+      const entry = { fingerprint, durationMs: duration, success, requestId: getRequestId() };
+      if (DB_SLOW_QUERY.EXPLAIN && EXPLAINABLE_OPERATIONS.has(operation)) {
+        const plan = await this.explainSlowQuery(sql, params, fingerprint);
+        if (plan) entry.plan = plan;
+      }
+      logger.warn('🐢 Slow query', entry);
     }
   }
 
+  /**
+   * Return the query plan of sql, at most once per fingerprint per EXPLAIN_INTERVAL.
+   * The plan comes from the primary even when the query ran on a replica or worker.
+   */
+  async explainSlowQuery(sql, params, fingerprint) {
+    const now = Date.now();
+    if (now - (this.explainedAt.get(fingerprint) ?? 0) < DB_SLOW_QUERY.EXPLAIN_INTERVAL * 1000) {
+      return null;
+    }
+    this.explainedAt.delete(fingerprint);
+    this.explainedAt.set(fingerprint, now);
+    if (this.explainedAt.size > 1000) {
+      this.explainedAt.delete(this.explainedAt.keys().next().value);
+    }
+
+    try {
+      if (this.isSQLite) {
+        const rows = this.db.prepare(`EXPLAIN QUERY PLAN ${sql}`).all(...params);
+        return rows.map((row) => row.detail);
+      }
+      const [rows] = await this.db.query(`EXPLAIN ${sql}`, params);
+      return rows;
+    } catch (error) {
+      return `EXPLAIN failed: ${error.message}`;
+    }
+  }
+
+  /**
+   * Run fn inside a transaction on the primary connection and return its result.
+   * fn receives a handle with query/queryOne/run; the transaction commits when fn
+   * resolves and rolls back when it throws.
+   *
+   * SQLite has a single connection, so transactions are serialized, and statements
+   * from outside fn (db.query/run elsewhere, Sequelize) wait until the transaction
+   * ends instead of joining it (see sqliteLock.js). Keep transactions short.
+   */
+  async transaction(fn) {
+    if (this.isSQLite) {
+      return this.sqliteLock.hold(Symbol('transaction'), async () => {
+        this.db.exec('BEGIN IMMEDIATE');
+        try {
+          const result = await fn(this.createTransactionHandle(null));
+          this.db.exec('COMMIT');
+          this.replication.recordWrite();
+          return result;
+        } catch (error) {
+          if (this.db.inTransaction) this.db.exec('ROLLBACK');
+          throw error;
+        }
+      });
+    }
+
+    const connection = await this.db.getConnection();
+    try {
+      await connection.beginTransaction();
+      try {
+        const result = await fn(this.createTransactionHandle(connection));
+        await connection.commit();
+        this.replication.recordWrite();
+        return result;
+      } catch (error) {
+        await connection.rollback();
+        throw error;
+      }
+    } finally {
+      connection.release();
+    }
+  }
+
+  /**
+   * Build the handle passed to transaction callbacks.
+   * connection is the MySQL connection holding the transaction, or null for SQLite.
+   */
+  createTransactionHandle(connection) {
+    const execute = async (sql, params, mode) => {
+      const startTime = Date.now();
+      const operation = sql.trim().split(/\s+/)[0].toUpperCase();
+      let success = true;
+
+      try {
+        if (!connection) {
+          const statement = this.statements.prepare(sql);
+          if (mode === 'run') {
+            const runResult = statement.run(...params);
+            return { insertId: runResult.lastInsertRowid, affectedRows: runResult.changes };
+          }
+          return mode === 'one' ? statement.get(...params) : statement.all(...params);
+        }
+
+        const [result] = await connection.execute(sql, params);
+        if (mode === 'run') {
+          return { insertId: result.insertId, affectedRows: result.affectedRows };
+        }
+        return mode === 'one' ? result[0] : result;
+      } catch (error) {
+        success = false;
+        throw error;
+      } finally {
+        await this.recordQuery(sql, params, operation, Date.now() - startTime, success);
+      }
+    };
+
+    return {
+      isSQLite: this.isSQLite,
+      query: (sql, params = []) => execute(sql, params, 'all'),
+      queryOne: (sql, params = []) => execute(sql, params, 'one'),
+      run: (sql, params = []) => execute(sql, params, 'run'),
+    };
+  }
+
+  /**
+   * Run fn with all of its reads on the primary, bypassing replicas.
+   */
+  readFromPrimary(fn) {
+    return this.replication.readFromPrimary(fn);
+  }
+
   /**
    * Get replication status.
    */
@@ -1357,43 +1563,46 @@ class Database {
   }
 
   /**
-   * Get database connection pool metrics.
-   * Returns pool statistics for MySQL or null for SQLite.
-   *
-   * Note: mysql2 library doesn't expose public APIs for active/idle connection counts.
-   * We only report the configured pool size limit.
+   * Check the primary answers a trivial query. Throws if it is not connected or fails.
+   * Not recorded in the query metrics, since health probes call it constantly.
    */
-  getPoolMetrics() {
-    if (this.isSQLite || !this.db || !this.db.pool) {
-      return null;
+  async ping() {
+    if (!this.db) {
+      throw new Error('Database not connected');
+    }
+    if (this.isSQLite) {
+      this.db.prepare('SELECT 1').get();
+    } else {
+      await this.db.query('SELECT 1');
     }
+  }
 
-    // MySQL pool statistics
-    try {
-      const pool = this.db.pool;
-      // mysql2 only exposes config.connectionLimit in public API
-      const total = pool.config?.connectionLimit || 10;
-
-      // Return basic metrics - active/idle counts not available via public API
-      return {
-        active: 0, // Not available in mysql2 public API
-        idle: 0, // Not available in mysql2 public API
-        total: total,
-      };
-    } catch (_error) {
+  /**
+   * Get database connection pool metrics.
+   * Returns pool statistics for MySQL (active, idle, queued, total, limit, min, max)
+   * or null for SQLite.
+   */
+  getPoolMetrics() {
+    if (this.isSQLite || !this.db) {
       return null;
     }
+    return this.db.getStats();
   }
 
   /**
    * Close the database connection and all replicas.
    */
   async close() {
-    // Close replication connections first
+    // Close replication connections and read workers first
     await this.replication.close();
+    if (this.readPool) {
+      await this.readPool.close();
+      this.readPool = null;
+    }
 
     if (this.db) {
       if (this.isSQLite) {
+        this.statements.clear();
         this.db.close();
       } else {
         await this.db.end();
@@ -10,20 +10,62 @@
  * - Load balancing across read replicas
  * - Health monitoring and automatic failover
  * - Replica lag monitoring
+ * - Read-your-writes: after a write, the same request and user read from the primary
+ *   until a replica has caught up
  */
 
+import { AsyncLocalStorage } from 'node:async_hooks';
 import fs from 'node:fs';
 import path from 'node:path';
+import { performance } from 'node:perf_hooks';
+import { getRequestContext } from '../middleware/requestId.js';
+import {
+  DB_READ_YOUR_WRITES,
+  DB_REPLICATION,
+  DB_STATEMENT_CACHE_SIZE,
+  MYSQL_POOL,
+} from './constants.js';
 import logger from './logger.js';
+import MonitoredPool from './mysqlPool.js';
+import StatementCache from './statementCache.js';
+
+// Metrics are loaded lazily to avoid a circular dependency with the metrics middleware
+let metrics = null;
+import('../middleware/metrics.js')
+  .then((module) => {
+    metrics = module;
+  })
+  .catch(() => {
+    // Metrics not available, skip recording
+  });
+
+// Weight of the newest sample in a replica's latency EWMA
+const LATENCY_EWMA_ALPHA = 0.2;
+
+// Routing state of a newly connected replica
+const INITIAL_REPLICA_STATE = {
+  healthy: true,
+  // Measured lag, and the primary time up to which the replica has every write
+  lagMs: 0,
+  caughtUpTo: 0,
+  // In-flight queries and latency EWMA, null until the first query
+  outstanding: 0,
+  latencyEwmaMs: null,
+};
 
 class DatabaseReplication {
   constructor() {
     this.primary = null;
+    this.primaryStatements = null;
     this.replicas = [];
     this.isSQLite = true;
     this.currentReplicaIndex = 0;
     this.replicaHealthStatus = new Map();
     this.enabled = false;
+    // Time of each user's last write, oldest first (see recordWrite)
+    this.userWrites = new Map();
+    // Set while running code that must not read from replicas (see readFromPrimary)
+    this.primaryReads = new AsyncLocalStorage();
   }
 
   /**
@@ -40,9 +82,12 @@ class DatabaseReplication {
    *
    * For SQLite:
    * - SQLITE_REPLICA_PATHS: Comma-separated list of replica database paths
+   *
+   * primaryStatements is the primary's SQLite statement cache, shared with Database.
    */
-  async initialize(primaryConnection, isSQLite = true) {
+  async initialize(primaryConnection, isSQLite = true, primaryStatements = null) {
     this.primary = primaryConnection;
+    this.primaryStatements = primaryStatements;
     this.isSQLite = isSQLite;
 
     // Check if replication is enabled
@@ -108,9 +153,11 @@ class DatabaseReplication {
 
         this.replicas.push({
           connection: replica,
+          statements: new StatementCache(replica, 'replica', DB_STATEMENT_CACHE_SIZE),
           path: resolvedPath,
+          name: resolvedPath,
           type: 'sqlite',
-          healthy: true,
+          ...INITIAL_REPLICA_STATE,
         });
 
         logger.info(`   ✓ Connected to SQLite replica: ${resolvedPath}`);
@@ -149,7 +196,6 @@ class DatabaseReplication {
           password,
           database,
           waitForConnections: true,
-          connectionLimit: 5, // Fewer connections per replica
           queueLimit: 0,
         };
 
@@ -167,7 +213,15 @@ class DatabaseReplication {
           config.ssl = { rejectUnauthorized: true };
         }
 
-        const pool = await mysql.createPool(config);
+        // Fewer connections per replica; adaptive sizing as configured for the primary
+        const pool = new MonitoredPool(mysql, config, {
+          name: `${host}:${port}`,
+          minSize: MYSQL_POOL.MIN_SIZE,
+          maxSize: MYSQL_POOL.REPLICA_SIZE,
+          adaptive: MYSQL_POOL.ADAPTIVE,
+          adaptInterval: MYSQL_POOL.ADAPT_INTERVAL,
+          growWait: MYSQL_POOL.GROW_WAIT,
+        });
 
         // Test connection
         const connection = await pool.getConnection();
@@ -177,8 +231,9 @@ class DatabaseReplication {
           connection: pool,
           host,
           port,
+          name: `${host}:${port}`,
           type: 'mysql',
-          healthy: true,
+          ...INITIAL_REPLICA_STATE,
         });
 
         logger.info(`   ✓ Connected to MySQL replica: ${host}:${port}`);
@@ -190,83 +245,106 @@ class DatabaseReplication {
 
   /**
    * Execute a read query
-   * Routes to a healthy replica, falls back to primary if no replicas available
+   * Routes to the best replica that can serve it (see selectReplica), falls back to
+   * primary otherwise. options.maxStalenessMs bounds the replica lag the read tolerates.
+   */
+  async query(sql, params = [], options = {}) {
+    return this.read(sql, params, 'all', options);
+  }
+
+  /**
+   * Execute a read query that returns a single row
+   * Routes like query()
    */
-  async query(sql, params = []) {
+  async queryOne(sql, params = [], options = {}) {
+    return this.read(sql, params, 'one', options);
+  }
+
+  async read(sql, params, mode, { maxStalenessMs } = {}) {
+    const readPrimary = () =>
+      mode === 'one' ? this.queryOnePrimary(sql, params) : this.queryPrimary(sql, params);
+
     // If replication is not enabled or no healthy replicas, use primary
-    if (!this.enabled || !this.hasHealthyReplicas()) {
-      return this.queryPrimary(sql, params);
+    const healthy = this.enabled ? this.replicas.filter((r) => this.isHealthy(r)) : [];
+    if (healthy.length === 0) {
+      metrics?.recordReadRouting('primary', 'unavailable');
+      return readPrimary();
     }
 
-    // Try to use a replica with round-robin load balancing
-    const replica = this.getNextHealthyReplica();
-    if (!replica) {
-      logger.warn('⚠️  No healthy replicas available, falling back to primary');
-      return this.queryPrimary(sql, params);
+    // After a write, only replicas that have the request's and user's last write qualify
+    const lastWriteAt = this.getLastWriteAt();
+    const caughtUp = healthy.filter((r) => this.canServe(r, lastWriteAt));
+    if (caughtUp.length === 0) {
+      metrics?.recordReadRouting('primary', 'read_your_writes');
+      return readPrimary();
     }
 
+    const candidates =
+      maxStalenessMs === undefined
+        ? caughtUp
+        : caughtUp.filter((r) => r.lagMs <= maxStalenessMs);
+    if (candidates.length === 0) {
+      metrics?.recordReadRouting('primary', 'staleness');
+      return readPrimary();
+    }
+
+    const replica = this.selectReplica(candidates);
+    metrics?.recordReadRouting('replica', 'balanced');
+    metrics?.recordReplicaSelection(replica.name);
+
     try {
-      if (this.isSQLite) {
-        return replica.connection.prepare(sql).all(...params);
-      } else {
-        const [rows] = await replica.connection.execute(sql, params);
-        return rows;
-      }
+      return await this.queryReplica(replica, sql, params, mode);
     } catch (error) {
       logger.error(
-        `⚠️  Replica query failed (${replica.host || replica.path}), falling back to primary:`,
+        `⚠️  Replica query failed (${replica.name}), falling back to primary:`,
         error.message,
       );
       // Mark replica as unhealthy
       this.replicaHealthStatus.set(replica, false);
+      metrics?.recordReadRouting('primary', 'replica_error');
       // Fallback to primary
-      return this.queryPrimary(sql, params);
+      return readPrimary();
     }
   }
 
   /**
-   * Execute a read query that returns a single row
-   * Routes to a healthy replica, falls back to primary if no replicas available
+   * Run a read on replica, tracking in-flight queries and latency
+   * @param {string} mode - 'all' for every row, 'one' for the first row
    */
-  async queryOne(sql, params = []) {
-    // If replication is not enabled or no healthy replicas, use primary
-    if (!this.enabled || !this.hasHealthyReplicas()) {
-      return this.queryOnePrimary(sql, params);
-    }
-
-    // Try to use a replica with round-robin load balancing
-    const replica = this.getNextHealthyReplica();
-    if (!replica) {
-      logger.warn('⚠️  No healthy replicas available, falling back to primary');
-      return this.queryOnePrimary(sql, params);
-    }
-
+  async queryReplica(replica, sql, params, mode) {
+    const startTime = performance.now();
+    replica.outstanding++;
     try {
       if (this.isSQLite) {
-        return replica.connection.prepare(sql).get(...params);
-      } else {
-        const [rows] = await replica.connection.execute(sql, params);
-        return rows[0];
+        const statement = replica.statements.prepare(sql);
+        return mode === 'one' ? statement.get(...params) : statement.all(...params);
       }
-    } catch (error) {
-      logger.error(
-        `⚠️  Replica query failed (${replica.host || replica.path}), falling back to primary:`,
-        error.message,
-      );
-      // Mark replica as unhealthy
-      this.replicaHealthStatus.set(replica, false);
-      // Fallback to primary
-      return this.queryOnePrimary(sql, params);
+      const [rows] = await replica.connection.execute(sql, params);
+      return mode === 'one' ? rows[0] : rows;
+    } finally {
+      replica.outstanding--;
+      this.recordLatency(replica, performance.now() - startTime);
     }
   }
 
+  /**
+   * Fold a query duration into the replica's latency EWMA
+   */
+  recordLatency(replica, durationMs) {
+    replica.latencyEwmaMs =
+      replica.latencyEwmaMs === null
+        ? durationMs
+        : LATENCY_EWMA_ALPHA * durationMs + (1 - LATENCY_EWMA_ALPHA) * replica.latencyEwmaMs;
+    metrics?.recordReplicaLatency(replica.name, replica.latencyEwmaMs);
+  }
+
   /**
    * Execute a write query (INSERT, UPDATE, DELETE)
    * Always routes to primary database
    */
   async run(sql, params = []) {
     if (this.isSQLite) {
-      const result = this.primary.prepare(sql).run(...params);
+      const result = this.primaryStatements.prepare(sql).run(...params);
       return { insertId: result.lastInsertRowid, affectedRows: result.changes };
     } else {
       const [result] = await this.primary.execute(sql, params);
@@ -279,7 +357,7 @@ class DatabaseReplication {
    */
   async queryPrimary(sql, params = []) {
     if (this.isSQLite) {
-      return this.primary.prepare(sql).all(...params);
+      return this.primaryStatements.prepare(sql).all(...params);
     } else {
       const [rows] = await this.primary.execute(sql, params);
       return rows;
@@ -291,7 +369,7 @@ class DatabaseReplication {
    */
   async queryOnePrimary(sql, params = []) {
     if (this.isSQLite) {
-      return this.primary.prepare(sql).get(...params);
+      return this.primaryStatements.prepare(sql).get(...params);
     } else {
       const [rows] = await this.primary.execute(sql, params);
       return rows[0];
@@ -299,109 +377,244 @@ class DatabaseReplication {
   }
 
   /**
-   * Get the next healthy replica using round-robin
+   * Remember a write to the primary for the current request and its user.
+   * Until a replica has caught up, their reads go to the primary (read-your-writes).
+   * User writes are tracked per process; requests without a context (background jobs)
+   * are not tracked.
    */
-  getNextHealthyReplica() {
-    if (this.replicas.length === 0) {
-      return null;
+  recordWrite() {
+    const context = getRequestContext();
+    if (!this.enabled || !context) {
+      return;
+    }
+
+    const now = Date.now();
+    context.lastWriteAt = now;
+    if (context.userId === undefined) {
+      return;
+    }
+
+    // Re-insert so the map stays ordered by write time, then drop expired entries
+    this.userWrites.delete(context.userId);
+    this.userWrites.set(context.userId, now);
+    for (const [userId, writtenAt] of this.userWrites) {
+      const expired = now - writtenAt >= DB_READ_YOUR_WRITES.WINDOW + this.getMaxLagMs();
+      if (!expired && this.userWrites.size <= DB_READ_YOUR_WRITES.MAX_USERS) break;
+      this.userWrites.delete(userId);
+    }
+  }
+
+  /**
+   * Run fn with every read it makes going to the primary (e.g. background jobs that
+   * read back rows they, or the requests that queued them, just wrote).
+   */
+  readFromPrimary(fn) {
+    return this.primaryReads.run(true, fn);
+  }
+
+  /**
+   * Time of the last write visible to the current request: its own or its user's.
+   * Returns 0 when there is none, Infinity inside readFromPrimary.
+   */
+  getLastWriteAt() {
+    if (this.primaryReads.getStore()) {
+      return Number.POSITIVE_INFINITY;
+    }
+    const context = getRequestContext();
+    if (!context) {
+      return 0;
     }
+    const userWriteAt = context.userId !== undefined ? this.userWrites.get(context.userId) : 0;
+    return Math.max(context.lastWriteAt ?? 0, userWriteAt ?? 0);
+  }
 
-    const _startIndex = this.currentReplicaIndex;
-    let attempts = 0;
+  /**
+   * Whether replica has the writes made up to lastWriteAt: either its last health check
+   * saw it caught up past that point, or the window plus its measured lag has passed.
+   */
+  canServe(replica, lastWriteAt) {
+    if (!lastWriteAt || replica.caughtUpTo >= lastWriteAt) {
+      return true;
+    }
+    return Date.now() - lastWriteAt >= DB_READ_YOUR_WRITES.WINDOW + replica.lagMs;
+  }
 
-    while (attempts < this.replicas.length) {
-      const replica = this.replicas[this.currentReplicaIndex];
-      this.currentReplicaIndex = (this.currentReplicaIndex + 1) % this.replicas.length;
-      attempts++;
+  /**
+   * Largest replica lag measured by the last health checks, in milliseconds
+   */
+  getMaxLagMs() {
+    return this.replicas.reduce((max, replica) => Math.max(max, replica.lagMs), 0);
+  }
 
-      if (replica.healthy && this.replicaHealthStatus.get(replica) !== false) {
-        return replica;
+  /**
+   * Pick the replica with the fewest in-flight queries, then the lowest latency EWMA.
+   * Scanning starts at a rotating offset so ties are spread round-robin; replicas
+   * without a latency sample yet are tried first.
+   */
+  selectReplica(candidates) {
+    const offset = this.currentReplicaIndex % candidates.length;
+    this.currentReplicaIndex = (this.currentReplicaIndex + 1) % this.replicas.length;
+
+    let best = null;
+    for (let i = 0; i < candidates.length; i++) {
+      const replica = candidates[(offset + i) % candidates.length];
+      if (
+        !best ||
+        replica.outstanding < best.outstanding ||
+        (replica.outstanding === best.outstanding &&
+          (replica.latencyEwmaMs ?? 0) < (best.latencyEwmaMs ?? 0))
+      ) {
+        best = replica;
       }
     }
+    return best;
+  }
 
-    return null;
+  /**
+   * Whether replica passed its last health check and has not failed a query since
+   */
+  isHealthy(replica) {
+    return replica.healthy && this.replicaHealthStatus.get(replica) !== false;
   }
 
   /**
    * Check if any healthy replicas are available
    */
   hasHealthyReplicas() {
-    return this.replicas.some((r) => r.healthy && this.replicaHealthStatus.get(r) !== false);
+    return this.replicas.some((r) => this.isHealthy(r));
   }
 
   /**
-   * Start periodic health checks for replicas
+   * Start the primary heartbeat and periodic health checks for replicas
    */
   startHealthChecks() {
-    // Check replica health every 30 seconds
+    this.heartbeatInterval = setInterval(() => {
+      this.writeHeartbeat();
+    }, DB_REPLICATION.HEARTBEAT_INTERVAL);
+    this.writeHeartbeat();
+
     this.healthCheckInterval = setInterval(() => {
       this.checkReplicaHealth();
-    }, 30000);
+    }, DB_REPLICATION.HEALTH_CHECK_INTERVAL);
 
     // Initial health check
     this.checkReplicaHealth();
   }
 
   /**
-   * Check health of all replicas
+   * Stamp the current time into the heartbeat row on the primary. Replicas return the
+   * last stamp they have applied, which is how far behind they are (see checkReplicaHealth).
+   */
+  async writeHeartbeat() {
+    const sql = 'UPDATE replication_heartbeat SET written_at = ? WHERE id = 1';
+    try {
+      if (this.isSQLite) {
+        // Never write into a transaction that is open on the shared connection
+        if (this.primary.inTransaction) return;
+        this.primaryStatements.prepare(sql).run(Date.now());
+      } else {
+        await this.primary.execute(sql, [Date.now()]);
+      }
+      this.heartbeatFailing = false;
+    } catch (error) {
+      // Expected until migrations have created the table; log once per failure streak
+      if (!this.heartbeatFailing) {
+        logger.warn('⚠️  Failed to write replication heartbeat:', error.message);
+      }
+      this.heartbeatFailing = true;
+    }
+  }
+
+  /**
+   * Read the heartbeat a replica has applied. Returns null when the replica has none
+   * yet (table not replicated or never written), after checking it still answers.
+   */
+  async readHeartbeat(replica) {
+    try {
+      const row = await this.queryReplica(
+        replica,
+        'SELECT written_at FROM replication_heartbeat WHERE id = 1',
+        [],
+        'one',
+      );
+      return Number(row?.written_at) || null;
+    } catch (_error) {
+      await this.queryReplica(replica, 'SELECT 1', [], 'one');
+      return null;
+    }
+  }
+
+  /**
+   * Check health of all replicas and measure their lag. The heartbeat read also keeps the
+   * latency EWMA of replicas that selectReplica is currently passing over up to date.
    */
   async checkReplicaHealth() {
     for (const replica of this.replicas) {
+      const checkedAt = Date.now();
       try {
-        if (this.isSQLite) {
-          // For SQLite, just try a simple query
-          replica.connection.prepare('SELECT 1').get();
-          replica.healthy = true;
-          this.replicaHealthStatus.set(replica, true);
-        } else {
-          // For MySQL, check connection and replica lag
-          const connection = await replica.connection.getConnection();
-
-          // Check if replica is running (use modern REPLICA terminology, fallback to SLAVE for older MySQL)
-          let status;
-          try {
-            [status] = await connection.execute('SHOW REPLICA STATUS');
-          } catch (_error) {
-            // Fallback to deprecated SLAVE syntax for MySQL < 8.0.22
-            [status] = await connection.execute('SHOW SLAVE STATUS');
-          }
-
-          if (status.length > 0) {
-            const replicaStatus = status[0];
-            // Check both modern and legacy field names for compatibility
-            const secondsBehind =
-              replicaStatus.Seconds_Behind_Source || replicaStatus.Seconds_Behind_Master;
-
-            // Consider replica unhealthy if lag is more than 30 seconds
-            if (secondsBehind !== null && secondsBehind <= 30) {
-              replica.healthy = true;
-              this.replicaHealthStatus.set(replica, true);
-            } else {
-              logger.warn(
-                `⚠️  Replica ${replica.host}:${replica.port} has high lag: ${secondsBehind}s`,
-              );
-              replica.healthy = false;
-              this.replicaHealthStatus.set(replica, false);
-            }
-          } else {
-            // No replication status, assume it's healthy (might be a regular read-only instance)
-            replica.healthy = true;
-            this.replicaHealthStatus.set(replica, true);
-          }
-
-          connection.release();
+        const writtenAt = await this.readHeartbeat(replica);
+        if (writtenAt) {
+          // The replica has every primary write up to the heartbeat it returned
+          replica.caughtUpTo = writtenAt;
+          replica.lagMs = Math.max(0, checkedAt - writtenAt);
+        } else if (!this.isSQLite) {
+          await this.checkMySQLReplicaStatus(replica, checkedAt);
+        }
+        // SQLite replicas without a heartbeat keep an unknown (0) lag
+
+        metrics?.recordReplicaLag(replica.name, replica.lagMs);
+        const healthy = replica.lagMs <= DB_REPLICATION.MAX_LAG;
+        if (!healthy) {
+          logger.warn(`⚠️  Replica ${replica.name} has high lag: ${replica.lagMs}ms`);
         }
+        replica.healthy = healthy;
+        this.replicaHealthStatus.set(replica, healthy);
       } catch (error) {
-        logger.error(
-          `⚠️  Health check failed for replica ${replica.host || replica.path}:`,
-          error.message,
-        );
+        logger.error(`⚠️  Health check failed for replica ${replica.name}:`, error.message);
         replica.healthy = false;
         this.replicaHealthStatus.set(replica, false);
       }
     }
   }
 
+  /**
+   * Measure lag from SHOW REPLICA STATUS, for MySQL replicas without a heartbeat.
+   * Throws when replication is not running.
+   */
+  async checkMySQLReplicaStatus(replica, checkedAt) {
+    const connection = await replica.connection.getConnection();
+    try {
+      // Check if replica is running (modern REPLICA terminology, SLAVE fallback for older MySQL)
+      let status;
+      try {
+        [status] = await connection.execute('SHOW REPLICA STATUS');
+      } catch (_error) {
+        // Fallback to deprecated SLAVE syntax for MySQL < 8.0.22
+        [status] = await connection.execute('SHOW SLAVE STATUS');
+      }
+
+      if (status.length === 0) {
+        // No replication status, assume it's current (might be a regular read-only instance)
+        replica.lagMs = 0;
+        replica.caughtUpTo = checkedAt;
+        return;
+      }
+
+      // Check both modern and legacy field names for compatibility
+      const secondsBehind = status[0].Seconds_Behind_Source ?? status[0].Seconds_Behind_Master;
+      if (secondsBehind === null || secondsBehind === undefined) {
+        throw new Error('replication is not running');
+      }
+
+      // Everything committed on the primary before checkedAt minus the lag is applied
+      // (lag is reported in whole seconds, so allow one more)
+      replica.lagMs = (secondsBehind + 1) * 1000;
+      replica.caughtUpTo = checkedAt - replica.lagMs;
+    } finally {
+      connection.release();
+    }
+  }
+
   /**
    * Get replication status
    */
@@ -419,8 +632,11 @@ class DatabaseReplication {
       healthyReplicas: this.replicas.filter((r) => r.healthy).length,
       replicas: this.replicas.map((r) => ({
         type: r.type,
-        location: r.host ? `${r.host}:${r.port}` : r.path,
+        location: r.name,
         healthy: r.healthy,
+        lagMs: r.lagMs,
+        latencyMs: r.latencyEwmaMs,
+        outstanding: r.outstanding,
       })),
     };
   }
@@ -439,10 +655,14 @@ class DatabaseReplication {
     if (this.healthCheckInterval) {
       clearInterval(this.healthCheckInterval);
     }
+    if (this.heartbeatInterval) {
+      clearInterval(this.heartbeatInterval);
+    }
 
     for (const replica of this.replicas) {
       try {
         if (this.isSQLite) {
+          replica.statements.clear();
           replica.connection.close();
         } else {
           await replica.connection.end();
@@ -453,6 +673,7 @@ class DatabaseReplication {
     }
 
     this.replicas = [];
+    this.userWrites.clear();
     this.enabled = false;
   }
 }
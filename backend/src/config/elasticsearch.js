@@ -86,70 +86,162 @@ class ElasticsearchService {
 
   /**
    * Initialize notes index with mappings.
+   * `indexName` is an alias over a versioned index so the index can be rebuilt and
+   * swapped in without downtime (see scripts/reindex_search.js). Deployments created
+   * before that keep their concrete index until the first reindex replaces it.
    */
   async initializeIndex() {
     if (!this.enabled || !this.client) return;
 
     try {
-      // Check if index exists
+      // Check if index exists (true for both the alias and a legacy concrete index)
       const exists = await this.client.indices.exists({
         index: this.indexName,
       });
 
       if (!exists) {
-        // Create index with mappings
-        await this.client.indices.create({
-          index: this.indexName,
-          body: {
-            settings: {
-              number_of_shards: 1,
-              // Set replicas to 0 for single-node development, 1+ for production
-              number_of_replicas:
-                process.env.NODE_ENV === 'production'
-                  ? ELASTICSEARCH.REPLICAS_PROD
-                  : ELASTICSEARCH.REPLICAS_DEV,
-              analysis: {
-                analyzer: {
-                  note_analyzer: {
-                    type: 'standard',
-                    stopwords: '_english_',
-                  },
-                },
-              },
-            },
-            mappings: {
-              properties: {
-                id: { type: 'integer' },
-                title: {
-                  type: 'text',
-                  analyzer: 'note_analyzer',
-                  fields: {
-                    keyword: { type: 'keyword' },
-                  },
-                },
-                body: {
-                  type: 'text',
-                  analyzer: 'note_analyzer',
-                },
-                owner_id: { type: 'integer' },
-                tags: { type: 'keyword' },
-                pinned: { type: 'boolean' },
-                archived: { type: 'boolean' },
-                favorite: { type: 'boolean' },
-                created_at: { type: 'date' },
-                updated_at: { type: 'date' },
-              },
-            },
-          },
+        const index = await this.createVersionedIndex();
+        await this.client.indices.updateAliases({
+          body: { actions: [{ add: { index, alias: this.indexName } }] },
         });
 
-        logger.info(`✅ Created Elasticsearch index: ${this.indexName}`);
+        logger.info(`✅ Created Elasticsearch index: ${index} (alias ${this.indexName})`);
       }
     } catch (error) {
       logger.error('Elasticsearch index initialization error:', error.message);
     }
   }
 
+  /**
+   * Settings and mappings for a notes index.
+   */
+  getIndexDefinition() {
+    return {
+      settings: {
+        number_of_shards: 1,
+        // Set replicas to 0 for single-node development, 1+ for production
+        number_of_replicas:
+          process.env.NODE_ENV === 'production'
+            ? ELASTICSEARCH.REPLICAS_PROD
+            : ELASTICSEARCH.REPLICAS_DEV,
+        analysis: {
+          analyzer: {
+            note_analyzer: {
+              type: 'standard',
+              stopwords: '_english_',
+            },
+          },
+        },
+      },
+      mappings: {
+        properties: {
+          id: { type: 'integer' },
+          title: {
+            type: 'text',
+            analyzer: 'note_analyzer',
+            fields: {
+              keyword: { type: 'keyword' },
+            },
+          },
+          body: {
+            type: 'text',
+            analyzer: 'note_analyzer',
+          },
+          owner_id: { type: 'integer' },
+          tags: { type: 'keyword' },
+          pinned: { type: 'boolean' },
+          archived: { type: 'boolean' },
+          favorite: { type: 'boolean' },
+          created_at: { type: 'date' },
+          updated_at: { type: 'date' },
+        },
+      },
+    };
+  }
+
+  /**
+   * Create a new timestamped notes index (not yet behind the alias) and return its name.
+   * @param {object} settingsOverrides - Extra index settings, e.g. for bulk loading
+   */
+  async createVersionedIndex(settingsOverrides = {}) {
+    const index = `${this.indexName}-${Date.now()}`;
+    const definition = this.getIndexDefinition();
+
+    await this.client.indices.create({
+      index,
+      body: {
+        ...definition,
+        settings: { ...definition.settings, ...settingsOverrides },
+      },
+    });
+
+    return index;
+  }
+
+  /**
+   * Names of the indices currently behind the alias, or of the legacy concrete index.
+   */
+  async getAliasedIndices() {
+    const isAlias = await this.client.indices.existsAlias({ name: this.indexName });
+    if (!isAlias) {
+      const exists = await this.client.indices.exists({ index: this.indexName });
+      return exists ? [this.indexName] : [];
+    }
+
+    const response = await this.client.indices.getAlias({ name: this.indexName });
+    return Object.keys(response);
+  }
+
+  /**
+   * Atomically point the alias at `index`, detaching whatever it pointed at before.
+   * A legacy concrete index with the alias name is deleted in the same request, since
+   * an alias cannot share its name. Returns the indices that were detached.
+   */
+  async swapAlias(index) {
+    const previous = (await this.getAliasedIndices()).filter((name) => name !== index);
+    const actions = previous.map((name) =>
+      name === this.indexName
+        ? { remove_index: { index: name } }
+        : { remove: { index: name, alias: this.indexName } },
+    );
+    actions.push({ add: { index, alias: this.indexName } });
+
+    await this.client.indices.updateAliases({ body: { actions } });
+
+    return previous.filter((name) => name !== this.indexName);
+  }
+
+  /**
+   * Restore refresh and replica settings on an index created for bulk loading, then refresh it.
+   */
+  async finishBulkLoad(index) {
+    const { settings } = this.getIndexDefinition();
+
+    await this.client.indices.putSettings({
+      index,
+      body: { index: { refresh_interval: null, number_of_replicas: settings.number_of_replicas } },
+    });
+    await this.client.indices.refresh({ index });
+  }
+
+  /**
+   * Note IDs stored in an index, in ascending order, starting after `afterId`.
+   */
+  async getIndexedNoteIds(index, afterId, size) {
+    const response = await this.client.search({
+      index,
+      body: {
+        query: { match_all: {} },
+        sort: [{ id: { order: 'asc' } }],
+        ...(afterId ? { search_after: [afterId] } : {}),
+        size,
+        _source: false,
+      },
+    });
+
+    return response.hits.hits.map((hit) => Number(hit._id));
+  }
+
   /**
    * Index a note document.
    */
@@ -206,6 +298,7 @@ class ElasticsearchService {
 
   /**
    * Search notes with full-text search.
+   * Pass the `sort` values of the last hit as `searchAfter` to fetch the next page.
    */
   async searchNotes(userId, query, options = {}) {
     if (!this.enabled || !this.client) return null;
@@ -214,7 +307,14 @@ class ElasticsearchService {
     let success = true;
 
     try {
-      const { archived = false, favorite = null, tags = null, limit = 20, offset = 0 } = options;
+      const {
+        archived = false,
+        favorite = null,
+        tags = null,
+        limit = 20,
+        offset = 0,
+        searchAfter = null,
+      } = options;
 
       // Build search query
       const must = [{ term: { owner_id: userId } }, { term: { archived } }];
@@ -253,8 +353,9 @@ class ElasticsearchService {
             { pinned: { order: 'desc' } },
             { _score: { order: 'desc' } },
             { updated_at: { order: 'desc' } },
+            { id: { order: 'desc' } },
           ],
-          from: offset,
+          ...(searchAfter ? { search_after: searchAfter } : { from: offset }),
           size: limit,
           _source: [
             'id',
@@ -275,6 +376,7 @@ class ElasticsearchService {
         notes: response.hits.hits.map((hit) => ({
           ...hit._source,
           score: hit._score,
+          sort: hit.sort,
         })),
       };
     } catch (error) {
@@ -292,12 +394,12 @@ class ElasticsearchService {
   /**
    * Bulk index multiple notes.
    */
-  async bulkIndexNotes(notes) {
+  async bulkIndexNotes(notes, index = this.indexName) {
     if (!this.enabled || !this.client || notes.length === 0) return false;
 
     try {
       const body = notes.flatMap((note) => [
-        { index: { _index: this.indexName, _id: note.id.toString() } },
+        { index: { _index: index, _id: note.id.toString() } },
         {
           id: note.id,
           title: note.title || '',
@@ -312,18 +414,54 @@ class ElasticsearchService {
         },
       ]);
 
-      await this.client.bulk({
+      const response = await this.client.bulk({
         body,
         refresh: ELASTICSEARCH.BULK_REFRESH_STRATEGY,
       });
 
-      return true;
+      return this.checkBulkResponse(response, 'index');
     } catch (error) {
       logger.error('Elasticsearch bulk index error:', error.message);
       return false;
     }
   }
 
+  /**
+   * Bulk delete notes by ID. Notes already missing from the index count as deleted.
+   */
+  async bulkDeleteNotes(noteIds, index = this.indexName) {
+    if (!this.enabled || !this.client || noteIds.length === 0) return false;
+
+    try {
+      const response = await this.client.bulk({
+        body: noteIds.map((id) => ({ delete: { _index: index, _id: id.toString() } })),
+        refresh: ELASTICSEARCH.BULK_REFRESH_STRATEGY,
+      });
+
+      return this.checkBulkResponse(response, 'delete');
+    } catch (error) {
+      logger.error('Elasticsearch bulk delete error:', error.message);
+      return false;
+    }
+  }
+
+  /**
+   * A bulk request succeeds as a whole even when single items fail; report those.
+   */
+  checkBulkResponse(response, action) {
+    if (!response.errors) return true;
+
+    const failed = response.items
+      .map((item) => item[action])
+      .filter((result) => result.error && !(action === 'delete' && result.status === 404));
+    if (failed.length === 0) return true;
+
+    logger.error(`Elasticsearch bulk ${action} failed for ${failed.length} item(s):`, {
+      reason: failed[0].error.reason,
+    });
+    return false;
+  }
+
   /**
    * Check if Elasticsearch is enabled.
    */
@@ -331,6 +469,14 @@ class ElasticsearchService {
     return this.enabled;
   }
 
+  /**
+   * Check if Elasticsearch is configured (ELASTICSEARCH_NODE is set), whether or not
+   * it is reachable right now.
+   */
+  isConfigured() {
+    return Boolean(process.env.ELASTICSEARCH_NODE);
+  }
+
   /**
    * Close Elasticsearch connection.
    */
@@ -0,0 +1,83 @@
+/**
+ * In-process LRU cache used as the L1 tier in front of Redis.
+ * Bounded by entry count and approximate serialized size in bytes.
+ *
+ * Values are stored as parsed objects and shared between callers,
+ * so cached values must be treated as immutable.
+ */
+
+export default class LocalCache {
+  constructor({ maxEntries = 5000, maxBytes = 32 * 1024 * 1024 } = {}) {
+    this.maxEntries = maxEntries;
+    this.maxBytes = maxBytes;
+    this.bytes = 0;
+    // Map preserves insertion order, so the first key is the least recently used
+    this.entries = new Map();
+  }
+
+  /**
+   * Get a value. Returns undefined on a miss or when the entry has expired.
+   */
+  get(key) {
+    const entry = this.entries.get(key);
+    if (!entry) return undefined;
+
+    if (entry.expiresAt <= Date.now()) {
+      this.delete(key);
+      return undefined;
+    }
+
+    // Mark as most recently used
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    return entry.value;
+  }
+
+  /**
+   * Store a value for ttl seconds. size is the entry's approximate byte size.
+   * Entries larger than a quarter of the byte budget are not cached.
+   */
+  set(key, value, ttl, size) {
+    this.delete(key);
+    if (size > this.maxBytes / 4) return false;
+
+    this.entries.set(key, { value, size, expiresAt: Date.now() + ttl * 1000 });
+    this.bytes += size;
+
+    while (this.entries.size > this.maxEntries || this.bytes > this.maxBytes) {
+      this.delete(this.entries.keys().next().value);
+    }
+    return true;
+  }
+
+  /**
+   * Remove a value.
+   */
+  delete(key) {
+    const entry = this.entries.get(key);
+    if (!entry) return false;
+    this.entries.delete(key);
+    this.bytes -= entry.size;
+    return true;
+  }
+
+  /**
+   * Remove all values.
+   */
+  clear() {
+    this.entries.clear();
+    this.bytes = 0;
+  }
+
+  /**
+   * Current size of the cache.
+   */
+  getStats() {
+    return {
+      entries: this.entries.size,
+      bytes: this.bytes,
+      maxEntries: this.maxEntries,
+      maxBytes: this.maxBytes,
+    };
+  }
+}
@@ -12,8 +12,30 @@
  * - Easy to add new migrations
  */
 
+import {
+  COUNTER_TABLES,
+  counterRefreshSql,
+  counterSchemaStatements,
+  counterTriggerStatements,
+  statSchemaStatements,
+  statTriggerStatements,
+} from './counters.js';
 import logger from './logger.js';
 
+// Every (ancestor, descendant, depth) of the folders tree, walking down parent_id links.
+// The depth bound stops the walk should existing data contain a cycle.
+const FOLDER_CLOSURE_BACKFILL = `
+  WITH RECURSIVE tree (ancestor_id, descendant_id, depth) AS (
+    SELECT id, id, 0 FROM folders
+    UNION ALL
+    SELECT tree.ancestor_id, f.id, tree.depth + 1
+    FROM tree
+    JOIN folders f ON f.parent_id = tree.descendant_id
+    WHERE tree.depth < 100
+  )
+  SELECT ancestor_id, descendant_id, depth FROM tree
+`;
+
 /**
  * Migration registry - add new migrations here
  * Each migration should be idempotent and include:
@@ -656,6 +678,344 @@ const MIGRATIONS = [
       logger.info('  ✅ Chat features migration completed');
     },
   },
+  {
+    id: '010_add_note_tag_tag_index',
+    description: 'Index note_tag by tag_id for incremental orphan tag cleanup',
+    async sqlite(db) {
+      db.exec('CREATE INDEX IF NOT EXISTS ix_note_tag_tag ON note_tag(tag_id)');
+    },
+    async mysql(_db) {
+      // InnoDB already indexes note_tag.tag_id for its foreign key
+    },
+  },
+  {
+    id: '011_add_note_render_columns',
+    description: 'Store precomputed excerpt and rendered HTML on notes',
+    async sqlite(db) {
+      const columns = db.prepare('PRAGMA table_info(notes)').all();
+
+      if (!columns.some((col) => col.name === 'excerpt')) {
+        logger.info('  🔄 Adding excerpt column to notes table...');
+        db.exec('ALTER TABLE notes ADD COLUMN excerpt TEXT');
+      }
+      if (!columns.some((col) => col.name === 'body_html')) {
+        logger.info('  🔄 Adding body_html column to notes table...');
+        db.exec('ALTER TABLE notes ADD COLUMN body_html TEXT');
+      }
+
+      // Existing notes are rendered on read until `npm run backfill:render` fills them in
+      logger.info('  ✅ Note render columns added');
+    },
+    async mysql(db) {
+      const database = process.env.MYSQL_DATABASE || 'notehub';
+      const [columns] = await db.query(
+        `SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS
+         WHERE TABLE_SCHEMA = ? AND TABLE_NAME = 'notes'`,
+        [database],
+      );
+      const columnNames = columns.map((c) => c.COLUMN_NAME);
+
+      if (!columnNames.includes('excerpt')) {
+        logger.info('  🔄 Adding excerpt column to notes table...');
+        await db.query('ALTER TABLE notes ADD COLUMN excerpt TEXT');
+      }
+      if (!columnNames.includes('body_html')) {
+        logger.info('  🔄 Adding body_html column to notes table...');
+        await db.query('ALTER TABLE notes ADD COLUMN body_html MEDIUMTEXT');
+      }
+
+      logger.info('  ✅ Note render columns added');
+    },
+  },
+  {
+    id: '012_add_notes_fts',
+    description: 'Add FTS5 full-text index for notes (SQLite)',
+    async sqlite(db) {
+      try {
+        db.exec(`
+          CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+            title,
+            body,
+            content='notes',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+          )
+        `);
+      } catch (error) {
+        // Search falls back to LIKE when the SQLite build lacks FTS5
+        logger.warn(`  ⚠️  FTS5 unavailable, skipping notes full-text index: ${error.message}`);
+        return;
+      }
+
+      // Keep the external-content index in sync with the notes table
+      db.exec(`
+        CREATE TRIGGER IF NOT EXISTS notes_fts_insert AFTER INSERT ON notes BEGIN
+          INSERT INTO notes_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+        END;
+        CREATE TRIGGER IF NOT EXISTS notes_fts_delete AFTER DELETE ON notes BEGIN
+          INSERT INTO notes_fts(notes_fts, rowid, title, body)
+          VALUES ('delete', old.id, old.title, old.body);
+        END;
+        CREATE TRIGGER IF NOT EXISTS notes_fts_update AFTER UPDATE OF title, body ON notes BEGIN
+          INSERT INTO notes_fts(notes_fts, rowid, title, body)
+          VALUES ('delete', old.id, old.title, old.body);
+          INSERT INTO notes_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+        END;
+      `);
+
+      // Default ORDER BY rank to BM25 with titles weighted 2x, matching Elasticsearch
+      db.exec(`INSERT INTO notes_fts(notes_fts, rank) VALUES ('rank', 'bm25(2.0, 1.0)')`);
+
+      logger.info('  🔄 Building notes full-text index...');
+      db.exec(`INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')`);
+      logger.info('  ✅ Notes full-text index built');
+    },
+    async mysql(_db) {
+      // MySQL keeps using Elasticsearch or the LIKE fallback
+    },
+  },
+  {
+    id: '013_add_search_outbox',
+    description: 'Add search_outbox table for asynchronous Elasticsearch indexing',
+    async sqlite(db) {
+      // One row per note; no foreign key so pending deletes outlive the note
+      db.exec(`
+        CREATE TABLE IF NOT EXISTS search_outbox (
+          note_id INTEGER PRIMARY KEY,
+          operation TEXT NOT NULL,
+          version INTEGER NOT NULL DEFAULT 1,
+          attempts INTEGER NOT NULL DEFAULT 0,
+          available_at INTEGER NOT NULL,
+          enqueued_at INTEGER NOT NULL,
+          last_error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS ix_search_outbox_available ON search_outbox(available_at);
+      `);
+      logger.info('  ✅ Search outbox table created');
+    },
+    async mysql(db) {
+      await db.query(`
+        CREATE TABLE IF NOT EXISTS search_outbox (
+          note_id INT PRIMARY KEY,
+          operation VARCHAR(10) NOT NULL,
+          version INT NOT NULL DEFAULT 1,
+          attempts INT NOT NULL DEFAULT 0,
+          available_at BIGINT NOT NULL,
+          enqueued_at BIGINT NOT NULL,
+          last_error TEXT,
+          INDEX ix_search_outbox_available (available_at)
+        )
+      `);
+      logger.info('  ✅ Search outbox table created');
+    },
+  },
+  {
+    id: '014_add_replication_heartbeat',
+    description: 'Add replication_heartbeat table for measuring replica lag',
+    async sqlite(db) {
+      // Single row rewritten on the primary; its value on a replica shows how far it lags
+      db.exec(`
+        CREATE TABLE IF NOT EXISTS replication_heartbeat (
+          id INTEGER PRIMARY KEY,
+          written_at INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO replication_heartbeat (id, written_at) VALUES (1, 0);
+      `);
+      logger.info('  ✅ Replication heartbeat table created');
+    },
+    async mysql(db) {
+      await db.query(`
+        CREATE TABLE IF NOT EXISTS replication_heartbeat (
+          id INT PRIMARY KEY,
+          written_at BIGINT NOT NULL
+        )
+      `);
+      await db.query(`INSERT IGNORE INTO replication_heartbeat (id, written_at) VALUES (1, 0)`);
+      logger.info('  ✅ Replication heartbeat table created');
+    },
+  },
+  {
+    id: '015_add_folder_closure',
+    description: 'Add folder_closure table for single-query subtree, path and cycle checks',
+    async sqlite(db) {
+      // One row per (ancestor, descendant) pair, including each folder with itself at depth 0
+      db.exec(`
+        CREATE TABLE IF NOT EXISTS folder_closure (
+          ancestor_id INTEGER NOT NULL,
+          descendant_id INTEGER NOT NULL,
+          depth INTEGER NOT NULL,
+          PRIMARY KEY (ancestor_id, descendant_id),
+          FOREIGN KEY (ancestor_id) REFERENCES folders(id) ON DELETE CASCADE,
+          FOREIGN KEY (descendant_id) REFERENCES folders(id) ON DELETE CASCADE
+        );
+        CREATE INDEX IF NOT EXISTS idx_folder_closure_descendant
+          ON folder_closure(descendant_id, depth);
+      `);
+      db.exec(
+        `INSERT OR IGNORE INTO folder_closure (ancestor_id, descendant_id, depth) ${FOLDER_CLOSURE_BACKFILL}`,
+      );
+      logger.info('  ✅ Folder closure table created and backfilled');
+    },
+    async mysql(db) {
+      await db.query(`
+        CREATE TABLE IF NOT EXISTS folder_closure (
+          ancestor_id INT NOT NULL,
+          descendant_id INT NOT NULL,
+          depth INT NOT NULL,
+          PRIMARY KEY (ancestor_id, descendant_id),
+          INDEX idx_folder_closure_descendant (descendant_id, depth),
+          FOREIGN KEY (ancestor_id) REFERENCES folders(id) ON DELETE CASCADE,
+          FOREIGN KEY (descendant_id) REFERENCES folders(id) ON DELETE CASCADE
+        )
+      `);
+      await db.query(
+        `INSERT IGNORE INTO folder_closure (ancestor_id, descendant_id, depth) ${FOLDER_CLOSURE_BACKFILL}`,
+      );
+      logger.info('  ✅ Folder closure table created and backfilled');
+    },
+  },
+  {
+    id: '016_add_counters',
+    description: 'Add trigger-maintained user_counters and folder_counters tables',
+    async sqlite(db) {
+      const statements = [...counterSchemaStatements(true), ...counterTriggerStatements(true)];
+      for (const statement of statements) {
+        db.exec(statement);
+      }
+      for (const [table, { key, parent }] of Object.entries(COUNTER_TABLES)) {
+        db.exec(`INSERT OR IGNORE INTO ${table} (${key}) SELECT id FROM ${parent}`);
+        db.exec(counterRefreshSql(table));
+      }
+      logger.info('  ✅ Counter tables and triggers created and backfilled');
+    },
+    async mysql(db) {
+      for (const statement of counterSchemaStatements(false)) {
+        await db.query(statement);
+      }
+      // With binary logging, creating triggers needs SUPER or log_bin_trust_function_creators.
+      // Without them the counters are computed on read instead (see services/counterService.js).
+      try {
+        for (const statement of counterTriggerStatements(false)) {
+          await db.query(statement);
+        }
+      } catch (error) {
+        logger.warn('  ⚠️  Could not create counter triggers, counters will be computed on read', {
+          error: error.message,
+        });
+      }
+      for (const [table, { key, parent }] of Object.entries(COUNTER_TABLES)) {
+        await db.query(`INSERT IGNORE INTO ${table} (${key}) SELECT id FROM ${parent}`);
+        await db.query(counterRefreshSql(table));
+      }
+      logger.info('  ✅ Counter tables created and backfilled');
+    },
+  },
+  {
+    id: '017_add_app_stats',
+    description: 'Add trigger-maintained app_stats table for the application gauges',
+    async sqlite(db) {
+      for (const statement of [...statSchemaStatements(true), ...statTriggerStatements(true)]) {
+        db.exec(statement);
+      }
+      logger.info('  ✅ app_stats table and triggers created and backfilled');
+    },
+    async mysql(db) {
+      for (const statement of statSchemaStatements(false)) {
+        await db.query(statement);
+      }
+      // Same privilege caveat as the counter triggers in 016_add_counters
+      try {
+        for (const statement of statTriggerStatements(false)) {
+          await db.query(statement);
+        }
+      } catch (error) {
+        logger.warn('  ⚠️  Could not create app_stats triggers, stats will be computed on read', {
+          error: error.message,
+        });
+      }
+      logger.info('  ✅ app_stats table created and backfilled');
+    },
+  },
+  {
+    id: '018_add_search_outbox_claims',
+    description: 'Add claim columns to search_outbox so one worker owns an entry at a time',
+    async sqlite(db) {
+      const columns = db.prepare('PRAGMA table_info(search_outbox)').all();
+
+      if (!columns.some((col) => col.name === 'claimed_by')) {
+        db.exec('ALTER TABLE search_outbox ADD COLUMN claimed_by TEXT');
+      }
+      if (!columns.some((col) => col.name === 'claimed_until')) {
+        db.exec('ALTER TABLE search_outbox ADD COLUMN claimed_until INTEGER');
+      }
+      logger.info('  ✅ Search outbox claim columns added');
+    },
+    async mysql(db) {
+      const database = process.env.MYSQL_DATABASE || 'notehub';
+      const [columns] = await db.query(
+        `SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS
+         WHERE TABLE_SCHEMA = ? AND TABLE_NAME = 'search_outbox'`,
+        [database],
+      );
+      const columnNames = columns.map((c) => c.COLUMN_NAME);
+
+      if (!columnNames.includes('claimed_by')) {
+        await db.query('ALTER TABLE search_outbox ADD COLUMN claimed_by VARCHAR(36)');
+      }
+      if (!columnNames.includes('claimed_until')) {
+        await db.query('ALTER TABLE search_outbox ADD COLUMN claimed_until BIGINT');
+      }
+      logger.info('  ✅ Search outbox claim columns added');
+    },
+  },
+  {
+    id: '019_add_folder_favorite_counter',
+    description: 'Add favorite_notes to folder_counters',
+    async sqlite(db) {
+      const columns = db.prepare('PRAGMA table_info(folder_counters)').all();
+
+      if (!columns.some((col) => col.name === 'favorite_notes')) {
+        db.exec('ALTER TABLE folder_counters ADD COLUMN favorite_notes INTEGER NOT NULL DEFAULT 0');
+      }
+      // SQLite triggers are created IF NOT EXISTS, so drop the notes ones to pick up the column
+      for (const event of ['insert', 'delete', 'update']) {
+        db.exec(`DROP TRIGGER IF EXISTS notes_counters_${event}`);
+      }
+      for (const statement of counterTriggerStatements(true)) {
+        db.exec(statement);
+      }
+      db.exec(counterRefreshSql('folder_counters'));
+      logger.info('  ✅ Folder favorite counter added and backfilled');
+    },
+    async mysql(db) {
+      const database = process.env.MYSQL_DATABASE || 'notehub';
+      const [columns] = await db.query(
+        `SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS
+         WHERE TABLE_SCHEMA = ? AND TABLE_NAME = 'folder_counters'`,
+        [database],
+      );
+      const columnNames = columns.map((c) => c.COLUMN_NAME);
+
+      if (!columnNames.includes('favorite_notes')) {
+        await db.query(
+          'ALTER TABLE folder_counters ADD COLUMN favorite_notes INT NOT NULL DEFAULT 0',
+        );
+      }
+      // Same privilege caveat as the counter triggers in 016_add_counters
+      try {
+        for (const statement of counterTriggerStatements(false)) {
+          await db.query(statement);
+        }
+      } catch (error) {
+        logger.warn('  ⚠️  Could not create counter triggers, counters will be computed on read', {
+          error: error.message,
+        });
+      }
+      await db.query(counterRefreshSql('folder_counters'));
+      logger.info('  ✅ Folder favorite counter added and backfilled');
+    },
+  },
 ];
 
 /**
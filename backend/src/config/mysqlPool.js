@@ -0,0 +1,223 @@
+/**
+ * Instrumented, optionally adaptive wrapper around a mysql2 promise pool.
+ *
+ * mysql2 has no public API for active/idle/queued connection counts, so the wrapper
+ * admits callers itself: at most `limit` connections are checked out at once and the
+ * rest wait in a FIFO queue. That gives exact counts and acquire-wait times, and lets
+ * the limit change at runtime. The underlying pool is created with connectionLimit set
+ * to the upper bound; connections returned while more are open than the limit allows
+ * are closed instead of kept idle.
+ *
+ * With adaptive sizing the limit starts at the lower bound and, every adaptInterval,
+ * grows by a quarter when more than 5% of acquisitions waited longer than growWait ms,
+ * or shrinks by one when nobody waited and fewer connections were in use than allowed.
+ *
+ * Exposes the subset of the mysql2 pool API the app uses: execute, query,
+ * getConnection and end.
+ */
+
+import { performance } from 'node:perf_hooks';
+import logger from './logger.js';
+
+// Metrics are loaded lazily so this module stays usable without prom-client (e.g. scripts)
+let metrics = null;
+import('../middleware/metrics.js')
+  .then((module) => {
+    metrics = module;
+  })
+  .catch(() => {
+    // Metrics not available, skip recording
+  });
+
+// Share of acquisitions allowed to wait longer than growWait before the pool grows
+const GROW_SLOW_RATIO = 0.05;
+
+export default class MonitoredPool {
+  /**
+   * @param {object} mysql - mysql2/promise module
+   * @param {object} config - mysql2 pool config (connectionLimit is replaced)
+   * @param {object} options - { name, minSize, maxSize, adaptive, adaptInterval, growWait }
+   */
+  constructor(mysql, config, { name, minSize, maxSize, adaptive, adaptInterval, growWait }) {
+    this.name = name;
+    this.minSize = Math.min(minSize, maxSize);
+    this.maxSize = maxSize;
+    this.adaptive = adaptive;
+    this.growWait = growWait;
+    this.limit = adaptive ? this.minSize : maxSize;
+
+    // maxIdle = connectionLimit keeps mysql2 from closing idle connections on its own,
+    // so every close is seen here (connection end/error events or returnConnection)
+    this.pool = mysql.createPool({ ...config, connectionLimit: maxSize, maxIdle: maxSize });
+    this.active = 0;
+    this.open = 0;
+    this.waiters = [];
+    // Per physical connection: callback that counts it as closed (once)
+    this.closeTrackers = new WeakMap();
+    this.resetWindow();
+
+    // 'connection' fires once for every physical connection mysql2 opens
+    this.pool.on('connection', (connection) => {
+      this.open++;
+      let closed = false;
+      const onClose = () => {
+        if (closed) return;
+        closed = true;
+        this.open--;
+        this.report();
+      };
+      connection.once('end', onClose);
+      connection.once('error', onClose);
+      this.closeTrackers.set(connection, onClose);
+    });
+
+    if (adaptive) {
+      this.adaptTimer = setInterval(() => this.adapt(), adaptInterval);
+      this.adaptTimer.unref?.();
+    }
+    this.report();
+  }
+
+  /**
+   * Wait for a free slot. Resolves immediately while fewer than limit are in use.
+   */
+  acquireSlot() {
+    const requestedAt = performance.now();
+    if (this.active < this.limit && this.waiters.length === 0) {
+      this.active++;
+      this.recordAcquire(0);
+      return Promise.resolve();
+    }
+
+    return new Promise((resolve) => {
+      this.waiters.push({ resolve, requestedAt });
+      this.report();
+    });
+  }
+
+  /**
+   * Hand free slots to waiting callers.
+   */
+  dispatch() {
+    while (this.active < this.limit && this.waiters.length > 0) {
+      const waiter = this.waiters.shift();
+      this.active++;
+      this.recordAcquire(performance.now() - waiter.requestedAt);
+      waiter.resolve();
+    }
+    this.report();
+  }
+
+  releaseSlot() {
+    this.active--;
+    this.dispatch();
+  }
+
+  /**
+   * Check out a connection (for transactions). Call connection.release() when done.
+   */
+  async getConnection() {
+    await this.acquireSlot();
+    let connection;
+    try {
+      connection = await this.pool.getConnection();
+    } catch (error) {
+      this.releaseSlot();
+      throw error;
+    }
+
+    // Return the connection through the wrapper so its slot is freed exactly once.
+    // After the limit shrank, surplus connections are closed instead of kept idle.
+    const releaseToPool = connection.release.bind(connection);
+    let released = false;
+    connection.release = () => {
+      if (released) return;
+      released = true;
+      if (this.open > this.limit) {
+        this.closeTrackers.get(connection.connection)?.();
+        connection.destroy();
+      } else {
+        releaseToPool();
+      }
+      this.releaseSlot();
+    };
+    return connection;
+  }
+
+  async withConnection(fn) {
+    const connection = await this.getConnection();
+    try {
+      return await fn(connection);
+    } finally {
+      connection.release();
+    }
+  }
+
+  execute(sql, params) {
+    return this.withConnection((connection) => connection.execute(sql, params));
+  }
+
+  query(sql, params) {
+    return this.withConnection((connection) => connection.query(sql, params));
+  }
+
+  /**
+   * Current connection counts: active (checked out), idle (open, not checked out),
+   * queued (callers waiting for a slot), total (open) and the current limit.
+   */
+  getStats() {
+    return {
+      active: this.active,
+      idle: Math.max(0, this.open - this.active),
+      queued: this.waiters.length,
+      total: this.open,
+      limit: this.limit,
+      min: this.minSize,
+      max: this.maxSize,
+    };
+  }
+
+  recordAcquire(waitMs) {
+    this.window.acquisitions++;
+    if (waitMs > this.growWait) {
+      this.window.slow++;
+    }
+    this.window.peakActive = Math.max(this.window.peakActive, this.active);
+    metrics?.recordDbPoolAcquire(this.name, waitMs);
+  }
+
+  resetWindow() {
+    this.window = { acquisitions: 0, slow: 0, peakActive: this.active };
+  }
+
+  /**
+   * Grow or shrink the limit from the acquire waits seen since the last call.
+   */
+  adapt() {
+    const { acquisitions, slow, peakActive } = this.window;
+    this.resetWindow();
+    const previous = this.limit;
+
+    if (acquisitions > 0 && slow / acquisitions > GROW_SLOW_RATIO) {
+      this.limit = Math.min(this.maxSize, this.limit + Math.max(1, Math.ceil(this.limit / 4)));
+    } else if (slow === 0 && this.waiters.length === 0 && peakActive < this.limit - 1) {
+      this.limit = Math.max(this.minSize, this.limit - 1);
+    }
+
+    if (this.limit !== previous) {
+      logger.info(`🐬 MySQL pool ${this.name} resized: ${previous} → ${this.limit} connections`);
+      this.dispatch();
+    }
+  }
+
+  report() {
+    metrics?.recordDbPoolStats(this.name, this.getStats());
+  }
+
+  async end() {
+    if (this.adaptTimer) {
+      clearInterval(this.adaptTimer);
+    }
+    await this.pool.end();
+  }
+}
@@ -0,0 +1,46 @@
+/**
+ * SQL query fingerprints: the query text with literals replaced by ? and variable-length
+ * lists collapsed, so every execution of the same query shape maps to one fingerprint.
+ * Used to label per-query latency metrics and the slow-query log.
+ */
+
+// Fingerprints are cached by SQL text; most queries are static strings with parameters
+const CACHE_SIZE = 1000;
+// Keep fingerprints readable as metric labels
+const MAX_LENGTH = 300;
+
+const cache = new Map();
+
+/**
+ * Normalize sql into its fingerprint.
+ */
+export function normalizeQuery(sql) {
+  const normalized = sql
+    .replace(/\/\*[\s\S]*?\*\//g, ' ')
+    .replace(/--[^\n]*/g, ' ')
+    .replace(/'(?:[^']|'')*'/g, '?')
+    .replace(/\b\d+(?:\.\d+)?\b/g, '?')
+    .replace(/\s+/g, ' ')
+    .trim()
+    // IN (?, ?, ?) -> IN (...)
+    .replace(/\bIN \( ?\?(?: ?, ?\?)* ?\)/gi, 'IN (...)')
+    // VALUES (?, ?), (?, ?) -> VALUES (?, ?), ...
+    .replace(/\b(VALUES ?\([^()]*\))(?: ?, ?\([^()]*\))+/gi, '$1, ...');
+
+  return normalized.length > MAX_LENGTH ? `${normalized.slice(0, MAX_LENGTH)}…` : normalized;
+}
+
+/**
+ * Return the (cached) fingerprint of sql.
+ */
+export function fingerprintQuery(sql) {
+  let fingerprint = cache.get(sql);
+  if (fingerprint === undefined) {
+    fingerprint = normalizeQuery(sql);
+    if (cache.size >= CACHE_SIZE) {
+      cache.delete(cache.keys().next().value);
+    }
+    cache.set(sql, fingerprint);
+  }
+  return fingerprint;
+}
@@ -1,31 +1,73 @@
 /**
  * Redis cache configuration and connection management.
  * Provides caching for frequently accessed data.
+ *
+ * An optional in-process L1 cache (CACHE_L1_ENABLED) sits in front of Redis.
+ * Deletions and namespace invalidations are broadcast over Redis pub/sub so
+ * every instance drops its L1 copy. Without Redis the L1 acts as a local cache.
  */
+import crypto from 'node:crypto';
 import Redis from 'ioredis';
-import { REDIS } from './constants.js';
+import { CACHE_L1, CACHE_TTL, REDIS } from './constants.js';
+import LocalCache from './localCache.js';
 import logger from './logger.js';
 
-// Import metrics recording function - use lazy loading to avoid circular dependency
+// Import metrics recording functions - use lazy loading to avoid circular dependency
 let recordCacheOperation = null;
+let recordCacheInvalidation = null;
+let recordCacheTierLookup = null;
+let recordCacheL1Size = null;
 async function getMetrics() {
   if (!recordCacheOperation) {
     try {
       const metrics = await import('../middleware/metrics.js');
       recordCacheOperation = metrics.recordCacheOperation;
+      recordCacheInvalidation = metrics.recordCacheInvalidation;
+      recordCacheTierLookup = metrics.recordCacheTierLookup;
+      recordCacheL1Size = metrics.recordCacheL1Size;
     } catch (_error) {
       // Metrics not available yet, use noop
       // biome-ignore lint/suspicious/noEmptyBlockStatements: Intentional noop for lazy loading
       recordCacheOperation = () => {};
+      // biome-ignore lint/suspicious/noEmptyBlockStatements: Intentional noop for lazy loading
+      recordCacheInvalidation = () => {};
+      // biome-ignore lint/suspicious/noEmptyBlockStatements: Intentional noop for lazy loading
+      recordCacheTierLookup = () => {};
+      // biome-ignore lint/suspicious/noEmptyBlockStatements: Intentional noop for lazy loading
+      recordCacheL1Size = () => {};
     }
   }
   return recordCacheOperation;
 }
 
+async function getInvalidationMetrics() {
+  await getMetrics();
+  return recordCacheInvalidation;
+}
+
+async function getTierMetrics() {
+  await getMetrics();
+  return { recordTier: recordCacheTierLookup, recordL1Size: recordCacheL1Size };
+}
+
+function versionKeyFor(namespace) {
+  return `ns:${namespace}:version`;
+}
+
 class RedisCache {
   constructor() {
     this.client = null;
     this.enabled = false;
+    // In-process single-flight: key -> pending loader promise
+    this.inflight = new Map();
+    // Optional L1 tier and its cross-instance invalidation channel
+    this.local = CACHE_L1.ENABLED
+      ? new LocalCache({ maxEntries: CACHE_L1.MAX_ENTRIES, maxBytes: CACHE_L1.MAX_BYTES })
+      : null;
+    this.subscriber = null;
+    this.instanceId = crypto.randomUUID();
+    // Local namespace generations when Redis is unavailable (never reissued)
+    this.localVersionSeq = Date.now();
   }
 
   /**
@@ -38,7 +80,11 @@ class RedisCache {
     const redisHost = process.env.REDIS_HOST;
 
     if (!redisUrl && !redisHost) {
-      logger.info('⚠️  Redis not configured - caching disabled');
+      if (this.local) {
+        logger.info('⚠️  Redis not configured - using in-process L1 cache only');
+      } else {
+        logger.info('⚠️  Redis not configured - caching disabled');
+      }
       this.enabled = false;
       return;
     }
@@ -85,8 +131,14 @@ class RedisCache {
 
       this.client.on('ready', () => {
         logger.info('✅ Redis ready');
+        // Invalidation broadcasts may have been missed while disconnected
+        this.local?.clear();
         this.enabled = true;
       });
+
+      if (this.local) {
+        await this.subscribeInvalidations();
+      }
     } catch (error) {
       logger.error('⚠️  Redis connection failed:', error.message);
       logger.info('⚠️  Continuing without cache - performance may be slower');
@@ -95,10 +147,80 @@ class RedisCache {
     }
   }
 
+  /**
+   * Subscribe to L1 invalidation broadcasts from other instances.
+   * L1 is turned off if the subscription fails, since it could not be kept coherent.
+   */
+  async subscribeInvalidations() {
+    try {
+      this.subscriber = this.client.duplicate();
+      this.subscriber.on('message', (_channel, message) => {
+        this.handleInvalidationMessage(message);
+      });
+      await this.subscriber.subscribe(CACHE_L1.INVALIDATION_CHANNEL);
+      logger.info('🧊 L1 cache enabled with pub/sub invalidation', {
+        maxEntries: CACHE_L1.MAX_ENTRIES,
+        maxBytes: CACHE_L1.MAX_BYTES,
+      });
+    } catch (error) {
+      logger.error('⚠️  Cache invalidation subscribe failed - L1 cache disabled:', error.message);
+      this.local = null;
+      this.subscriber?.disconnect();
+      this.subscriber = null;
+    }
+  }
+
+  /**
+   * Drop L1 entries named in an invalidation broadcast from another instance.
+   */
+  handleInvalidationMessage(message) {
+    if (!this.local) return;
+
+    try {
+      const { origin, keys } = JSON.parse(message);
+      if (origin === this.instanceId) return;
+      for (const key of keys) {
+        this.local.delete(key);
+      }
+    } catch (error) {
+      logger.warn('Invalid cache invalidation message:', error.message);
+    }
+  }
+
+  /**
+   * Broadcast L1 invalidation for keys to other instances.
+   */
+  async publishInvalidation(keys) {
+    if (!this.local || !this.enabled || !this.client || keys.length === 0) return;
+
+    try {
+      await this.client.publish(
+        CACHE_L1.INVALIDATION_CHANNEL,
+        JSON.stringify({ origin: this.instanceId, keys }),
+      );
+    } catch (error) {
+      logger.error('Cache invalidation publish error:', error.message);
+    }
+  }
+
   /**
    * Get value from cache.
+   * Checks the L1 tier first (no network, no JSON.parse), then Redis.
    */
   async get(key) {
+    const { recordTier } = await getTierMetrics();
+
+    if (this.local) {
+      const localValue = this.local.get(key);
+      if (localValue !== undefined) {
+        recordTier('l1', 'hit');
+        const recordMetrics = await getMetrics();
+        recordMetrics('get', 'hit');
+        return localValue;
+      }
+      recordTier('l1', 'miss');
+    }
+
     if (!this.enabled || !this.client) {
       const recordMetrics = await getMetrics();
       recordMetrics('get', 'disabled');
@@ -108,9 +230,14 @@ class RedisCache {
     try {
       const value = await this.client.get(key);
       const result = value ? 'hit' : 'miss';
+      recordTier('l2', result);
       const recordMetrics = await getMetrics();
       recordMetrics('get', result);
-      return value ? JSON.parse(value) : null;
+      if (!value) return null;
+
+      const parsed = JSON.parse(value);
+      this.setLocal(key, parsed, CACHE_L1.MAX_TTL, value.length);
+      return parsed;
     } catch (error) {
       logger.error(`Cache get error for key ${key}:`, error.message);
       const recordMetrics = await getMetrics();
@@ -125,12 +252,20 @@ class RedisCache {
   async set(key, value, ttl = 3600) {
     if (!this.enabled || !this.client) {
       const recordMetrics = await getMetrics();
+      if (this.local) {
+        // Local-only mode: L1 is the sole cache, so it keeps the full TTL
+        const stored = this.setLocal(key, value, ttl, JSON.stringify(value).length);
+        recordMetrics('set', stored ? 'success' : 'disabled');
+        return stored;
+      }
       recordMetrics('set', 'disabled');
       return false;
     }
 
     try {
-      await this.client.setex(key, ttl, JSON.stringify(value));
+      const serialized = JSON.stringify(value);
+      await this.client.setex(key, ttl, serialized);
+      this.setLocal(key, value, Math.min(ttl, CACHE_L1.MAX_TTL), serialized.length);
       const recordMetrics = await getMetrics();
       recordMetrics('set', 'success');
       return true;
@@ -146,6 +281,8 @@ class RedisCache {
    * Delete value from cache.
    */
   async del(key) {
+    this.deleteLocal([key]);
+
     if (!this.enabled || !this.client) {
       const recordMetrics = await getMetrics();
       recordMetrics('del', 'disabled');
@@ -154,6 +291,7 @@ class RedisCache {
 
     try {
       await this.client.del(key);
+      await this.publishInvalidation([key]);
       const recordMetrics = await getMetrics();
       recordMetrics('del', 'success');
       return true;
@@ -165,13 +303,169 @@ class RedisCache {
     }
   }
 
+  /**
+   * Get a cached value, or compute it with loader() and cache it for ttl seconds.
+   *
+   * Concurrent misses for the same key in this process share one loader call.
+   * With options.softTtl (seconds), entries older than softTtl are returned
+   * stale, without waiting, while a single background refresh recomputes them. Works without
+   * Redis too, backed by the L1 tier if enabled or by single-flight alone.
+   */
+  async getOrCompute(key, ttl, loader, options = {}) {
+    const { softTtl } = options;
+    const recordMetrics = await getMetrics();
+
+    // Read first: while a refresh is running, stale entries are still served right away
+    const entry = await this.get(key);
+    if (entry && Object.hasOwn(entry, 'storedAt')) {
+      const ageSeconds = (Date.now() - entry.storedAt) / 1000;
+      if (softTtl && ageSeconds > softTtl) {
+        recordMetrics('get_or_compute', 'stale');
+        if (!this.inflight.has(key)) {
+          this.computeAndStore(key, ttl, loader).catch((error) => {
+            logger.error(`Cache background refresh error for key ${key}:`, error.message);
+          });
+        }
+      } else {
+        recordMetrics('get_or_compute', 'hit');
+      }
+      return entry.value;
+    }
+
+    // Join a computation already running in this process
+    const pending = this.inflight.get(key);
+    if (pending) {
+      recordMetrics('get_or_compute', 'coalesced');
+      return pending;
+    }
+
+    recordMetrics('get_or_compute', 'miss');
+    return this.computeAndStore(key, ttl, loader);
+  }
+
+  /**
+   * Run loader() once per key at a time and store its result with a timestamp.
+   */
+  computeAndStore(key, ttl, loader) {
+    const pending = this.inflight.get(key);
+    if (pending) return pending;
+
+    const computation = (async () => {
+      const value = await loader();
+      await this.set(key, { value, storedAt: Date.now() }, ttl);
+      return value;
+    })().finally(() => {
+      this.inflight.delete(key);
+    });
+
+    this.inflight.set(key, computation);
+    return computation;
+  }
+
+  /**
+   * Get the current generation of a cache namespace.
+   * Generations start at the current time in ms, so a counter lost to expiry or
+   * eviction never reissues a version that older entries were written under.
+   * Versions are kept in L1 when enabled; invalidations broadcast their removal.
+   */
+  async getNamespaceVersion(namespace) {
+    const versionKey = versionKeyFor(namespace);
+    const localVersion = this.local?.get(versionKey);
+    if (localVersion !== undefined) return localVersion;
+
+    if (!this.enabled || !this.client) {
+      if (!this.local) return '0';
+      const version = String(++this.localVersionSeq);
+      this.setLocal(versionKey, version, CACHE_TTL.NAMESPACE_VERSION, version.length);
+      return version;
+    }
+
+    try {
+      let version = await this.client.get(versionKey);
+      if (!version) {
+        await this.client.set(
+          versionKey,
+          String(Date.now()),
+          'EX',
+          CACHE_TTL.NAMESPACE_VERSION,
+          'NX',
+        );
+        version = await this.client.get(versionKey);
+      }
+      if (!version) return '0';
+
+      this.setLocal(versionKey, version, CACHE_L1.MAX_TTL, version.length);
+      return version;
+    } catch (error) {
+      logger.error(`Cache version error for namespace ${namespace}:`, error.message);
+      return '0';
+    }
+  }
+
+  /**
+   * Build a cache key embedding the namespace's current generation.
+   * Read the key before computing a value and reuse it for set(), so a
+   * concurrent invalidation makes the freshly computed value unreachable.
+   */
+  async versionedKey(namespace, suffix = '') {
+    const version = await this.getNamespaceVersion(namespace);
+    return suffix ? `${namespace}:v${version}:${suffix}` : `${namespace}:v${version}`;
+  }
+
+  /**
+   * Invalidate every key in the given namespaces by bumping their generations.
+   * One pipelined INCR per namespace; stale entries are left to expire via TTL.
+   */
+  async invalidateNamespaces(...namespaces) {
+    if (namespaces.length === 0) return false;
+
+    const versionKeys = namespaces.map(versionKeyFor);
+    if (!this.enabled || !this.client) {
+      // Local-only mode: dropping the version makes the next read issue a new one
+      this.deleteLocal(versionKeys);
+      return !!this.local;
+    }
+
+    const startTime = Date.now();
+    let success = true;
+    try {
+      const pipeline = this.client.pipeline();
+      for (const versionKey of versionKeys) {
+        pipeline.incr(versionKey);
+        pipeline.expire(versionKey, CACHE_TTL.NAMESPACE_VERSION);
+      }
+      if (this.local) {
+        pipeline.publish(
+          CACHE_L1.INVALIDATION_CHANNEL,
+          JSON.stringify({ origin: this.instanceId, keys: versionKeys }),
+        );
+      }
+      const results = await pipeline.exec();
+      // Drop local copies after the INCR so a concurrent read cannot re-cache the old version
+      this.deleteLocal(versionKeys);
+      const failed = results.find(([err]) => err);
+      if (failed) throw failed[0];
+      return true;
+    } catch (error) {
+      success = false;
+      logger.error(`Cache invalidation error for ${namespaces.join(', ')}:`, error.message);
+      return false;
+    } finally {
+      const recordInvalidation = await getInvalidationMetrics();
+      recordInvalidation('generation', Date.now() - startTime, success);
+    }
+  }
+
   /**
    * Delete multiple keys matching pattern.
-   * Uses SCAN instead of KEYS to avoid blocking Redis.
+   * Uses SCAN instead of KEYS to avoid blocking Redis, but still walks the
+   * whole keyspace - prefer invalidateNamespaces() for per-user data.
    */
   async delPattern(pattern) {
     if (!this.enabled || !this.client) return false;
 
+    const startTime = Date.now();
+    let success = true;
     try {
       let cursor = '0';
       let _deletedCount = 0;
@@ -193,6 +487,8 @@ class RedisCache {
 
         if (keys.length > 0) {
           await this.client.del(...keys);
+          this.deleteLocal(keys);
+          await this.publishInvalidation(keys);
           _deletedCount += keys.length;
         }
 
@@ -207,8 +503,40 @@ class RedisCache {
 
       return true;
     } catch (error) {
+      success = false;
       logger.error(`Cache delPattern error for pattern ${pattern}:`, error.message);
       return false;
+    } finally {
+      const recordInvalidation = await getInvalidationMetrics();
+      recordInvalidation('scan', Date.now() - startTime, success);
+    }
+  }
+
+  /**
+   * Store a value in the L1 tier (no-op when L1 is disabled).
+   */
+  setLocal(key, value, ttl, size) {
+    if (!this.local) return false;
+    const stored = this.local.set(key, value, ttl, size);
+    this.reportLocalSize();
+    return stored;
+  }
+
+  /**
+   * Remove keys from the L1 tier (no-op when L1 is disabled).
+   */
+  deleteLocal(keys) {
+    if (!this.local) return;
+    for (const key of keys) {
+      this.local.delete(key);
+    }
+    this.reportLocalSize();
+  }
+
+  reportLocalSize() {
+    if (recordCacheL1Size) {
+      const { entries, bytes } = this.local.getStats();
+      recordCacheL1Size(entries, bytes);
     }
   }
 
@@ -223,6 +551,11 @@ class RedisCache {
    * Close Redis connection.
    */
   async close() {
+    if (this.subscriber) {
+      await this.subscriber.quit();
+      this.subscriber = null;
+    }
+    this.local?.clear();
     if (this.client) {
       await this.client.quit();
       this.client = null;
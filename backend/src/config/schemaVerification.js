@@ -58,6 +58,8 @@ const EXPECTED_SCHEMA = {
       'id',
       'title',
       'body',
+      'excerpt',
+      'body_html',
       'images',
       'pinned',
       'archived',
@@ -263,6 +265,58 @@ const EXPECTED_SCHEMA = {
     columns: ['id', 'message_id', 'user_id', 'read_at'],
     indexes: ['idx_reads_message', 'idx_reads_user'],
   },
+  search_outbox: {
+    columns: [
+      'note_id',
+      'operation',
+      'version',
+      'attempts',
+      'available_at',
+      'enqueued_at',
+      'last_error',
+      'claimed_by',
+      'claimed_until',
+    ],
+    indexes: ['ix_search_outbox_available'],
+  },
+  replication_heartbeat: {
+    columns: ['id', 'written_at'],
+    indexes: [],
+  },
+  folder_closure: {
+    columns: ['ancestor_id', 'descendant_id', 'depth'],
+    indexes: ['idx_folder_closure_descendant'],
+  },
+  user_counters: {
+    columns: [
+      'user_id',
+      'notes',
+      'archived_notes',
+      'favorite_notes',
+      'tasks',
+      'tasks_completed',
+      'tasks_active',
+      'shares_sent',
+      'shares_received',
+    ],
+    indexes: [],
+  },
+  folder_counters: {
+    columns: [
+      'folder_id',
+      'notes',
+      'archived_notes',
+      'favorite_notes',
+      'tasks',
+      'tasks_completed',
+      'tasks_active',
+    ],
+    indexes: [],
+  },
+  app_stats: {
+    columns: ['name', 'shard', 'value'],
+    indexes: [],
+  },
   migration_history: {
     columns: ['id', 'description', 'applied_at'],
     indexes: [],
@@ -8,6 +8,7 @@ import db from '../config/database.js';
 import logger from '../config/logger.js';
 import * as chatService from '../services/chatService.js';
 import jwtService from '../services/jwtService.js';
+import principalCache from '../services/principalCache.js';
 
 // Store connected users (userId -> socketId mapping)
 const connectedUsers = new Map();
@@ -41,11 +42,8 @@ export function initializeSocketIO(httpServer) {
         return next(new Error(result.error || 'Invalid authentication token'));
       }
 
-      // Get user from database
-      const user = await db.queryOne(
-        'SELECT id, username, avatar_url, status FROM users WHERE id = ?',
-        [result.userId],
-      );
+      // Get user, cached briefly (see services/principalCache.js)
+      const user = await principalCache.get(result.userId);
 
       if (!user) {
         return next(new Error('User not found'));
@@ -283,6 +281,7 @@ export function initializeSocketIO(httpServer) {
         if (validStatuses.includes(status)) {
           // Update in database
           await db.run('UPDATE users SET status = ? WHERE id = ?', [status, userId]);
+          await principalCache.invalidate(userId);
           socket.userStatus = status;
 
           // Broadcast to all connected users
@@ -0,0 +1,74 @@
+/**
+ * Transaction lock for the shared SQLite handle.
+ *
+ * better-sqlite3 has a single connection, so a transaction left open across awaits
+ * would take in every statement run on the handle meanwhile, and a rollback would undo
+ * writes that had already reported success. A transaction (Database.transaction() or a
+ * Sequelize transaction) holds this lock from BEGIN to COMMIT or ROLLBACK. Statements
+ * from the holder run directly; everyone else's wait, in order, until it is released.
+ */
+
+import { AsyncLocalStorage } from 'node:async_hooks';
+
+export default class SQLiteLock {
+  constructor() {
+    this.owner = null;
+    this.tail = Promise.resolve();
+    // Holder plus waiters; statements skip the queue while it is 0
+    this.pending = 0;
+    this.scope = new AsyncLocalStorage();
+  }
+
+  /**
+   * Wait for the lock and take it for owner. Resolves to the release function.
+   */
+  async acquire(owner) {
+    this.pending++;
+    const previous = this.tail;
+    let unlock;
+    this.tail = new Promise((resolve) => {
+      unlock = resolve;
+    });
+    await previous;
+    this.owner = owner;
+
+    let released = false;
+    return () => {
+      if (released) return;
+      released = true;
+      this.owner = null;
+      this.pending--;
+      unlock();
+    };
+  }
+
+  /**
+   * Run fn holding the lock for owner. Database statements made from fn's async
+   * context count as the owner's.
+   */
+  async hold(owner, fn) {
+    const release = await this.acquire(owner);
+    try {
+      return await this.scope.run(owner, fn);
+    } finally {
+      release();
+    }
+  }
+
+  /**
+   * Run one statement (fn) on the handle: right away if the lock is free or held by
+   * owner, otherwise once the transactions ahead of it have finished.
+   * owner defaults to the hold() scope the caller runs in.
+   */
+  async run(fn, owner = this.scope.getStore() ?? null) {
+    if (this.pending === 0 || (owner !== null && owner === this.owner)) {
+      return fn();
+    }
+    const release = await this.acquire(null);
+    try {
+      return await fn();
+    } finally {
+      release();
+    }
+  }
+}
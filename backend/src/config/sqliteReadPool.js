@@ -0,0 +1,159 @@
+/**
+ * Pool of worker threads running SQLite read queries off the main event loop.
+ *
+ * better-sqlite3 is synchronous, so a slow SELECT on the main connection blocks every
+ * other request and socket. With the pool enabled (SQLITE_READ_POOL=true), Database
+ * sends plain reads to workers that each hold their own read-only connection; writes
+ * and transactions stay on the single main connection. In WAL mode readers never block
+ * the writer and always see the latest committed data.
+ *
+ * Each worker runs one query at a time. Queries wait in a bounded FIFO queue; when it
+ * is full, query() rejects with code SQLITE_READ_POOL_FULL instead of queueing without
+ * limit.
+ *
+ * Crashed workers are replaced by WorkerSupervisor. Once it has given up every worker
+ * (e.g. none can open the database), the pool is degraded and runs all reads through
+ * options.fallback, on the main connection.
+ */
+
+import { performance } from 'node:perf_hooks';
+import { Worker } from 'node:worker_threads';
+import logger from './logger.js';
+import WorkerSupervisor from './workerSupervisor.js';
+
+// Metrics are loaded lazily so this module stays usable without prom-client (e.g. scripts)
+let metrics = null;
+import('../middleware/metrics.js')
+  .then((module) => {
+    metrics = module;
+  })
+  .catch(() => {
+    // Metrics not available, skip recording
+  });
+
+const WORKER_URL = new URL('./sqliteReadWorker.js', import.meta.url);
+
+export default class SqliteReadPool {
+  /**
+   * @param {string} dbPath - Path of the SQLite database (must use WAL mode)
+   * @param {object} options - { size, maxQueue, statementCacheSize, fallback, workerUrl }
+   *   fallback(sql, params, mode) runs a query on the main connection once degraded
+   */
+  constructor(dbPath, { size, maxQueue, statementCacheSize, fallback, workerUrl = WORKER_URL }) {
+    this.dbPath = dbPath;
+    this.size = size;
+    this.maxQueue = maxQueue;
+    this.statementCacheSize = statementCacheSize;
+    this.fallback = fallback;
+    this.workerUrl = workerUrl;
+    this.queue = [];
+    this.closed = false;
+    this.workers = new WorkerSupervisor({
+      name: 'SQLite read worker',
+      size,
+      createWorker: (workerId) =>
+        new Worker(this.workerUrl, {
+          workerData: {
+            dbPath: this.dbPath,
+            workerId,
+            statementCacheSize: this.statementCacheSize,
+          },
+        }),
+      onMessage: (slot, message) => this.complete(slot, message),
+      onReady: () => this.dispatch(),
+      onDegrade: () => this.degrade(),
+    });
+  }
+
+  /**
+   * Spawn the workers.
+   */
+  start() {
+    this.workers.start();
+    logger.info(`🧵 SQLite read pool started with ${this.size} worker(s)`);
+  }
+
+  /**
+   * Stop using workers: queued and future reads run through the fallback.
+   */
+  degrade() {
+    logger.error('SQLite read pool has no workers left, reading on the main connection');
+    for (const job of this.queue.splice(0)) {
+      this.runFallback(job.sql, job.params, job.mode).then(job.resolve, job.reject);
+    }
+    metrics?.recordReadPoolQueueDepth(0);
+  }
+
+  async runFallback(sql, params, mode) {
+    return this.fallback(sql, params, mode);
+  }
+
+  /**
+   * Run a read query on a worker.
+   * @param {string} mode - 'all' for every row, 'one' for the first row
+   */
+  query(sql, params, mode) {
+    if (this.closed) {
+      return Promise.reject(new Error('SQLite read pool is closed'));
+    }
+    if (this.workers.degraded) {
+      return this.runFallback(sql, params, mode);
+    }
+    if (this.queue.length >= this.maxQueue) {
+      metrics?.recordReadPoolRejection();
+      const error = new Error('SQLite read pool queue is full');
+      error.code = 'SQLITE_READ_POOL_FULL';
+      return Promise.reject(error);
+    }
+
+    return new Promise((resolve, reject) => {
+      this.queue.push({ sql, params, mode, resolve, reject, queuedAt: performance.now() });
+      this.dispatch();
+    });
+  }
+
+  /**
+   * Hand queued queries to idle workers.
+   */
+  dispatch() {
+    while (this.workers.idle.length > 0 && this.queue.length > 0) {
+      const slot = this.workers.idle.pop();
+      const job = this.queue.shift();
+      job.startedAt = performance.now();
+      slot.job = job;
+      slot.worker.postMessage({ sql: job.sql, params: job.params, mode: job.mode });
+    }
+    metrics?.recordReadPoolQueueDepth(this.queue.length);
+  }
+
+  complete(slot, { result, error }) {
+    const { job } = slot;
+    this.workers.release(slot);
+
+    const finishedAt = performance.now();
+    metrics?.recordReadPoolQuery(
+      slot.workerId,
+      job.startedAt - job.queuedAt,
+      finishedAt - job.startedAt,
+      !error,
+    );
+
+    if (error) {
+      job.reject(Object.assign(new Error(error.message), { code: error.code }));
+    } else {
+      job.resolve(result);
+    }
+    this.dispatch();
+  }
+
+  /**
+   * Fail queued queries and stop all workers.
+   */
+  async close() {
+    this.closed = true;
+    for (const job of this.queue.splice(0)) {
+      job.reject(new Error('SQLite read pool is closed'));
+    }
+    await this.workers.stop();
+  }
+}
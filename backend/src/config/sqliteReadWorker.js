@@ -0,0 +1,28 @@
+/**
+ * Worker thread of the SQLite read pool (see sqliteReadPool.js).
+ * Holds one read-only connection to the WAL database and answers the read queries
+ * the main thread posts to it, one at a time.
+ */
+
+import { parentPort, workerData } from 'node:worker_threads';
+import Database from 'better-sqlite3';
+import StatementCache from './statementCache.js';
+
+const connection = new Database(workerData.dbPath, { readonly: true, fileMustExist: true });
+connection.pragma('query_only = ON');
+
+const statements = new StatementCache(
+  connection,
+  `reader-${workerData.workerId}`,
+  workerData.statementCacheSize,
+);
+
+parentPort.on('message', ({ sql, params, mode }) => {
+  try {
+    const statement = statements.prepare(sql);
+    const result = mode === 'one' ? statement.get(...params) : statement.all(...params);
+    parentPort.postMessage({ result });
+  } catch (error) {
+    parentPort.postMessage({ error: { message: error.message, code: error.code } });
+  }
+});
@@ -0,0 +1,69 @@
+/**
+ * LRU cache of better-sqlite3 prepared statements for one connection, keyed by SQL text.
+ * Preparing parses and plans the SQL on every call; hot queries (auth lookups, note
+ * lists) reuse the compiled statement instead. MySQL needs no equivalent: mysql2's
+ * execute() already caches prepared statements per connection.
+ */
+
+import { isMainThread } from 'node:worker_threads';
+
+// Metrics are loaded lazily so this module stays usable without prom-client (e.g. scripts).
+// Worker threads (SQLite read pool) skip them: only the main thread's registry is scraped.
+// biome-ignore lint/suspicious/noEmptyBlockStatements: Intentional noop until metrics load
+let recordStatementCacheOperation = () => {};
+if (isMainThread) {
+  import('../middleware/metrics.js')
+    .then((metrics) => {
+      recordStatementCacheOperation = metrics.recordStatementCacheOperation;
+    })
+    .catch(() => {
+      // Metrics not available, keep noop recorder
+    });
+}
+
+export default class StatementCache {
+  /**
+   * @param {object} connection - better-sqlite3 database
+   * @param {string} name - Connection label for metrics ('primary', 'replica')
+   * @param {number} maxEntries - Maximum number of cached statements
+   */
+  constructor(connection, name, maxEntries) {
+    this.connection = connection;
+    this.name = name;
+    this.maxEntries = maxEntries;
+    // Map preserves insertion order, so the first key is the least recently used
+    this.statements = new Map();
+  }
+
+  /**
+   * Return the cached statement for sql, preparing and caching it on a miss.
+   */
+  prepare(sql) {
+    let statement = this.statements.get(sql);
+    if (statement) {
+      // Mark as most recently used
+      this.statements.delete(sql);
+      this.statements.set(sql, statement);
+      recordStatementCacheOperation(this.name, 'hit');
+      return statement;
+    }
+
+    statement = this.connection.prepare(sql);
+    recordStatementCacheOperation(this.name, 'miss');
+    if (this.maxEntries <= 0) return statement;
+
+    this.statements.set(sql, statement);
+    if (this.statements.size > this.maxEntries) {
+      this.statements.delete(this.statements.keys().next().value);
+      recordStatementCacheOperation(this.name, 'eviction');
+    }
+    return statement;
+  }
+
+  /**
+   * Drop all cached statements (e.g. before closing the connection).
+   */
+  clear() {
+    this.statements.clear();
+  }
+}
@@ -0,0 +1,129 @@
+/**
+ * Lifecycle of a fixed set of worker threads, shared by the worker pools.
+ *
+ * The supervisor spawns the workers, keeps track of which are idle and replaces crashed
+ * ones after a backoff that doubles with each consecutive crash. A worker that crashes
+ * MAX_CONSECUTIVE_CRASHES times without finishing a job is given up; once every worker
+ * is, the supervisor is degraded and calls options.onDegrade so the pool can run its
+ * jobs some other way. Pools keep their own queue and job handling: they take workers
+ * from idle, set slot.job and call release(slot) when the job is done.
+ */
+
+import logger from './logger.js';
+
+const MAX_CONSECUTIVE_CRASHES = 5;
+const RESPAWN_BASE_DELAY = 100; // ms, doubled per consecutive crash
+
+export default class WorkerSupervisor {
+  /**
+   * @param {object} options - { name, size, createWorker, onMessage, onReady, onDegrade }
+   *   createWorker(workerId) returns a new Worker, onMessage(slot, message) handles its
+   *   results, onReady() runs when a worker becomes idle and onDegrade() once every
+   *   worker is given up
+   */
+  constructor({ name, size, createWorker, onMessage, onReady, onDegrade }) {
+    this.name = name;
+    this.size = size;
+    this.createWorker = createWorker;
+    this.onMessage = onMessage;
+    this.onReady = onReady;
+    this.onDegrade = onDegrade;
+    this.slots = [];
+    this.idle = [];
+    // Consecutive crashes per worker ID, reset when the worker finishes a job
+    this.crashes = [];
+    this.respawnTimers = new Set();
+    this.degraded = false;
+    this.running = false;
+  }
+
+  /**
+   * Spawn the workers.
+   */
+  start() {
+    this.running = true;
+    for (let i = 0; i < this.size; i++) {
+      this.spawn(i);
+    }
+  }
+
+  spawn(workerId) {
+    const worker = this.createWorker(workerId);
+    const slot = { workerId, worker, job: null };
+
+    worker.on('message', (message) => this.onMessage(slot, message));
+    worker.on('error', (error) => {
+      logger.error(`${this.name} ${workerId} failed:`, error.message);
+    });
+    worker.on('exit', () => {
+      // A crashed worker fails its in-flight job and is replaced
+      this.idle = this.idle.filter((entry) => entry !== slot);
+      if (slot.job) {
+        slot.job.reject(new Error(`${this.name} ${workerId} exited`));
+        slot.job = null;
+      }
+      if (this.running && this.slots[workerId] === slot) {
+        this.respawn(workerId);
+      }
+    });
+
+    this.slots[workerId] = slot;
+    this.idle.push(slot);
+    this.onReady();
+  }
+
+  /**
+   * Replace a crashed worker after a backoff, or give it up after too many crashes
+   * in a row.
+   */
+  respawn(workerId) {
+    const crashes = (this.crashes[workerId] ?? 0) + 1;
+    this.crashes[workerId] = crashes;
+
+    if (crashes >= MAX_CONSECUTIVE_CRASHES) {
+      logger.error(`${this.name} ${workerId} crashed ${crashes} times in a row, giving up`);
+      const givenUp = this.crashes.filter((count) => count >= MAX_CONSECUTIVE_CRASHES).length;
+      if (givenUp === this.size) {
+        this.degraded = true;
+        this.onDegrade();
+      }
+      return;
+    }
+
+    const timer = setTimeout(
+      () => {
+        this.respawnTimers.delete(timer);
+        this.spawn(workerId);
+      },
+      RESPAWN_BASE_DELAY * 2 ** (crashes - 1),
+    );
+    timer.unref();
+    this.respawnTimers.add(timer);
+  }
+
+  /**
+   * Return a worker that finished its job to the idle list.
+   */
+  release(slot) {
+    slot.job = null;
+    this.idle.push(slot);
+    this.crashes[slot.workerId] = 0;
+  }
+
+  /**
+   * Stop respawning and terminate all workers. start() spawns fresh ones.
+   */
+  async stop() {
+    this.running = false;
+    this.degraded = false;
+    this.crashes = [];
+    for (const timer of this.respawnTimers) {
+      clearTimeout(timer);
+    }
+    this.respawnTimers.clear();
+    const slots = this.slots;
+    this.slots = [];
+    this.idle = [];
+    await Promise.all(slots.map((slot) => slot.worker.terminate()));
+  }
+}
@@ -24,6 +24,7 @@ import cors from 'cors';
 import express from 'express';
 import rateLimit from 'express-rate-limit';
 import helmet from 'helmet';
+import { TAG_CLEANUP } from './config/constants.js';
 // Database: supports both legacy DB layer and Sequelize ORM
 import db from './config/database.js';
 import elasticsearch from './config/elasticsearch.js';
@@ -32,6 +33,7 @@ import logger from './config/logger.js';
 
 // Cache and search services
 import cache from './config/redis.js';
+import { createRateLimiter } from './middleware/rateLimiter.js';
 import { closeDatabase, initializeSequelize, syncDatabase } from './models/index.js';
 import adminRoutes from './routes/admin.js';
 import aiRoutes from './routes/ai.js';
@@ -48,7 +50,13 @@ import tasksRoutes from './routes/tasks.js';
 import uploadRoutes from './routes/upload.js';
 import usersRoutes from './routes/users.js';
 // Import passkey services
+import auditBuffer from './services/auditBuffer.js';
 import { isUsingRedis } from './services/challengeStorage.js';
+import counters from './services/counterService.js';
+import NoteService from './services/noteService.js';
+import passwordHashPool from './services/passwordHashPool.js';
+import principalCache from './services/principalCache.js';
+import searchOutbox from './services/searchOutbox.js';
 
 const app = express();
 const PORT = process.env.PORT || 5000;
@@ -93,11 +101,9 @@ app.use(
   }),
 );
 
-// Rate limiting for API routes
-const apiLimiter = rateLimit({
-  windowMs: 15 * 60 * 1000, // 15 minutes
-  max: 100, // limit each IP to 100 requests per windowMs
-  message: { error: 'Too many requests, please try again later' },
+// Rate limiting for API routes: per-user token buckets shared through Redis,
+// with per-route costs (see middleware/rateLimiter.js)
+const apiLimiter = createRateLimiter({
   // Skip rate limiting for Socket.IO connections
   skip: (req) => {
     // Skip for localhost
@@ -196,24 +202,13 @@ async function updateMetricsJob() {
       return;
     }
 
-    // Simplified query - removed tasks and notes by status
-    const counts = await db.query(`
-      SELECT
-        (SELECT COUNT(*) FROM users) as users,
-        (SELECT COUNT(*) FROM notes) as notes,
-        (SELECT COUNT(DISTINCT id) FROM tags) as tags
-    `);
-
-    const metrics = counts?.[0] || {
-      users: 0,
-      notes: 0,
-      tags: 0,
-    };
+    // Row counts are kept in app_stats by triggers, so this reads a few rows
+    const stats = await counters.getAppStats();
 
     updateApplicationMetrics({
-      users: metrics.users || 0,
-      notes: metrics.notes || 0,
-      tags: metrics.tags || 0,
+      users: stats.users,
+      notes: stats.notes,
+      tags: stats.tags,
       activeSessions: activeSessions,
     });
   } catch (error) {
@@ -226,9 +221,28 @@ setInterval(updateMetricsJob, 30000);
 // Initial update after delay to ensure database is ready
 setTimeout(updateMetricsJob, 5000);
 
+// Sweep tags orphaned outside the note write path (per-write cleanup is incremental)
+async function cleanupOrphanTagsJob() {
+  try {
+    if (!db || !db.db) return;
+
+    const deleted = await NoteService.cleanupOrphanTags();
+    if (deleted > 0) {
+      logger.info('Cleaned up orphaned tags', { deleted });
+    }
+  } catch (error) {
+    logger.error('Error cleaning up orphaned tags', { error: error.message });
+  }
+}
+
+setInterval(cleanupOrphanTagsJob, TAG_CLEANUP.INTERVAL * 1000);
+
+// Set once shutdown starts, so readiness fails while connections drain
+let shuttingDown = false;
+
 // Shared health check logic
 async function getHealthStatus() {
-  const userCount = await db.queryOne(`SELECT COUNT(*) as count FROM users`);
+  const stats = await counters.getAppStats();
   const replicationStatus = db.getReplicationStatus();
 
   return {
@@ -245,10 +259,43 @@ async function getHealthStatus() {
           healthy: replicationStatus.healthyReplicas,
         }
       : undefined,
-    user_count: userCount?.count || 0,
+    user_count: stats.users,
   };
 }
 
+// Liveness: the process is up and serving requests. Touches no dependencies, so a
+// slow database never gets the container restarted.
+app.get('/api/health/live', (_req, res) => {
+  res.status(200).json({ status: 'alive' });
+});
+
+// Readiness: the primary database answers, so traffic can be routed here
+app.get('/api/health/ready', async (_req, res) => {
+  try {
+    if (shuttingDown) {
+      throw new Error('Shutting down');
+    }
+    await db.ping();
+
+    const replicationStatus = db.getReplicationStatus();
+    res.status(200).json({
+      status: 'ready',
+      database: 'connected',
+      replication: replicationStatus.enabled
+        ? {
+            replicas: replicationStatus.replicaCount,
+            healthy: replicationStatus.healthyReplicas,
+          }
+        : undefined,
+    });
+  } catch (error) {
+    res.status(503).json({
+      status: 'not_ready',
+      error: error.message,
+    });
+  }
+});
+
 // Backward-compatible health endpoint (without version prefix for Docker healthchecks)
 app.get('/api/health', async (_req, res) => {
   try {
@@ -334,12 +381,16 @@ async function start() {
     // Initialize Sequelize ORM after migrations
     await initializeSequelize();
     await syncDatabase();
+    auditBuffer.start();
 
     // Initialize Redis cache (optional)
     await cache.connect();
+    await principalCache.start();
 
     // Initialize Elasticsearch (optional)
     await elasticsearch.connect();
+    searchOutbox.start();
+    counters.start();
 
     // Log passkey challenge storage mode
     const challengeStorage = isUsingRedis()
@@ -383,6 +434,12 @@ async function start() {
 // Graceful shutdown
 process.on('SIGTERM', async () => {
   logger.info('SIGTERM received, shutting down gracefully...');
+  shuttingDown = true;
+  await searchOutbox.stop();
+  await counters.stop();
+  await principalCache.stop();
+  await passwordHashPool.close();
+  await auditBuffer.stop();
   await closeDatabase();
   await db.close();
   await cache.close();
@@ -392,6 +449,12 @@ process.on('SIGTERM', async () => {
 
 process.on('SIGINT', async () => {
   logger.info('SIGINT received, shutting down gracefully...');
+  shuttingDown = true;
+  await searchOutbox.stop();
+  await counters.stop();
+  await principalCache.stop();
+  await passwordHashPool.close();
+  await auditBuffer.stop();
   await closeDatabase();
   await db.close();
   await cache.close();
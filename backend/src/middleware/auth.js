@@ -2,9 +2,13 @@
  * JWT Authentication Middleware.
  */
 
-import db from '../config/database.js';
+import { PASSWORD_HASH_POOL } from '../config/constants.js';
 import jwtService from '../services/jwtService.js';
+import passwordHashPool from '../services/passwordHashPool.js';
+import principalCache from '../services/principalCache.js';
 import * as responseHandler from '../utils/responseHandler.js';
+import { recordPasswordHashRejection } from './metrics.js';
+import { setRequestUserId } from './requestId.js';
 
 /**
  * Middleware that requires a valid JWT token.
@@ -33,11 +37,11 @@ export const jwtRequired = async (req, res, next) => {
     return responseHandler.unauthorized(res, result.error || 'Invalid token');
   }
 
-  // Get user from database
-  const user = await db.queryOne(
-    `SELECT id, username, email, bio, theme, hidden_notes, preferred_language, totp_secret, is_admin, is_locked, created_at, last_login FROM users WHERE id = ?`,
-    [result.userId],
-  );
+  // Route this request's reads like the user's recent writes (read-your-writes)
+  setRequestUserId(result.userId);
+
+  // Get user, cached briefly (see services/principalCache.js)
+  const user = await principalCache.get(result.userId);
 
   if (!user) {
     return responseHandler.unauthorized(res, 'User not found');
@@ -74,10 +78,8 @@ export const jwtOptional = async (req, _res, next) => {
   const result = jwtService.validateToken(token);
 
   if (result.valid) {
-    const user = await db.queryOne(
-      `SELECT id, username, email, bio, theme, hidden_notes, preferred_language, totp_secret, is_admin, is_locked, created_at, last_login FROM users WHERE id = ?`,
-      [result.userId],
-    );
+    setRequestUserId(result.userId);
+    const user = await principalCache.get(result.userId);
     if (user && !user.is_locked) {
       req.user = user;
       req.userId = user.id;
@@ -96,3 +98,26 @@ export const adminRequired = async (req, res, next) => {
   }
   next();
 };
+
+/**
+ * Answer a request turned away because password hashing is saturated.
+ */
+export function passwordHashBusy(res) {
+  return responseHandler.serviceUnavailable(
+    res,
+    'Too many sign-ins in progress, please retry shortly',
+    PASSWORD_HASH_POOL.RETRY_AFTER,
+  );
+}
+
+/**
+ * Admission control for routes that hash or verify passwords: while the password
+ * hashing queue is full, answer 503 with Retry-After before doing any work.
+ */
+export const passwordHashAdmission = (_req, res, next) => {
+  if (passwordHashPool.isSaturated()) {
+    recordPasswordHashRejection();
+    return passwordHashBusy(res);
+  }
+  next();
+};
@@ -5,6 +5,7 @@
  * Provides default Node.js metrics and custom application metrics.
  */
 import promClient from 'prom-client';
+import { DB_QUERY_FINGERPRINTS } from '../config/constants.js';
 import logger from '../config/logger.js';
 
 // Create a Registry to register metrics
@@ -56,6 +57,122 @@ const dbQueryTotal = new promClient.Counter({
   registers: [register],
 });
 
+// Per-fingerprint query duration (see config/queryFingerprint.js)
+const dbQueryFingerprintDuration = new promClient.Histogram({
+  name: 'db_query_fingerprint_duration_seconds',
+  help: 'Duration of database queries in seconds by normalized query',
+  labelNames: ['fingerprint'],
+  buckets: [0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2],
+  registers: [register],
+});
+
+// Queries slower than DB_SLOW_QUERY_THRESHOLD
+const dbSlowQueries = new promClient.Counter({
+  name: 'db_slow_queries_total',
+  help: 'Total number of queries slower than the slow-query threshold',
+  labelNames: ['fingerprint'],
+  registers: [register],
+});
+
+// Fingerprints with their own label; any beyond MAX_LABELS are reported as 'other'
+const labelledFingerprints = new Set();
+
+// Replica routing decisions for reads (see DatabaseReplication.query)
+const dbReadRouting = new promClient.Counter({
+  name: 'db_read_routing_total',
+  help: 'Read queries routed to replicas or the primary while replication is enabled',
+  labelNames: ['target', 'reason'],
+  registers: [register],
+});
+
+// Per-replica routing state (see DatabaseReplication.selectReplica)
+const dbReplicaSelections = new promClient.Counter({
+  name: 'db_replica_selections_total',
+  help: 'Read queries sent to each replica',
+  labelNames: ['replica'],
+  registers: [register],
+});
+
+const dbReplicaLatency = new promClient.Gauge({
+  name: 'db_replica_latency_ewma_seconds',
+  help: 'Exponentially weighted moving average of replica query latency',
+  labelNames: ['replica'],
+  registers: [register],
+});
+
+const dbReplicaLag = new promClient.Gauge({
+  name: 'db_replica_lag_seconds',
+  help: 'Replica lag measured by the last health check',
+  labelNames: ['replica'],
+  registers: [register],
+});
+
+// MySQL connection pools (see config/mysqlPool.js)
+const dbPoolConnections = new promClient.Gauge({
+  name: 'db_pool_connections',
+  help: 'MySQL pool connections by state (active, idle, queued callers)',
+  labelNames: ['pool', 'state'],
+  registers: [register],
+});
+
+const dbPoolLimit = new promClient.Gauge({
+  name: 'db_pool_limit',
+  help: 'Current MySQL pool size limit (changes with adaptive sizing)',
+  labelNames: ['pool'],
+  registers: [register],
+});
+
+const dbPoolAcquireWait = new promClient.Histogram({
+  name: 'db_pool_acquire_wait_seconds',
+  help: 'Time spent waiting for a MySQL pool connection',
+  labelNames: ['pool'],
+  buckets: [0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5],
+  registers: [register],
+});
+
+// Prepared statement cache (SQLite)
+const statementCacheOperations = new promClient.Counter({
+  name: 'db_statement_cache_operations_total',
+  help: 'Prepared statement cache lookups and evictions',
+  labelNames: ['connection', 'result'],
+  registers: [register],
+});
+
+// SQLite read pool (worker threads)
+const readPoolQueries = new promClient.Counter({
+  name: 'db_read_pool_queries_total',
+  help: 'Read queries executed by SQLite read pool workers',
+  labelNames: ['worker', 'status'],
+  registers: [register],
+});
+
+const readPoolQueryDuration = new promClient.Histogram({
+  name: 'db_read_pool_query_duration_seconds',
+  help: 'Execution time of read queries on SQLite read pool workers',
+  labelNames: ['worker'],
+  buckets: [0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2],
+  registers: [register],
+});
+
+const readPoolQueueWait = new promClient.Histogram({
+  name: 'db_read_pool_queue_wait_seconds',
+  help: 'Time read queries waited for a free SQLite read pool worker',
+  buckets: [0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1],
+  registers: [register],
+});
+
+const readPoolQueueDepth = new promClient.Gauge({
+  name: 'db_read_pool_queue_depth',
+  help: 'Read queries waiting for a SQLite read pool worker',
+  registers: [register],
+});
+
+const readPoolRejections = new promClient.Counter({
+  name: 'db_read_pool_rejections_total',
+  help: 'Read queries rejected because the SQLite read pool queue was full',
+  registers: [register],
+});
+
 // Cache hit/miss counter
 const cacheOperations = new promClient.Counter({
   name: 'cache_operations_total',
@@ -64,6 +181,42 @@ const cacheOperations = new promClient.Counter({
   registers: [register],
 });
 
+// Two-tier cache lookups (l1 = in-process LRU, l2 = Redis)
+const cacheTierLookups = new promClient.Counter({
+  name: 'cache_tier_lookups_total',
+  help: 'Cache lookups by tier and result',
+  labelNames: ['tier', 'result'],
+  registers: [register],
+});
+
+const cacheL1Entries = new promClient.Gauge({
+  name: 'cache_l1_entries',
+  help: 'Number of entries in the in-process L1 cache',
+  registers: [register],
+});
+
+const cacheL1Bytes = new promClient.Gauge({
+  name: 'cache_l1_bytes',
+  help: 'Approximate size of the in-process L1 cache in bytes',
+  registers: [register],
+});
+
+// Cache invalidation cost (generation bump vs. SCAN-based pattern delete)
+const cacheInvalidations = new promClient.Counter({
+  name: 'cache_invalidations_total',
+  help: 'Total number of cache invalidations',
+  labelNames: ['strategy', 'result'],
+  registers: [register],
+});
+
+const cacheInvalidationDuration = new promClient.Histogram({
+  name: 'cache_invalidation_duration_seconds',
+  help: 'Duration of cache invalidations in seconds',
+  labelNames: ['strategy'],
+  buckets: [0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1],
+  registers: [register],
+});
+
 // Application entity metrics
 const notesTotal = new promClient.Gauge({
   name: 'notehub_notes_total',
@@ -144,6 +297,122 @@ const searchDuration = new promClient.Histogram({
   registers: [register],
 });
 
+// Search indexing outbox (asynchronous Elasticsearch writes)
+const searchIndexLag = new promClient.Gauge({
+  name: 'notehub_search_index_lag_seconds',
+  help: 'Age of the oldest note change not yet indexed in Elasticsearch',
+  registers: [register],
+});
+
+const searchOutboxPending = new promClient.Gauge({
+  name: 'notehub_search_outbox_pending',
+  help: 'Number of notes waiting in the search indexing outbox',
+  registers: [register],
+});
+
+const searchOutboxProcessed = new promClient.Counter({
+  name: 'notehub_search_outbox_processed_total',
+  help: 'Outbox entries applied to Elasticsearch',
+  labelNames: ['operation', 'status'],
+  registers: [register],
+});
+
+// Trigger-maintained user/folder counters
+const countersDrift = new promClient.Counter({
+  name: 'notehub_counters_drift_total',
+  help: 'Counter rows found out of sync with their source tables and recomputed',
+  labelNames: ['table'],
+  registers: [register],
+});
+
+// API rate limiter (middleware/rateLimiter.js)
+const rateLimitThrottled = new promClient.Counter({
+  name: 'notehub_rate_limit_throttled_total',
+  help: 'API requests rejected with 429 by the rate limiter',
+  labelNames: ['route_class', 'store'],
+  registers: [register],
+});
+
+const rateLimitLocalFallback = new promClient.Counter({
+  name: 'notehub_rate_limit_local_fallback_total',
+  help: 'Rate limit decisions made in process because Redis was unavailable',
+  registers: [register],
+});
+
+// Password hashing worker pool (services/passwordHashPool.js)
+const passwordHashDuration = new promClient.Histogram({
+  name: 'notehub_password_hash_duration_seconds',
+  help: 'Time bcrypt hashes and comparisons took on password hashing workers',
+  labelNames: ['operation', 'status'],
+  buckets: [0.05, 0.1, 0.25, 0.5, 1, 2, 5],
+  registers: [register],
+});
+
+const passwordHashQueueWait = new promClient.Histogram({
+  name: 'notehub_password_hash_queue_wait_seconds',
+  help: 'Time password hashing jobs waited for a free worker',
+  buckets: [0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10],
+  registers: [register],
+});
+
+const passwordHashQueueDepth = new promClient.Gauge({
+  name: 'notehub_password_hash_queue_depth',
+  help: 'Password hashing jobs waiting for a worker',
+  registers: [register],
+});
+
+const passwordHashRejections = new promClient.Counter({
+  name: 'notehub_password_hash_rejections_total',
+  help: 'Password hashing jobs and requests rejected because the queue was full',
+  registers: [register],
+});
+
+// Authenticated-principal cache (services/principalCache.js)
+const principalCacheLookups = new promClient.Counter({
+  name: 'notehub_principal_cache_lookups_total',
+  help: 'Authenticated user lookups by where they were served from',
+  labelNames: ['result'],
+  registers: [register],
+});
+
+// Write-behind audit log buffer (services/auditBuffer.js)
+const auditBufferDepth = new promClient.Gauge({
+  name: 'notehub_audit_buffer_depth',
+  help: 'Audit log entries waiting to be written',
+  registers: [register],
+});
+
+const auditFlushDuration = new promClient.Histogram({
+  name: 'notehub_audit_flush_duration_seconds',
+  help: 'Duration of audit log buffer flushes',
+  labelNames: ['status'],
+  buckets: [0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1],
+  registers: [register],
+});
+
+const auditEntries = new promClient.Counter({
+  name: 'notehub_audit_entries_total',
+  help: 'Audit log entries by outcome',
+  labelNames: ['result'],
+  registers: [register],
+});
+
+// Chat encryption key cache (PBKDF2-derived room keys)
+const chatKeyCacheOperations = new promClient.Counter({
+  name: 'notehub_chat_key_cache_operations_total',
+  help: 'Chat encryption key cache lookups and evictions',
+  labelNames: ['result'],
+  registers: [register],
+});
+
+const chatKeyDerivationDuration = new promClient.Histogram({
+  name: 'notehub_chat_key_derivation_seconds',
+  help: 'Duration of chat encryption key derivations (cache misses)',
+  labelNames: ['mode'],
+  buckets: [0.01, 0.05, 0.1, 0.25, 0.5, 1],
+  registers: [register],
+});
+
 /**
  * Middleware to track HTTP request metrics
  */
@@ -244,11 +513,111 @@ function normalizeRoute(path) {
 /**
  * Update database metrics
  */
-export function recordDbQuery(operation, duration, success = true) {
+export function recordDbQuery(operation, duration, success = true, fingerprint = null) {
   const status = success ? 'success' : 'error';
 
   dbQueryDuration.observe({ operation, status }, duration / 1000); // Convert to seconds
   dbQueryTotal.inc({ operation, status });
+  if (fingerprint) {
+    dbQueryFingerprintDuration.observe(
+      { fingerprint: fingerprintLabel(fingerprint) },
+      duration / 1000,
+    );
+  }
+}
+
+/**
+ * Record a query slower than the slow-query threshold
+ */
+export function recordSlowQuery(fingerprint) {
+  dbSlowQueries.inc({ fingerprint: fingerprintLabel(fingerprint) });
+}
+
+/**
+ * Bound label cardinality: the first MAX_LABELS fingerprints keep their own label
+ */
+function fingerprintLabel(fingerprint) {
+  if (labelledFingerprints.has(fingerprint)) return fingerprint;
+  if (labelledFingerprints.size >= DB_QUERY_FINGERPRINTS.MAX_LABELS) return 'other';
+  labelledFingerprints.add(fingerprint);
+  return fingerprint;
+}
+
+/**
+ * Record where a read was routed with replication enabled
+ * (reason: balanced, read_your_writes, staleness, unavailable, replica_error)
+ */
+export function recordReadRouting(target, reason) {
+  dbReadRouting.inc({ target, reason });
+}
+
+/**
+ * Record a read sent to a replica
+ */
+export function recordReplicaSelection(replica) {
+  dbReplicaSelections.inc({ replica });
+}
+
+/**
+ * Record a replica's latency EWMA
+ */
+export function recordReplicaLatency(replica, latencyMs) {
+  dbReplicaLatency.set({ replica }, latencyMs / 1000);
+}
+
+/**
+ * Record a replica's measured lag
+ */
+export function recordReplicaLag(replica, lagMs) {
+  dbReplicaLag.set({ replica }, lagMs / 1000);
+}
+
+/**
+ * Record connection counts and limit of a MySQL pool
+ */
+export function recordDbPoolStats(pool, { active, idle, queued, limit }) {
+  dbPoolConnections.set({ pool, state: 'active' }, active);
+  dbPoolConnections.set({ pool, state: 'idle' }, idle);
+  dbPoolConnections.set({ pool, state: 'queued' }, queued);
+  dbPoolLimit.set({ pool }, limit);
+}
+
+/**
+ * Record time spent waiting for a MySQL pool connection
+ */
+export function recordDbPoolAcquire(pool, waitMs) {
+  dbPoolAcquireWait.observe({ pool }, waitMs / 1000);
+}
+
+/**
+ * Record prepared statement cache result (hit, miss, eviction)
+ */
+export function recordStatementCacheOperation(connection, result) {
+  statementCacheOperations.inc({ connection, result });
+}
+
+/**
+ * Record a query executed by a SQLite read pool worker
+ */
+export function recordReadPoolQuery(worker, waitMs, durationMs, success = true) {
+  const status = success ? 'success' : 'error';
+  readPoolQueries.inc({ worker: String(worker), status });
+  readPoolQueryDuration.observe({ worker: String(worker) }, durationMs / 1000);
+  readPoolQueueWait.observe(waitMs / 1000);
+}
+
+/**
+ * Record the number of queries waiting for a SQLite read pool worker
+ */
+export function recordReadPoolQueueDepth(depth) {
+  readPoolQueueDepth.set(depth);
+}
+
+/**
+ * Record a read query rejected by a full SQLite read pool queue
+ */
+export function recordReadPoolRejection() {
+  readPoolRejections.inc();
 }
 
 /**
@@ -258,6 +627,111 @@ export function recordCacheOperation(operation, result) {
   cacheOperations.inc({ operation, result });
 }
 
+/**
+ * Record a cache lookup on one tier (l1 or l2)
+ */
+export function recordCacheTierLookup(tier, result) {
+  cacheTierLookups.inc({ tier, result });
+}
+
+/**
+ * Update L1 cache size gauges
+ */
+export function recordCacheL1Size(entries, bytes) {
+  cacheL1Entries.set(entries);
+  cacheL1Bytes.set(bytes);
+}
+
+/**
+ * Record cache invalidation cost
+ */
+export function recordCacheInvalidation(strategy, duration, success = true) {
+  const result = success ? 'success' : 'error';
+  cacheInvalidations.inc({ strategy, result });
+  cacheInvalidationDuration.observe({ strategy }, duration / 1000); // Convert to seconds
+}
+
+/**
+ * Record a request throttled by the rate limiter (store: redis or local)
+ */
+export function recordRateLimitThrottled(routeClass, store) {
+  rateLimitThrottled.inc({ route_class: routeClass, store });
+}
+
+/**
+ * Record a rate limit decision made in process because Redis was unavailable
+ */
+export function recordRateLimitLocalFallback() {
+  rateLimitLocalFallback.inc();
+}
+
+/**
+ * Record a password hashing job run on a worker (operation: hash or compare)
+ */
+export function recordPasswordHash(operation, waitMs, durationMs, success = true) {
+  const status = success ? 'success' : 'error';
+  passwordHashDuration.observe({ operation, status }, durationMs / 1000);
+  passwordHashQueueWait.observe(waitMs / 1000);
+}
+
+/**
+ * Record the number of password hashing jobs waiting for a worker
+ */
+export function recordPasswordHashQueueDepth(depth) {
+  passwordHashQueueDepth.set(depth);
+}
+
+/**
+ * Record a login or password change turned away because hashing was saturated
+ */
+export function recordPasswordHashRejection() {
+  passwordHashRejections.inc();
+}
+
+/**
+ * Record a principal cache lookup result (local, redis, coalesced, database)
+ */
+export function recordPrincipalCacheLookup(result) {
+  principalCacheLookups.inc({ result });
+}
+
+/**
+ * Record the number of audit log entries waiting in the buffer
+ */
+export function recordAuditBufferDepth(depth) {
+  auditBufferDepth.set(depth);
+}
+
+/**
+ * Record an audit log write: entries written and entries that could not be written
+ */
+export function recordAuditFlush(durationMs, written, failed = 0) {
+  auditFlushDuration.observe({ status: failed > 0 ? 'error' : 'success' }, durationMs / 1000);
+  auditEntries.inc({ result: 'written' }, written);
+  auditEntries.inc({ result: 'failed' }, failed);
+}
+
+/**
+ * Record audit log entries dropped because the buffer was full
+ */
+export function recordAuditDropped() {
+  auditEntries.inc({ result: 'dropped' });
+}
+
+/**
+ * Record chat encryption key cache result (hit, miss, coalesced, eviction)
+ */
+export function recordChatKeyCacheOperation(result) {
+  chatKeyCacheOperations.inc({ result });
+}
+
+/**
+ * Record chat encryption key derivation duration
+ */
+export function recordChatKeyDerivation(mode, duration) {
+  chatKeyDerivationDuration.observe({ mode }, duration / 1000); // Convert to seconds
+}
+
 /**
  * Update application-specific metrics
  */
@@ -316,6 +790,29 @@ export function recordSearchOperation(engine, duration, success = true) {
   searchDuration.observe({ engine }, duration / 1000); // Convert to seconds
 }
 
+/**
+ * Record outbox entries applied to (or rejected by) Elasticsearch
+ */
+export function recordSearchOutboxProcessed(operation, count, success = true) {
+  const status = success ? 'success' : 'failure';
+  searchOutboxProcessed.inc({ operation, status }, count);
+}
+
+/**
+ * Record search outbox backlog size and indexing lag
+ */
+export function recordSearchOutboxBacklog(pending, lagSeconds) {
+  searchOutboxPending.set(pending);
+  searchIndexLag.set(lagSeconds);
+}
+
+/**
+ * Record counter rows recomputed by the counter reconciliation job
+ */
+export function recordCounterDrift(table, rows) {
+  countersDrift.inc({ table }, rows);
+}
+
 /**
  * Metrics endpoint handler
  */
@@ -0,0 +1,179 @@
+/**
+ * Distributed API rate limiter.
+ *
+ * Every client has a token bucket holding RATE_LIMIT.CAPACITY tokens that refills over
+ * RATE_LIMIT.WINDOW seconds. Clients are authenticated users (by the user ID in a valid
+ * access token), or IP addresses for anonymous requests, so users behind one NAT no
+ * longer share a budget. Requests take one token, or RATE_LIMIT.COSTS[class] for the
+ * expensive route classes below; without enough tokens they get 429 with Retry-After.
+ *
+ * Buckets live in Redis and are updated by one Lua script, so all instances share
+ * them atomically. When Redis is unavailable, each instance keeps its own buckets in
+ * process instead (a client then gets the budget once per instance).
+ */
+
+import { RATE_LIMIT } from '../config/constants.js';
+import LocalCache from '../config/localCache.js';
+import logger from '../config/logger.js';
+import cache from '../config/redis.js';
+import jwtService from '../services/jwtService.js';
+import { recordRateLimitLocalFallback, recordRateLimitThrottled } from './metrics.js';
+
+// Route classes with their own cost. Paths are relative to /api, without /v1.
+const ROUTE_CLASSES = [
+  {
+    name: 'ai',
+    matches: (_method, path) => path.startsWith('/ai/') && path !== '/ai/status',
+  },
+  {
+    name: 'import',
+    matches: (method, path) => method === 'POST' && path === '/export/import',
+  },
+  {
+    name: 'search',
+    matches: (method, path, query) =>
+      /^\/(users\/search|chat\/rooms\/[^/]+\/search)$/.test(path) ||
+      (method === 'GET' && /^\/notes\/?$/.test(path) && Boolean(query.q)),
+  },
+];
+
+// KEYS[1]: bucket; ARGV: capacity, tokens per ms, cost.
+// Returns { allowed (0/1), tokens left (floored), ms until cost tokens are available }.
+// Time comes from the Redis server, so instances with skewed clocks share one timeline.
+const TAKE_TOKENS_LUA = `
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  wait = math.ceil((cost - tokens) / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 1000)
+return { allowed, math.floor(tokens), wait }
+`;
+
+// ioredis clients the script has been registered on (EVALSHA with EVAL fallback)
+const scriptedClients = new WeakSet();
+
+/**
+ * Route class of a request, or 'default'.
+ */
+export function routeClass(req) {
+  const path = req.path.replace(/^\/v\d+(?=\/)/, '');
+  const match = ROUTE_CLASSES.find(({ matches }) => matches(req.method, path, req.query ?? {}));
+  return match?.name ?? 'default';
+}
+
+/**
+ * Bucket identity: the authenticated user if the request carries a valid access
+ * token, otherwise the client IP.
+ */
+export function clientKey(req) {
+  const header = req.headers.authorization;
+  if (header?.toLowerCase().startsWith('bearer ')) {
+    const result = jwtService.validateToken(header.slice(7).trim());
+    if (result.valid) {
+      return `user:${result.userId}`;
+    }
+  }
+  return `ip:${req.ip}`;
+}
+
+async function takeFromRedis(client, key, capacity, rate, cost) {
+  if (!scriptedClients.has(client)) {
+    client.defineCommand('rateLimitTake', { numberOfKeys: 1, lua: TAKE_TOKENS_LUA });
+    scriptedClients.add(client);
+  }
+  const [allowed, remaining, wait] = await client.rateLimitTake(key, capacity, rate, cost);
+  return { allowed: allowed === 1, remaining, wait };
+}
+
+/**
+ * Same token bucket as TAKE_TOKENS_LUA, on an in-process LocalCache and the process clock.
+ */
+function takeFromLocal(buckets, key, capacity, rate, cost, now) {
+  const bucket = buckets.get(key);
+  let tokens = bucket
+    ? Math.min(capacity, bucket.tokens + Math.max(0, now - bucket.ts) * rate)
+    : capacity;
+
+  const allowed = tokens >= cost;
+  const wait = allowed ? 0 : Math.ceil((cost - tokens) / rate);
+  if (allowed) {
+    tokens -= cost;
+  }
+
+  // Drop the bucket once it would be full again
+  buckets.set(key, { tokens, ts: now }, Math.ceil((capacity - tokens) / rate / 1000) + 1, 1);
+  return { allowed, remaining: Math.floor(tokens), wait };
+}
+
+/**
+ * Create the rate limiting middleware.
+ * @param {object} options - { capacity, window (seconds), costs, skip(req) }
+ */
+export function createRateLimiter(options = {}) {
+  const {
+    capacity = RATE_LIMIT.CAPACITY,
+    window = RATE_LIMIT.WINDOW,
+    costs = RATE_LIMIT.COSTS,
+    skip = () => false,
+  } = options;
+  const rate = capacity / (window * 1000); // tokens per ms
+  const localBuckets = new LocalCache({ maxEntries: RATE_LIMIT.LOCAL_MAX_ENTRIES });
+  let redisFailing = false;
+
+  return async (req, res, next) => {
+    if (skip(req)) return next();
+
+    const routeClassName = routeClass(req);
+    // A cost above the capacity could never be paid
+    const cost = Math.min(capacity, costs[routeClassName] ?? 1);
+    const key = `ratelimit:${clientKey(req)}`;
+
+    let result = null;
+    let store = 'redis';
+    if (cache.isEnabled() && cache.client) {
+      try {
+        result = await takeFromRedis(cache.client, key, capacity, rate, cost);
+        if (redisFailing) {
+          redisFailing = false;
+          logger.info('Rate limiter is using Redis again');
+        }
+      } catch (error) {
+        if (!redisFailing) {
+          redisFailing = true;
+          logger.warn('Rate limiter falling back to in-process buckets:', error.message);
+        }
+      }
+    }
+    if (!result) {
+      store = 'local';
+      recordRateLimitLocalFallback();
+      result = takeFromLocal(localBuckets, key, capacity, rate, cost, Date.now());
+    }
+
+    res.set('RateLimit-Limit', String(capacity));
+    res.set('RateLimit-Remaining', String(Math.max(0, result.remaining)));
+    if (!result.allowed) {
+      recordRateLimitThrottled(routeClassName, store);
+      res.set('Retry-After', String(Math.max(1, Math.ceil(result.wait / 1000))));
+      return res.status(429).json({ error: 'Too many requests, please try again later' });
+    }
+    next();
+  };
+}
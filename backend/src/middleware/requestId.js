@@ -4,8 +4,37 @@
  * Generates a unique request ID for each incoming request.
  * This helps with debugging and log correlation.
  */
+import { AsyncLocalStorage } from 'node:async_hooks';
 import { v4 as uuidv4 } from 'uuid';
 
+// Carries the request ID through async calls (e.g. into the slow-query log). The database
+// layer also records the request's user and last write here for read-your-writes routing.
+const requestContext = new AsyncLocalStorage();
+
+/**
+ * Get the context of the request being handled, if any
+ */
+export function getRequestContext() {
+  return requestContext.getStore();
+}
+
+/**
+ * Get the ID of the request being handled, if any
+ */
+export function getRequestId() {
+  return requestContext.getStore()?.requestId;
+}
+
+/**
+ * Attach the authenticated user to the current request context
+ */
+export function setRequestUserId(userId) {
+  const context = requestContext.getStore();
+  if (context) {
+    context.userId = userId;
+  }
+}
+
 /**
  * Middleware to add unique request ID to each request
  */
@@ -19,7 +48,7 @@ function requestIdMiddleware(req, res, next) {
   // Add to response headers for client tracking
   res.setHeader('X-Request-ID', requestId);
 
-  next();
+  requestContext.run({ requestId }, next);
 }
 
 export default requestIdMiddleware;
@@ -3,25 +3,26 @@
  * Provides a consistent interface for database operations across SQLite and MySQL.
  */
 
-import fs from 'node:fs';
-import path from 'node:path';
 import { DataTypes, Sequelize } from 'sequelize';
+import db from '../config/database.js';
 import logger from '../config/logger.js';
+import { attachSharedPool, sqliteDialectModule } from './sharedConnection.js';
 
 let sequelize = null;
 
 /**
- * Initialize Sequelize connection based on environment.
+ * Initialize Sequelize on the connection of the Database wrapper (config/database.js),
+ * which is connected first if needed. Both share one SQLite handle or MySQL pool; only
+ * DATABASE_URL, which the wrapper does not use, gets a connection of its own.
  */
 export async function initializeSequelize() {
-  const dbPath = process.env.NOTES_DB_PATH;
-  const mysqlHost = process.env.MYSQL_HOST;
   const databaseUrl = process.env.DATABASE_URL;
+  const logging = process.env.NODE_ENV === 'development' ? (msg) => logger.debug(msg) : false;
 
   // Production: Use DATABASE_URL if provided
   if (databaseUrl) {
     sequelize = new Sequelize(databaseUrl, {
-      logging: process.env.NODE_ENV === 'development' ? (msg) => logger.debug(msg) : false,
+      logging,
       dialectOptions: {
         ssl: {
           require: true,
@@ -30,63 +31,32 @@ export async function initializeSequelize() {
       },
     });
     logger.info('🌐 Connected to cloud database via DATABASE_URL');
-  }
-  // MySQL if MYSQL_HOST is set and no NOTES_DB_PATH
-  else if (mysqlHost && !dbPath) {
-    const sslDisabled =
-      process.env.MYSQL_SSL_DISABLED === 'true' ||
-      mysqlHost === 'localhost' ||
-      mysqlHost === '127.0.0.1' ||
-      mysqlHost === 'mysql' ||
-      mysqlHost.startsWith('10.') ||
-      mysqlHost.startsWith('172.') ||
-      mysqlHost.startsWith('192.168.');
-
-    sequelize = new Sequelize({
-      dialect: 'mysql',
-      host: mysqlHost,
-      port: parseInt(process.env.MYSQL_PORT || '3306', 10),
-      username: process.env.MYSQL_USER || 'root',
-      password: process.env.MYSQL_PASSWORD || '',
-      database: process.env.MYSQL_DATABASE || 'notehub',
-      logging: process.env.NODE_ENV === 'development' ? (msg) => logger.debug(msg) : false,
-      dialectOptions: sslDisabled
-        ? {}
-        : {
-            ssl: {
-              require: true,
-              rejectUnauthorized: false,
-            },
-          },
-      pool: {
-        max: 10,
-        min: 0,
-        acquire: 30000,
-        idle: 10000,
-      },
-    });
-    logger.info(`🐬 Connected to MySQL: ${mysqlHost}`);
-  }
-  // Default: SQLite
-  else {
-    const resolvedPath = dbPath
-      ? path.isAbsolute(dbPath)
-        ? dbPath
-        : path.resolve(process.cwd(), dbPath)
-      : path.resolve(process.cwd(), 'data', 'notes.db');
-
-    // Ensure directory exists
-    const dir = path.dirname(resolvedPath);
-    if (!fs.existsSync(dir)) {
-      fs.mkdirSync(dir, { recursive: true });
+  } else {
+    if (!db.db) {
+      await db.connect();
     }
 
-    sequelize = new Sequelize({
-      dialect: 'sqlite',
-      storage: resolvedPath,
-      logging: process.env.NODE_ENV === 'development' ? (msg) => logger.debug(msg) : false,
-    });
-    logger.info(`📦 Connected to SQLite: ${resolvedPath}`);
+    if (db.isSQLite) {
+      sequelize = new Sequelize({
+        dialect: 'sqlite',
+        storage: db.db.name,
+        dialectModule: sqliteDialectModule(db),
+        logging,
+      });
+      logger.info(`📦 Sequelize sharing the SQLite connection: ${db.db.name}`);
+    } else {
+      // Sequelize normally detects the server version on its first own connection
+      const [[{ version }]] = await db.db.query('SELECT VERSION() AS version');
+      sequelize = new Sequelize({
+        dialect: 'mysql',
+        host: process.env.MYSQL_HOST,
+        database: process.env.MYSQL_DATABASE || 'notehub',
+        databaseVersion: version.match(/^\d+\.\d+\.\d+/)?.[0] ?? 0,
+        logging,
+      });
+      attachSharedPool(sequelize, db);
+      logger.info('🐬 Sequelize sharing the MySQL connection pool');
+    }
   }
 
   // Define models
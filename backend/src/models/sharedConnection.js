@@ -0,0 +1,251 @@
+/**
+ * Run Sequelize on the connections of the Database wrapper (config/database.js) instead
+ * of a second connection stack, so chat and note traffic share one SQLite handle or one
+ * MySQL pool: the same connection limit, pool and query metrics, and slow-query log.
+ *
+ * - SQLite: Sequelize's sqlite dialect is written against the node-sqlite3 API.
+ *   sqliteDialectModule implements the part of that API Sequelize uses on top of the
+ *   shared better-sqlite3 handle, so there is a single writer and no SQLITE_BUSY between
+ *   two handles competing for the WAL lock. Sequelize transactions take the handle's
+ *   transaction lock (config/sqliteLock.js) from BEGIN to COMMIT/ROLLBACK, like
+ *   Database.transaction(), so other statements never run inside them.
+ * - MySQL: attachSharedPool makes the connection manager check connections out of the
+ *   shared pool and return them after each query (or at the end of a transaction).
+ */
+
+import { DataTypes } from 'sequelize';
+
+// node-sqlite3 open flags; Sequelize reads them from the dialect module
+const OPEN_READONLY = 0x00000001;
+const OPEN_READWRITE = 0x00000002;
+const OPEN_CREATE = 0x00000004;
+
+function operationOf(sql) {
+  return sql.trim().split(/\s+/)[0].toUpperCase();
+}
+
+/**
+ * 'begin' or 'end' for statements that open or close a transaction (not savepoints).
+ */
+function transactionBoundary(sql) {
+  if (/^\s*BEGIN\b/i.test(sql)) return 'begin';
+  if (/^\s*(COMMIT|END|ROLLBACK)\b(?!\s+(TRANSACTION\s+)?TO\b)/i.test(sql)) return 'end';
+  return null;
+}
+
+/**
+ * Bind values the way node-sqlite3 does: booleans as 0/1 and dates as epoch ms
+ * (better-sqlite3 rejects both).
+ */
+function toSqliteValue(value) {
+  if (typeof value === 'boolean') return value ? 1 : 0;
+  if (value instanceof Date) return value.getTime();
+  return value === undefined ? null : value;
+}
+
+/**
+ * Convert node-sqlite3 parameters into better-sqlite3 arguments. Sequelize binds named
+ * parameters as { $1: value }; better-sqlite3 expects the names without their prefix.
+ */
+function toSqliteArgs(params) {
+  if (Array.isArray(params)) {
+    return params.map(toSqliteValue);
+  }
+  const entries = Object.entries(params ?? {});
+  if (entries.length === 0) {
+    return [];
+  }
+  const named = {};
+  for (const [key, value] of entries) {
+    named[key.replace(/^[$:@]/, '')] = toSqliteValue(value);
+  }
+  return [named];
+}
+
+/**
+ * Build a node-sqlite3 compatible module (pass as Sequelize's dialectModule) whose
+ * connections all run on database.db, the shared better-sqlite3 handle.
+ */
+export function sqliteDialectModule(database) {
+  class SharedDatabase {
+    constructor(filename, mode, callback) {
+      this.filename = filename;
+      const error =
+        database.isSQLite && database.db ? null : new Error('SQLite database is not connected');
+      setImmediate(() => callback?.(error));
+    }
+
+    // better-sqlite3 is synchronous, so statements already run in call order
+    serialize(fn) {
+      fn?.();
+    }
+
+    all(sql, params, callback) {
+      this.execute('all', sql, params, callback);
+    }
+
+    get(sql, params, callback) {
+      this.execute('get', sql, params, callback);
+    }
+
+    run(sql, params, callback) {
+      this.execute('run', sql, params, callback);
+    }
+
+    exec(sql, callback) {
+      database.sqliteLock
+        .run(() => {
+          try {
+            database.db.exec(sql);
+            return null;
+          } catch (execError) {
+            return execError;
+          }
+        }, this)
+        .then((error) => setImmediate(() => callback?.(error)));
+    }
+
+    // The shared handle is closed by Database.close()
+    close(callback) {
+      setImmediate(() => callback?.(null));
+    }
+
+    /**
+     * Run sql and call back like node-sqlite3: with (error, rows) and `this` set to
+     * { lastID, changes } for writes.
+     */
+    execute(method, sql, params, callback) {
+      if (typeof params === 'function') {
+        callback = params;
+        params = [];
+      }
+      const args = toSqliteArgs(params);
+      const finish = ({ error, result, context }) =>
+        setImmediate(() => callback?.call(context, error, result));
+
+      const boundary = transactionBoundary(sql);
+      if (boundary === 'begin') {
+        database.sqliteLock.acquire(this).then((release) => {
+          const outcome = this.runStatement(method, sql, args);
+          if (outcome.error) {
+            release();
+          } else {
+            this.releaseLock = release;
+          }
+          finish(outcome);
+        });
+      } else if (boundary === 'end' && this.releaseLock) {
+        const outcome = this.runStatement(method, sql, args);
+        // A failed COMMIT leaves the transaction open for Sequelize to roll back
+        if (!database.db.inTransaction) {
+          this.releaseLock();
+          this.releaseLock = null;
+        }
+        finish(outcome);
+      } else {
+        database.sqliteLock.run(() => this.runStatement(method, sql, args), this).then(finish);
+      }
+    }
+
+    runStatement(method, sql, args) {
+      const startTime = Date.now();
+      const context = {};
+      let error = null;
+      let result;
+
+      try {
+        // Not the shared statement cache: Sequelize inlines literals, so its SQL text
+        // rarely repeats and would evict the wrapper's hot statements
+        const statement = database.db.prepare(sql);
+        if (method !== 'run' && statement.reader) {
+          result = method === 'get' ? statement.get(...args) : statement.all(...args);
+        } else {
+          const info = statement.run(...args);
+          context.lastID = Number(info.lastInsertRowid);
+          context.changes = info.changes;
+          result = method === 'all' ? [] : undefined;
+        }
+      } catch (queryError) {
+        error = queryError;
+      }
+
+      database.recordQuery(sql, args, operationOf(sql), Date.now() - startTime, error === null);
+      return { error, result, context };
+    }
+  }
+
+  return { Database: SharedDatabase, OPEN_READONLY, OPEN_READWRITE, OPEN_CREATE };
+}
+
+/**
+ * mysql2 typeCast matching the one Sequelize's mysql dialect installs on its own
+ * connections: fields of a type that has a mysql data type with a static parse() (DATETIME
+ * in the configured time zone, DATE as a string, GEOMETRY as GeoJSON, ...) go through
+ * that parser, everything else through mysql2's default.
+ */
+export function mysqlTypeCast(options) {
+  const parsers = new Map();
+  for (const dataType of Object.values(DataTypes.mysql)) {
+    if (Object.hasOwn(dataType, 'parse')) {
+      for (const type of dataType.types?.mysql ?? []) {
+        parsers.set(type, dataType.parse);
+      }
+    }
+  }
+
+  return (field, next) => {
+    const parse = parsers.get(field.type);
+    return parse ? parse(field, options, next) : next();
+  };
+}
+
+/**
+ * Wrap a connection checked out of the shared MySQL pool in the callback API Sequelize's
+ * mysql dialect uses. Results are type-cast like on the connections Sequelize opens
+ * itself (see mysqlTypeCast), and every query is recorded like the wrapper's.
+ */
+function sharedMySQLConnection(sequelize, database, poolConnection, typeCast) {
+  const core = poolConnection.connection;
+  const { timezone } = sequelize.options;
+
+  const timed = (sql, params, callback, send) => {
+    const startTime = Date.now();
+    return send((error, ...results) => {
+      database.recordQuery(sql, params, operationOf(sql), Date.now() - startTime, !error);
+      callback(error, ...results);
+    });
+  };
+
+  return {
+    query(options, callback) {
+      const queryOptions = typeof options === 'string' ? { sql: options } : options;
+      return timed(queryOptions.sql, [], callback, (done) =>
+        core.query({ ...queryOptions, typeCast, timezone }, done),
+      );
+    },
+    execute(sql, params, callback) {
+      return timed(sql, params, callback, (done) =>
+        core.execute({ sql, values: params, typeCast, timezone }, done),
+      );
+    },
+    release() {
+      poolConnection.release();
+    },
+  };
+}
+
+/**
+ * Make sequelize acquire connections from database.db, the shared MySQL pool, instead of
+ * its own pool. Connections count against the pool limit while a query or transaction
+ * holds them.
+ */
+export function attachSharedPool(sequelize, database) {
+  const { connectionManager } = sequelize;
+  const typeCast = mysqlTypeCast(sequelize.options);
+
+  connectionManager.getConnection = async () =>
+    sharedMySQLConnection(sequelize, database, await database.db.getConnection(), typeCast);
+  connectionManager.releaseConnection = async (connection) => connection.release();
+  // The shared pool is ended by Database.close()
+  connectionManager.close = async () => undefined;
+}
@@ -4,6 +4,7 @@
 import express from 'express';
 import logger from '../config/logger.js';
 import AuditService from '../services/auditService.js';
+import principalCache from '../services/principalCache.js';
 
 const router = express.Router();
 
@@ -113,6 +114,7 @@ router.post('/users/:userId/disable-2fa', jwtRequired, adminRequired, async (req
 
     // Disable 2FA
     await db.run(`UPDATE users SET totp_secret = NULL WHERE id = ?`, [userId]);
+    await principalCache.invalidate(userId);
 
     // Log admin action for audit trail
     // TODO: Consider using a proper logging framework (winston, pino) in production
@@ -167,6 +169,7 @@ router.post('/users/:userId/lock', jwtRequired, adminRequired, async (req, res)
 
     // Lock user
     await db.run(`UPDATE users SET is_locked = 1 WHERE id = ?`, [userId]);
+    await principalCache.invalidate(userId);
 
     // Log admin action for audit trail
     logger.info(`[SECURITY AUDIT] Admin ID: ${req.userId} locked user ID: ${userId}`);
@@ -211,6 +214,7 @@ router.post('/users/:userId/unlock', jwtRequired, adminRequired, async (req, res
 
     // Unlock user
     await db.run(`UPDATE users SET is_locked = 0 WHERE id = ?`, [userId]);
+    await principalCache.invalidate(userId);
 
     // Log admin action for audit trail
     logger.info(`[SECURITY AUDIT] Admin ID: ${req.userId} unlocked user ID: ${userId}`);
@@ -259,6 +263,7 @@ router.delete('/users/:userId', jwtRequired, adminRequired, async (req, res) =>
 
     // Delete user and all associated data (cascade deletes handled by foreign keys)
     await db.run(`DELETE FROM users WHERE id = ?`, [userId]);
+    await principalCache.invalidate(userId);
 
     // Log admin action for audit trail
     logger.info(
@@ -300,6 +305,7 @@ router.post('/users/:userId/grant-admin', jwtRequired, adminRequired, async (req
 
     // Grant admin privileges
     await db.run(`UPDATE users SET is_admin = 1 WHERE id = ?`, [userId]);
+    await principalCache.invalidate(userId);
 
     // Log admin action for audit trail
     logger.info(
@@ -356,6 +362,7 @@ router.post('/users/:userId/revoke-admin', jwtRequired, adminRequired, async (re
 
     // Revoke admin privileges
     await db.run(`UPDATE users SET is_admin = 0 WHERE id = ?`, [userId]);
+    await principalCache.invalidate(userId);
 
     // Log admin action for audit trail
     logger.info(
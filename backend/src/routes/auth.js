@@ -11,7 +11,7 @@ import jwt from 'jsonwebtoken';
 import { authenticator } from 'otplib';
 import QRCode from 'qrcode';
 import db from '../config/database.js';
-import { jwtRequired } from '../middleware/auth.js';
+import { jwtRequired, passwordHashAdmission, passwordHashBusy } from '../middleware/auth.js';
 import { record2FAOperation, recordAuthAttempt } from '../middleware/metrics.js';
 import {
   sanitizeStrings,
@@ -23,107 +23,117 @@ import AuthService from '../services/authService.js';
 import emailService from '../services/emailService.js';
 import googleOAuthService from '../services/googleOAuthService.js';
 import jwtService from '../services/jwtService.js';
+import principalCache from '../services/principalCache.js';
 import * as responseHandler from '../utils/responseHandler.js';
 
 /**
  * POST /api/auth/login - User login
  */
-router.post('/login', sanitizeStrings(['username', 'password']), async (req, res) => {
-  try {
-    const { username, password, totp_code } = req.body;
+router.post(
+  '/login',
+  passwordHashAdmission,
+  sanitizeStrings(['username', 'password']),
+  async (req, res) => {
+    try {
+      const { username, password, totp_code } = req.body;
 
-    if (!username || !password) {
-      recordAuthAttempt('password', false, 'password_required');
-      return responseHandler.validationError(res, {
-        missingFields: ['username', 'password'],
-        message: 'Username/email and password required',
-      });
-    }
+      if (!username || !password) {
+        recordAuthAttempt('password', false, 'password_required');
+        return responseHandler.validationError(res, {
+          missingFields: ['username', 'password'],
+          message: 'Username/email and password required',
+        });
+      }
 
-    const user = await AuthService.authenticateUser(username, password);
+      const user = await AuthService.authenticateUser(username, password);
 
-    if (!user) {
-      recordAuthAttempt('password', false, 'invalid_credentials');
-      return responseHandler.unauthorized(res, 'Invalid credentials');
-    }
-
-    // Check 2FA if enabled
-    if (user.totp_secret && !totp_code) {
-      record2FAOperation('verify', false);
-      recordAuthAttempt('password', false, '2fa_code_required');
-      return responseHandler.error(res, '2FA code required', {
-        statusCode: 401,
-        errorCode: 'REQUIRES_2FA',
-        details: { requires_2fa: true },
-      });
-    }
+      if (!user) {
+        recordAuthAttempt('password', false, 'invalid_credentials');
+        return responseHandler.unauthorized(res, 'Invalid credentials');
+      }
 
-    if (user.totp_secret) {
-      const isValidTotp = authenticator.verify({ token: totp_code, secret: user.totp_secret });
-      if (!isValidTotp) {
+      // Check 2FA if enabled
+      if (user.totp_secret && !totp_code) {
         record2FAOperation('verify', false);
-        recordAuthAttempt('password', false, 'invalid_2fa');
-        return responseHandler.unauthorized(res, 'Invalid 2FA code');
+        recordAuthAttempt('password', false, '2fa_code_required');
+        return responseHandler.error(res, '2FA code required', {
+          statusCode: 401,
+          errorCode: 'REQUIRES_2FA',
+          details: { requires_2fa: true },
+        });
       }
-      record2FAOperation('verify', true);
-    }
 
-    // Generate tokens with rotation
-    const accessToken = jwtService.generateToken(user.id);
-    const { token: refreshToken, tokenId } = jwtService.generateRefreshToken(user.id);
+      if (user.totp_secret) {
+        const isValidTotp = authenticator.verify({ token: totp_code, secret: user.totp_secret });
+        if (!isValidTotp) {
+          record2FAOperation('verify', false);
+          recordAuthAttempt('password', false, 'invalid_2fa');
+          return responseHandler.unauthorized(res, 'Invalid 2FA code');
+        }
+        record2FAOperation('verify', true);
+      }
 
-    // Store refresh token in database
-    const expiresAt = new Date();
-    expiresAt.setDate(expiresAt.getDate() + 7);
-    const deviceInfo = req.headers['user-agent'] || null;
-    const ipAddress = req.ip || req.connection.remoteAddress || null;
+      // Generate tokens with rotation
+      const accessToken = jwtService.generateToken(user.id);
+      const { token: refreshToken, tokenId } = jwtService.generateRefreshToken(user.id);
+
+      // Store refresh token in database
+      const expiresAt = new Date();
+      expiresAt.setDate(expiresAt.getDate() + 7);
+      const deviceInfo = req.headers['user-agent'] || null;
+      const ipAddress = req.ip || req.connection.remoteAddress || null;
+
+      await jwtService.storeRefreshToken(
+        user.id,
+        tokenId,
+        expiresAt.toISOString(),
+        deviceInfo,
+        ipAddress,
+      );
 
-    await jwtService.storeRefreshToken(
-      user.id,
-      tokenId,
-      expiresAt.toISOString(),
-      deviceInfo,
-      ipAddress,
-    );
+      // Update last login
+      await AuthService.updateLastLogin(user.id);
 
-    // Update last login
-    await AuthService.updateLastLogin(user.id);
+      // Record successful authentication
+      recordAuthAttempt('password', true, 'none');
 
-    // Record successful authentication
-    recordAuthAttempt('password', true, 'none');
-
-    return responseHandler.success(
-      res,
-      {
-        access_token: accessToken,
-        refresh_token: refreshToken,
-        token_type: 'Bearer',
-        expires_in: 86400, // 24 hours
-        user: {
-          id: user.id,
-          username: user.username,
-          email: user.email,
-          preferred_language: user.preferred_language || 'en',
-          has_2fa: !!user.totp_secret,
-          is_admin: user.is_admin || false,
+      return responseHandler.success(
+        res,
+        {
+          access_token: accessToken,
+          refresh_token: refreshToken,
+          token_type: 'Bearer',
+          expires_in: 86400, // 24 hours
+          user: {
+            id: user.id,
+            username: user.username,
+            email: user.email,
+            preferred_language: user.preferred_language || 'en',
+            has_2fa: !!user.totp_secret,
+            is_admin: user.is_admin || false,
+          },
         },
-      },
-      { message: 'Login successful' },
-    );
-  } catch (error) {
-    logger.error('Login error:', error);
-    return responseHandler.error(res, 'Internal server error', {
-      statusCode: 500,
-      errorCode: 'LOGIN_ERROR',
-    });
-  }
-});
+        { message: 'Login successful' },
+      );
+    } catch (error) {
+      if (error.code === 'PASSWORD_HASH_POOL_FULL') {
+        return passwordHashBusy(res);
+      }
+      logger.error('Login error:', error);
+      return responseHandler.error(res, 'Internal server error', {
+        statusCode: 500,
+        errorCode: 'LOGIN_ERROR',
+      });
+    }
+  },
+);
 
 /**
  * POST /api/auth/register - User registration
  */
 router.post(
   '/register',
+  passwordHashAdmission,
   sanitizeStrings(['username', 'password', 'email']),
   validateRequiredFields(['username', 'password']),
   validateLength('username', { min: 3, max: 50 }),
@@ -148,6 +158,9 @@ router.post(
         'Registration successful',
       );
     } catch (error) {
+      if (error.code === 'PASSWORD_HASH_POOL_FULL') {
+        return passwordHashBusy(res);
+      }
       logger.error('Registration error:', error);
       return responseHandler.error(res, 'Internal server error', {
         statusCode: 500,
@@ -202,7 +215,7 @@ router.get('/validate', jwtRequired, (req, res) => {
         bio: req.user.bio,
         theme: req.user.theme,
         preferred_language: req.user.preferred_language || 'en',
-        has_2fa: !!req.user.totp_secret,
+        has_2fa: !!req.user.has_2fa,
         is_admin: req.user.is_admin || false,
         created_at: req.user.created_at,
       },
@@ -273,7 +286,7 @@ router.post('/forgot-password', async (req, res) => {
 /**
  * POST /api/auth/reset-password - Reset password with token
  */
-router.post('/reset-password', async (req, res) => {
+router.post('/reset-password', passwordHashAdmission, async (req, res) => {
   try {
     const { token, password } = req.body;
 
@@ -289,6 +302,9 @@ router.post('/reset-password', async (req, res) => {
 
     res.json({ message: 'Password reset successful' });
   } catch (error) {
+    if (error.code === 'PASSWORD_HASH_POOL_FULL') {
+      return passwordHashBusy(res);
+    }
     logger.error('Reset password error:', error);
     res.status(500).json({ error: 'Internal server error' });
   }
@@ -297,7 +313,7 @@ router.post('/reset-password', async (req, res) => {
 /**
  * POST /api/auth/change-password - Change password (authenticated)
  */
-router.post('/change-password', jwtRequired, async (req, res) => {
+router.post('/change-password', jwtRequired, passwordHashAdmission, async (req, res) => {
   try {
     const { current_password, new_password } = req.body;
 
@@ -313,6 +329,9 @@ router.post('/change-password', jwtRequired, async (req, res) => {
 
     res.json({ message: 'Password changed successfully' });
   } catch (error) {
+    if (error.code === 'PASSWORD_HASH_POOL_FULL') {
+      return passwordHashBusy(res);
+    }
     logger.error('Change password error:', error);
     res.status(500).json({ error: 'Internal server error' });
   }
@@ -357,6 +376,7 @@ router.post('/2fa/enable', jwtRequired, async (req, res) => {
     }
 
     await db.run(`UPDATE users SET totp_secret = ? WHERE id = ?`, [secret, req.userId]);
+    await principalCache.invalidate(req.userId);
 
     record2FAOperation('enable', true);
 
@@ -378,13 +398,14 @@ router.post('/2fa/enable', jwtRequired, async (req, res) => {
  */
 router.post('/2fa/disable', jwtRequired, async (req, res) => {
   try {
-    if (!req.user.totp_secret) {
+    if (!req.user.has_2fa) {
       record2FAOperation('disable', false);
       return res.status(400).json({ error: '2FA is not enabled' });
     }
 
     // Disable 2FA without requiring OTP code
     await db.run(`UPDATE users SET totp_secret = NULL WHERE id = ?`, [req.userId]);
+    await principalCache.invalidate(req.userId);
 
     // Log security event
     // TODO: Consider using a proper logging framework (winston, pino) in production
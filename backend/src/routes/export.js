@@ -9,6 +9,8 @@ const router = express.Router();
 
 import db from '../config/database.js';
 import { jwtRequired } from '../middleware/auth.js';
+import NoteService from '../services/noteService.js';
+import searchOutbox from '../services/searchOutbox.js';
 import * as responseHandler from '../utils/responseHandler.js';
 
 /**
@@ -138,78 +140,94 @@ router.post('/import', jwtRequired, async (req, res) => {
         }
 
         try {
-          if (existing && overwrite) {
-            // Update existing note
-            await db.run(
-              `UPDATE notes 
-               SET body = ?, pinned = ?, favorite = ?, archived = ?, images = ?
-               WHERE id = ?`,
-              [
-                noteData.body,
-                noteData.pinned ? 1 : 0,
-                noteData.favorite ? 1 : 0,
-                noteData.archived ? 1 : 0,
-                noteData.images ? JSON.stringify(noteData.images) : null,
-                existing.id,
-              ],
-            );
+          const rendered = NoteService.renderContent(noteData.body);
 
-            // Remove existing tags
-            await db.run(`DELETE FROM note_tag WHERE note_id = ?`, [existing.id]);
+          // Note, tags and search outbox entry are written atomically
+          await db.transaction(async (tx) => {
+            const insertIgnore = tx.isSQLite ? 'INSERT OR IGNORE' : 'INSERT IGNORE';
 
-            // Add new tags
-            if (noteData.tags && Array.isArray(noteData.tags)) {
-              for (const tagName of noteData.tags) {
-                // Get or create tag
-                let tag = await db.queryOne(`SELECT id FROM tags WHERE name = ?`, [tagName]);
-                if (!tag) {
-                  const result = await db.run(`INSERT INTO tags (name) VALUES (?)`, [tagName]);
-                  tag = { id: result.insertId };
-                }
-                await db.run(`INSERT OR IGNORE INTO note_tag (note_id, tag_id) VALUES (?, ?)`, [
+            if (existing && overwrite) {
+              // Update existing note
+              await tx.run(
+                `UPDATE notes 
+                 SET body = ?, excerpt = ?, body_html = ?, pinned = ?, favorite = ?, archived = ?,
+                   images = ?
+                 WHERE id = ?`,
+                [
+                  noteData.body,
+                  rendered.excerpt,
+                  rendered.html,
+                  noteData.pinned ? 1 : 0,
+                  noteData.favorite ? 1 : 0,
+                  noteData.archived ? 1 : 0,
+                  noteData.images ? JSON.stringify(noteData.images) : null,
                   existing.id,
-                  tag.id,
-                ]);
+                ],
+              );
+
+              // Remove existing tags
+              await tx.run(`DELETE FROM note_tag WHERE note_id = ?`, [existing.id]);
+
+              // Add new tags
+              if (noteData.tags && Array.isArray(noteData.tags)) {
+                for (const tagName of noteData.tags) {
+                  // Get or create tag
+                  let tag = await tx.queryOne(`SELECT id FROM tags WHERE name = ?`, [tagName]);
+                  if (!tag) {
+                    const result = await tx.run(`INSERT INTO tags (name) VALUES (?)`, [tagName]);
+                    tag = { id: result.insertId };
+                  }
+                  await tx.run(`${insertIgnore} INTO note_tag (note_id, tag_id) VALUES (?, ?)`, [
+                    existing.id,
+                    tag.id,
+                  ]);
+                }
               }
-            }
-          } else {
-            // Create new note
-            const result = await db.run(
-              `INSERT INTO notes (title, body, pinned, favorite, archived, images, owner_id) 
-               VALUES (?, ?, ?, ?, ?, ?, ?)`,
-              [
-                noteData.title,
-                noteData.body,
-                noteData.pinned ? 1 : 0,
-                noteData.favorite ? 1 : 0,
-                noteData.archived ? 1 : 0,
-                noteData.images ? JSON.stringify(noteData.images) : null,
-                userId,
-              ],
-            );
+              await searchOutbox.enqueue(tx, existing.id);
+            } else {
+              // Create new note
+              const result = await tx.run(
+                `INSERT INTO notes (title, body, excerpt, body_html, pinned, favorite, archived,
+                   images, owner_id)
+                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)`,
+                [
+                  noteData.title,
+                  noteData.body,
+                  rendered.excerpt,
+                  rendered.html,
+                  noteData.pinned ? 1 : 0,
+                  noteData.favorite ? 1 : 0,
+                  noteData.archived ? 1 : 0,
+                  noteData.images ? JSON.stringify(noteData.images) : null,
+                  userId,
+                ],
+              );
 
-            // Add tags
-            if (noteData.tags && Array.isArray(noteData.tags)) {
-              for (const tagName of noteData.tags) {
-                // Get or create tag
-                let tag = await db.queryOne(`SELECT id FROM tags WHERE name = ?`, [tagName]);
-                if (!tag) {
-                  const tagResult = await db.run(`INSERT INTO tags (name) VALUES (?)`, [tagName]);
-                  tag = { id: tagResult.insertId };
+              // Add tags
+              if (noteData.tags && Array.isArray(noteData.tags)) {
+                for (const tagName of noteData.tags) {
+                  // Get or create tag
+                  let tag = await tx.queryOne(`SELECT id FROM tags WHERE name = ?`, [tagName]);
+                  if (!tag) {
+                    const tagResult = await tx.run(`INSERT INTO tags (name) VALUES (?)`, [tagName]);
+                    tag = { id: tagResult.insertId };
+                  }
+                  await tx.run(`${insertIgnore} INTO note_tag (note_id, tag_id) VALUES (?, ?)`, [
+                    result.insertId,
+                    tag.id,
+                  ]);
                 }
-                await db.run(`INSERT OR IGNORE INTO note_tag (note_id, tag_id) VALUES (?, ?)`, [
-                  result.insertId,
-                  tag.id,
-                ]);
               }
+              await searchOutbox.enqueue(tx, result.insertId);
             }
-          }
+          });
           importedNotes++;
         } catch (error) {
           logger.error('Error importing note:', error);
           skippedNotes++;
         }
       }
+      searchOutbox.schedule();
     }
 
     // Import tasks
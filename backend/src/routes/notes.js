@@ -10,6 +10,7 @@ const router = express.Router();
 import crypto from 'node:crypto';
 import path from 'node:path';
 import multer from 'multer';
+import { NOTES_PAGE } from '../config/constants.js';
 import db from '../config/database.js';
 import { jwtRequired } from '../middleware/auth.js';
 import { recordNoteOperation, recordTagOperation } from '../middleware/metrics.js';
@@ -104,12 +105,32 @@ async function ensureFolderPath(userId, baseFolderId, relativeDir) {
 
 /**
  * GET /api/notes - List all notes for user
+ * Pass `limit` (and then `cursor` from the previous response's `next_cursor`)
+ * to fetch one page at a time.
  */
 router.get('/', jwtRequired, async (req, res) => {
   try {
-    const { view = 'all', q = '', tag = '' } = req.query;
-
-    const notes = await NoteService.getNotesForUser(req.userId, view, q, tag);
+    const { view = 'all', q = '', tag = '', limit, cursor } = req.query;
+    const paginate = limit !== undefined || cursor !== undefined;
+
+    if (cursor !== undefined && !NoteService.decodeCursor(cursor)) {
+      return res.status(400).json({ error: 'Invalid cursor' });
+    }
+
+    let notes;
+    let nextCursor = null;
+    if (paginate) {
+      const parsedLimit = Number.parseInt(String(limit ?? ''), 10);
+      const pageLimit = Number.isFinite(parsedLimit)
+        ? Math.min(Math.max(parsedLimit, 1), NOTES_PAGE.MAX_LIMIT)
+        : NOTES_PAGE.DEFAULT_LIMIT;
+      ({ notes, nextCursor } = await NoteService.getNotesForUser(req.userId, view, q, tag, {
+        limit: pageLimit,
+        cursor: cursor || null,
+      }));
+    } else {
+      notes = await NoteService.getNotesForUser(req.userId, view, q, tag);
+    }
     const tags = await NoteService.getTagsForUser(req.userId);
 
     res.json({
@@ -117,7 +138,7 @@ router.get('/', jwtRequired, async (req, res) => {
         id: note.id,
         title: note.title,
         body: note.body,
-        excerpt: NoteService.getExcerpt(note.body),
+        excerpt: note.excerpt ?? NoteService.getExcerpt(note.body),
         images: note.images ? JSON.parse(note.images) : [],
         pinned: !!note.pinned,
         favorite: !!note.favorite,
@@ -128,6 +149,7 @@ router.get('/', jwtRequired, async (req, res) => {
         tags: note.tags,
       })),
       tags,
+      ...(paginate && { next_cursor: nextCursor }),
     });
   } catch (error) {
     logger.error('List notes error:', error);
@@ -301,7 +323,7 @@ router.get('/:id', jwtRequired, async (req, res) => {
         id: note.id,
         title: note.title,
         body: note.body,
-        html: NoteService.renderMarkdown(note.body),
+        html: note.body_html ?? NoteService.renderMarkdown(note.body),
         images: note.images ? JSON.parse(note.images) : [],
         pinned: !!note.pinned,
         favorite: !!note.favorite,
@@ -452,7 +474,7 @@ async function updateNote(req, res) {
         id: updatedNote.id,
         title: updatedNote.title,
         body: updatedNote.body,
-        excerpt: NoteService.getExcerpt(updatedNote.body),
+        excerpt: updatedNote.excerpt ?? NoteService.getExcerpt(updatedNote.body),
         images: updatedNote.images ? JSON.parse(updatedNote.images) : [],
         pinned: !!updatedNote.pinned,
         favorite: !!updatedNote.favorite,
@@ -9,6 +9,8 @@ const router = express.Router();
 import crypto from 'node:crypto';
 import db from '../config/database.js';
 import { jwtRequired } from '../middleware/auth.js';
+import counters from '../services/counterService.js';
+import principalCache from '../services/principalCache.js';
 
 /**
  * Validate avatar URL format
@@ -36,26 +38,8 @@ function validateAvatarUrl(avatarUrl) {
  */
 router.get('/', jwtRequired, async (req, res) => {
   try {
-    // Get user stats
-    const totalNotes = await db.queryOne(`SELECT COUNT(*) as count FROM notes WHERE owner_id = ?`, [
-      req.userId,
-    ]);
-    const favoriteNotes = await db.queryOne(
-      `SELECT COUNT(*) as count FROM notes WHERE owner_id = ? AND favorite = 1`,
-      [req.userId],
-    );
-    const archivedNotes = await db.queryOne(
-      `SELECT COUNT(*) as count FROM notes WHERE owner_id = ? AND archived = 1`,
-      [req.userId],
-    );
-    const sharedNotesCount = await db.queryOne(
-      `SELECT COUNT(*) as count FROM share_notes WHERE shared_by_id = ?`,
-      [req.userId],
-    );
-    const notesSharedWithMe = await db.queryOne(
-      `SELECT COUNT(*) as count FROM share_notes WHERE shared_with_id = ?`,
-      [req.userId],
-    );
+    // Get user stats (note and share counts are maintained counters)
+    const counts = await counters.getUserCounters(req.userId);
     const totalTags = await db.queryOne(
       `SELECT COUNT(DISTINCT t.id) as count 
        FROM tags t 
@@ -94,18 +78,18 @@ router.get('/', jwtRequired, async (req, res) => {
         theme: req.user.theme,
         hidden_notes: req.user.hidden_notes || null,
         preferred_language: req.user.preferred_language || 'en',
-        has_2fa: !!req.user.totp_secret,
+        has_2fa: !!req.user.has_2fa,
         created_at: req.user.created_at,
         last_login: req.user.last_login,
         avatar_url: req.user.avatar_url || null,
         status: req.user.status || 'online',
       },
       stats: {
-        total_notes: totalNotes?.count || 0,
-        favorite_notes: favoriteNotes?.count || 0,
-        archived_notes: archivedNotes?.count || 0,
-        shared_notes: sharedNotesCount?.count || 0,
-        notes_shared_with_me: notesSharedWithMe?.count || 0,
+        total_notes: counts.notes,
+        favorite_notes: counts.favorite_notes,
+        archived_notes: counts.archived_notes,
+        shared_notes: counts.shares_sent,
+        notes_shared_with_me: counts.shares_received,
         total_tags: totalTags?.count || 0,
       },
       recent_notes: recentNotes,
@@ -192,6 +176,7 @@ router.put('/', jwtRequired, async (req, res) => {
     if (updates.length > 0) {
       params.push(req.userId);
       await db.run(`UPDATE users SET ${updates.join(', ')} WHERE id = ?`, params);
+      await principalCache.invalidate(req.userId);
     }
 
     const updatedUser = await db.queryOne(
@@ -229,6 +214,7 @@ router.post('/toggle-theme', jwtRequired, async (req, res) => {
     const newTheme = req.user.theme === 'light' ? 'dark' : 'light';
 
     await db.run(`UPDATE users SET theme = ? WHERE id = ?`, [newTheme, req.userId]);
+    await principalCache.invalidate(req.userId);
 
     res.json({ theme: newTheme });
   } catch (error) {
@@ -307,6 +293,7 @@ router.put('/status', jwtRequired, async (req, res) => {
 
     // Use db.run for proper compatibility with both SQLite and MySQL
     await db.run('UPDATE users SET status = ? WHERE id = ?', [status, req.userId]);
+    await principalCache.invalidate(req.userId);
 
     logger.info('User status updated', { userId: req.userId, status });
 
@@ -333,9 +320,7 @@ router.get('/:id', jwtRequired, async (req, res) => {
       return res.status(404).json({ error: 'User not found' });
     }
 
-    const totalNotes = await db.queryOne(`SELECT COUNT(*) as count FROM notes WHERE owner_id = ?`, [
-      userId,
-    ]);
+    const counts = await counters.getUserCounters(userId);
 
     res.json({
       user: {
@@ -345,7 +330,7 @@ router.get('/:id', jwtRequired, async (req, res) => {
         created_at: user.created_at,
       },
       stats: {
-        total_notes: totalNotes?.count || 0,
+        total_notes: counts.notes,
       },
       is_own_profile: userId === req.userId,
     });
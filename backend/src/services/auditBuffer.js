@@ -0,0 +1,180 @@
+/**
+ * Audit Log Buffer
+ * Collects audit_logs rows in process and writes them in batches, so audited requests
+ * (note and task views, creates, updates and deletes) do not each wait for an INSERT
+ * and, on SQLite, for the writer lock.
+ *
+ * Buffered rows are written every AUDIT_LOG.FLUSH_INTERVAL ms, or as soon as
+ * AUDIT_LOG.BATCH_SIZE are waiting, as multi-row INSERTs in one transaction. At most
+ * AUDIT_LOG.MAX_BUFFERED rows are held; beyond that AUDIT_LOG.OVERFLOW decides whether
+ * new rows are dropped or written directly. stop() writes what is left. Until start()
+ * is called (tests, scripts) every row is written directly.
+ */
+
+import { performance } from 'node:perf_hooks';
+import { AUDIT_LOG } from '../config/constants.js';
+import db from '../config/database.js';
+import logger from '../config/logger.js';
+import {
+  recordAuditBufferDepth,
+  recordAuditDropped,
+  recordAuditFlush,
+} from '../middleware/metrics.js';
+
+const COLUMNS = [
+  'user_id',
+  'entity_type',
+  'entity_id',
+  'action',
+  'ip_address',
+  'user_agent',
+  'metadata',
+  'created_at',
+];
+const INSERT_PREFIX = `INSERT INTO audit_logs (${COLUMNS.join(', ')}) VALUES `;
+const ROW_PLACEHOLDERS = `(${COLUMNS.map(() => '?').join(', ')})`;
+// 800 parameters per statement, below SQLite's historical limit of 999
+const ROWS_PER_INSERT = 100;
+
+/**
+ * UTC 'YYYY-MM-DD HH:MM:SS', as SQLite's datetime('now') and MySQL DATETIME expect.
+ */
+function sqlTimestamp(date) {
+  return date.toISOString().slice(0, 19).replace('T', ' ');
+}
+
+class AuditBuffer {
+  constructor() {
+    this.rows = [];
+    this.timer = null;
+    this.flushing = null;
+    this.scheduled = false;
+    this.overflowing = false;
+  }
+
+  /**
+   * Record an audit log row. Resolves once the row is buffered, or written when it is
+   * written directly. Never rejects.
+   * @param {object} entry - audit_logs columns except id and created_at
+   */
+  async add(entry) {
+    const row = COLUMNS.map((column) =>
+      column === 'created_at' ? sqlTimestamp(new Date()) : (entry[column] ?? null),
+    );
+
+    if (!this.timer) {
+      return this.write([row]);
+    }
+    if (this.rows.length >= AUDIT_LOG.MAX_BUFFERED) {
+      if (AUDIT_LOG.OVERFLOW === 'write') {
+        return this.write([row]);
+      }
+      recordAuditDropped();
+      if (!this.overflowing) {
+        this.overflowing = true;
+        logger.warn('Audit log buffer is full, dropping entries', {
+          maxBuffered: AUDIT_LOG.MAX_BUFFERED,
+        });
+      }
+      return;
+    }
+
+    this.rows.push(row);
+    recordAuditBufferDepth(this.rows.length);
+    if (this.rows.length >= AUDIT_LOG.BATCH_SIZE) {
+      this.schedule();
+    }
+  }
+
+  /**
+   * Start buffering. Does nothing when AUDIT_LOG.FLUSH_INTERVAL is 0.
+   */
+  start() {
+    if (this.timer || AUDIT_LOG.FLUSH_INTERVAL <= 0) return;
+
+    this.timer = setInterval(() => this.flush(), AUDIT_LOG.FLUSH_INTERVAL);
+    logger.info('📝 Audit log buffer started', {
+      flushInterval: AUDIT_LOG.FLUSH_INTERVAL,
+      batchSize: AUDIT_LOG.BATCH_SIZE,
+      maxBuffered: AUDIT_LOG.MAX_BUFFERED,
+    });
+  }
+
+  /**
+   * Stop buffering and write the buffered rows.
+   */
+  async stop() {
+    if (this.timer) {
+      clearInterval(this.timer);
+      this.timer = null;
+    }
+    await this.flush();
+  }
+
+  /**
+   * Flush soon instead of waiting for the next interval.
+   * Calls made in the same tick share one flush.
+   */
+  schedule() {
+    if (this.scheduled) return;
+    this.scheduled = true;
+    setImmediate(() => {
+      this.scheduled = false;
+      this.flush();
+    });
+  }
+
+  /**
+   * Write all buffered rows, after any flush already in progress.
+   */
+  async flush() {
+    while (this.flushing) {
+      await this.flushing;
+    }
+    if (this.rows.length === 0) return;
+
+    const rows = this.rows.splice(0);
+    this.overflowing = false;
+    recordAuditBufferDepth(0);
+    this.flushing = this.write(rows).finally(() => {
+      this.flushing = null;
+    });
+    await this.flushing;
+  }
+
+  /**
+   * Insert rows, several in one transaction. If that fails (e.g. a row references a
+   * user deleted since), they are inserted one by one so only the bad ones are lost.
+   */
+  async write(rows) {
+    const start = performance.now();
+    if (rows.length > 1) {
+      try {
+        await db.transaction(async (tx) => {
+          for (let i = 0; i < rows.length; i += ROWS_PER_INSERT) {
+            const chunk = rows.slice(i, i + ROWS_PER_INSERT);
+            const placeholders = chunk.map(() => ROW_PLACEHOLDERS).join(', ');
+            await tx.run(INSERT_PREFIX + placeholders, chunk.flat());
+          }
+        });
+        recordAuditFlush(performance.now() - start, rows.length);
+        return;
+      } catch (error) {
+        logger.warn('Audit log batch failed, writing entries one by one:', error.message);
+      }
+    }
+
+    let failed = 0;
+    for (const row of rows) {
+      try {
+        await db.run(INSERT_PREFIX + ROW_PLACEHOLDERS, row);
+      } catch (error) {
+        failed++;
+        logger.error('Audit log error:', error);
+      }
+    }
+    recordAuditFlush(performance.now() - start, rows.length - failed, failed);
+  }
+}
+
+export default new AuditBuffer();
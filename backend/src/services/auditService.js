@@ -5,6 +5,7 @@
 
 import db from '../config/database.js';
 import logger from '../config/logger.js';
+import auditBuffer from './auditBuffer.js';
 
 export default class AuditService {
   /**
@@ -20,12 +21,15 @@ export default class AuditService {
         userAgent: userAgent?.substring(0, 255), // Truncate for storage
       });
 
-      // Store in database for compliance reporting
-      await db.run(
-        `INSERT INTO audit_logs (user_id, entity_type, entity_id, action, ip_address, user_agent, created_at)
-         VALUES (?, ?, ?, ?, ?, ?, datetime('now'))`,
-        [userId, 'note', noteId, 'view', ipAddress, userAgent?.substring(0, 255)],
-      );
+      // Store in database for compliance reporting (batched, see auditBuffer.js)
+      await auditBuffer.add({
+        user_id: userId,
+        entity_type: 'note',
+        entity_id: noteId,
+        action: 'view',
+        ip_address: ipAddress,
+        user_agent: userAgent?.substring(0, 255),
+      });
     } catch (error) {
       // Don't fail the request if audit logging fails
       logger.error('Audit log error (note access):', error);
@@ -45,11 +49,14 @@ export default class AuditService {
         ...metadata,
       });
 
-      await db.run(
-        `INSERT INTO audit_logs (user_id, entity_type, entity_id, action, ip_address, metadata, created_at)
-         VALUES (?, ?, ?, ?, ?, ?, datetime('now'))`,
-        [userId, 'note', noteId, 'create', ipAddress, JSON.stringify(metadata)],
-      );
+      await auditBuffer.add({
+        user_id: userId,
+        entity_type: 'note',
+        entity_id: noteId,
+        action: 'create',
+        ip_address: ipAddress,
+        metadata: JSON.stringify(metadata),
+      });
     } catch (error) {
       logger.error('Audit log error (note creation):', error);
     }
@@ -75,19 +82,15 @@ export default class AuditService {
         userAgent: userAgent?.substring(0, 255),
       });
 
-      await db.run(
-        `INSERT INTO audit_logs (user_id, entity_type, entity_id, action, metadata, ip_address, user_agent, created_at)
-         VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))`,
-        [
-          userId,
-          'note',
-          noteId,
-          'update',
-          JSON.stringify(changes),
-          ipAddress,
-          userAgent?.substring(0, 255),
-        ],
-      );
+      await auditBuffer.add({
+        user_id: userId,
+        entity_type: 'note',
+        entity_id: noteId,
+        action: 'update',
+        metadata: JSON.stringify(changes),
+        ip_address: ipAddress,
+        user_agent: userAgent?.substring(0, 255),
+      });
     } catch (error) {
       logger.error('Audit log error (note modification):', error);
     }
@@ -106,11 +109,14 @@ export default class AuditService {
         ...metadata,
       });
 
-      await db.run(
-        `INSERT INTO audit_logs (user_id, entity_type, entity_id, action, ip_address, metadata, created_at)
-         VALUES (?, ?, ?, ?, ?, ?, datetime('now'))`,
-        [userId, 'note', noteId, 'delete', ipAddress, JSON.stringify(metadata)],
-      );
+      await auditBuffer.add({
+        user_id: userId,
+        entity_type: 'note',
+        entity_id: noteId,
+        action: 'delete',
+        ip_address: ipAddress,
+        metadata: JSON.stringify(metadata),
+      });
     } catch (error) {
       logger.error('Audit log error (note deletion):', error);
     }
@@ -129,11 +135,14 @@ export default class AuditService {
         userAgent: userAgent?.substring(0, 255),
       });
 
-      await db.run(
-        `INSERT INTO audit_logs (user_id, entity_type, entity_id, action, ip_address, user_agent, created_at)
-         VALUES (?, ?, ?, ?, ?, ?, datetime('now'))`,
-        [userId, 'task', taskId, 'view', ipAddress, userAgent?.substring(0, 255)],
-      );
+      await auditBuffer.add({
+        user_id: userId,
+        entity_type: 'task',
+        entity_id: taskId,
+        action: 'view',
+        ip_address: ipAddress,
+        user_agent: userAgent?.substring(0, 255),
+      });
     } catch (error) {
       logger.error('Audit log error (task access):', error);
     }
@@ -152,11 +161,14 @@ export default class AuditService {
         ...metadata,
       });
 
-      await db.run(
-        `INSERT INTO audit_logs (user_id, entity_type, entity_id, action, ip_address, metadata, created_at)
-         VALUES (?, ?, ?, ?, ?, ?, datetime('now'))`,
-        [userId, 'task', taskId, 'create', ipAddress, JSON.stringify(metadata)],
-      );
+      await auditBuffer.add({
+        user_id: userId,
+        entity_type: 'task',
+        entity_id: taskId,
+        action: 'create',
+        ip_address: ipAddress,
+        metadata: JSON.stringify(metadata),
+      });
     } catch (error) {
       logger.error('Audit log error (task creation):', error);
     }
@@ -182,19 +194,15 @@ export default class AuditService {
         userAgent: userAgent?.substring(0, 255),
       });
 
-      await db.run(
-        `INSERT INTO audit_logs (user_id, entity_type, entity_id, action, metadata, ip_address, user_agent, created_at)
-         VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))`,
-        [
-          userId,
-          'task',
-          taskId,
-          'update',
-          JSON.stringify(changes),
-          ipAddress,
-          userAgent?.substring(0, 255),
-        ],
-      );
+      await auditBuffer.add({
+        user_id: userId,
+        entity_type: 'task',
+        entity_id: taskId,
+        action: 'update',
+        metadata: JSON.stringify(changes),
+        ip_address: ipAddress,
+        user_agent: userAgent?.substring(0, 255),
+      });
     } catch (error) {
       logger.error('Audit log error (task modification):', error);
     }
@@ -213,11 +221,14 @@ export default class AuditService {
         ...metadata,
       });
 
-      await db.run(
-        `INSERT INTO audit_logs (user_id, entity_type, entity_id, action, ip_address, metadata, created_at)
-         VALUES (?, ?, ?, ?, ?, ?, datetime('now'))`,
-        [userId, 'task', taskId, 'delete', ipAddress, JSON.stringify(metadata)],
-      );
+      await auditBuffer.add({
+        user_id: userId,
+        entity_type: 'task',
+        entity_id: taskId,
+        action: 'delete',
+        ip_address: ipAddress,
+        metadata: JSON.stringify(metadata),
+      });
     } catch (error) {
       logger.error('Audit log error (task deletion):', error);
     }
@@ -235,11 +246,14 @@ export default class AuditService {
         ...metadata,
       });
 
-      await db.run(
-        `INSERT INTO audit_logs (user_id, entity_type, entity_id, action, ip_address, metadata, created_at)
-         VALUES (?, ?, ?, ?, ?, ?, datetime('now'))`,
-        [userId, 'export', null, exportType, ipAddress, JSON.stringify(metadata)],
-      );
+      await auditBuffer.add({
+        user_id: userId,
+        entity_type: 'export',
+        entity_id: null,
+        action: exportType,
+        ip_address: ipAddress,
+        metadata: JSON.stringify(metadata),
+      });
     } catch (error) {
       logger.error('Audit log error (data export):', error);
     }
@@ -257,18 +271,14 @@ export default class AuditService {
         ...metadata,
       });
 
-      await db.run(
-        `INSERT INTO audit_logs (user_id, entity_type, entity_id, action, ip_address, metadata, created_at)
-         VALUES (?, ?, ?, ?, ?, ?, datetime('now'))`,
-        [
-          userId,
-          'user',
-          userId,
-          'data_deletion',
-          ipAddress,
-          JSON.stringify({ reason, ...metadata }),
-        ],
-      );
+      await auditBuffer.add({
+        user_id: userId,
+        entity_type: 'user',
+        entity_id: userId,
+        action: 'data_deletion',
+        ip_address: ipAddress,
+        metadata: JSON.stringify({ reason, ...metadata }),
+      });
     } catch (error) {
       logger.error('Audit log error (data deletion):', error);
     }
@@ -3,9 +3,10 @@
  */
 
 import crypto from 'node:crypto';
-import bcrypt from 'bcryptjs';
 import db from '../config/database.js';
 import logger from '../config/logger.js';
+import passwordHashPool from './passwordHashPool.js';
+import principalCache from './principalCache.js';
 
 export default class AuthService {
   /**
@@ -31,11 +32,12 @@ export default class AuthService {
   /**
    * Hash a password using bcrypt with strengthened work factor.
    * Uses 14 rounds (increased from 12) for better security against brute-force attacks.
-   * Estimated time: ~200ms per hash (acceptable for authentication).
+   * Estimated time: ~200ms per hash, run on the password hashing worker pool.
+   * Rejects with code PASSWORD_HASH_POOL_FULL when the pool is saturated.
    */
   static async hashPassword(password) {
     const saltRounds = 14; // Increased from 12 for better security
-    return bcrypt.hash(password, saltRounds);
+    return passwordHashPool.hash(password, saltRounds);
   }
 
   /**
@@ -52,10 +54,10 @@ export default class AuthService {
   }
 
   /**
-   * Verify a password against a hash.
+   * Verify a password against a hash, on the password hashing worker pool.
    */
   static async verifyPassword(password, hash) {
-    return bcrypt.compare(password, hash);
+    return passwordHashPool.compare(password, hash);
   }
 
   /**
@@ -88,13 +90,20 @@ export default class AuthService {
     }
 
     // Opportunistic rehashing: upgrade hash if using old work factor
-    // Note: Runs asynchronously during login. Adds ~200ms but acceptable tradeoff.
+    // Note: Adds ~200ms to this login. Skipped while the hashing pool is saturated
+    // (the next login retries), so an upgrade never makes a valid login fail.
     // TODO: Consider using a proper logging framework (winston, pino) in production
-    if (AuthService.needsRehash(user.password_hash)) {
-      logger.info(`[SECURITY] Upgrading password hash for user ID: ${user.id}`);
-      const newHash = await AuthService.hashPassword(password);
-      await db.run(`UPDATE users SET password_hash = ? WHERE id = ?`, [newHash, user.id]);
-      user.password_hash = newHash;
+    if (AuthService.needsRehash(user.password_hash) && !passwordHashPool.isSaturated()) {
+      try {
+        const newHash = await AuthService.hashPassword(password);
+        await db.run(`UPDATE users SET password_hash = ? WHERE id = ?`, [newHash, user.id]);
+        user.password_hash = newHash;
+        logger.info(`[SECURITY] Upgraded password hash for user ID: ${user.id}`);
+      } catch (error) {
+        logger.warn(`Password hash upgrade skipped for user ID: ${user.id}`, {
+          error: error.message,
+        });
+      }
     }
 
     return user;
@@ -134,17 +143,32 @@ export default class AuthService {
     // Hash password and create user (store trimmed username/email)
     const passwordHash = await AuthService.hashPassword(password);
     const trimmedEmail = email ? email.trim() : null;
-    const result = await db.run(
-      `INSERT INTO users (username, password_hash, email) VALUES (?, ?, ?)`,
-      [trimmedUsername, passwordHash, trimmedEmail],
-    );
+    const result = await db.transaction(async (tx) => {
+      // Claim the invitation first so two registrations cannot both use it
+      if (inviteToken) {
+        const claimed = await tx.run(
+          `UPDATE invitations SET used = 1 WHERE token = ? AND used = 0`,
+          [inviteToken],
+        );
+        if (claimed.affectedRows === 0) return null;
+      }
 
-    // Mark invitation as used
-    if (inviteToken) {
-      await db.run(`UPDATE invitations SET used = 1, used_by_id = ? WHERE token = ?`, [
-        result.insertId,
-        inviteToken,
-      ]);
+      const inserted = await tx.run(
+        `INSERT INTO users (username, password_hash, email) VALUES (?, ?, ?)`,
+        [trimmedUsername, passwordHash, trimmedEmail],
+      );
+
+      if (inviteToken) {
+        await tx.run(`UPDATE invitations SET used_by_id = ? WHERE token = ?`, [
+          inserted.insertId,
+          inviteToken,
+        ]);
+      }
+
+      return inserted;
+    });
+    if (!result) {
+      return { success: false, error: 'Invalid or expired invitation' };
     }
 
     const newUser = await db.queryOne(
@@ -170,6 +194,7 @@ export default class AuthService {
    */
   static async updateLastLogin(userId) {
     await db.run(`UPDATE users SET last_login = datetime('now') WHERE id = ?`, [userId]);
+    await principalCache.invalidate(userId);
   }
 
   /**
@@ -179,15 +204,17 @@ export default class AuthService {
     const token = crypto.randomBytes(32).toString('hex');
     const expiresAt = new Date(Date.now() + 60 * 60 * 1000); // 1 hour
 
-    // Invalidate any existing tokens
-    await db.run(`UPDATE password_reset_tokens SET used = 1 WHERE user_id = ? AND used = 0`, [
-      userId,
-    ]);
+    await db.transaction(async (tx) => {
+      // Invalidate any existing tokens
+      await tx.run(`UPDATE password_reset_tokens SET used = 1 WHERE user_id = ? AND used = 0`, [
+        userId,
+      ]);
 
-    await db.run(
-      `INSERT INTO password_reset_tokens (user_id, token, expires_at) VALUES (?, ?, ?)`,
-      [userId, token, expiresAt.toISOString()],
-    );
+      await tx.run(
+        `INSERT INTO password_reset_tokens (user_id, token, expires_at) VALUES (?, ?, ?)`,
+        [userId, token, expiresAt.toISOString()],
+      );
+    });
 
     return token;
   }
@@ -213,12 +240,23 @@ export default class AuthService {
 
     const passwordHash = await AuthService.hashPassword(newPassword);
 
-    await db.run(`UPDATE users SET password_hash = ? WHERE id = ?`, [
-      passwordHash,
-      resetToken.user_id,
-    ]);
+    const reset = await db.transaction(async (tx) => {
+      // Consume the token first so it cannot be used twice concurrently
+      const consumed = await tx.run(
+        `UPDATE password_reset_tokens SET used = 1 WHERE id = ? AND used = 0`,
+        [resetToken.id],
+      );
+      if (consumed.affectedRows === 0) return false;
 
-    await db.run(`UPDATE password_reset_tokens SET used = 1 WHERE id = ?`, [resetToken.id]);
+      await tx.run(`UPDATE users SET password_hash = ? WHERE id = ?`, [
+        passwordHash,
+        resetToken.user_id,
+      ]);
+      return true;
+    });
+    if (!reset) {
+      return { success: false, error: 'Invalid or expired reset token' };
+    }
 
     return { success: true };
   }
@@ -13,7 +13,12 @@ import {
   ChatRoom,
   User,
 } from '../models/index.js';
-import { decryptMessage, encryptMessage, generateSalt } from '../utils/encryption.js';
+import {
+  decryptMessage,
+  deriveKeyAsync,
+  encryptMessage,
+  generateSalt,
+} from '../utils/encryption.js';
 
 // Get encryption secret from environment or use default for development
 const ENCRYPTION_SECRET =
@@ -209,6 +214,7 @@ export async function getUserChatRooms(userId) {
           let decryptedMessage = lastMsg.message;
           if (lastMsg.is_encrypted && p.room.encryption_salt) {
             try {
+              await deriveKeyAsync(ENCRYPTION_SECRET, p.room.encryption_salt);
               decryptedMessage = decryptMessage(
                 lastMsg.message,
                 ENCRYPTION_SECRET,
@@ -297,6 +303,11 @@ export async function getRoomMessages(roomId, userId, limit = 50, offset = 0) {
       offset,
     });
 
+    // Derive the room key once (off the event loop) so each decrypt is a cache hit
+    if (room.encryption_salt) {
+      await deriveKeyAsync(ENCRYPTION_SECRET, room.encryption_salt);
+    }
+
     // Decrypt messages before returning
     const decryptedMessages = messages.map((msg) => {
       const msgData = msg.toJSON();
@@ -358,7 +369,8 @@ export async function sendMessage(roomId, senderId, message, photoUrl = null) {
       await room.update({ encryption_salt: encryptionSalt });
     }
 
-    // Encrypt message
+    // Encrypt message (room key is derived off the event loop and cached)
+    await deriveKeyAsync(ENCRYPTION_SECRET, encryptionSalt);
     const encryptedMessage = encryptMessage(message, ENCRYPTION_SECRET, encryptionSalt);
 
     const newMessage = await ChatMessage.create({
@@ -556,6 +568,11 @@ export async function searchRoomMessages(roomId, userId, query, limit = 50) {
       limit: 500, // Limit to recent messages for performance
     });
 
+    // Derive the room key once (off the event loop) so each decrypt is a cache hit
+    if (room.encryption_salt) {
+      await deriveKeyAsync(ENCRYPTION_SECRET, room.encryption_salt);
+    }
+
     // Decrypt and filter messages
     const matchingMessages = [];
     const lowerQuery = query.toLowerCase();
@@ -888,6 +905,10 @@ export async function getPinnedMessages(roomId, userId) {
       order: [['pinned_at', 'DESC']],
     });
 
+    if (room.encryption_salt) {
+      await deriveKeyAsync(ENCRYPTION_SECRET, room.encryption_salt);
+    }
+
     // Decrypt messages
     const decryptedMessages = messages.map((msg) => {
       const msgData = msg.toJSON();
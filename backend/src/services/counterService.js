@@ -0,0 +1,255 @@
+/**
+ * Counter Service
+ * Reads the per-user and per-folder counters and the app_stats row counts that triggers
+ * keep current (see config/counters.js) and periodically reconciles them with their
+ * source tables.
+ *
+ * Triggers do not see changes made by MySQL foreign-key cascades (e.g. shares deleted
+ * together with their note), so the reconciler recomputes drifted rows in batches.
+ * Running it on several instances is safe, since each recomputation is idempotent.
+ * If the triggers are missing (MySQL may refuse to create them under binary logging),
+ * reads compute the counters from the source tables instead.
+ */
+
+import { COUNTERS } from '../config/constants.js';
+import {
+  COUNTER_TABLES,
+  COUNTER_TRIGGERS,
+  counterComputeSql,
+  counterDriftCondition,
+  counterRefreshSql,
+  STAT_TABLES,
+} from '../config/counters.js';
+import db from '../config/database.js';
+import logger from '../config/logger.js';
+import { recordCounterDrift } from '../middleware/metrics.js';
+
+function zeroCounters(table) {
+  return Object.fromEntries(Object.keys(COUNTER_TABLES[table].columns).map((name) => [name, 0]));
+}
+
+class CounterService {
+  constructor() {
+    this.timer = null;
+    this.reconciling = null;
+    this.triggersPresent = null;
+  }
+
+  /**
+   * Whether all counter triggers exist (checked once).
+   */
+  async hasTriggers() {
+    if (this.triggersPresent === null) {
+      const placeholders = COUNTER_TRIGGERS.map(() => '?').join(', ');
+      const sql = db.isSQLite
+        ? `SELECT COUNT(*) AS count FROM sqlite_master
+           WHERE type = 'trigger' AND name IN (${placeholders})`
+        : `SELECT COUNT(*) AS count FROM information_schema.TRIGGERS
+           WHERE TRIGGER_SCHEMA = DATABASE() AND TRIGGER_NAME IN (${placeholders})`;
+      const row = await db.queryOne(sql, COUNTER_TRIGGERS);
+      this.triggersPresent = Number(row?.count) === COUNTER_TRIGGERS.length;
+      if (!this.triggersPresent) {
+        logger.warn('🧮 Counter triggers missing, computing counters from source tables');
+      }
+    }
+    return this.triggersPresent;
+  }
+
+  /**
+   * Counters of the rows of table whose keys keysSql selects, as a Map by key.
+   * keysSql must name its column like the table's key.
+   */
+  async read(table, keysSql, params) {
+    const { key, columns } = COUNTER_TABLES[table];
+    const sql = (await this.hasTriggers())
+      ? `SELECT ${key}, ${Object.keys(columns).join(', ')} FROM ${table}
+         WHERE ${key} IN (${keysSql})`
+      : counterComputeSql(table, keysSql);
+
+    const rows = await db.query(sql, params);
+    const counters = new Map();
+    for (const row of rows) {
+      const values = zeroCounters(table);
+      for (const name of Object.keys(values)) {
+        values[name] = Number(row[name]) || 0;
+      }
+      counters.set(row[key], values);
+    }
+    return counters;
+  }
+
+  /**
+   * Get a user's counters: notes, archived_notes, favorite_notes, tasks, tasks_completed,
+   * tasks_active, shares_sent and shares_received.
+   */
+  async getUserCounters(userId) {
+    const counters = await this.read('user_counters', 'SELECT ? AS user_id', [userId]);
+    return counters.values().next().value ?? zeroCounters('user_counters');
+  }
+
+  /**
+   * Get the counters of one folder: notes, archived_notes, favorite_notes, tasks,
+   * tasks_completed and tasks_active.
+   */
+  async getFolderCounters(folderId) {
+    const counters = await this.read('folder_counters', 'SELECT ? AS folder_id', [folderId]);
+    return counters.values().next().value ?? zeroCounters('folder_counters');
+  }
+
+  /**
+   * Get the counters of all of a user's folders, as a Map by folder ID.
+   */
+  async getFolderCountersForUser(userId) {
+    return this.read('folder_counters', 'SELECT id AS folder_id FROM folders WHERE user_id = ?', [
+      userId,
+    ]);
+  }
+
+  /**
+   * Get the row counts of the users, notes and tags tables.
+   */
+  async getAppStats() {
+    const sql = (await this.hasTriggers())
+      ? 'SELECT name, SUM(value) AS value FROM app_stats GROUP BY name'
+      : STAT_TABLES.map((table) => `SELECT '${table}' AS name, COUNT(*) AS value FROM ${table}`)
+          .join(' UNION ALL ');
+
+    const stats = Object.fromEntries(STAT_TABLES.map((table) => [table, 0]));
+    for (const row of await db.query(sql)) {
+      stats[row.name] = Number(row.value) || 0;
+    }
+    return stats;
+  }
+
+  /**
+   * Start reconciling counters every COUNTERS.RECONCILE_INTERVAL seconds.
+   */
+  start() {
+    if (this.timer || COUNTERS.RECONCILE_INTERVAL <= 0) return;
+
+    this.timer = setInterval(() => this.reconcile(), COUNTERS.RECONCILE_INTERVAL * 1000);
+    this.timer.unref?.();
+    logger.info('🧮 Counter reconciliation started', { interval: COUNTERS.RECONCILE_INTERVAL });
+  }
+
+  /**
+   * Stop reconciling and wait for an in-flight run to finish.
+   */
+  async stop() {
+    if (this.timer) {
+      clearInterval(this.timer);
+      this.timer = null;
+    }
+    await this.reconciling;
+  }
+
+  /**
+   * Recompute counters that drifted from their source tables.
+   * Concurrent calls share one run. Resolves to the number of rows fixed per table.
+   */
+  reconcile() {
+    if (!this.reconciling) {
+      this.reconciling = db
+        .readFromPrimary(() => this.reconcileAll())
+        .catch((error) => {
+          logger.error('Counter reconciliation failed', { error: error.message });
+          return null;
+        })
+        .finally(() => {
+          this.reconciling = null;
+        });
+    }
+    return this.reconciling;
+  }
+
+  async reconcileAll() {
+    // Without triggers the tables are not read, so there is nothing to keep in sync
+    if (!(await this.hasTriggers())) return {};
+
+    const fixed = {};
+    for (const table of Object.keys(COUNTER_TABLES)) {
+      fixed[table] = await this.reconcileTable(table);
+      recordCounterDrift(table, fixed[table]);
+    }
+    fixed.app_stats = await this.reconcileStats();
+    recordCounterDrift('app_stats', fixed.app_stats);
+
+    if (Object.values(fixed).some((rows) => rows > 0)) {
+      logger.warn('🧮 Counters out of sync were recomputed', fixed);
+    }
+    return fixed;
+  }
+
+  /**
+   * Add missing counter rows, then walk the table in key order and recompute the
+   * rows whose counters differ from the source tables.
+   */
+  async reconcileTable(table) {
+    const { key, parent } = COUNTER_TABLES[table];
+    const insertIgnore = db.isSQLite ? 'INSERT OR IGNORE' : 'INSERT IGNORE';
+    await db.run(
+      `${insertIgnore} INTO ${table} (${key})
+       SELECT id FROM ${parent} WHERE id NOT IN (SELECT ${key} FROM ${table})`,
+    );
+
+    let fixed = 0;
+    let lastKey = 0;
+    let batch;
+    do {
+      batch = await db.query(
+        `SELECT ${key} AS id FROM ${table} WHERE ${key} > ? ORDER BY ${key} LIMIT ?`,
+        [lastKey, COUNTERS.RECONCILE_BATCH_SIZE],
+      );
+      if (batch.length === 0) break;
+      lastKey = batch[batch.length - 1].id;
+
+      const ids = batch.map((row) => row.id);
+      const placeholders = ids.map(() => '?').join(', ');
+      const drifted = await db.query(
+        `SELECT ${key} AS id FROM ${table}
+         WHERE ${key} IN (${placeholders}) AND ${counterDriftCondition(table)}`,
+        ids,
+      );
+
+      if (drifted.length > 0) {
+        const driftedIds = drifted.map((row) => row.id);
+        await db.run(
+          `${counterRefreshSql(table)} WHERE ${key} IN (${driftedIds.map(() => '?').join(', ')})`,
+          driftedIds,
+        );
+        fixed += drifted.length;
+      }
+    } while (batch.length === COUNTERS.RECONCILE_BATCH_SIZE);
+    return fixed;
+  }
+
+  /**
+   * Correct app_stats counts that differ from the tables, returning how many did.
+   * The difference is read from one snapshot and added to shard 0, so increments
+   * made by concurrent writes are kept.
+   */
+  async reconcileStats() {
+    let fixed = 0;
+    for (const table of STAT_TABLES) {
+      const drift = await db.transaction(async (tx) => {
+        const row = await tx.queryOne(
+          `SELECT (SELECT COUNT(*) FROM ${table})
+             - (SELECT COALESCE(SUM(value), 0) FROM app_stats WHERE name = ?) AS drift`,
+          [table],
+        );
+        const difference = Number(row?.drift) || 0;
+        if (difference !== 0) {
+          await tx.run('UPDATE app_stats SET value = value + ? WHERE name = ? AND shard = 0', [
+            difference,
+            table,
+          ]);
+        }
+        return difference;
+      });
+      if (drift !== 0) fixed++;
+    }
+    return fixed;
+  }
+}
+
+export default new CounterService();
@@ -1,12 +1,21 @@
 /**
  * Folder Service for hierarchical folder management.
  * Supports nested folders with caching for improved performance.
+ *
+ * The folder_closure table holds every (ancestor, descendant, depth) pair, including
+ * each folder with itself at depth 0, so subtree, breadcrumb and cycle checks are one
+ * indexed query. It is updated in the same transaction as the folder it describes.
  */
 
-import { CACHE_TTL } from '../config/constants.js';
+import { CACHE_NAMESPACE, CACHE_SOFT_TTL, CACHE_TTL } from '../config/constants.js';
 import db from '../config/database.js';
 import logger from '../config/logger.js';
 import cache from '../config/redis.js';
+import counters from './counterService.js';
+
+// Folder listings show note summaries, so neither the body nor its rendered HTML is read
+const FOLDER_NOTE_COLUMNS = `n.id, n.title, n.excerpt, n.images, n.pinned, n.favorite,
+  n.archived, n.owner_id, n.folder_id, n.created_at, n.updated_at`;
 
 export default class FolderService {
   /**
@@ -14,32 +23,40 @@ export default class FolderService {
    * Results are cached in Redis for improved performance.
    */
   static async getFoldersForUser(userId) {
-    const cacheKey = `folders:user:${userId}`;
-
-    // Try cache first
-    const cached = await cache.get(cacheKey);
-    if (cached) {
-      return cached;
-    }
+    const cacheKey = await cache.versionedKey(CACHE_NAMESPACE.FOLDERS(userId));
+
+    return cache.getOrCompute(
+      cacheKey,
+      CACHE_TTL.FOLDERS,
+      () => FolderService.queryFolderTree(userId),
+      { softTtl: CACHE_SOFT_TTL.FOLDERS },
+    );
+  }
 
+  /**
+   * Query a user's folders and build the tree, bypassing the cache.
+   */
+  static async queryFolderTree(userId) {
     // Query folders with note counts (all notes, including archived)
     // Note: Counts include all items (archived/completed) to show true folder contents
     // UI can filter the displayed items separately based on user preference
     const sql = `
       SELECT
         f.id, f.name, f.parent_id, f.description, f.icon, f.color,
-        f.position, f.is_expanded, f.created_at, f.updated_at,
-        COUNT(DISTINCT n.id) as note_count,
-        COUNT(DISTINCT t.id) as task_count
+        f.position, f.is_expanded, f.created_at, f.updated_at
       FROM folders f
-      LEFT JOIN notes n ON n.folder_id = f.id
-      LEFT JOIN tasks t ON t.folder_id = f.id
       WHERE f.user_id = ?
-      GROUP BY f.id
       ORDER BY f.position, f.name
     `;
 
-    const folders = await db.query(sql, [userId]);
+    const [rows, folderCounters] = await Promise.all([
+      db.query(sql, [userId]),
+      counters.getFolderCountersForUser(userId),
+    ]);
+    const folders = rows.map((folder) => {
+      const counts = folderCounters.get(folder.id);
+      return { ...folder, note_count: counts?.notes ?? 0, task_count: counts?.tasks ?? 0 };
+    });
 
     // Build tree structure
     const foldersById = new Map();
@@ -69,15 +86,10 @@ export default class FolderService {
       }
     }
 
-    const result = {
+    return {
       folders: rootFolders,
       total: folders.length,
     };
-
-    // Cache the result
-    await cache.set(cacheKey, result, CACHE_TTL.TAGS);
-
-    return result;
   }
 
   /**
@@ -87,18 +99,23 @@ export default class FolderService {
     const sql = `
       SELECT
         f.id, f.name, f.parent_id, f.description, f.icon, f.color,
-        f.position, f.is_expanded, f.created_at, f.updated_at,
-        COUNT(DISTINCT n.id) as note_count,
-        COUNT(DISTINCT t.id) as task_count
+        f.position, f.is_expanded, f.created_at, f.updated_at
       FROM folders f
-      LEFT JOIN notes n ON n.folder_id = f.id AND n.archived = 0
-      LEFT JOIN tasks t ON t.folder_id = f.id AND t.completed = 0
       WHERE f.id = ? AND f.user_id = ?
-      GROUP BY f.id
     `;
 
     const folder = await db.queryOne(sql, [folderId, userId]);
-    return folder;
+    if (!folder) {
+      return folder;
+    }
+
+    // Counts exclude archived notes and completed tasks
+    const counts = await counters.getFolderCounters(folder.id);
+    return {
+      ...folder,
+      note_count: counts.notes - counts.archived_notes,
+      task_count: counts.tasks_active,
+    };
   }
 
   /**
@@ -143,31 +160,24 @@ export default class FolderService {
       : `INSERT INTO folders (name, user_id, parent_id, description, icon, color, position)
          VALUES (?, ?, ?, ?, ?, ?, ?)`;
 
+    const values = [name, userId, parent_id, description, icon, color, position];
+
     if (db.isSQLite) {
-      const folder = await db.queryOne(sql, [
-        name,
-        userId,
-        parent_id,
-        description,
-        icon,
-        color,
-        position,
-      ]);
+      const folder = await db.transaction(async (tx) => {
+        const inserted = await tx.queryOne(sql, values);
+        await FolderService.addToClosure(tx, inserted.id, parent_id);
+        return inserted;
+      });
       await FolderService.invalidateCache(userId);
       return folder;
     }
 
     // MySQL
-    const result = await db.query(sql, [
-      name,
-      userId,
-      parent_id,
-      description,
-      icon,
-      color,
-      position,
-    ]);
-    const insertId = result.insertId;
+    const insertId = await db.transaction(async (tx) => {
+      const result = await tx.run(sql, values);
+      await FolderService.addToClosure(tx, result.insertId, parent_id);
+      return result.insertId;
+    });
     const newFolder = await FolderService.getFolderById(insertId, userId);
     await FolderService.invalidateCache(userId);
     return newFolder;
@@ -226,7 +236,15 @@ export default class FolderService {
 
     values.push(folderId, userId);
     const sql = `UPDATE folders SET ${updateFields.join(', ')} WHERE id = ? AND user_id = ?`;
-    await db.run(sql, values);
+
+    if (updates.parent_id !== undefined && updates.parent_id !== folder.parent_id) {
+      await db.transaction(async (tx) => {
+        await tx.run(sql, values);
+        await FolderService.moveInClosure(tx, folderId, updates.parent_id);
+      });
+    } else {
+      await db.run(sql, values);
+    }
 
     await FolderService.invalidateCache(userId);
     return await FolderService.getFolderById(folderId, userId);
@@ -271,55 +289,36 @@ export default class FolderService {
   }
 
   /**
-   * Check if moving a folder would create a circular reference.
+   * Check if moving a folder would create a circular reference,
+   * i.e. whether the new parent is the folder itself or one of its descendants.
    */
   static async checkCircularReference(folderId, newParentId, userId) {
     if (folderId === newParentId) {
       return true;
     }
 
-    let currentId = newParentId;
-    const visited = new Set([folderId]);
-
-    while (currentId !== null) {
-      if (visited.has(currentId)) {
-        return true;
-      }
-      visited.add(currentId);
-
-      const parent = await db.queryOne(
-        'SELECT parent_id FROM folders WHERE id = ? AND user_id = ?',
-        [currentId, userId],
-      );
-      if (!parent) {
-        break;
-      }
-      currentId = parent.parent_id;
-    }
-
-    return false;
+    const descendant = await db.queryOne(
+      `SELECT c.descendant_id
+       FROM folder_closure c
+       JOIN folders f ON f.id = c.descendant_id
+       WHERE c.ancestor_id = ? AND c.descendant_id = ? AND f.user_id = ?`,
+      [folderId, newParentId, userId],
+    );
+    return Boolean(descendant);
   }
 
   /**
-   * Get folder breadcrumb path.
+   * Get folder breadcrumb path, from the root folder down to folderId.
    */
   static async getFolderPath(folderId, userId) {
-    const path = [];
-    let currentId = folderId;
-
-    while (currentId !== null) {
-      const folder = await db.queryOne(
-        'SELECT id, name, parent_id FROM folders WHERE id = ? AND user_id = ?',
-        [currentId, userId],
-      );
-      if (!folder) {
-        break;
-      }
-      path.unshift(folder);
-      currentId = folder.parent_id;
-    }
-
-    return path;
+    return await db.query(
+      `SELECT f.id, f.name, f.parent_id
+       FROM folder_closure c
+       JOIN folders f ON f.id = c.ancestor_id
+       WHERE c.descendant_id = ? AND f.user_id = ?
+       ORDER BY c.depth DESC`,
+      [folderId, userId],
+    );
   }
 
   /**
@@ -328,7 +327,7 @@ export default class FolderService {
   static async getNotesInFolder(folderId, userId, recursive = false) {
     if (!recursive) {
       const sql = `
-        SELECT n.*,
+        SELECT ${FOLDER_NOTE_COLUMNS},
           GROUP_CONCAT(t.name) as tag_names,
           GROUP_CONCAT(t.id) as tag_ids
         FROM notes n
@@ -341,43 +340,81 @@ export default class FolderService {
       return await db.query(sql, [folderId, userId]);
     }
 
-    // Recursive: get all descendant folder IDs
-    const folderIds = await FolderService.getAllDescendantFolderIds(folderId, userId);
-    folderIds.push(folderId);
-
-    const placeholders = folderIds.map(() => '?').join(',');
+    // Recursive: the folder and all of its descendants, from the closure table
     const sql = `
-      SELECT n.*,
+      SELECT ${FOLDER_NOTE_COLUMNS},
         GROUP_CONCAT(t.name) as tag_names,
         GROUP_CONCAT(t.id) as tag_ids
       FROM notes n
       LEFT JOIN note_tag nt ON n.id = nt.note_id
       LEFT JOIN tags t ON nt.tag_id = t.id
-      WHERE n.folder_id IN (${placeholders}) AND n.owner_id = ? AND n.archived = 0
+      WHERE n.folder_id IN (SELECT descendant_id FROM folder_closure WHERE ancestor_id = ?)
+        AND n.owner_id = ? AND n.archived = 0
       GROUP BY n.id
       ORDER BY n.pinned DESC, n.updated_at DESC
     `;
 
-    return await db.query(sql, [...folderIds, userId]);
+    return await db.query(sql, [folderId, userId]);
   }
 
   /**
-   * Get all descendant folder IDs recursively.
+   * Get all descendant folder IDs, nearest first.
    */
   static async getAllDescendantFolderIds(folderId, userId) {
-    const descendants = [];
-    const children = await db.query('SELECT id FROM folders WHERE parent_id = ? AND user_id = ?', [
-      folderId,
-      userId,
-    ]);
+    const rows = await db.query(
+      `SELECT c.descendant_id AS id
+       FROM folder_closure c
+       JOIN folders f ON f.id = c.descendant_id
+       WHERE c.ancestor_id = ? AND c.depth > 0 AND f.user_id = ?
+       ORDER BY c.depth`,
+      [folderId, userId],
+    );
+    return rows.map((row) => row.id);
+  }
 
-    for (const child of children) {
-      descendants.push(child.id);
-      const childDescendants = await FolderService.getAllDescendantFolderIds(child.id, userId);
-      descendants.push(...childDescendants);
-    }
+  /**
+   * Add a new folder to the closure table: itself at depth 0, and below every
+   * ancestor of its parent.
+   */
+  static async addToClosure(tx, folderId, parentId) {
+    await tx.run(
+      `INSERT INTO folder_closure (ancestor_id, descendant_id, depth)
+       SELECT ancestor_id, ?, depth + 1 FROM folder_closure WHERE descendant_id = ?
+       UNION ALL
+       SELECT ?, ?, 0`,
+      [folderId, parentId, folderId, folderId],
+    );
+  }
+
+  /**
+   * Re-link a folder's subtree under newParentId (null for the root level): drop the
+   * links from its old ancestors, then link every ancestor of the new parent to every
+   * folder in the subtree. Links inside the subtree are unchanged.
+   */
+  static async moveInClosure(tx, folderId, newParentId) {
+    // MySQL cannot select from the table a DELETE subquery deletes from, so it joins instead
+    const detachSql = tx.isSQLite
+      ? `DELETE FROM folder_closure
+         WHERE descendant_id IN (SELECT descendant_id FROM folder_closure WHERE ancestor_id = ?)
+           AND ancestor_id NOT IN (SELECT descendant_id FROM folder_closure WHERE ancestor_id = ?)`
+      : `DELETE link FROM folder_closure link
+         JOIN folder_closure subtree
+           ON subtree.descendant_id = link.descendant_id AND subtree.ancestor_id = ?
+         LEFT JOIN folder_closure inside
+           ON inside.ancestor_id = ? AND inside.descendant_id = link.ancestor_id
+         WHERE inside.ancestor_id IS NULL`;
+    await tx.run(detachSql, [folderId, folderId]);
 
-    return descendants;
+    if (newParentId !== null) {
+      await tx.run(
+        `INSERT INTO folder_closure (ancestor_id, descendant_id, depth)
+         SELECT above.ancestor_id, subtree.descendant_id, above.depth + subtree.depth + 1
+         FROM folder_closure above
+         JOIN folder_closure subtree ON subtree.ancestor_id = ?
+         WHERE above.descendant_id = ?`,
+        [folderId, newParentId],
+      );
+    }
   }
 
   /**
@@ -465,23 +502,10 @@ export default class FolderService {
    * Invalidate folder cache for a user.
    */
   static async invalidateCache(userId) {
-    const cacheKey = `folders:user:${userId}`;
-    await cache.del(cacheKey);
-
     // Also invalidate notes cache as folder changes affect note queries
-    // Note: This invalidates multiple keys by pattern matching
-    // If cache implementation doesn't support glob patterns,
-    // we'll need to track and delete specific keys individually
-    try {
-      // Try pattern-based deletion (works with Redis KEYS/DEL)
-      const notesPattern = `notes:user:${userId}:*`;
-      await cache.del(notesPattern);
-    } catch (_error) {
-      // If pattern deletion fails, fall back to known cache keys
-      const viewTypes = ['all', 'favorites', 'archived'];
-      for (const view of viewTypes) {
-        await cache.del(`notes:user:${userId}:${view}::`);
-      }
-    }
+    await cache.invalidateNamespaces(
+      CACHE_NAMESPACE.FOLDERS(userId),
+      CACHE_NAMESPACE.NOTES(userId),
+    );
   }
 }
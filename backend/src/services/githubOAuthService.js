@@ -5,9 +5,9 @@
 
 import crypto from 'node:crypto';
 import axios from 'axios';
-import bcrypt from 'bcryptjs';
 import db from '../config/database.js';
 import logger from '../config/logger.js';
+import AuthService from './authService.js';
 
 export default class GitHubOAuthService {
   /**
@@ -171,7 +171,7 @@ export default class GitHubOAuthService {
 
     // Create new user with random password (they'll use GitHub OAuth to login)
     const randomPassword = crypto.randomBytes(32).toString('hex');
-    const passwordHash = await bcrypt.hash(randomPassword, 14);
+    const passwordHash = await AuthService.hashPassword(randomPassword);
 
     const result = await db.run(
       `INSERT INTO users (username, password_hash, email, bio, preferred_language) VALUES (?, ?, ?, ?, ?)`,
@@ -6,6 +6,11 @@ import crypto from 'node:crypto';
 import jwt from 'jsonwebtoken';
 import db from '../config/database.js';
 import logger from '../config/logger.js';
+import refreshTokenStore from './refreshTokenStore.js';
+
+// Revokes a refresh token that was just used for rotation
+const REVOKE_USED_TOKEN_SQL = `UPDATE refresh_tokens
+  SET revoked = 1, revoked_at = ?, last_used_at = ? WHERE token_hash = ?`;
 
 class JWTService {
   constructor() {
@@ -55,7 +60,7 @@ class JWTService {
   }
 
   /**
-   * Store a refresh token in the database.
+   * Store a refresh token in the refresh token store (Redis when enabled) and the database.
    */
   async storeRefreshToken(
     userId,
@@ -64,10 +69,59 @@ class JWTService {
     deviceInfo = null,
     ipAddress = null,
     parentTokenHash = null,
+  ) {
+    const tokenHash = this.hashToken(tokenId);
+    const now = this.getCurrentTimestamp();
+
+    if (refreshTokenStore.isEnabled()) {
+      try {
+        await refreshTokenStore.add(userId, tokenHash, {
+          expiresAt,
+          deviceInfo,
+          ipAddress,
+          parentTokenHash,
+          createdAt: now,
+        });
+        // The row is only an audit record here, so it is written in the background
+        this.insertRefreshToken(
+          userId,
+          tokenHash,
+          expiresAt,
+          deviceInfo,
+          ipAddress,
+          parentTokenHash,
+          now,
+        );
+        return { success: true };
+      } catch (error) {
+        logger.warn('[JWT] Redis refresh token store failed, using the database:', error.message);
+      }
+    }
+
+    return this.insertRefreshToken(
+      userId,
+      tokenHash,
+      expiresAt,
+      deviceInfo,
+      ipAddress,
+      parentTokenHash,
+      now,
+    );
+  }
+
+  /**
+   * Insert a refresh_tokens row. Never throws.
+   */
+  async insertRefreshToken(
+    userId,
+    tokenHash,
+    expiresAt,
+    deviceInfo,
+    ipAddress,
+    parentTokenHash,
+    now,
   ) {
     try {
-      const tokenHash = this.hashToken(tokenId);
-      const now = this.getCurrentTimestamp();
       // Check if refresh_tokens table exists (for backward compatibility with tests/old DBs)
       const result = await db
         .run(
@@ -116,6 +170,15 @@ class JWTService {
     }
   }
 
+  /**
+   * Run an audit write to refresh_tokens in the background (Redis store only).
+   */
+  auditWrite(sql, params) {
+    db.run(sql, params).catch((error) => {
+      logger.warn('[JWT] Failed to record refresh token audit row:', error.message);
+    });
+  }
+
   /**
    * Refresh an access token using a refresh token with rotation.
    * Implements refresh token rotation for enhanced security:
@@ -163,8 +226,30 @@ class JWTService {
         };
       }
 
-      // Check if token exists and is valid in database
       const tokenHash = this.hashToken(tokenId);
+      const now = this.getCurrentTimestamp();
+
+      // With the Redis store, check and revoke the token there in one step
+      let claim = null;
+      if (refreshTokenStore.isEnabled()) {
+        try {
+          claim = await refreshTokenStore.claim(userId, tokenHash, now);
+        } catch (error) {
+          logger.warn('[JWT] Redis refresh token store failed, using the database:', error.message);
+        }
+      }
+      if (claim === 'invalid') {
+        return { success: false, error: 'Invalid refresh token' };
+      }
+      if (claim === 'revoked') {
+        return this.handleTokenReuse(userId);
+      }
+      if (claim === 'claimed') {
+        this.auditWrite(REVOKE_USED_TOKEN_SQL, [now, now, tokenHash]);
+        return this.rotateRefreshToken(userId, tokenHash, deviceInfo, ipAddress);
+      }
+
+      // Not in Redis (or Redis is not used): check the database
       let storedToken;
       try {
         storedToken = await db.queryOne(
@@ -194,10 +279,7 @@ class JWTService {
 
       // Check if token is revoked
       if (storedToken.revoked) {
-        // Token reuse detected - revoke all tokens for this user as security measure
-        logger.error(`[SECURITY] Refresh token reuse detected for user ${userId}`);
-        await this.revokeAllUserTokens(userId);
-        return { success: false, error: 'Token reuse detected. All sessions revoked.' };
+        return this.handleTokenReuse(userId);
       }
 
       // Check if token is expired
@@ -205,44 +287,10 @@ class JWTService {
         return { success: false, error: 'Refresh token expired' };
       }
 
-      // Generate new tokens with rotation
-      const newAccessToken = this.generateToken(userId);
-      const { token: newRefreshToken, tokenId: newTokenId } = this.generateRefreshToken(userId);
+      // Revoke the old refresh token and record its last use
+      await db.run(REVOKE_USED_TOKEN_SQL, [now, now, tokenHash]);
 
-      // Calculate new expiry
-      const newExpiresAt = new Date();
-      newExpiresAt.setDate(newExpiresAt.getDate() + 7);
-
-      // Revoke the old refresh token
-      const revokedAt = this.getCurrentTimestamp();
-      await db.run(`UPDATE refresh_tokens SET revoked = 1, revoked_at = ? WHERE token_hash = ?`, [
-        revokedAt,
-        tokenHash,
-      ]);
-
-      // Store the new refresh token with parent tracking
-      await this.storeRefreshToken(
-        userId,
-        newTokenId,
-        newExpiresAt.toISOString(),
-        deviceInfo,
-        ipAddress,
-        tokenHash,
-      );
-
-      // Update last_used_at for the old token
-      const lastUsedAt = this.getCurrentTimestamp();
-      await db.run(`UPDATE refresh_tokens SET last_used_at = ? WHERE token_hash = ?`, [
-        lastUsedAt,
-        tokenHash,
-      ]);
-
-      return {
-        success: true,
-        accessToken: newAccessToken,
-        refreshToken: newRefreshToken,
-        rotated: true,
-      };
+      return this.rotateRefreshToken(userId, tokenHash, deviceInfo, ipAddress);
     } catch (error) {
       if (error.name === 'TokenExpiredError') {
         return { success: false, error: 'Refresh token expired' };
@@ -252,8 +300,49 @@ class JWTService {
     }
   }
 
+  /**
+   * Issue new access and refresh tokens replacing the (already revoked) parent token.
+   */
+  async rotateRefreshToken(userId, parentTokenHash, deviceInfo, ipAddress) {
+    const newAccessToken = this.generateToken(userId);
+    const { token: newRefreshToken, tokenId: newTokenId } = this.generateRefreshToken(userId);
+
+    // Calculate new expiry
+    const newExpiresAt = new Date();
+    newExpiresAt.setDate(newExpiresAt.getDate() + 7);
+
+    // Store the new refresh token with parent tracking
+    await this.storeRefreshToken(
+      userId,
+      newTokenId,
+      newExpiresAt.toISOString(),
+      deviceInfo,
+      ipAddress,
+      parentTokenHash,
+    );
+
+    return {
+      success: true,
+      accessToken: newAccessToken,
+      refreshToken: newRefreshToken,
+      rotated: true,
+    };
+  }
+
+  /**
+   * A revoked refresh token was presented again: revoke all tokens for this user
+   * as a security measure.
+   */
+  async handleTokenReuse(userId) {
+    logger.error(`[SECURITY] Refresh token reuse detected for user ${userId}`);
+    await this.revokeAllUserTokens(userId);
+    return { success: false, error: 'Token reuse detected. All sessions revoked.' };
+  }
+
   /**
    * Revoke a specific refresh token.
+   * Revocations are written to the database and Redis (when enabled) before returning,
+   * unlike the background audit writes of token rotation.
    */
   async revokeRefreshToken(tokenId) {
     try {
@@ -263,6 +352,9 @@ class JWTService {
         revokedAt,
         tokenHash,
       ]);
+      if (refreshTokenStore.isEnabled()) {
+        await refreshTokenStore.revoke(tokenHash, revokedAt);
+      }
       return { success: true };
     } catch (error) {
       logger.error('[JWT] Failed to revoke token:', error);
@@ -280,6 +372,9 @@ class JWTService {
         `UPDATE refresh_tokens SET revoked = 1, revoked_at = ? WHERE user_id = ? AND revoked = 0`,
         [revokedAt, userId],
       );
+      if (refreshTokenStore.isEnabled()) {
+        await refreshTokenStore.revokeAll(userId, revokedAt);
+      }
       return { success: true };
     } catch (error) {
       logger.error('[JWT] Failed to revoke all user tokens:', error);
@@ -289,6 +384,8 @@ class JWTService {
 
   /**
    * Clean up expired tokens (should be run periodically).
+   * With the Redis store, tokens there expire on their own and the rows deleted here
+   * are only audit records.
    */
   async cleanupExpiredTokens() {
     try {
@@ -305,6 +402,14 @@ class JWTService {
    * Get active refresh tokens for a user.
    */
   async getUserTokens(userId) {
+    if (refreshTokenStore.isEnabled()) {
+      try {
+        return { success: true, tokens: await refreshTokenStore.list(userId) };
+      } catch (error) {
+        logger.warn('[JWT] Redis refresh token store failed, using the database:', error.message);
+      }
+    }
+
     try {
       const now = this.getCurrentTimestamp();
       const tokens = await db.query(
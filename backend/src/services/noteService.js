@@ -5,42 +5,157 @@
 
 import { marked } from 'marked';
 import sanitizeHtml from 'sanitize-html';
-import { CACHE_TTL, SEARCH_MIN_LENGTH } from '../config/constants.js';
+import {
+  CACHE_NAMESPACE,
+  CACHE_SOFT_TTL,
+  CACHE_TTL,
+  SEARCH_MIN_LENGTH,
+  TAG_CLEANUP,
+} from '../config/constants.js';
 import db from '../config/database.js';
 import elasticsearch from '../config/elasticsearch.js';
 import cache from '../config/redis.js';
 import { validateEmail } from '../utils/common.js';
+import searchOutbox from './searchOutbox.js';
+
+// Note columns for lists: everything but body_html, which only single-note reads need.
+// The body stays since list responses carry it (the frontend keeps them for offline use).
+const NOTE_LIST_COLUMNS = `n.id, n.title, n.body, n.excerpt, n.images, n.pinned, n.favorite,
+  n.archived, n.owner_id, n.folder_id, n.created_at, n.updated_at`;
 
 export default class NoteService {
   /**
    * Get all notes for a user with optional filters.
    * Uses Elasticsearch for full-text search if available, otherwise falls back to SQL.
-   * Results are cached in Redis for improved performance.
+   * Results are cached in Redis for improved performance; concurrent misses
+   * share one query and expiring lists are refreshed in the background.
+   *
+   * When `limit` is given, returns one page as `{ notes, nextCursor }`, ordered by
+   * (pinned, updated_at, id). Pass `nextCursor` back as `cursor` for the next page;
+   * it is null on the last page. Without `limit`, returns every matching note.
    */
-  static async getNotesForUser(userId, viewType = 'all', searchQuery = '', tagFilter = '') {
-    // Generate cache key
-    const cacheKey = `notes:user:${userId}:${viewType}:${searchQuery}:${tagFilter}`;
-
-    // Try cache first
-    const cached = await cache.get(cacheKey);
-    if (cached) {
-      return cached;
+  static async getNotesForUser(
+    userId,
+    viewType = 'all',
+    searchQuery = '',
+    tagFilter = '',
+    { limit = null, cursor = null } = {},
+  ) {
+    // Generate cache key (embeds the user's notes generation)
+    const cacheKey = await cache.versionedKey(
+      CACHE_NAMESPACE.NOTES(userId),
+      `${viewType}:${searchQuery}:${tagFilter}:${limit ?? 'all'}:${cursor ?? ''}`,
+    );
+    const isSearch = searchQuery && searchQuery.length >= SEARCH_MIN_LENGTH;
+
+    const page = await cache.getOrCompute(
+      cacheKey,
+      isSearch ? CACHE_TTL.NOTES_SEARCH : CACHE_TTL.NOTES_LIST,
+      () =>
+        NoteService.queryNotesForUser(userId, viewType, searchQuery, tagFilter, {
+          limit,
+          cursor: NoteService.decodeCursor(cursor),
+        }),
+      { softTtl: isSearch ? null : CACHE_SOFT_TTL.NOTES_LIST },
+    );
+
+    return limit ? page : page.notes;
+  }
+
+  /**
+   * Encode the position after a note as an opaque pagination cursor.
+   * Elasticsearch pages resume from the hit's sort values, full-text SQL pages
+   * from a row offset (pass `{ offset }`), and list pages from the note's
+   * (pinned, updated_at, id).
+   */
+  static encodeCursor(note) {
+    let position;
+    if (note.sort) {
+      position = { s: note.sort };
+    } else if (note.offset !== undefined) {
+      position = { o: note.offset };
+    } else {
+      position = {
+        p: note.pinned ? 1 : 0,
+        u: note.updated_at instanceof Date ? note.updated_at.toISOString() : note.updated_at,
+        d: note.updated_at instanceof Date ? 1 : undefined,
+        i: note.id,
+      };
     }
+    return Buffer.from(JSON.stringify(position)).toString('base64url');
+  }
 
+  /**
+   * Decode a cursor produced by encodeCursor. Returns null for a missing or malformed cursor.
+   */
+  static decodeCursor(cursor) {
+    if (!cursor || typeof cursor !== 'string') return null;
+
+    try {
+      const position = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf8'));
+      if (Array.isArray(position?.s)) {
+        return { searchAfter: position.s };
+      }
+      if (Number.isInteger(position?.o) && position.o >= 0) {
+        return { offset: position.o };
+      }
+      if ((position?.p === 0 || position?.p === 1) && position.u && Number.isInteger(position.i)) {
+        return {
+          pinned: position.p,
+          updatedAt: position.d ? new Date(position.u) : position.u,
+          id: position.i,
+        };
+      }
+    } catch (_error) {
+      // Fall through to null
+    }
+    return null;
+  }
+
+  /**
+   * Build an FTS5 MATCH expression that prefix-matches every word of a search query.
+   * Returns null when the full-text index is unavailable or the query has no words.
+   */
+  static buildFtsQuery(searchQuery) {
+    if (!db.hasNotesFts) return null;
+
+    // Quoting each word keeps FTS5 operators and punctuation in user input inert
+    const words = String(searchQuery).match(/[\p{L}\p{N}]+/gu);
+    if (!words) return null;
+    return words.map((word) => `"${word}"*`).join(' ');
+  }
+
+  /**
+   * Query notes for a user, bypassing the cache.
+   * Returns `{ notes, nextCursor }`; without a limit all notes are returned.
+   */
+  static async queryNotesForUser(
+    userId,
+    viewType,
+    searchQuery,
+    tagFilter,
+    { limit = null, cursor = null } = {},
+  ) {
     // Use Elasticsearch for full-text search if available and query is provided
     if (searchQuery && searchQuery.length >= SEARCH_MIN_LENGTH && elasticsearch.isEnabled()) {
       const esResults = await elasticsearch.searchNotes(userId, searchQuery, {
         archived: viewType === 'archived',
         favorite: viewType === 'favorites' ? true : null,
         tags: tagFilter ? [tagFilter] : null,
+        // Fetch one extra hit to find out whether another page follows
+        ...(limit !== null && { limit: limit + 1 }),
+        searchAfter: cursor?.searchAfter ?? null,
       });
 
       if (esResults?.notes) {
+        const hasMore = limit !== null && esResults.notes.length > limit;
+        const hits = hasMore ? esResults.notes.slice(0, limit) : esResults.notes;
+        const nextCursor = hasMore ? NoteService.encodeCursor(hits[hits.length - 1]) : null;
+
         // Fetch full note details from database (ES only stores indexed fields)
-        const noteIds = esResults.notes.map((n) => n.id);
+        const noteIds = hits.map((n) => n.id);
         if (noteIds.length === 0) {
-          await cache.set(cacheKey, [], CACHE_TTL.NOTES_SEARCH);
-          return [];
+          return { notes: [], nextCursor };
         }
 
         // Validate noteIds are integers to prevent SQL injection
@@ -49,14 +164,13 @@ export default class NoteService {
           .map((id) => (typeof id === 'string' ? parseInt(id, 10) : id))
           .filter((id) => Number.isInteger(id) && id > 0 && !Number.isNaN(id));
         if (validNoteIds.length === 0) {
-          await cache.set(cacheKey, [], CACHE_TTL.NOTES_SEARCH);
-          return [];
+          return { notes: [], nextCursor };
         }
 
         // Use parameterized query to prevent SQL injection
         const placeholders = validNoteIds.map(() => '?').join(',');
         const sql = `
-          SELECT DISTINCT n.*,
+          SELECT DISTINCT ${NOTE_LIST_COLUMNS},
             GROUP_CONCAT(t.name) as tag_names,
             GROUP_CONCAT(t.id) as tag_ids
           FROM notes n
@@ -84,40 +198,57 @@ export default class NoteService {
             : [],
         }));
 
-        await cache.set(cacheKey, parsedNotes, CACHE_TTL.NOTES_SEARCH);
-        return parsedNotes;
+        return { notes: parsedNotes, nextCursor };
       }
     }
 
+    // Full-text searches rank with BM25 and page by offset; lists page by keyset
+    const ftsQuery =
+      searchQuery && searchQuery.length >= SEARCH_MIN_LENGTH
+        ? NoteService.buildFtsQuery(searchQuery)
+        : null;
+
+    // A cursor from another search tier cannot be resumed here; end the listing instead
+    // of restarting it
+    if (cursor && (cursor.searchAfter || (cursor.offset !== undefined) !== !!ftsQuery)) {
+      return { notes: [], nextCursor: null };
+    }
+
     // Fall back to SQL query
     let sql, params;
+    const ftsJoin = ftsQuery
+      ? `INNER JOIN (SELECT rowid AS note_id, rank AS score FROM notes_fts WHERE notes_fts MATCH ?)
+          fts ON fts.note_id = n.id`
+      : '';
 
     // Special handling for 'shared' view - use INNER JOIN to only get shared notes
     if (viewType === 'shared') {
       sql = `
-        SELECT DISTINCT n.*,
+        SELECT DISTINCT ${NOTE_LIST_COLUMNS},
           GROUP_CONCAT(t.name) as tag_names,
           GROUP_CONCAT(t.id) as tag_ids
         FROM notes n
+        ${ftsJoin}
         INNER JOIN share_notes sn ON n.id = sn.note_id
         LEFT JOIN note_tag nt ON n.id = nt.note_id
         LEFT JOIN tags t ON nt.tag_id = t.id
         WHERE sn.shared_with_id = ? AND n.owner_id != ?
       `;
-      params = [userId, userId];
+      params = ftsQuery ? [ftsQuery, userId, userId] : [userId, userId];
     } else {
       // Standard query for other views
       sql = `
-        SELECT DISTINCT n.*,
+        SELECT DISTINCT ${NOTE_LIST_COLUMNS},
           GROUP_CONCAT(t.name) as tag_names,
           GROUP_CONCAT(t.id) as tag_ids
         FROM notes n
+        ${ftsJoin}
         LEFT JOIN note_tag nt ON n.id = nt.note_id
         LEFT JOIN tags t ON nt.tag_id = t.id
         LEFT JOIN share_notes sn ON n.id = sn.note_id
         WHERE (n.owner_id = ? OR sn.shared_with_id = ?)
       `;
-      params = [userId, userId];
+      params = ftsQuery ? [ftsQuery, userId, userId] : [userId, userId];
 
       // Apply view filter
       switch (viewType) {
@@ -133,8 +264,8 @@ export default class NoteService {
       }
     }
 
-    // Apply search filter (SQL LIKE as fallback)
-    if (searchQuery && searchQuery.length >= SEARCH_MIN_LENGTH) {
+    // Apply search filter (SQL LIKE as fallback when there is no full-text index)
+    if (searchQuery && searchQuery.length >= SEARCH_MIN_LENGTH && !ftsQuery) {
       sql += ` AND (n.title LIKE ? OR n.body LIKE ?)`;
       const searchPattern = `%${searchQuery}%`;
       params.push(searchPattern, searchPattern);
@@ -146,25 +277,51 @@ export default class NoteService {
       params.push(tagFilter);
     }
 
-    sql += ` GROUP BY n.id ORDER BY n.pinned DESC, n.updated_at DESC`;
+    const offset = cursor?.offset ?? 0;
+    if (ftsQuery) {
+      sql += ` GROUP BY n.id ORDER BY n.pinned DESC, fts.score, n.id DESC`;
+    } else {
+      // Keyset pagination: resume strictly after the cursor's (pinned, updated_at, id)
+      if (cursor) {
+        sql += ` AND (n.pinned < ?
+          OR (n.pinned = ? AND n.updated_at < ?)
+          OR (n.pinned = ? AND n.updated_at = ? AND n.id < ?))`;
+        params.push(
+          cursor.pinned,
+          cursor.pinned,
+          cursor.updatedAt,
+          cursor.pinned,
+          cursor.updatedAt,
+          cursor.id,
+        );
+      }
+      sql += ` GROUP BY n.id ORDER BY n.pinned DESC, n.updated_at DESC, n.id DESC`;
+    }
+    if (limit !== null) {
+      // One extra row tells whether another page follows
+      sql += ` LIMIT ? OFFSET ?`;
+      params.push(limit + 1, offset);
+    }
 
-    const notes = await db.query(sql, params);
+    const rows = await db.query(sql, params);
+    const hasMore = limit !== null && rows.length > limit;
+    const notes = hasMore ? rows.slice(0, limit) : rows;
 
     // Parse tags from concatenated strings
-    const parsedNotes = notes.map((note) => ({
-      ...note,
-      tags: note.tag_names
-        ? note.tag_names.split(',').map((name, i) => ({
-            id: note.tag_ids.split(',')[i],
-            name,
-          }))
-        : [],
-    }));
-
-    // Cache results
-    await cache.set(cacheKey, parsedNotes, CACHE_TTL.NOTES_LIST);
-
-    return parsedNotes;
+    return {
+      notes: notes.map((note) => ({
+        ...note,
+        tags: note.tag_names
+          ? note.tag_names.split(',').map((name, i) => ({
+              id: note.tag_ids.split(',')[i],
+              name,
+            }))
+          : [],
+      })),
+      nextCursor: hasMore
+        ? NoteService.encodeCursor(ftsQuery ? { offset: offset + limit } : notes[notes.length - 1])
+        : null,
+    };
   }
 
   /**
@@ -172,32 +329,26 @@ export default class NoteService {
    * Cached for improved performance.
    */
   static async getTagsForUser(userId) {
-    const cacheKey = `tags:user:${userId}`;
-
-    // Try cache first
-    const cached = await cache.get(cacheKey);
-    if (cached) {
-      return cached;
-    }
-
-    // Query database
-    const tags = await db.query(
-      `
-      SELECT DISTINCT t.*, COUNT(nt.note_id) as note_count
-      FROM tags t
-      INNER JOIN note_tag nt ON t.id = nt.tag_id
-      INNER JOIN notes n ON nt.note_id = n.id
-      WHERE n.owner_id = ?
-      GROUP BY t.id
-      ORDER BY t.name
-    `,
-      [userId],
+    const cacheKey = await cache.versionedKey(CACHE_NAMESPACE.TAGS(userId));
+
+    return cache.getOrCompute(
+      cacheKey,
+      CACHE_TTL.TAGS,
+      () =>
+        db.query(
+          `
+          SELECT DISTINCT t.*, COUNT(nt.note_id) as note_count
+          FROM tags t
+          INNER JOIN note_tag nt ON t.id = nt.tag_id
+          INNER JOIN notes n ON nt.note_id = n.id
+          WHERE n.owner_id = ?
+          GROUP BY t.id
+          ORDER BY t.name
+        `,
+          [userId],
+        ),
+      { softTtl: CACHE_SOFT_TTL.TAGS },
     );
-
-    // Cache results
-    await cache.set(cacheKey, tags, CACHE_TTL.TAGS);
-
-    return tags;
   }
 
   /**
@@ -252,7 +403,7 @@ export default class NoteService {
 
   /**
    * Create a new note.
-   * Invalidates cache and indexes in Elasticsearch.
+   * Invalidates cache and queues the note for Elasticsearch indexing.
    */
   static async createNote(
     userId,
@@ -266,52 +417,47 @@ export default class NoteService {
     folderId = null,
   ) {
     const imagesJson = Array.isArray(images) ? JSON.stringify(images) : null;
-
-    const result = await db.run(
-      `
-      INSERT INTO notes (title, body, images, pinned, favorite, archived, owner_id, folder_id)
-      VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    `,
-      [
-        title,
-        body,
-        imagesJson,
-        pinned ? 1 : 0,
-        favorite ? 1 : 0,
-        archived ? 1 : 0,
-        userId,
-        folderId,
-      ],
-    );
-
-    const noteId = result.insertId;
-
-    // Process tags
-    if (tags) {
-      await NoteService.updateNoteTags(noteId, tags);
-    }
+    const rendered = NoteService.renderContent(body);
+
+    const noteId = await db.transaction(async (tx) => {
+      const result = await tx.run(
+        `
+        INSERT INTO notes (title, body, excerpt, body_html, images, pinned, favorite, archived,
+          owner_id, folder_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+      `,
+        [
+          title,
+          body,
+          rendered.excerpt,
+          rendered.html,
+          imagesJson,
+          pinned ? 1 : 0,
+          favorite ? 1 : 0,
+          archived ? 1 : 0,
+          userId,
+          folderId,
+        ],
+      );
+      await NoteService.updateNoteTags(tx, result.insertId, tags);
+      await searchOutbox.enqueue(tx, result.insertId);
+      return result.insertId;
+    });
 
     // Get the complete note
     const note = await NoteService.getNoteById(noteId);
 
     // Invalidate user's notes and tags cache
-    await cache.delPattern(`notes:user:${userId}:*`);
-    await cache.del(`tags:user:${userId}`);
+    await NoteService.invalidateCache(userId);
 
-    // Index in Elasticsearch
-    if (note) {
-      await elasticsearch.indexNote({
-        ...note,
-        tags: note.tags ? note.tags.map((t) => t.name) : [],
-      });
-    }
+    searchOutbox.schedule();
 
     return note;
   }
 
   /**
    * Update an existing note.
-   * Invalidates cache and updates Elasticsearch index.
+   * Invalidates cache and queues the note for Elasticsearch indexing.
    */
   static async updateNote(noteId, title, body, tags, pinned, favorite, archived, images, folderId) {
     const updates = [];
@@ -322,8 +468,9 @@ export default class NoteService {
       params.push(title);
     }
     if (body !== undefined) {
-      updates.push('body = ?');
-      params.push(body);
+      const rendered = NoteService.renderContent(body);
+      updates.push('body = ?', 'excerpt = ?', 'body_html = ?');
+      params.push(body, rendered.excerpt, rendered.html);
     }
     if (images !== undefined) {
       updates.push('images = ?');
@@ -346,14 +493,15 @@ export default class NoteService {
       params.push(folderId);
     }
 
-    if (updates.length > 0) {
+    if (updates.length > 0 || tags) {
       params.push(noteId);
-      await db.run(`UPDATE notes SET ${updates.join(', ')} WHERE id = ?`, params);
-    }
-
-    // Update tags if provided
-    if (tags !== undefined) {
-      await NoteService.updateNoteTags(noteId, tags);
+      await db.transaction(async (tx) => {
+        if (updates.length > 0) {
+          await tx.run(`UPDATE notes SET ${updates.join(', ')} WHERE id = ?`, params);
+        }
+        await NoteService.updateNoteTags(tx, noteId, tags);
+        await searchOutbox.enqueue(tx, noteId);
+      });
     }
 
     // Get the updated note
@@ -361,14 +509,9 @@ export default class NoteService {
 
     if (note) {
       // Invalidate user's notes and tags cache
-      await cache.delPattern(`notes:user:${note.owner_id}:*`);
-      await cache.del(`tags:user:${note.owner_id}`);
+      await NoteService.invalidateCache(note.owner_id);
 
-      // Update in Elasticsearch
-      await elasticsearch.indexNote({
-        ...note,
-        tags: note.tags ? note.tags.map((t) => t.name) : [],
-      });
+      searchOutbox.schedule();
     }
 
     return note;
@@ -376,43 +519,114 @@ export default class NoteService {
 
   /**
    * Update note tags.
+   * Diffs the requested tags against the note's current tags and applies the
+   * difference with multi-row statements through executor (a transaction handle, so
+   * the tags change together with the note). Tags left without notes by this change
+   * are removed in the same transaction. Bumps the note's updated_at if its tags changed.
    */
-  static async updateNoteTags(noteId, tagsString) {
+  static async updateNoteTags(executor, noteId, tagsString) {
     // If tagsString is undefined, null, or empty, do nothing
     if (!tagsString) return;
 
-    // Clear existing tags
-    await db.run(`DELETE FROM note_tag WHERE note_id = ?`, [noteId]);
-
-    // Parse and add new tags
+    // Parse tags
     // Handle both string and array inputs
     const tagsStr = Array.isArray(tagsString) ? tagsString.join(',') : tagsString;
-    const tagNames = tagsStr
-      .trim()
-      .split(',')
-      .map((t) => t.trim().toLowerCase())
-      .filter((t) => t.length > 0);
-
-    for (const tagName of tagNames) {
-      // Get or create tag
-      let tag = await db.queryOne(`SELECT * FROM tags WHERE name = ?`, [tagName]);
-
-      if (!tag) {
-        const result = await db.run(`INSERT INTO tags (name) VALUES (?)`, [tagName]);
-        tag = { id: result.insertId, name: tagName };
-      }
-
-      // Link tag to note
-      await db.run(`INSERT OR IGNORE INTO note_tag (note_id, tag_id) VALUES (?, ?)`, [
+    const tagNames = [
+      ...new Set(
+        tagsStr
+          .trim()
+          .split(',')
+          .map((t) => t.trim().toLowerCase())
+          .filter((t) => t.length > 0),
+      ),
+    ];
+
+    const current = await executor.query(
+      `SELECT t.id, t.name FROM note_tag nt INNER JOIN tags t ON nt.tag_id = t.id
+       WHERE nt.note_id = ?`,
+      [noteId],
+    );
+    const currentNames = new Set(current.map((tag) => tag.name));
+    const wanted = new Set(tagNames);
+    const added = tagNames.filter((name) => !currentNames.has(name));
+    const removedIds = current.filter((tag) => !wanted.has(tag.name)).map((tag) => tag.id);
+
+    if (removedIds.length > 0) {
+      const placeholders = removedIds.map(() => '?').join(',');
+      await executor.run(`DELETE FROM note_tag WHERE note_id = ? AND tag_id IN (${placeholders})`, [
         noteId,
-        tag.id,
+        ...removedIds,
       ]);
     }
 
-    // Cleanup orphaned tags
-    await db.run(`
-      DELETE FROM tags WHERE id NOT IN (SELECT DISTINCT tag_id FROM note_tag)
-    `);
+    if (added.length > 0) {
+      const insertIgnore = executor.isSQLite ? 'INSERT OR IGNORE' : 'INSERT IGNORE';
+      const placeholders = added.map(() => '?').join(',');
+
+      // Get or create tags
+      await executor.run(
+        `${insertIgnore} INTO tags (name) VALUES ${added.map(() => '(?)').join(',')}`,
+        added,
+      );
+      const tags = await executor.query(
+        `SELECT id FROM tags WHERE name IN (${placeholders})`,
+        added,
+      );
+
+      // Link tags to note
+      const links = tags.map(() => '(?, ?)').join(',');
+      await executor.run(
+        `${insertIgnore} INTO note_tag (note_id, tag_id) VALUES ${links}`,
+        tags.flatMap((tag) => [noteId, tag.id]),
+      );
+    }
+
+    if (added.length > 0 || removedIds.length > 0) {
+      // A tag change is a note change, e.g. for the search reindex catch-up
+      await executor.run(`UPDATE notes SET updated_at = CURRENT_TIMESTAMP WHERE id = ?`, [noteId]);
+    }
+
+    await NoteService.deleteOrphanTags(executor, removedIds);
+  }
+
+  /**
+   * Delete the given tags if no note uses them anymore.
+   * Only the candidate tags are checked, so this stays cheap as note_tag grows.
+   */
+  static async deleteOrphanTags(executor, tagIds) {
+    if (tagIds.length === 0) return;
+
+    await executor.run(
+      `DELETE FROM tags WHERE id IN (${tagIds.map(() => '?').join(',')})
+       AND NOT EXISTS (SELECT 1 FROM note_tag WHERE note_tag.tag_id = tags.id)`,
+      tagIds,
+    );
+  }
+
+  /**
+   * Delete every tag that no note uses, in batches.
+   * Catches orphans created outside updateNoteTags/deleteNote, such as notes
+   * removed by a user deletion cascade. Returns the number of deleted tags.
+   */
+  static async cleanupOrphanTags(batchSize = TAG_CLEANUP.BATCH_SIZE) {
+    let deleted = 0;
+
+    while (true) {
+      const orphans = await db.query(
+        `SELECT id FROM tags
+         WHERE NOT EXISTS (SELECT 1 FROM note_tag WHERE note_tag.tag_id = tags.id)
+         LIMIT ?`,
+        [batchSize],
+      );
+      if (orphans.length === 0) break;
+
+      const ids = orphans.map((tag) => tag.id);
+      await db.transaction((tx) => NoteService.deleteOrphanTags(tx, ids));
+      deleted += orphans.length;
+      if (orphans.length < batchSize) break;
+    }
+
+    return deleted;
   }
 
   /**
@@ -447,7 +661,7 @@ export default class NoteService {
 
   /**
    * Delete a note.
-   * Invalidates cache and removes from Elasticsearch index.
+   * Invalidates cache and queues removal from the Elasticsearch index.
    * @param {number} noteId - Note ID to delete
    * @param {number} userId - Optional user ID for cache invalidation
    */
@@ -458,24 +672,25 @@ export default class NoteService {
       userId = note?.owner_id;
     }
 
-    // Delete from Elasticsearch first
-    await elasticsearch.deleteNote(noteId);
+    await db.transaction(async (tx) => {
+      // Delete shares first
+      await tx.run(`DELETE FROM share_notes WHERE note_id = ?`, [noteId]);
+
+      const tags = await tx.query(`SELECT tag_id FROM note_tag WHERE note_id = ?`, [noteId]);
 
-    // Delete shares first
-    await db.run(`DELETE FROM share_notes WHERE note_id = ?`, [noteId]);
+      // Delete note (cascades to note_tag)
+      await tx.run(`DELETE FROM notes WHERE id = ?`, [noteId]);
 
-    // Delete note (cascades to note_tag)
-    await db.run(`DELETE FROM notes WHERE id = ?`, [noteId]);
+      // Cleanup tags orphaned by this note
+      await NoteService.deleteOrphanTags(tx, tags.map((tag) => tag.tag_id));
 
-    // Cleanup orphaned tags
-    await db.run(`
-      DELETE FROM tags WHERE id NOT IN (SELECT DISTINCT tag_id FROM note_tag)
-    `);
+      await searchOutbox.enqueue(tx, noteId, 'delete');
+    });
+    searchOutbox.schedule();
 
     // Invalidate cache
     if (userId) {
-      await cache.delPattern(`notes:user:${userId}:*`);
-      await cache.del(`tags:user:${userId}`);
+      await NoteService.invalidateCache(userId);
     }
   }
 
@@ -519,7 +734,7 @@ export default class NoteService {
     );
 
     // Invalidate the recipient's notes cache so they see the shared note
-    await cache.delPattern(`notes:user:${sharedWithUser.id}:*`);
+    await cache.invalidateNamespaces(CACHE_NAMESPACE.NOTES(sharedWithUser.id));
 
     return { success: true, sharedWith: sharedWithUser };
   }
@@ -538,10 +753,18 @@ export default class NoteService {
 
     // Invalidate the recipient's notes cache so the note disappears from their shared view
     if (share?.shared_with_id) {
-      await cache.delPattern(`notes:user:${share.shared_with_id}:*`);
+      await cache.invalidateNamespaces(CACHE_NAMESPACE.NOTES(share.shared_with_id));
     }
   }
 
+  /**
+   * Invalidate a user's cached note lists and tags.
+   * Bumps the namespace generations instead of scanning for matching keys.
+   */
+  static async invalidateCache(userId) {
+    await cache.invalidateNamespaces(CACHE_NAMESPACE.NOTES(userId), CACHE_NAMESPACE.TAGS(userId));
+  }
+
   /**
    * Get excerpt from note body.
    */
@@ -551,6 +774,17 @@ export default class NoteService {
     return plainText.length > length ? `${plainText.substring(0, length)}...` : plainText;
   }
 
+  /**
+   * Compute the excerpt and rendered HTML stored alongside a note's body.
+   * Called on every body write so reads can serve them without re-rendering.
+   */
+  static renderContent(body) {
+    return {
+      excerpt: NoteService.getExcerpt(body),
+      html: NoteService.renderMarkdown(body),
+    };
+  }
+
   /**
    * Render markdown to HTML.
    */
@@ -0,0 +1,173 @@
+/**
+ * Pool of worker threads running bcrypt password hashes and comparisons.
+ *
+ * bcryptjs is pure JavaScript, so one hash at cost 14 is hundreds of milliseconds of
+ * CPU; on the main thread a burst of logins would stall every other request and
+ * socket. The pool runs them on PASSWORD_HASH_POOL.SIZE workers instead, spawned on
+ * first use (SIZE 0 keeps hashing on the event loop).
+ *
+ * Jobs wait in a bounded FIFO queue. When it is full, jobs reject with code
+ * PASSWORD_HASH_POOL_FULL and isSaturated() is true, which the passwordHashAdmission
+ * middleware answers with 503 and Retry-After before any work is done.
+ *
+ * Crashed workers are replaced by WorkerSupervisor. Once it has given up every worker,
+ * the pool is degraded and hashes on the event loop, as with SIZE 0, until it is closed.
+ */
+
+import { performance } from 'node:perf_hooks';
+import { Worker } from 'node:worker_threads';
+import bcrypt from 'bcryptjs';
+import { PASSWORD_HASH_POOL } from '../config/constants.js';
+import logger from '../config/logger.js';
+import WorkerSupervisor from '../config/workerSupervisor.js';
+import {
+  recordPasswordHash,
+  recordPasswordHashQueueDepth,
+  recordPasswordHashRejection,
+} from '../middleware/metrics.js';
+
+const WORKER_URL = new URL('./passwordHashWorker.js', import.meta.url);
+
+function runInThread(operation, args) {
+  return operation === 'hash' ? bcrypt.hash(...args) : bcrypt.compare(...args);
+}
+
+function poolFullError() {
+  const error = new Error('Password hashing queue is full');
+  error.code = 'PASSWORD_HASH_POOL_FULL';
+  return error;
+}
+
+export class PasswordHashPool {
+  /**
+   * @param {object} options - { size, maxQueue, workerUrl }
+   */
+  constructor({ size, maxQueue, workerUrl = WORKER_URL }) {
+    this.size = size;
+    this.maxQueue = maxQueue;
+    this.workerUrl = workerUrl;
+    this.queue = [];
+    this.started = false;
+    this.workers = new WorkerSupervisor({
+      name: 'Password hashing worker',
+      size,
+      createWorker: () => {
+        const worker = new Worker(this.workerUrl);
+        // Idle workers must not keep scripts alive; busy ones are ref'd in dispatch()
+        worker.unref();
+        return worker;
+      },
+      onMessage: (slot, message) => this.complete(slot, message),
+      onReady: () => this.dispatch(),
+      onDegrade: () => this.degrade(),
+    });
+  }
+
+  /**
+   * Hash a password with the given bcrypt cost.
+   */
+  hash(password, rounds) {
+    return this.run('hash', [password, rounds]);
+  }
+
+  /**
+   * Check a password against a bcrypt hash.
+   */
+  compare(password, hash) {
+    return this.run('compare', [password, hash]);
+  }
+
+  /**
+   * Whether the queue is full, so new jobs would be rejected right now.
+   */
+  isSaturated() {
+    return this.size > 0 && this.queue.length >= this.maxQueue;
+  }
+
+  run(operation, args) {
+    if (this.size <= 0 || this.workers.degraded) {
+      return runInThread(operation, args);
+    }
+    if (this.isSaturated()) {
+      recordPasswordHashRejection();
+      return Promise.reject(poolFullError());
+    }
+    if (!this.started) {
+      this.start();
+    }
+
+    return new Promise((resolve, reject) => {
+      this.queue.push({ operation, args, resolve, reject, queuedAt: performance.now() });
+      this.dispatch();
+    });
+  }
+
+  start() {
+    this.started = true;
+    this.workers.start();
+    logger.info(`🔑 Password hashing pool started with ${this.size} worker(s)`);
+  }
+
+  /**
+   * Stop using workers: queued and future jobs run on the event loop.
+   */
+  degrade() {
+    logger.error('Password hashing pool has no workers left, hashing on the event loop');
+    for (const job of this.queue.splice(0)) {
+      runInThread(job.operation, job.args).then(job.resolve, job.reject);
+    }
+    recordPasswordHashQueueDepth(0);
+  }
+
+  /**
+   * Hand queued jobs to idle workers.
+   */
+  dispatch() {
+    while (this.workers.idle.length > 0 && this.queue.length > 0) {
+      const slot = this.workers.idle.pop();
+      const job = this.queue.shift();
+      job.startedAt = performance.now();
+      slot.job = job;
+      slot.worker.ref();
+      slot.worker.postMessage({ operation: job.operation, args: job.args });
+    }
+    recordPasswordHashQueueDepth(this.queue.length);
+  }
+
+  complete(slot, { result, error }) {
+    const { job } = slot;
+    slot.worker.unref();
+    this.workers.release(slot);
+
+    recordPasswordHash(
+      job.operation,
+      job.startedAt - job.queuedAt,
+      performance.now() - job.startedAt,
+      !error,
+    );
+
+    if (error) {
+      job.reject(new Error(error.message));
+    } else {
+      job.resolve(result);
+    }
+    this.dispatch();
+  }
+
+  /**
+   * Fail queued jobs and stop all workers. The pool starts again, with fresh workers,
+   * on next use.
+   */
+  async close() {
+    this.started = false;
+    for (const job of this.queue.splice(0)) {
+      job.reject(new Error('Password hashing pool is closed'));
+    }
+    await this.workers.stop();
+  }
+}
+
+export default new PasswordHashPool({
+  size: PASSWORD_HASH_POOL.SIZE,
+  maxQueue: PASSWORD_HASH_POOL.MAX_QUEUE,
+});
@@ -0,0 +1,16 @@
+/**
+ * Worker thread of the password hashing pool (see passwordHashPool.js).
+ * Runs the bcrypt hashes and comparisons the main thread posts to it, one at a time.
+ */
+
+import { parentPort } from 'node:worker_threads';
+import bcrypt from 'bcryptjs';
+
+parentPort.on('message', ({ operation, args }) => {
+  try {
+    const result = operation === 'hash' ? bcrypt.hashSync(...args) : bcrypt.compareSync(...args);
+    parentPort.postMessage({ result });
+  } catch (error) {
+    parentPort.postMessage({ error: { message: error.message } });
+  }
+});
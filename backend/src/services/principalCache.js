@@ -0,0 +1,177 @@
+/**
+ * Principal Cache
+ * Caches the user row behind every authenticated request (jwtRequired, jwtOptional and
+ * the Socket.IO handshake), so authentication does not query the users table each time.
+ *
+ * Rows are kept in process for PRINCIPAL_CACHE.TTL seconds and, when Redis is
+ * available, in Redis for PRINCIPAL_CACHE.REDIS_TTL seconds under a per-user cache
+ * namespace. Every change to a cached column must call invalidate(), which drops the
+ * row here, bumps the namespace so Redis copies (even ones being written concurrently)
+ * are never read again, and tells the other instances over Redis pub/sub.
+ */
+
+import crypto from 'node:crypto';
+import { CACHE_NAMESPACE, PRINCIPAL_CACHE } from '../config/constants.js';
+import db from '../config/database.js';
+import LocalCache from '../config/localCache.js';
+import logger from '../config/logger.js';
+import cache from '../config/redis.js';
+import { recordPrincipalCacheLookup } from '../middleware/metrics.js';
+
+// The TOTP secret itself stays out of the cache; only whether 2FA is on is kept
+const PRINCIPAL_COLUMNS = `id, username, email, bio, theme, hidden_notes, preferred_language,
+  totp_secret IS NOT NULL AS has_2fa, is_admin, is_locked, avatar_url, status, created_at,
+  last_login`;
+
+function principalKey(userId) {
+  return `user:${userId}`;
+}
+
+class PrincipalCache {
+  constructor() {
+    this.local = new LocalCache({ maxEntries: PRINCIPAL_CACHE.MAX_ENTRIES });
+    // In-process single-flight: key -> pending lookup
+    this.inflight = new Map();
+    // Bumped by every invalidation; lookups that overlapped one are not cached
+    this.generation = 0;
+    this.subscriber = null;
+    this.instanceId = crypto.randomUUID();
+  }
+
+  /**
+   * Get the principal for a user ID, or null if the user does not exist.
+   * The returned object is shared between requests and must not be modified.
+   */
+  async get(userId) {
+    if (PRINCIPAL_CACHE.TTL <= 0) {
+      return this.load(userId);
+    }
+
+    const key = principalKey(userId);
+    const cached = this.local.get(key);
+    if (cached !== undefined) {
+      recordPrincipalCacheLookup('local');
+      return cached;
+    }
+
+    const pending = this.inflight.get(key);
+    if (pending) {
+      recordPrincipalCacheLookup('coalesced');
+      return pending;
+    }
+
+    const lookup = this.lookup(key, userId).finally(() => {
+      if (this.inflight.get(key) === lookup) {
+        this.inflight.delete(key);
+      }
+    });
+    this.inflight.set(key, lookup);
+    return lookup;
+  }
+
+  /**
+   * Read a principal from Redis or the database and keep it in process.
+   */
+  async lookup(key, userId) {
+    const generation = this.generation;
+    // Resolve the Redis key before loading, so an invalidation meanwhile orphans it
+    const redisKey = cache.isEnabled()
+      ? await cache.versionedKey(CACHE_NAMESPACE.PRINCIPAL(userId))
+      : null;
+
+    let principal = redisKey ? await cache.get(redisKey) : null;
+    if (principal) {
+      recordPrincipalCacheLookup('redis');
+    } else {
+      recordPrincipalCacheLookup('database');
+      principal = await this.load(userId);
+      if (principal && redisKey) {
+        await cache.set(redisKey, principal, PRINCIPAL_CACHE.REDIS_TTL);
+      }
+    }
+
+    if (principal && generation === this.generation) {
+      this.local.set(key, principal, PRINCIPAL_CACHE.TTL, JSON.stringify(principal).length);
+    }
+    return principal;
+  }
+
+  /**
+   * Read the principal from the primary: a lagging replica could still show a user as
+   * unlocked, or with 2FA settings changed since, right after the invalidation.
+   */
+  async load(userId) {
+    const user = await db.readFromPrimary(() =>
+      db.queryOne(`SELECT ${PRINCIPAL_COLUMNS} FROM users WHERE id = ?`, [userId]),
+    );
+    return user ?? null;
+  }
+
+  /**
+   * Drop a user's cached principal on every instance. Call after changing any of
+   * the user's cached columns, locking or deleting the user.
+   */
+  async invalidate(userId) {
+    const key = principalKey(userId);
+    this.forget(key);
+
+    if (!cache.isEnabled()) return;
+    await cache.invalidateNamespaces(CACHE_NAMESPACE.PRINCIPAL(userId));
+    try {
+      await cache.client.publish(
+        PRINCIPAL_CACHE.INVALIDATION_CHANNEL,
+        JSON.stringify({ origin: this.instanceId, key }),
+      );
+    } catch (error) {
+      logger.error('Principal invalidation publish error:', error.message);
+    }
+  }
+
+  forget(key) {
+    this.generation++;
+    this.local.delete(key);
+    this.inflight.delete(key);
+  }
+
+  /**
+   * Subscribe to invalidations from other instances. Call after the Redis cache has
+   * connected; without Redis there are no other instances to hear from.
+   */
+  async start() {
+    if (this.subscriber || !cache.isEnabled()) return;
+
+    try {
+      this.subscriber = cache.client.duplicate();
+      this.subscriber.on('message', (_channel, message) => {
+        this.handleInvalidationMessage(message);
+      });
+      await this.subscriber.subscribe(PRINCIPAL_CACHE.INVALIDATION_CHANNEL);
+    } catch (error) {
+      // Other instances' changes then show up within PRINCIPAL_CACHE.TTL
+      logger.error('⚠️  Principal invalidation subscribe failed:', error.message);
+      this.subscriber?.disconnect();
+      this.subscriber = null;
+    }
+  }
+
+  handleInvalidationMessage(message) {
+    try {
+      const { origin, key } = JSON.parse(message);
+      if (origin !== this.instanceId) {
+        this.forget(key);
+      }
+    } catch (error) {
+      logger.warn('Invalid principal invalidation message:', error.message);
+    }
+  }
+
+  async stop() {
+    if (this.subscriber) {
+      await this.subscriber.quit();
+      this.subscriber = null;
+    }
+    this.local.clear();
+  }
+}
+
+export default new PrincipalCache();
@@ -0,0 +1,192 @@
+/**
+ * Redis Refresh Token Store
+ * Keeps refresh tokens in Redis when REFRESH_TOKEN_STORE=redis, so refreshing a session
+ * does not read or lock rows in refresh_tokens.
+ *
+ * Each token is a hash (keyed by its token hash) that expires with the token, and
+ * each user has a set of their token hashes for listing sessions and revoking them
+ * all. Revoked tokens stay until they expire so reuse is still detected. jwtService
+ * keeps writing refresh_tokens rows as an audit trail and falls back to them for
+ * tokens Redis does not know (issued before the switch, or lost by Redis).
+ */
+
+import { REFRESH_TOKENS } from '../config/constants.js';
+import cache from '../config/redis.js';
+
+// KEYS[1]: token; ARGV: user ID, timestamp.
+// Marks an active token used and revoked in one step, so a token rotates only once.
+const CLAIM_LUA = `
+local fields = redis.call('HMGET', KEYS[1], 'user_id', 'revoked')
+if not fields[1] then
+  return 'missing'
+end
+if fields[1] ~= ARGV[1] then
+  return 'invalid'
+end
+if fields[2] == '1' then
+  return 'revoked'
+end
+redis.call('HSET', KEYS[1], 'revoked', '1', 'revoked_at', ARGV[2], 'last_used_at', ARGV[2])
+return 'claimed'
+`;
+
+// KEYS[1]: token; ARGV: timestamp. Does not recreate expired tokens.
+const REVOKE_LUA = `
+if redis.call('EXISTS', KEYS[1]) == 0 then
+  return 0
+end
+redis.call('HSET', KEYS[1], 'revoked', '1', 'revoked_at', ARGV[1])
+return 1
+`;
+
+// KEYS[1]: user set; ARGV: token key prefix, timestamp.
+// Revokes every live token of the user and drops expired ones from the set.
+const REVOKE_ALL_LUA = `
+local revoked = 0
+for _, hash in ipairs(redis.call('SMEMBERS', KEYS[1])) do
+  local key = ARGV[1] .. hash
+  if redis.call('EXISTS', key) == 1 then
+    if redis.call('HGET', key, 'revoked') ~= '1' then
+      redis.call('HSET', key, 'revoked', '1', 'revoked_at', ARGV[2])
+      revoked = revoked + 1
+    end
+  else
+    redis.call('SREM', KEYS[1], hash)
+  end
+end
+return revoked
+`;
+
+const TOKEN_PREFIX = 'refresh_token:';
+
+function tokenKey(tokenHash) {
+  return `${TOKEN_PREFIX}${tokenHash}`;
+}
+
+function userKey(userId) {
+  return `refresh_tokens:user:${userId}`;
+}
+
+// ioredis clients the scripts have been registered on
+const scriptedClients = new WeakSet();
+
+class RefreshTokenStore {
+  /**
+   * Whether refresh tokens are kept in Redis.
+   */
+  isEnabled() {
+    return REFRESH_TOKENS.STORE === 'redis' && cache.isEnabled() && Boolean(cache.client);
+  }
+
+  client() {
+    const { client } = cache;
+    if (!scriptedClients.has(client)) {
+      client.defineCommand('refreshTokenClaim', { numberOfKeys: 1, lua: CLAIM_LUA });
+      client.defineCommand('refreshTokenRevoke', { numberOfKeys: 1, lua: REVOKE_LUA });
+      client.defineCommand('refreshTokenRevokeAll', { numberOfKeys: 1, lua: REVOKE_ALL_LUA });
+      scriptedClients.add(client);
+    }
+    return client;
+  }
+
+  /**
+   * Store a new refresh token until its expiry.
+   * @param {object} token - { expiresAt, deviceInfo, ipAddress, parentTokenHash, createdAt }
+   */
+  async add(userId, tokenHash, token) {
+    const expiresAtMs = new Date(token.expiresAt).getTime();
+    const key = tokenKey(tokenHash);
+    const results = await this.client()
+      .multi()
+      .hset(key, {
+        user_id: String(userId),
+        device_info: token.deviceInfo ?? '',
+        ip_address: token.ipAddress ?? '',
+        parent_token_hash: token.parentTokenHash ?? '',
+        created_at: token.createdAt,
+        last_used_at: token.createdAt,
+        expires_at: token.expiresAt,
+        revoked: '0',
+      })
+      .pexpireat(key, expiresAtMs)
+      .sadd(userKey(userId), tokenHash)
+      // Tokens share one lifetime, so the newest token expires last
+      .pexpireat(userKey(userId), expiresAtMs)
+      .exec();
+
+    const failed = results.find(([error]) => error);
+    if (failed) {
+      throw failed[0];
+    }
+  }
+
+  /**
+   * Use a refresh token for rotation.
+   * @returns {Promise<string>} 'claimed' (was active, now revoked), 'revoked' (reuse),
+   *   'invalid' (belongs to another user) or 'missing' (unknown or expired)
+   */
+  claim(userId, tokenHash, now) {
+    return this.client().refreshTokenClaim(tokenKey(tokenHash), userId, now);
+  }
+
+  /**
+   * Revoke one token. Resolves to whether it was known.
+   */
+  async revoke(tokenHash, revokedAt) {
+    return (await this.client().refreshTokenRevoke(tokenKey(tokenHash), revokedAt)) === 1;
+  }
+
+  /**
+   * Revoke all tokens of a user. Resolves to the number of tokens revoked.
+   */
+  revokeAll(userId, revokedAt) {
+    return this.client().refreshTokenRevokeAll(userKey(userId), TOKEN_PREFIX, revokedAt);
+  }
+
+  /**
+   * Active (unrevoked, unexpired) tokens of a user, most recently used first,
+   * in the shape of the refresh_tokens session rows.
+   */
+  async list(userId) {
+    const client = this.client();
+    const hashes = await client.smembers(userKey(userId));
+    if (hashes.length === 0) {
+      return [];
+    }
+
+    const pipeline = client.pipeline();
+    for (const hash of hashes) {
+      pipeline.hgetall(tokenKey(hash));
+    }
+    const results = await pipeline.exec();
+
+    const now = new Date();
+    const tokens = [];
+    const expired = [];
+    results.forEach(([error, token], index) => {
+      if (error) {
+        throw error;
+      }
+      if (!token?.user_id) {
+        expired.push(hashes[index]);
+      } else if (token.revoked !== '1' && new Date(token.expires_at) > now) {
+        tokens.push({
+          // A short prefix of the token hash stands in for the SQL row ID
+          id: hashes[index].slice(0, 16),
+          device_info: token.device_info || null,
+          ip_address: token.ip_address || null,
+          created_at: token.created_at,
+          last_used_at: token.last_used_at,
+          expires_at: token.expires_at,
+        });
+      }
+    });
+
+    if (expired.length > 0) {
+      await client.srem(userKey(userId), ...expired);
+    }
+    return tokens.sort((a, b) => b.last_used_at.localeCompare(a.last_used_at));
+  }
+}
+
+export default new RefreshTokenStore();
@@ -0,0 +1,279 @@
+/**
+ * Search Outbox Service
+ * Queues note changes for Elasticsearch in the search_outbox table and applies them in bulk.
+ *
+ * Writers enqueue inside the same transaction as the note change, so a committed note is
+ * always eventually indexed even if Elasticsearch is down or the process dies. The table
+ * holds one row per note: repeated edits collapse into a single pending entry whose
+ * version is bumped, and the worker only removes an entry if its version is unchanged.
+ *
+ * Several instances can run the worker. Each claims the entries of a batch (claimed_by,
+ * claimed_until) before loading the notes and keeps them until the batch is settled;
+ * enqueue() leaves claims alone. So a note is indexed by one worker at a time, and an
+ * older copy of it can never be written over a newer one. A claim left by a crashed
+ * worker expires after SEARCH_OUTBOX.CLAIM_TTL.
+ *
+ * Entries are queued whenever Elasticsearch is configured, even while it is unreachable;
+ * the worker keeps trying to connect, with backoff, and drains the backlog once it can.
+ */
+
+import crypto from 'node:crypto';
+import { SEARCH_OUTBOX } from '../config/constants.js';
+import db from '../config/database.js';
+import elasticsearch from '../config/elasticsearch.js';
+import logger from '../config/logger.js';
+import { recordSearchOutboxBacklog, recordSearchOutboxProcessed } from '../middleware/metrics.js';
+
+class SearchOutbox {
+  constructor() {
+    this.timer = null;
+    this.draining = null;
+    this.scheduled = false;
+    this.connectAttempts = 0;
+    this.nextConnectAt = 0;
+  }
+
+  /**
+   * Queue a note for indexing ('index') or removal ('delete').
+   * @param {object} executor - db or a transaction handle from db.transaction
+   * @param {number} noteId - Note ID
+   * @param {string} operation - 'index' or 'delete'
+   */
+  async enqueue(executor, noteId, operation = 'index') {
+    if (!elasticsearch.isConfigured()) return;
+
+    const now = Date.now();
+    const upsert = executor.isSQLite
+      ? `ON CONFLICT(note_id) DO UPDATE SET operation = excluded.operation,
+           version = search_outbox.version + 1, attempts = 0, available_at = excluded.available_at`
+      : `ON DUPLICATE KEY UPDATE operation = VALUES(operation), version = version + 1,
+           attempts = 0, available_at = VALUES(available_at)`;
+
+    // enqueued_at is kept on conflict so the lag metric tracks the oldest unindexed change
+    await executor.run(
+      `INSERT INTO search_outbox (note_id, operation, version, attempts, available_at, enqueued_at)
+       VALUES (?, ?, 1, 0, ?, ?) ${upsert}`,
+      [noteId, operation, now, now],
+    );
+  }
+
+  /**
+   * Start polling the outbox. Does nothing when Elasticsearch is not configured.
+   */
+  start() {
+    if (this.timer || !elasticsearch.isConfigured()) return;
+
+    this.timer = setInterval(() => this.drain(), SEARCH_OUTBOX.POLL_INTERVAL);
+    logger.info('🔎 Search outbox worker started', {
+      pollInterval: SEARCH_OUTBOX.POLL_INTERVAL,
+      batchSize: SEARCH_OUTBOX.BATCH_SIZE,
+    });
+    this.schedule();
+  }
+
+  /**
+   * Stop polling and wait for an in-flight drain to finish.
+   */
+  async stop() {
+    if (this.timer) {
+      clearInterval(this.timer);
+      this.timer = null;
+    }
+    await this.draining;
+  }
+
+  /**
+   * Drain soon after a write instead of waiting for the next poll.
+   * Calls made in the same tick share one drain.
+   */
+  schedule() {
+    if (!this.timer || this.scheduled) return;
+
+    this.scheduled = true;
+    setImmediate(() => {
+      this.scheduled = false;
+      this.drain();
+    });
+  }
+
+  /**
+   * Process due outbox entries in batches until none are left or a batch fails.
+   */
+  drain() {
+    if (!this.draining) {
+      // Replicas may not have the queued writes yet
+      this.draining = db.readFromPrimary(() => this.drainBatches()).finally(() => {
+        this.draining = null;
+      });
+    }
+    return this.draining;
+  }
+
+  async drainBatches() {
+    try {
+      while (await this.connect()) {
+        const now = Date.now();
+        const due = await db.query(
+          `SELECT note_id FROM search_outbox
+           WHERE available_at <= ? AND (claimed_until IS NULL OR claimed_until <= ?)
+           ORDER BY available_at LIMIT ?`,
+          [now, now, SEARCH_OUTBOX.BATCH_SIZE],
+        );
+        if (due.length === 0) break;
+
+        const claim = crypto.randomUUID();
+        const entries = await this.claim(claim, due.map((entry) => entry.note_id), now);
+        // Everything due was claimed by other workers in the meantime
+        if (entries.length === 0) break;
+
+        const allApplied = await this.processBatch(entries, claim);
+        if (!allApplied || due.length < SEARCH_OUTBOX.BATCH_SIZE) break;
+      }
+
+      await this.reportBacklog();
+    } catch (error) {
+      logger.error('Search outbox drain failed', { error: error.message });
+    }
+  }
+
+  /**
+   * Whether Elasticsearch is connected, trying to connect first if it is not (it was
+   * down at startup or has since been closed). Failed attempts back off like entries.
+   */
+  async connect() {
+    if (elasticsearch.isEnabled()) return true;
+    if (Date.now() < this.nextConnectAt) return false;
+
+    await elasticsearch.connect();
+    if (elasticsearch.isEnabled()) {
+      this.connectAttempts = 0;
+      return true;
+    }
+    this.nextConnectAt = Date.now() + this.retryDelay(this.connectAttempts++);
+    return false;
+  }
+
+  /**
+   * Claim the given entries unless another worker holds them, and return the ones
+   * claimed, with their version as of the claim.
+   */
+  async claim(claim, noteIds, now) {
+    const placeholders = noteIds.map(() => '?').join(',');
+    await db.run(
+      `UPDATE search_outbox SET claimed_by = ?, claimed_until = ?
+       WHERE note_id IN (${placeholders}) AND (claimed_until IS NULL OR claimed_until <= ?)`,
+      [claim, now + SEARCH_OUTBOX.CLAIM_TTL, ...noteIds, now],
+    );
+    return db.query(
+      `SELECT note_id, operation, version, attempts FROM search_outbox WHERE claimed_by = ?`,
+      [claim],
+    );
+  }
+
+  /**
+   * Apply one batch of claimed entries to Elasticsearch, settle them in the outbox and
+   * release the claim. Returns whether every entry was applied.
+   */
+  async processBatch(entries, claim) {
+    const notes = await this.loadNotes(
+      entries.filter((entry) => entry.operation === 'index').map((entry) => entry.note_id),
+    );
+    const noteIds = new Set(notes.map((note) => note.id));
+
+    // Notes deleted since they were queued are removed from the index instead
+    const indexEntries = entries.filter(
+      (entry) => entry.operation === 'index' && noteIds.has(entry.note_id),
+    );
+    const deleteEntries = entries.filter((entry) => !indexEntries.includes(entry));
+
+    const indexed = notes.length === 0 || (await elasticsearch.bulkIndexNotes(notes));
+    const deleted =
+      deleteEntries.length === 0 ||
+      (await elasticsearch.bulkDeleteNotes(deleteEntries.map((entry) => entry.note_id)));
+
+    const applied = [...(indexed ? indexEntries : []), ...(deleted ? deleteEntries : [])];
+    const failed = [...(indexed ? [] : indexEntries), ...(deleted ? [] : deleteEntries)];
+
+    await db.transaction(async (tx) => {
+      // An entry re-queued while we worked has a new version and stays for the next pass
+      for (const entry of applied) {
+        await tx.run(`DELETE FROM search_outbox WHERE note_id = ? AND version = ?`, [
+          entry.note_id,
+          entry.version,
+        ]);
+      }
+      for (const entry of failed) {
+        await tx.run(
+          `UPDATE search_outbox SET attempts = attempts + 1, available_at = ?, last_error = ?
+           WHERE note_id = ? AND version = ?`,
+          [
+            Date.now() + this.retryDelay(entry.attempts),
+            `${indexEntries.includes(entry) ? 'index' : 'delete'} rejected by Elasticsearch`,
+            entry.note_id,
+            entry.version,
+          ],
+        );
+      }
+      // Entries re-queued while we worked stay, now claimable again
+      await tx.run(
+        `UPDATE search_outbox SET claimed_by = NULL, claimed_until = NULL WHERE claimed_by = ?`,
+        [claim],
+      );
+    });
+
+    recordSearchOutboxProcessed('index', indexEntries.length, indexed);
+    recordSearchOutboxProcessed('delete', deleteEntries.length, deleted);
+    if (failed.length > 0) {
+      logger.warn('Search outbox entries failed, will retry', { count: failed.length });
+    }
+
+    return failed.length === 0;
+  }
+
+  /**
+   * Load notes with their tag names in the document shape Elasticsearch expects.
+   */
+  async loadNotes(noteIds) {
+    if (noteIds.length === 0) return [];
+
+    const rows = await db.query(
+      `
+      SELECT n.id, n.title, n.body, n.owner_id, n.pinned, n.archived, n.favorite, n.created_at,
+        n.updated_at, GROUP_CONCAT(t.name) as tag_names
+      FROM notes n
+      LEFT JOIN note_tag nt ON n.id = nt.note_id
+      LEFT JOIN tags t ON nt.tag_id = t.id
+      WHERE n.id IN (${noteIds.map(() => '?').join(',')})
+      GROUP BY n.id
+    `,
+      noteIds,
+    );
+
+    return rows.map(({ tag_names, ...note }) => ({
+      ...note,
+      tags: tag_names ? tag_names.split(',') : [],
+    }));
+  }
+
+  /**
+   * Exponential backoff for a failed entry, capped at RETRY_MAX_DELAY.
+   */
+  retryDelay(attempts) {
+    return Math.min(SEARCH_OUTBOX.RETRY_BASE_DELAY * 2 ** attempts, SEARCH_OUTBOX.RETRY_MAX_DELAY);
+  }
+
+  /**
+   * Update the backlog gauges from the outbox table.
+   */
+  async reportBacklog() {
+    const row = await db.queryOne(
+      `SELECT COUNT(*) as pending, MIN(enqueued_at) as oldest FROM search_outbox`,
+    );
+    const lagSeconds = row.oldest ? (Date.now() - Number(row.oldest)) / 1000 : 0;
+    recordSearchOutboxBacklog(Number(row.pending), lagSeconds);
+  }
+}
+
+const searchOutbox = new SearchOutbox();
+
+export default searchOutbox;
@@ -2,6 +2,7 @@
  * Task Service for task management operations.
  */
 import db from '../config/database.js';
+import counters from './counterService.js';
 
 export default class TaskService {
   /**
@@ -47,22 +48,12 @@ export default class TaskService {
    * Get task counts for a user.
    */
   static async getTaskCounts(userId) {
-    const total = await db.queryOne(`SELECT COUNT(*) as count FROM tasks WHERE owner_id = ?`, [
-      userId,
-    ]);
-    const completed = await db.queryOne(
-      `SELECT COUNT(*) as count FROM tasks WHERE owner_id = ? AND completed = 1`,
-      [userId],
-    );
-    const active = await db.queryOne(
-      `SELECT COUNT(*) as count FROM tasks WHERE owner_id = ? AND completed = 0`,
-      [userId],
-    );
+    const counts = await counters.getUserCounters(userId);
 
     return {
-      total: total?.count || 0,
-      completed: completed?.count || 0,
-      active: active?.count || 0,
+      total: counts.tasks,
+      completed: counts.tasks_completed,
+      active: counts.tasks_active,
     };
   }
 
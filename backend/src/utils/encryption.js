@@ -1,24 +1,188 @@
 /**
  * Encryption utilities for chat messages
  * Uses AES-256-GCM for encryption with user-specific keys derived from app secret
+ *
+ * Derived keys are kept in a bounded LRU cache keyed by (secret, salt) so that
+ * PBKDF2 runs once per room instead of once per message.
  */
 
 import crypto from 'node:crypto';
+import { promisify } from 'node:util';
+import { CHAT_ENCRYPTION } from '../config/constants.js';
+
+const pbkdf2 = promisify(crypto.pbkdf2);
 
 // Encryption algorithm
 const ALGORITHM = 'aes-256-gcm';
 const IV_LENGTH = 16;
 const _AUTH_TAG_LENGTH = 16;
 const SALT_LENGTH = 32;
+const KEY_LENGTH = 32;
+const KEY_DIGEST = 'sha256';
+
+// Derived key cache (Map preserves insertion order, so the first key is the least recently used)
+const keyCache = new Map();
+const pendingDerivations = new Map();
+const secretFingerprints = new Map();
+let keyCacheMaxEntries = CHAT_ENCRYPTION.KEY_CACHE_SIZE;
+
+// Metrics are loaded lazily so this module stays usable without prom-client (e.g. scripts)
+// biome-ignore lint/suspicious/noEmptyBlockStatements: Intentional noop until metrics load
+let recordKeyCacheOperation = () => {};
+// biome-ignore lint/suspicious/noEmptyBlockStatements: Intentional noop until metrics load
+let recordKeyDerivation = () => {};
+import('../middleware/metrics.js')
+  .then((metrics) => {
+    recordKeyCacheOperation = metrics.recordChatKeyCacheOperation;
+    recordKeyDerivation = metrics.recordChatKeyDerivation;
+  })
+  .catch(() => {
+    // Metrics not available, keep noop recorders
+  });
+
+/**
+ * Build the cache key for a (secret, salt) pair.
+ * The secret is fingerprinted so it never appears in cache keys.
+ * @param {string} baseSecret - Application encryption secret
+ * @param {string} salt - Room-specific salt (hex string)
+ * @returns {string} - Cache key
+ */
+function getCacheKey(baseSecret, salt) {
+  let fingerprint = secretFingerprints.get(baseSecret);
+  if (!fingerprint) {
+    fingerprint = crypto.createHash('sha256').update(baseSecret).digest('hex');
+    secretFingerprints.set(baseSecret, fingerprint);
+  }
+  return `${fingerprint}:${salt}`;
+}
+
+/**
+ * Look up a derived key and mark it as most recently used.
+ * @param {string} cacheKey - Cache key from getCacheKey
+ * @returns {Buffer|undefined} - Cached key, if present
+ */
+function getCachedKey(cacheKey) {
+  const key = keyCache.get(cacheKey);
+  if (key) {
+    keyCache.delete(cacheKey);
+    keyCache.set(cacheKey, key);
+  }
+  return key;
+}
+
+/**
+ * Store a derived key, evicting least recently used entries beyond the bound.
+ * @param {string} cacheKey - Cache key from getCacheKey
+ * @param {Buffer} key - Derived encryption key
+ */
+function storeKey(cacheKey, key) {
+  keyCache.delete(cacheKey);
+  keyCache.set(cacheKey, key);
+  while (keyCache.size > keyCacheMaxEntries) {
+    keyCache.delete(keyCache.keys().next().value);
+    recordKeyCacheOperation('eviction');
+  }
+}
 
 /**
  * Derive encryption key from base secret and user-specific salt
+ * Served from the key cache when possible; derives synchronously on a miss.
  * @param {string} baseSecret - Application encryption secret
  * @param {string} salt - User-specific salt (hex string)
  * @returns {Buffer} - Derived encryption key
  */
 function deriveKey(baseSecret, salt) {
-  return crypto.pbkdf2Sync(baseSecret, Buffer.from(salt, 'hex'), 100000, 32, 'sha256');
+  const cacheKey = getCacheKey(baseSecret, salt);
+  const cached = getCachedKey(cacheKey);
+  if (cached) {
+    recordKeyCacheOperation('hit');
+    return cached;
+  }
+
+  recordKeyCacheOperation('miss');
+  const startTime = Date.now();
+  const key = crypto.pbkdf2Sync(
+    baseSecret,
+    Buffer.from(salt, 'hex'),
+    CHAT_ENCRYPTION.PBKDF2_ITERATIONS,
+    KEY_LENGTH,
+    KEY_DIGEST,
+  );
+  recordKeyDerivation('sync', Date.now() - startTime);
+  storeKey(cacheKey, key);
+  return key;
+}
+
+/**
+ * Derive (or fetch from cache) the key for a salt without blocking the event loop.
+ * On a miss PBKDF2 runs on the libuv thread pool, and concurrent callers for the
+ * same salt share one derivation. Call this before encrypting/decrypting so that
+ * encryptMessage/decryptMessage are served from the cache.
+ * @param {string} baseSecret - Application encryption secret
+ * @param {string} salt - Room-specific salt (hex string)
+ * @returns {Promise<Buffer>} - Derived encryption key
+ */
+export async function deriveKeyAsync(baseSecret, salt) {
+  if (!baseSecret) {
+    throw new Error('Encryption secret is required');
+  }
+
+  const cacheKey = getCacheKey(baseSecret, salt);
+  const cached = getCachedKey(cacheKey);
+  if (cached) {
+    recordKeyCacheOperation('hit');
+    return cached;
+  }
+
+  const pending = pendingDerivations.get(cacheKey);
+  if (pending) {
+    recordKeyCacheOperation('coalesced');
+    return pending;
+  }
+
+  recordKeyCacheOperation('miss');
+  const startTime = Date.now();
+  const derivation = pbkdf2(
+    baseSecret,
+    Buffer.from(salt, 'hex'),
+    CHAT_ENCRYPTION.PBKDF2_ITERATIONS,
+    KEY_LENGTH,
+    KEY_DIGEST,
+  )
+    .then((key) => {
+      recordKeyDerivation('async', Date.now() - startTime);
+      storeKey(cacheKey, key);
+      return key;
+    })
+    .finally(() => {
+      pendingDerivations.delete(cacheKey);
+    });
+
+  pendingDerivations.set(cacheKey, derivation);
+  return derivation;
+}
+
+/**
+ * Get derived key cache statistics
+ * @returns {{size: number, maxEntries: number, pending: number}}
+ */
+export function getKeyCacheStats() {
+  return {
+    size: keyCache.size,
+    maxEntries: keyCacheMaxEntries,
+    pending: pendingDerivations.size,
+  };
+}
+
+/**
+ * Clear the derived key cache, optionally changing its bound (used by tests and benchmarks)
+ * @param {number} [maxEntries] - New maximum number of cached keys
+ */
+export function clearKeyCache(maxEntries) {
+  keyCache.clear();
+  if (Number.isInteger(maxEntries) && maxEntries > 0) {
+    keyCacheMaxEntries = maxEntries;
+  }
 }
 
 /**
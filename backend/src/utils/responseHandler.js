@@ -130,6 +130,22 @@ export function badRequest(res, message = 'Bad request') {
   });
 }
 
+/**
+ * Service unavailable response, for requests shed under load
+ * @param {Object} res - Express response object
+ * @param {string} message - Optional custom message
+ * @param {number} retryAfter - Seconds the client should wait before retrying
+ */
+export function serviceUnavailable(res, message = 'Service unavailable', retryAfter = null) {
+  if (retryAfter) {
+    res.set('Retry-After', String(retryAfter));
+  }
+  return error(res, message, {
+    statusCode: 503,
+    errorCode: 'SERVICE_UNAVAILABLE',
+  });
+}
+
 /**
  * Created response for POST endpoints
  * @param {Object} res - Express response object
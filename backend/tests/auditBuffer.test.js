@@ -0,0 +1,122 @@
+/**
+ * Audit Buffer Tests
+ * Tests batching, overflow and failure handling of the write-behind audit log buffer,
+ * with the database replaced by an in-memory stand-in.
+ */
+
+import { afterEach, beforeEach, describe, expect, it, jest } from '@jest/globals';
+import { AUDIT_LOG } from '../src/config/constants.js';
+import db from '../src/config/database.js';
+import auditBuffer from '../src/services/auditBuffer.js';
+
+function entry(userId, action = 'view') {
+  return { user_id: userId, entity_type: 'note', entity_id: 1, action };
+}
+
+describe('AuditBuffer', () => {
+  const originalRun = db.run;
+  const originalTransaction = db.transaction;
+  const originalConfig = { ...AUDIT_LOG };
+  let rows;
+  let statements;
+
+  beforeEach(() => {
+    rows = [];
+    statements = [];
+    // Rejects rows of user 0, like the users foreign key would
+    const run = jest.fn(async (sql, params) => {
+      statements.push(sql);
+      const inserted = [];
+      for (let i = 0; i < params.length; i += 8) {
+        if (params[i] === 0) throw new Error('FOREIGN KEY constraint failed');
+        inserted.push(params.slice(i, i + 8));
+      }
+      return inserted;
+    });
+    db.run = jest.fn(async (sql, params) => {
+      rows.push(...(await run(sql, params)));
+    });
+    db.transaction = jest.fn(async (fn) => {
+      const pending = [];
+      await fn({ run: async (sql, params) => pending.push(...(await run(sql, params))) });
+      rows.push(...pending);
+    });
+  });
+
+  afterEach(async () => {
+    await auditBuffer.stop();
+    Object.assign(AUDIT_LOG, originalConfig);
+    db.run = originalRun;
+    db.transaction = originalTransaction;
+  });
+
+  it('should write entries directly until started', async () => {
+    await auditBuffer.add(entry(1));
+
+    expect(rows).toHaveLength(1);
+    expect(db.transaction).not.toHaveBeenCalled();
+  });
+
+  it('should write buffered entries in one transaction on stop', async () => {
+    auditBuffer.start();
+    await auditBuffer.add(entry(1));
+    await auditBuffer.add(entry(2, 'update'));
+    expect(rows).toHaveLength(0);
+
+    await auditBuffer.stop();
+
+    expect(rows).toHaveLength(2);
+    expect(db.transaction).toHaveBeenCalledTimes(1);
+    expect(statements).toHaveLength(1);
+    expect(rows[1][3]).toBe('update');
+    expect(rows[0][7]).toMatch(/^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$/);
+  });
+
+  it('should flush as soon as a batch is full', async () => {
+    AUDIT_LOG.BATCH_SIZE = 2;
+    auditBuffer.start();
+
+    await auditBuffer.add(entry(1));
+    await auditBuffer.add(entry(1));
+    await new Promise((resolve) => setImmediate(resolve));
+
+    expect(rows).toHaveLength(2);
+  });
+
+  it('should drop entries beyond the buffer limit', async () => {
+    AUDIT_LOG.MAX_BUFFERED = 2;
+    auditBuffer.start();
+
+    for (let i = 0; i < 3; i++) {
+      await auditBuffer.add(entry(1));
+    }
+    await auditBuffer.stop();
+
+    expect(rows).toHaveLength(2);
+  });
+
+  it('should write entries beyond the buffer limit directly with the write policy', async () => {
+    AUDIT_LOG.MAX_BUFFERED = 2;
+    AUDIT_LOG.OVERFLOW = 'write';
+    auditBuffer.start();
+
+    for (let i = 0; i < 3; i++) {
+      await auditBuffer.add(entry(1));
+    }
+    expect(rows).toHaveLength(1);
+
+    await auditBuffer.stop();
+    expect(rows).toHaveLength(3);
+  });
+
+  it('should keep the valid entries of a failed batch', async () => {
+    auditBuffer.start();
+    await auditBuffer.add(entry(1));
+    await auditBuffer.add(entry(0));
+    await auditBuffer.add(entry(2));
+
+    await auditBuffer.stop();
+
+    expect(rows.map((row) => row[0])).toEqual([1, 2]);
+  });
+});
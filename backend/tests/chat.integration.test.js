@@ -31,14 +31,14 @@ describe('Chat Integration Tests', () => {
     process.env.JWT_SECRET = 'test-secret-key-for-chat-tests';
     process.env.REFRESH_TOKEN_SECRET = 'test-refresh-secret';
 
+    // Initialize legacy DB first; Sequelize shares its connection
+    await db.connect();
+    await db.initSchema();
+
     // Initialize Sequelize ORM
     await initializeSequelize();
     await syncDatabase();
 
-    // Also initialize legacy DB for backward compatibility
-    await db.connect();
-    await db.initSchema();
-
     // Import app after database is set up
     app = (await import('../src/index.js')).default;
 
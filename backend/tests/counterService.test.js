@@ -0,0 +1,126 @@
+/**
+ * Counter Service Tests
+ * Tests the trigger-maintained user and folder counters and their reconciliation
+ */
+
+import fs from 'node:fs';
+import path from 'node:path';
+import { afterAll, beforeAll, describe, expect, it } from '@jest/globals';
+import db from '../src/config/database.js';
+import counters from '../src/services/counterService.js';
+
+describe('Counter Service', () => {
+  const testDbPath = path.resolve('/tmp', 'test_counters.db');
+  let ownerId;
+  let friendId;
+  let folderId;
+
+  const addNote = async (values = {}) => {
+    const { archived = 0, favorite = 0, folder = null } = values;
+    const result = await db.run(
+      `INSERT INTO notes (title, body, owner_id, folder_id, archived, favorite)
+       VALUES ('Note', 'Body', ?, ?, ?, ?)`,
+      [ownerId, folder, archived, favorite],
+    );
+    return result.insertId;
+  };
+
+  beforeAll(async () => {
+    if (fs.existsSync(testDbPath)) {
+      fs.unlinkSync(testDbPath);
+    }
+    process.env.NOTES_DB_PATH = testDbPath;
+    await db.connect();
+    await db.initSchema();
+
+    const insertUser = `INSERT INTO users (username, password_hash, email) VALUES (?, 'x', ?)`;
+    ownerId = (await db.run(insertUser, ['owner', 'owner@example.com'])).insertId;
+    friendId = (await db.run(insertUser, ['friend', 'friend@example.com'])).insertId;
+    folderId = (
+      await db.run(`INSERT INTO folders (name, user_id) VALUES ('Work', ?)`, [ownerId])
+    ).insertId;
+  });
+
+  afterAll(async () => {
+    await db.close();
+    if (fs.existsSync(testDbPath)) {
+      fs.unlinkSync(testDbPath);
+    }
+  });
+
+  it('should count notes, favorites and archived notes per user and folder', async () => {
+    await addNote({ folder: folderId });
+    await addNote({ favorite: 1, folder: folderId });
+    const archivedId = await addNote({ archived: 1 });
+
+    expect(await counters.getUserCounters(ownerId)).toMatchObject({
+      notes: 3,
+      favorite_notes: 1,
+      archived_notes: 1,
+    });
+    expect(await counters.getFolderCounters(folderId)).toMatchObject({
+      notes: 2,
+      favorite_notes: 1,
+    });
+
+    await db.run('UPDATE notes SET archived = 0, folder_id = ? WHERE id = ?', [
+      folderId,
+      archivedId,
+    ]);
+    expect(await counters.getUserCounters(ownerId)).toMatchObject({ archived_notes: 0 });
+    expect(await counters.getFolderCounters(folderId)).toMatchObject({ notes: 3 });
+  });
+
+  it('should count active and completed tasks', async () => {
+    const insertTask = `INSERT INTO tasks (title, owner_id, folder_id) VALUES ('Task', ?, ?)`;
+    const taskId = (await db.run(insertTask, [ownerId, folderId])).insertId;
+    await db.run(insertTask, [ownerId, null]);
+    await db.run('UPDATE tasks SET completed = NOT completed WHERE id = ?', [taskId]);
+
+    expect(await counters.getUserCounters(ownerId)).toMatchObject({
+      tasks: 2,
+      tasks_completed: 1,
+      tasks_active: 1,
+    });
+    expect(await counters.getFolderCounters(folderId)).toMatchObject({
+      tasks: 1,
+      tasks_completed: 1,
+      tasks_active: 0,
+    });
+  });
+
+  it('should count shares for both users and drop them with the note', async () => {
+    const noteId = await addNote();
+    await db.run(
+      'INSERT INTO share_notes (note_id, shared_by_id, shared_with_id) VALUES (?, ?, ?)',
+      [noteId, ownerId, friendId],
+    );
+
+    expect(await counters.getUserCounters(ownerId)).toMatchObject({ shares_sent: 1 });
+    expect(await counters.getUserCounters(friendId)).toMatchObject({ shares_received: 1 });
+
+    await db.run('DELETE FROM notes WHERE id = ?', [noteId]);
+    expect(await counters.getUserCounters(friendId)).toMatchObject({ shares_received: 0 });
+  });
+
+  it('should recompute drifted counters', async () => {
+    const before = await counters.getUserCounters(ownerId);
+    await db.run('UPDATE user_counters SET notes = 999 WHERE user_id = ?', [ownerId]);
+
+    const fixed = await counters.reconcile();
+
+    expect(fixed).toEqual({ user_counters: 1, folder_counters: 0, app_stats: 0 });
+    expect(await counters.getUserCounters(ownerId)).toEqual(before);
+  });
+
+  it('should keep whole-table row counts in app_stats', async () => {
+    const actual = await db.queryOne(
+      `SELECT (SELECT COUNT(*) FROM users) AS users, (SELECT COUNT(*) FROM notes) AS notes`,
+    );
+    expect(await counters.getAppStats()).toMatchObject(actual);
+
+    await db.run(`UPDATE app_stats SET value = value + 5 WHERE name = 'notes' AND shard = 3`);
+    expect((await counters.reconcile()).app_stats).toBe(1);
+    expect(await counters.getAppStats()).toMatchObject(actual);
+  });
+});
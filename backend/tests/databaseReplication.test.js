@@ -0,0 +1,160 @@
+/**
+ * Database Replication Routing Tests
+ * Tests read-your-writes routing, replica selection and lag measurement
+ */
+
+import { afterEach, beforeEach, describe, expect, it } from '@jest/globals';
+import replication from '../src/config/databaseReplication.js';
+import requestIdMiddleware, { setRequestUserId } from '../src/middleware/requestId.js';
+
+const fakeStatements = (source) => ({
+  prepare: () => ({ all: () => [source], get: () => source }),
+});
+
+const fakeReplica = (name) => ({
+  statements: fakeStatements(name),
+  path: `${name}.db`,
+  name,
+  type: 'sqlite',
+  healthy: true,
+  lagMs: 0,
+  caughtUpTo: 0,
+  outstanding: 0,
+  latencyEwmaMs: null,
+});
+
+/**
+ * Run fn inside a request context (optionally authenticated as userId), as the
+ * request ID and auth middleware do for HTTP requests
+ */
+function inRequest(fn, userId) {
+  return new Promise((resolve, reject) => {
+    const req = { headers: {} };
+    const res = { locals: {}, setHeader: () => undefined };
+    requestIdMiddleware(req, res, () => {
+      if (userId !== undefined) {
+        setRequestUserId(userId);
+      }
+      fn().then(resolve, reject);
+    });
+  });
+}
+
+describe('Database Replication Routing', () => {
+  let replica;
+
+  beforeEach(() => {
+    replica = fakeReplica('replica');
+    replication.isSQLite = true;
+    replication.primaryStatements = fakeStatements('primary');
+    replication.replicas = [replica];
+    replication.replicaHealthStatus = new Map();
+    replication.userWrites.clear();
+    replication.enabled = true;
+  });
+
+  afterEach(() => {
+    replication.replicas = [];
+    replication.userWrites.clear();
+    replication.enabled = false;
+  });
+
+  it('should read from a replica when there was no write', async () => {
+    const source = await inRequest(() => replication.queryOne('SELECT 1'));
+    expect(source).toBe('replica');
+  });
+
+  it('should read from the primary after a write in the same request', async () => {
+    const sources = await inRequest(async () => {
+      const before = await replication.queryOne('SELECT 1');
+      replication.recordWrite();
+      const after = await replication.queryOne('SELECT 1');
+      return [before, after];
+    });
+
+    expect(sources).toEqual(['replica', 'primary']);
+  });
+
+  it('should not pin other requests without a user', async () => {
+    await inRequest(async () => replication.recordWrite());
+    const source = await inRequest(() => replication.queryOne('SELECT 1'));
+    expect(source).toBe('replica');
+  });
+
+  it("should pin the user's later requests to the primary", async () => {
+    await inRequest(async () => replication.recordWrite(), 1);
+
+    const sources = await Promise.all(
+      [1, 2].map((userId) => inRequest(() => replication.queryOne('SELECT 1'), userId)),
+    );
+
+    expect(sources).toEqual(['primary', 'replica']);
+  });
+
+  it('should use a replica that has caught up past the write', async () => {
+    const source = await inRequest(async () => {
+      replication.recordWrite();
+      replica.caughtUpTo = Date.now() + 1;
+      return replication.queryOne('SELECT 1');
+    });
+
+    expect(source).toBe('replica');
+  });
+
+  it('should prefer the replica with the lower latency', async () => {
+    const slow = fakeReplica('slow');
+    slow.latencyEwmaMs = 20;
+    replica.latencyEwmaMs = 2;
+    replication.replicas = [slow, replica];
+
+    const sources = [];
+    for (let i = 0; i < 4; i++) {
+      sources.push(await replication.queryOne('SELECT 1'));
+    }
+
+    expect(sources.every((source) => source === 'replica')).toBe(true);
+  });
+
+  it('should prefer the replica with fewer in-flight queries', async () => {
+    const busy = fakeReplica('busy');
+    busy.outstanding = 3;
+    busy.latencyEwmaMs = 1;
+    replica.latencyEwmaMs = 10;
+    replication.replicas = [busy, replica];
+
+    expect(await replication.queryOne('SELECT 1')).toBe('replica');
+  });
+
+  it('should read from the primary when replicas exceed maxStalenessMs', async () => {
+    replica.lagMs = 2000;
+
+    expect(await replication.queryOne('SELECT 1', [], { maxStalenessMs: 1000 })).toBe('primary');
+    expect(await replication.queryOne('SELECT 1', [], { maxStalenessMs: 5000 })).toBe('replica');
+  });
+
+  it('should measure lag from the heartbeat row', async () => {
+    const writtenAt = Date.now() - 1500;
+    replica.statements = fakeStatements({ written_at: writtenAt });
+
+    await replication.checkReplicaHealth();
+
+    expect(replica.caughtUpTo).toBe(writtenAt);
+    expect(replica.lagMs).toBeGreaterThanOrEqual(1500);
+    expect(replica.healthy).toBe(true);
+    expect(replica.latencyEwmaMs).not.toBeNull();
+  });
+
+  it('should mark a replica lagging beyond the maximum as unhealthy', async () => {
+    replica.statements = fakeStatements({ written_at: Date.now() - 10 * 60 * 1000 });
+
+    await replication.checkReplicaHealth();
+
+    expect(replica.healthy).toBe(false);
+    expect(await replication.queryOne('SELECT 1')).toBe('primary');
+  });
+
+  it('should read from the primary inside readFromPrimary', async () => {
+    const source = await replication.readFromPrimary(() => replication.queryOne('SELECT 1'));
+    expect(source).toBe('primary');
+  });
+});
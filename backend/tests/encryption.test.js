@@ -0,0 +1,80 @@
+/**
+ * Chat Encryption Tests
+ * Tests message encryption round trips and the derived key cache
+ */
+
+import { beforeEach, describe, expect, it } from '@jest/globals';
+import {
+  clearKeyCache,
+  decryptMessage,
+  deriveKeyAsync,
+  encryptMessage,
+  generateSalt,
+  getKeyCacheStats,
+  isEncrypted,
+} from '../src/utils/encryption.js';
+
+const SECRET = 'test-chat-encryption-secret';
+
+describe('Chat Encryption', () => {
+  beforeEach(() => {
+    clearKeyCache(1000);
+  });
+
+  it('should round-trip a message', () => {
+    const salt = generateSalt();
+    const encrypted = encryptMessage('Hello, world!', SECRET, salt);
+
+    expect(isEncrypted(encrypted)).toBe(true);
+    expect(decryptMessage(encrypted, SECRET, salt)).toBe('Hello, world!');
+  });
+
+  it('should decrypt with a key derived asynchronously', async () => {
+    const salt = generateSalt();
+    const encrypted = encryptMessage('Async derived', SECRET, salt);
+    clearKeyCache();
+
+    await deriveKeyAsync(SECRET, salt);
+    expect(getKeyCacheStats().size).toBe(1);
+    expect(decryptMessage(encrypted, SECRET, salt)).toBe('Async derived');
+  });
+
+  it('should share one derivation between concurrent callers', async () => {
+    const salt = generateSalt();
+    const [keyA, keyB] = await Promise.all([
+      deriveKeyAsync(SECRET, salt),
+      deriveKeyAsync(SECRET, salt),
+    ]);
+
+    expect(keyA).toBe(keyB);
+    expect(getKeyCacheStats().pending).toBe(0);
+  });
+
+  it('should derive different keys for different secrets with the same salt', async () => {
+    const salt = generateSalt();
+    const keyA = await deriveKeyAsync(SECRET, salt);
+    const keyB = await deriveKeyAsync('another-secret', salt);
+
+    expect(keyA.equals(keyB)).toBe(false);
+  });
+
+  it('should evict least recently used keys beyond the bound', async () => {
+    clearKeyCache(2);
+    const [saltA, saltB, saltC] = [generateSalt(), generateSalt(), generateSalt()];
+
+    await deriveKeyAsync(SECRET, saltA);
+    await deriveKeyAsync(SECRET, saltB);
+    await deriveKeyAsync(SECRET, saltA); // touch A so B becomes the oldest
+    await deriveKeyAsync(SECRET, saltC);
+
+    expect(getKeyCacheStats().size).toBe(2);
+    const encrypted = encryptMessage('still works after eviction', SECRET, saltB);
+    expect(decryptMessage(encrypted, SECRET, saltB)).toBe('still works after eviction');
+  });
+
+  it('should fail to decrypt with the wrong salt', () => {
+    const encrypted = encryptMessage('secret', SECRET, generateSalt());
+
+    expect(() => decryptMessage(encrypted, SECRET, generateSalt())).toThrow();
+  });
+});
@@ -0,0 +1,91 @@
+/**
+ * Folder Service Tests
+ * Tests that the folder closure table stays in sync through creates and moves
+ */
+
+import fs from 'node:fs';
+import path from 'node:path';
+import { afterAll, beforeAll, describe, expect, it } from '@jest/globals';
+import db from '../src/config/database.js';
+import FolderService from '../src/services/folderService.js';
+
+describe('FolderService hierarchy', () => {
+  const testDbPath = path.resolve('/tmp', 'test_folder_service.db');
+  let userId;
+  let work;
+  let projects;
+  let alpha;
+  let personal;
+
+  beforeAll(async () => {
+    if (fs.existsSync(testDbPath)) {
+      fs.unlinkSync(testDbPath);
+    }
+    process.env.NOTES_DB_PATH = testDbPath;
+    await db.connect();
+    await db.initSchema();
+
+    const user = await db.run(
+      `INSERT INTO users (username, password_hash, email) VALUES (?, ?, ?)`,
+      ['folderuser', 'x', 'folderuser@example.com'],
+    );
+    userId = user.insertId;
+
+    work = await FolderService.createFolder(userId, { name: 'Work' });
+    projects = await FolderService.createFolder(userId, { name: 'Projects', parent_id: work.id });
+    alpha = await FolderService.createFolder(userId, { name: 'Alpha', parent_id: projects.id });
+    personal = await FolderService.createFolder(userId, { name: 'Personal' });
+  });
+
+  afterAll(async () => {
+    await db.close();
+    if (fs.existsSync(testDbPath)) {
+      fs.unlinkSync(testDbPath);
+    }
+  });
+
+  it('should return the breadcrumb path from the root', async () => {
+    const folderPath = await FolderService.getFolderPath(alpha.id, userId);
+    expect(folderPath.map((folder) => folder.name)).toEqual(['Work', 'Projects', 'Alpha']);
+  });
+
+  it('should list all descendants', async () => {
+    const ids = await FolderService.getAllDescendantFolderIds(work.id, userId);
+    expect(ids).toEqual([projects.id, alpha.id]);
+  });
+
+  it('should detect moves into the own subtree', async () => {
+    expect(await FolderService.checkCircularReference(work.id, alpha.id, userId)).toBe(true);
+    expect(await FolderService.checkCircularReference(alpha.id, work.id, userId)).toBe(false);
+    await expect(FolderService.moveFolder(work.id, userId, projects.id)).rejects.toThrow(
+      'circular reference',
+    );
+  });
+
+  it('should move a subtree', async () => {
+    await FolderService.moveFolder(projects.id, userId, personal.id);
+
+    const folderPath = await FolderService.getFolderPath(alpha.id, userId);
+    expect(folderPath.map((folder) => folder.name)).toEqual(['Personal', 'Projects', 'Alpha']);
+    expect(await FolderService.getAllDescendantFolderIds(work.id, userId)).toEqual([]);
+
+    await FolderService.moveFolder(projects.id, userId, null);
+    expect(await FolderService.getFolderPath(alpha.id, userId)).toHaveLength(2);
+    expect(await FolderService.getAllDescendantFolderIds(personal.id, userId)).toEqual([]);
+  });
+
+  it('should include notes of descendant folders when recursive', async () => {
+    await db.run(`INSERT INTO notes (title, body, owner_id, folder_id) VALUES (?, ?, ?, ?)`, [
+      'Deep note',
+      'Body',
+      userId,
+      alpha.id,
+    ]);
+
+    const notes = await FolderService.getNotesInFolder(projects.id, userId, true);
+    expect(notes.map((note) => note.title)).toEqual(['Deep note']);
+    expect(notes[0]).toHaveProperty('excerpt');
+    expect(notes[0]).not.toHaveProperty('body_html');
+    expect(await FolderService.getNotesInFolder(projects.id, userId, false)).toEqual([]);
+  });
+});
@@ -62,6 +62,25 @@ describe('Health Check Integration Tests', () => {
     });
   });
 
+  describe('GET /api/health/live', () => {
+    it('should return 200 without touching the database', async () => {
+      const response = await request(app).get('/api/health/live');
+
+      expect(response.status).toBe(200);
+      expect(response.body).toEqual({ status: 'alive' });
+    });
+  });
+
+  describe('GET /api/health/ready', () => {
+    it('should return 200 when the database answers', async () => {
+      const response = await request(app).get('/api/health/ready');
+
+      expect(response.status).toBe(200);
+      expect(response.body).toHaveProperty('status', 'ready');
+      expect(response.body).toHaveProperty('database', 'connected');
+    });
+  });
+
   describe('GET /api/v1/health', () => {
     it('should return 200 with standardized v1 response format', async () => {
       const response = await request(app).get('/api/v1/health');
@@ -79,6 +79,8 @@ describe('Metrics Integration Tests', () => {
 
       expect(response.text).toContain('db_query_duration_seconds');
       expect(response.text).toContain('db_queries_total');
+      expect(response.text).toContain('db_statement_cache_operations_total');
+      expect(response.text).toContain('db_query_fingerprint_duration_seconds');
     });
 
     it('should include application metrics', async () => {
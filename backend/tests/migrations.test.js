@@ -241,6 +241,38 @@ describe('Database Migration System', () => {
     });
   });
 
+  describe('Folder Closure', () => {
+    it('should backfill the closure of existing folders', async () => {
+      await db.initSchema();
+      db.db.exec('DROP TABLE folder_closure');
+      db.db.prepare("DELETE FROM migration_history WHERE id = '015_add_folder_closure'").run();
+
+      const userId = db.db
+        .prepare(`INSERT INTO users (username, password_hash, email) VALUES ('u', 'x', 'u@x.io')`)
+        .run().lastInsertRowid;
+      const insertFolder = db.db.prepare(
+        'INSERT INTO folders (name, user_id, parent_id) VALUES (?, ?, ?)',
+      );
+      const rootId = insertFolder.run('root', userId, null).lastInsertRowid;
+      const childId = insertFolder.run('child', userId, rootId).lastInsertRowid;
+      const leafId = insertFolder.run('leaf', userId, childId).lastInsertRowid;
+
+      await runMigrations(db.db, true);
+
+      const ancestors = db.db
+        .prepare('SELECT ancestor_id, depth FROM folder_closure WHERE descendant_id = ?')
+        .all(leafId);
+      expect(ancestors).toEqual(
+        expect.arrayContaining([
+          { ancestor_id: leafId, depth: 0 },
+          { ancestor_id: childId, depth: 1 },
+          { ancestor_id: rootId, depth: 2 },
+        ]),
+      );
+      expect(ancestors).toHaveLength(3);
+    });
+  });
+
   describe('Index Creation', () => {
     it('should create indexes for folder_id columns', async () => {
       await db.initSchema();
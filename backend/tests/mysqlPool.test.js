@@ -0,0 +1,136 @@
+/**
+ * MySQL Pool Wrapper Tests
+ * Tests connection accounting and adaptive sizing against a fake mysql2 pool
+ */
+
+import { EventEmitter } from 'node:events';
+import { afterEach, describe, expect, it } from '@jest/globals';
+import MonitoredPool from '../src/config/mysqlPool.js';
+
+/**
+ * Minimal mysql2/promise stand-in: connections are opened on demand and reused
+ */
+function createFakeMysql() {
+  const fake = { opened: 0, destroyed: 0 };
+  fake.createPool = (config) => {
+    const pool = new EventEmitter();
+    const free = [];
+    pool.config = config;
+    pool.getConnection = async () => {
+      let core = free.pop();
+      if (!core) {
+        core = new EventEmitter();
+        fake.opened++;
+        pool.emit('connection', core);
+      }
+      return {
+        connection: core,
+        execute: async (sql, params) => [[{ sql, params }], []],
+        query: async (sql, params) => [[{ sql, params }], []],
+        release: () => free.push(core),
+        destroy: () => {
+          fake.destroyed++;
+        },
+      };
+    };
+    pool.end = async () => undefined;
+    return pool;
+  };
+  return fake;
+}
+
+const options = (overrides = {}) => ({
+  name: 'test',
+  minSize: 1,
+  maxSize: 4,
+  adaptive: false,
+  adaptInterval: 60000,
+  growWait: 5,
+  ...overrides,
+});
+
+describe('MonitoredPool', () => {
+  let pool;
+
+  afterEach(async () => {
+    await pool?.end();
+  });
+
+  it('should report active, idle and queued connections', async () => {
+    pool = new MonitoredPool(createFakeMysql(), {}, options({ maxSize: 2 }));
+
+    const first = await pool.getConnection();
+    const second = await pool.getConnection();
+    const third = pool.getConnection();
+
+    expect(pool.getStats()).toMatchObject({ active: 2, idle: 0, queued: 1, total: 2, limit: 2 });
+
+    first.release();
+    const thirdConnection = await third;
+    second.release();
+
+    expect(pool.getStats()).toMatchObject({ active: 1, idle: 1, queued: 0, total: 2 });
+    thirdConnection.release();
+    expect(pool.getStats()).toMatchObject({ active: 0, idle: 2, queued: 0 });
+  });
+
+  it('should release the slot only once', async () => {
+    pool = new MonitoredPool(createFakeMysql(), {}, options());
+
+    const connection = await pool.getConnection();
+    connection.release();
+    connection.release();
+
+    expect(pool.getStats().active).toBe(0);
+  });
+
+  it('should run execute on a pooled connection', async () => {
+    pool = new MonitoredPool(createFakeMysql(), {}, options());
+
+    const [rows] = await pool.execute('SELECT ?', [1]);
+
+    expect(rows[0]).toEqual({ sql: 'SELECT ?', params: [1] });
+    expect(pool.getStats()).toMatchObject({ active: 0, idle: 1 });
+  });
+
+  it('should start adaptive pools at the minimum and grow when callers wait', async () => {
+    pool = new MonitoredPool(createFakeMysql(), {}, options({ adaptive: true, growWait: 0 }));
+    expect(pool.getStats().limit).toBe(1);
+
+    const held = await pool.getConnection();
+    const waiting = pool.getConnection();
+    await new Promise((resolve) => setTimeout(resolve, 5));
+    held.release();
+    (await waiting).release();
+
+    pool.adapt();
+    expect(pool.getStats().limit).toBe(2);
+  });
+
+  it('should shrink when idle and close surplus connections on release', async () => {
+    const mysql = createFakeMysql();
+    pool = new MonitoredPool(mysql, {}, options({ adaptive: true }));
+    pool.limit = 4;
+
+    const connections = await Promise.all([1, 2, 3, 4].map(() => pool.getConnection()));
+    pool.resetWindow();
+    pool.adapt();
+    pool.adapt();
+
+    expect(pool.getStats().limit).toBe(4);
+
+    for (const connection of connections) {
+      connection.release();
+    }
+    pool.resetWindow();
+    pool.adapt();
+    pool.adapt();
+
+    expect(pool.getStats().limit).toBe(2);
+
+    const reused = await pool.getConnection();
+    reused.release();
+    expect(mysql.destroyed).toBe(1);
+    expect(pool.getStats().total).toBe(3);
+  });
+});
@@ -170,6 +170,106 @@ describe('Notes Integration Tests', () => {
     });
   });
 
+  describe('Rendering', () => {
+    it('should store the excerpt and rendered HTML when a note is written', async () => {
+      const created = await request(app)
+        .post('/api/v1/notes')
+        .set('Authorization', `Bearer ${authToken}`)
+        .send({ title: 'Rendered Note', body: '# Heading\n\nSome **bold** text' });
+      const noteId = created.body.note.id;
+
+      const row = await db.queryOne(`SELECT excerpt, body_html FROM notes WHERE id = ?`, [noteId]);
+      expect(row.body_html).toContain('<strong>bold</strong>');
+      expect(row.excerpt).toContain('Some **bold** text');
+
+      await request(app)
+        .put(`/api/v1/notes/${noteId}`)
+        .set('Authorization', `Bearer ${authToken}`)
+        .send({ body: 'Plain *updated* body' });
+
+      const response = await request(app)
+        .get(`/api/v1/notes/${noteId}`)
+        .set('Authorization', `Bearer ${authToken}`);
+      expect(response.body.note.html).toContain('<em>updated</em>');
+    });
+  });
+
+  describe('Search', () => {
+    it('should find notes by word prefix through the full-text index', async () => {
+      expect(db.hasNotesFts).toBe(true);
+      await request(app)
+        .post('/api/v1/notes')
+        .set('Authorization', `Bearer ${authToken}`)
+        .send({ title: 'Quarterly review', body: 'Budget numbers for the café' });
+
+      const response = await request(app)
+        .get('/api/v1/notes')
+        .query({ q: 'budg cafe' })
+        .set('Authorization', `Bearer ${authToken}`);
+
+      expect(response.status).toBe(200);
+      expect(response.body.notes.map((note) => note.title)).toEqual(['Quarterly review']);
+    });
+  });
+
+  describe('Tags', () => {
+    it('should apply tag changes and remove tags no note uses', async () => {
+      const created = await request(app)
+        .post('/api/v1/notes')
+        .set('Authorization', `Bearer ${authToken}`)
+        .send({ title: 'Tagged Note', body: 'Body', tags: 'alpha, beta' });
+      const noteId = created.body.note.id;
+
+      const updated = await request(app)
+        .put(`/api/v1/notes/${noteId}`)
+        .set('Authorization', `Bearer ${authToken}`)
+        .send({ tags: 'beta,gamma,gamma' });
+
+      expect(updated.status).toBe(200);
+      expect(updated.body.note.tags.map((tag) => tag.name).sort()).toEqual(['beta', 'gamma']);
+      expect(await db.queryOne(`SELECT id FROM tags WHERE name = ?`, ['alpha'])).toBeFalsy();
+
+      await request(app)
+        .delete(`/api/v1/notes/${noteId}`)
+        .set('Authorization', `Bearer ${authToken}`);
+      expect(await db.queryOne(`SELECT id FROM tags WHERE name = ?`, ['gamma'])).toBeFalsy();
+    });
+  });
+
+  describe('Pagination', () => {
+    it('should page through notes with a cursor without gaps or duplicates', async () => {
+      const all = await request(app)
+        .get('/api/v1/notes')
+        .set('Authorization', `Bearer ${authToken}`);
+      expect(all.body).not.toHaveProperty('next_cursor');
+
+      const seen = [];
+      let cursor;
+      do {
+        const response = await request(app)
+          .get('/api/v1/notes')
+          .query(cursor ? { limit: 1, cursor } : { limit: 1 })
+          .set('Authorization', `Bearer ${authToken}`);
+
+        expect(response.status).toBe(200);
+        expect(response.body.notes.length).toBeLessThanOrEqual(1);
+        seen.push(...response.body.notes.map((note) => note.id));
+        cursor = response.body.next_cursor;
+      } while (cursor);
+
+      expect(seen).toEqual(all.body.notes.map((note) => note.id));
+    });
+
+    it('should reject a malformed cursor', async () => {
+      const response = await request(app)
+        .get('/api/v1/notes')
+        .query({ limit: 2, cursor: 'not-a-cursor' })
+        .set('Authorization', `Bearer ${authToken}`);
+
+      expect(response.status).toBe(400);
+    });
+  });
+
   describe('Authorization', () => {
     it('should return 401 when creating note without auth', async () => {
       const response = await request(app)
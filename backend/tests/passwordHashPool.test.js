@@ -0,0 +1,69 @@
+/**
+ * Password Hash Pool Tests
+ * Tests bcrypt hashing on worker threads and load shedding when the queue is full
+ */
+
+import { afterEach, describe, expect, it } from '@jest/globals';
+import bcrypt from 'bcryptjs';
+import { PasswordHashPool } from '../src/services/passwordHashPool.js';
+
+describe('PasswordHashPool', () => {
+  let pool;
+
+  afterEach(async () => {
+    await pool.close();
+  });
+
+  it('should hash and verify passwords on workers', async () => {
+    pool = new PasswordHashPool({ size: 2, maxQueue: 10 });
+
+    const hash = await pool.hash('Secret123', 4);
+
+    expect(bcrypt.getRounds(hash)).toBe(4);
+    await expect(pool.compare('Secret123', hash)).resolves.toBe(true);
+    await expect(pool.compare('wrong', hash)).resolves.toBe(false);
+  });
+
+  it('should reject jobs once the queue is full', async () => {
+    pool = new PasswordHashPool({ size: 1, maxQueue: 1 });
+
+    const running = pool.hash('first', 8);
+    const queued = pool.hash('second', 8);
+
+    expect(pool.isSaturated()).toBe(true);
+    await expect(pool.hash('third', 8)).rejects.toMatchObject({
+      code: 'PASSWORD_HASH_POOL_FULL',
+    });
+    await expect(Promise.all([running, queued])).resolves.toHaveLength(2);
+    expect(pool.isSaturated()).toBe(false);
+  });
+
+  it('should hash on the calling thread once every worker keeps crashing', async () => {
+    pool = new PasswordHashPool({
+      size: 1,
+      maxQueue: 10,
+      workerUrl: new URL('data:text/javascript,throw new Error("worker failed to load")'),
+    });
+
+    await expect(pool.hash('first', 4)).rejects.toThrow('exited');
+    // Crashes back off 100, 200, 400 and 800 ms before the worker is given up
+    while (!pool.workers.degraded) {
+      await new Promise((resolve) => setTimeout(resolve, 50));
+    }
+
+    const hash = await pool.hash('second', 4);
+
+    expect(pool.isSaturated()).toBe(false);
+    await expect(pool.compare('second', hash)).resolves.toBe(true);
+    expect(pool.workers.crashes).toEqual([5]);
+  });
+
+  it('should hash on the calling thread when the pool size is 0', async () => {
+    pool = new PasswordHashPool({ size: 0, maxQueue: 0 });
+
+    const hash = await pool.hash('Secret123', 4);
+
+    expect(pool.isSaturated()).toBe(false);
+    await expect(pool.compare('Secret123', hash)).resolves.toBe(true);
+  });
+});
@@ -0,0 +1,147 @@
+/**
+ * Principal Cache Tests
+ * Tests caching, single-flight and invalidation of authenticated user lookups,
+ * with the database and the ioredis client replaced by in-memory stand-ins.
+ */
+
+import { afterEach, beforeEach, describe, expect, it, jest } from '@jest/globals';
+import db from '../src/config/database.js';
+import cache from '../src/config/redis.js';
+import principalCache from '../src/services/principalCache.js';
+
+function createFakeClient() {
+  const store = new Map();
+  const client = {
+    store,
+    published: [],
+    get: async (key) => store.get(key) ?? null,
+    set: async (key, value) => {
+      if (!store.has(key)) store.set(key, value);
+      return 'OK';
+    },
+    setex: async (key, _ttl, value) => {
+      store.set(key, value);
+      return 'OK';
+    },
+    publish: async (channel, message) => {
+      client.published.push({ channel, message });
+      return 1;
+    },
+    pipeline: () => {
+      const commands = [];
+      const pipeline = {
+        incr: (key) => {
+          commands.push(() => {
+            store.set(key, String(Number(store.get(key) ?? 0) + 1));
+          });
+          return pipeline;
+        },
+        expire: () => pipeline,
+        publish: () => pipeline,
+        exec: async () => commands.map((command) => [null, command()]),
+      };
+      return pipeline;
+    },
+  };
+  return client;
+}
+
+describe('PrincipalCache', () => {
+  const originalQueryOne = db.queryOne;
+  let users;
+
+  beforeEach(() => {
+    users = new Map([[1, { id: 1, username: 'alice', is_locked: 0 }]]);
+    db.queryOne = jest.fn(async (_sql, [id]) => users.get(id));
+    principalCache.local.clear();
+    principalCache.inflight.clear();
+  });
+
+  afterEach(() => {
+    db.queryOne = originalQueryOne;
+    cache.client = null;
+    cache.enabled = false;
+  });
+
+  it('should query the database once while the row is cached', async () => {
+    await principalCache.get(1);
+    const user = await principalCache.get(1);
+
+    expect(user).toMatchObject({ username: 'alice' });
+    expect(db.queryOne).toHaveBeenCalledTimes(1);
+  });
+
+  it('should read rows from the primary', async () => {
+    let lastWriteAt;
+    db.queryOne = jest.fn(async (_sql, [id]) => {
+      lastWriteAt = db.replication.getLastWriteAt();
+      return users.get(id);
+    });
+
+    await principalCache.get(1);
+
+    // Inside readFromPrimary, so no replica is considered caught up
+    expect(lastWriteAt).toBe(Number.POSITIVE_INFINITY);
+  });
+
+  it('should share one query between concurrent lookups', async () => {
+    const results = await Promise.all([principalCache.get(1), principalCache.get(1)]);
+
+    expect(results[0]).toBe(results[1]);
+    expect(db.queryOne).toHaveBeenCalledTimes(1);
+  });
+
+  it('should not cache missing users', async () => {
+    await expect(principalCache.get(2)).resolves.toBeNull();
+    users.set(2, { id: 2, username: 'bob' });
+
+    await expect(principalCache.get(2)).resolves.toMatchObject({ username: 'bob' });
+  });
+
+  it('should reload the row after an invalidation', async () => {
+    await principalCache.get(1);
+    users.set(1, { id: 1, username: 'alice', is_locked: 1 });
+    await principalCache.invalidate(1);
+
+    await expect(principalCache.get(1)).resolves.toMatchObject({ is_locked: 1 });
+  });
+
+  it('should not cache a row read before a concurrent invalidation', async () => {
+    const lookup = principalCache.get(1);
+    users.set(1, { id: 1, username: 'alice', is_locked: 1 });
+    await principalCache.invalidate(1);
+    await lookup;
+
+    await expect(principalCache.get(1)).resolves.toMatchObject({ is_locked: 1 });
+  });
+
+  it('should drop rows invalidated by other instances only', async () => {
+    await principalCache.get(1);
+
+    principalCache.handleInvalidationMessage(
+      JSON.stringify({ origin: principalCache.instanceId, key: 'user:1' }),
+    );
+    await principalCache.get(1);
+    expect(db.queryOne).toHaveBeenCalledTimes(1);
+
+    principalCache.handleInvalidationMessage(JSON.stringify({ origin: 'other', key: 'user:1' }));
+    await principalCache.get(1);
+    expect(db.queryOne).toHaveBeenCalledTimes(2);
+  });
+
+  it('should share rows through Redis and orphan them on invalidation', async () => {
+    cache.client = createFakeClient();
+    cache.enabled = true;
+
+    await principalCache.get(1);
+    principalCache.local.clear();
+    await principalCache.get(1);
+    expect(db.queryOne).toHaveBeenCalledTimes(1);
+
+    users.set(1, { id: 1, username: 'alice', is_locked: 1 });
+    await principalCache.invalidate(1);
+
+    await expect(principalCache.get(1)).resolves.toMatchObject({ is_locked: 1 });
+    expect(cache.client.published).toHaveLength(1);
+  });
+});
@@ -0,0 +1,58 @@
+/**
+ * Query Fingerprint Tests
+ * Tests SQL normalization used for per-query metrics and the slow-query log
+ */
+
+import { describe, expect, it } from '@jest/globals';
+import { fingerprintQuery, normalizeQuery } from '../src/config/queryFingerprint.js';
+
+describe('Query Fingerprints', () => {
+  it('should replace string and numeric literals', () => {
+    expect(normalizeQuery("SELECT * FROM notes WHERE id = 42 AND title = 'it''s'")).toBe(
+      'SELECT * FROM notes WHERE id = ? AND title = ?',
+    );
+  });
+
+  it('should keep digits inside identifiers', () => {
+    expect(normalizeQuery('SELECT t1.id FROM notes t1 LIMIT 10')).toBe(
+      'SELECT t1.id FROM notes t1 LIMIT ?',
+    );
+  });
+
+  it('should collapse whitespace and strip comments', () => {
+    expect(normalizeQuery('SELECT id\n  FROM notes /* list */\n  WHERE owner_id = ? -- user')).toBe(
+      'SELECT id FROM notes WHERE owner_id = ?',
+    );
+  });
+
+  it('should collapse IN lists of any length', () => {
+    const short = normalizeQuery('SELECT * FROM tags WHERE id IN (?, ?)');
+    const long = normalizeQuery('SELECT * FROM tags WHERE id IN (?,?,?,?,?)');
+
+    expect(short).toBe('SELECT * FROM tags WHERE id IN (...)');
+    expect(long).toBe(short);
+  });
+
+  it('should keep IN subqueries', () => {
+    expect(normalizeQuery('SELECT * FROM notes WHERE id IN (SELECT note_id FROM note_tag)')).toBe(
+      'SELECT * FROM notes WHERE id IN (SELECT note_id FROM note_tag)',
+    );
+  });
+
+  it('should collapse multi-row VALUES', () => {
+    expect(normalizeQuery('INSERT INTO note_tag (note_id, tag_id) VALUES (?, ?), (?, ?)')).toBe(
+      'INSERT INTO note_tag (note_id, tag_id) VALUES (?, ?), ...',
+    );
+  });
+
+  it('should truncate long queries', () => {
+    const columns = Array.from({ length: 100 }, (_, i) => `column_${i}`).join(', ');
+    expect(normalizeQuery(`SELECT ${columns} FROM notes`).length).toBeLessThanOrEqual(301);
+  });
+
+  it('should return the same fingerprint from the cache', () => {
+    const sql = 'SELECT * FROM notes WHERE id = 1';
+    expect(fingerprintQuery(sql)).toBe(normalizeQuery(sql));
+    expect(fingerprintQuery(sql)).toBe('SELECT * FROM notes WHERE id = ?');
+  });
+});
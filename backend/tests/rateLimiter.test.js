@@ -0,0 +1,153 @@
+/**
+ * Rate Limiter Tests
+ * Tests route classes, client keys and the in-process token buckets the limiter
+ * falls back to without Redis.
+ */
+
+import { afterEach, describe, expect, it, jest } from '@jest/globals';
+import cache from '../src/config/redis.js';
+import { clientKey, createRateLimiter, routeClass } from '../src/middleware/rateLimiter.js';
+import jwtService from '../src/services/jwtService.js';
+
+function createRequest(overrides = {}) {
+  return { method: 'GET', path: '/v1/notes', query: {}, headers: {}, ip: '10.0.0.1', ...overrides };
+}
+
+function createResponse() {
+  const res = {
+    headers: {},
+    statusCode: 200,
+    body: null,
+    set: (name, value) => {
+      res.headers[name] = value;
+      return res;
+    },
+    status: (code) => {
+      res.statusCode = code;
+      return res;
+    },
+    json: (body) => {
+      res.body = body;
+      return res;
+    },
+  };
+  return res;
+}
+
+async function send(limiter, req) {
+  const res = createResponse();
+  const next = jest.fn();
+  await limiter(req, res, next);
+  return { res, passed: next.mock.calls.length === 1 };
+}
+
+describe('Rate Limiter', () => {
+  afterEach(() => {
+    cache.client = null;
+    cache.enabled = false;
+  });
+
+  describe('routeClass', () => {
+    it('should classify expensive routes with or without the version prefix', () => {
+      expect(routeClass(createRequest({ method: 'POST', path: '/v1/ai/proofread' }))).toBe('ai');
+      expect(routeClass(createRequest({ method: 'POST', path: '/export/import' }))).toBe('import');
+      expect(routeClass(createRequest({ path: '/v1/users/search' }))).toBe('search');
+      expect(routeClass(createRequest({ path: '/v1/notes', query: { q: 'todo' } }))).toBe('search');
+    });
+
+    it('should treat other routes as default', () => {
+      expect(routeClass(createRequest({ path: '/v1/ai/status' }))).toBe('default');
+      expect(routeClass(createRequest({ path: '/v1/notes' }))).toBe('default');
+      expect(routeClass(createRequest({ path: '/export/import' }))).toBe('default');
+    });
+  });
+
+  describe('clientKey', () => {
+    it('should key authenticated requests by user', () => {
+      const token = jwtService.generateToken(42);
+      const req = createRequest({ headers: { authorization: `Bearer ${token}` } });
+
+      expect(clientKey(req)).toBe('user:42');
+    });
+
+    it('should key anonymous and invalid-token requests by IP', () => {
+      expect(clientKey(createRequest())).toBe('ip:10.0.0.1');
+      expect(clientKey(createRequest({ headers: { authorization: 'Bearer nope' } }))).toBe(
+        'ip:10.0.0.1',
+      );
+    });
+  });
+
+  describe('local buckets', () => {
+    it('should throttle a client once its budget is spent', async () => {
+      const limiter = createRateLimiter({ capacity: 3, window: 60 });
+
+      for (let i = 0; i < 3; i++) {
+        expect((await send(limiter, createRequest())).passed).toBe(true);
+      }
+      const { res, passed } = await send(limiter, createRequest());
+
+      expect(passed).toBe(false);
+      expect(res.statusCode).toBe(429);
+      expect(res.headers['RateLimit-Remaining']).toBe('0');
+      expect(Number(res.headers['Retry-After'])).toBeGreaterThanOrEqual(1);
+    });
+
+    it('should give each client its own budget', async () => {
+      const limiter = createRateLimiter({ capacity: 1, window: 60 });
+
+      expect((await send(limiter, createRequest())).passed).toBe(true);
+      expect((await send(limiter, createRequest({ ip: '10.0.0.2' }))).passed).toBe(true);
+      expect((await send(limiter, createRequest())).passed).toBe(false);
+    });
+
+    it('should charge expensive route classes their cost', async () => {
+      const limiter = createRateLimiter({ capacity: 10, window: 60, costs: { search: 5 } });
+      const search = createRequest({ path: '/v1/users/search' });
+
+      expect((await send(limiter, search)).passed).toBe(true);
+      expect((await send(limiter, search)).passed).toBe(true);
+      expect((await send(limiter, search)).passed).toBe(false);
+    });
+
+    it('should skip requests matched by skip()', async () => {
+      const limiter = createRateLimiter({ capacity: 1, window: 60, skip: () => true });
+
+      expect((await send(limiter, createRequest())).passed).toBe(true);
+      expect((await send(limiter, createRequest())).passed).toBe(true);
+    });
+  });
+
+  it('should leave the bucket clock to the Redis server', async () => {
+    cache.enabled = true;
+    cache.client = {
+      defineCommand: jest.fn(),
+      rateLimitTake: jest.fn(async () => [1, 0, 0]),
+    };
+    const limiter = createRateLimiter({ capacity: 1, window: 60 });
+
+    expect((await send(limiter, createRequest())).passed).toBe(true);
+    expect(cache.client.defineCommand.mock.calls[0][1].lua).toContain("redis.call('TIME')");
+    expect(cache.client.rateLimitTake.mock.calls[0]).toEqual([
+      'ratelimit:ip:10.0.0.1',
+      1,
+      1 / 60000,
+      1,
+    ]);
+  });
+
+  it('should fall back to local buckets when Redis fails', async () => {
+    cache.enabled = true;
+    cache.client = {
+      defineCommand: jest.fn(),
+      rateLimitTake: jest.fn(async () => {
+        throw new Error('Connection is closed');
+      }),
+    };
+    const limiter = createRateLimiter({ capacity: 1, window: 60 });
+
+    expect((await send(limiter, createRequest())).passed).toBe(true);
+    expect((await send(limiter, createRequest())).passed).toBe(false);
+    expect(cache.client.rateLimitTake).toHaveBeenCalledTimes(2);
+  });
+});
@@ -0,0 +1,213 @@
+/**
+ * RedisCache Tests
+ * Tests getOrCompute single-flight and stale-while-revalidate behaviour and
+ * the L1 tier against an in-memory stand-in for the ioredis client.
+ */
+
+import { afterEach, beforeEach, describe, expect, it, jest } from '@jest/globals';
+import LocalCache from '../src/config/localCache.js';
+import cache from '../src/config/redis.js';
+
+function createFakeClient() {
+  const store = new Map();
+  return {
+    store,
+    get: async (key) => store.get(key) ?? null,
+    setex: async (key, _ttl, value) => {
+      store.set(key, value);
+      return 'OK';
+    },
+    del: async (key) => store.delete(key),
+  };
+}
+
+describe('RedisCache.getOrCompute', () => {
+  beforeEach(() => {
+    cache.client = createFakeClient();
+    cache.enabled = true;
+    cache.inflight.clear();
+  });
+
+  afterEach(() => {
+    cache.client = null;
+    cache.enabled = false;
+  });
+
+  it('should run the loader once for concurrent misses', async () => {
+    const loader = jest.fn(async () => {
+      await new Promise((resolve) => setTimeout(resolve, 10));
+      return ['note'];
+    });
+
+    const results = await Promise.all([
+      cache.getOrCompute('k', 60, loader),
+      cache.getOrCompute('k', 60, loader),
+      cache.getOrCompute('k', 60, loader),
+    ]);
+
+    expect(loader).toHaveBeenCalledTimes(1);
+    expect(results).toEqual([['note'], ['note'], ['note']]);
+  });
+
+  it('should serve cached values without calling the loader', async () => {
+    await cache.getOrCompute('k', 60, async () => 'first');
+    const loader = jest.fn(async () => 'second');
+
+    await expect(cache.getOrCompute('k', 60, loader)).resolves.toBe('first');
+    expect(loader).not.toHaveBeenCalled();
+  });
+
+  it('should cache empty results', async () => {
+    await cache.getOrCompute('k', 60, async () => []);
+    const loader = jest.fn(async () => ['unexpected']);
+
+    await expect(cache.getOrCompute('k', 60, loader)).resolves.toEqual([]);
+    expect(loader).not.toHaveBeenCalled();
+  });
+
+  it('should serve stale data and refresh once in the background', async () => {
+    const staleEntry = { value: 'stale', storedAt: Date.now() - 120_000 };
+    cache.client.store.set('k', JSON.stringify(staleEntry));
+    const loader = jest.fn(async () => 'fresh');
+
+    const [a, b] = await Promise.all([
+      cache.getOrCompute('k', 600, loader, { softTtl: 60 }),
+      cache.getOrCompute('k', 600, loader, { softTtl: 60 }),
+    ]);
+
+    expect(a).toBe('stale');
+    expect(b).toBe('stale');
+    // Let the background refresh settle
+    await new Promise((resolve) => setTimeout(resolve, 0));
+    expect(loader).toHaveBeenCalledTimes(1);
+    await expect(cache.getOrCompute('k', 600, loader, { softTtl: 60 })).resolves.toBe('fresh');
+  });
+
+  it('should serve stale data without waiting for a refresh in flight', async () => {
+    const staleEntry = { value: 'stale', storedAt: Date.now() - 120_000 };
+    cache.client.store.set('k', JSON.stringify(staleEntry));
+    let finishRefresh;
+    const loader = jest.fn(() => new Promise((resolve) => (finishRefresh = resolve)));
+
+    await expect(cache.getOrCompute('k', 600, loader, { softTtl: 60 })).resolves.toBe('stale');
+    // The refresh is still running; later callers get the stale value right away
+    await expect(cache.getOrCompute('k', 600, loader, { softTtl: 60 })).resolves.toBe('stale');
+    expect(loader).toHaveBeenCalledTimes(1);
+
+    finishRefresh('fresh');
+    await new Promise((resolve) => setTimeout(resolve, 0));
+    await expect(cache.getOrCompute('k', 600, loader, { softTtl: 60 })).resolves.toBe('fresh');
+  });
+
+  it('should still deduplicate when Redis is disabled', async () => {
+    cache.enabled = false;
+    const loader = jest.fn(async () => 42);
+
+    await Promise.all([cache.getOrCompute('k', 60, loader), cache.getOrCompute('k', 60, loader)]);
+    expect(loader).toHaveBeenCalledTimes(1);
+  });
+
+  it('should propagate loader errors and allow a retry', async () => {
+    await expect(
+      cache.getOrCompute('k', 60, async () => {
+        throw new Error('db down');
+      }),
+    ).rejects.toThrow('db down');
+
+    await expect(cache.getOrCompute('k', 60, async () => 'ok')).resolves.toBe('ok');
+  });
+});
+
+describe('LocalCache', () => {
+  it('should evict least recently used entries beyond the entry bound', () => {
+    const local = new LocalCache({ maxEntries: 2, maxBytes: 1000 });
+    local.set('a', 1, 60, 1);
+    local.set('b', 2, 60, 1);
+    local.get('a');
+    local.set('c', 3, 60, 1);
+
+    expect(local.get('a')).toBe(1);
+    expect(local.get('b')).toBeUndefined();
+    expect(local.get('c')).toBe(3);
+  });
+
+  it('should evict entries beyond the byte bound and skip oversized values', () => {
+    const local = new LocalCache({ maxEntries: 100, maxBytes: 100 });
+    local.set('a', 'x', 60, 20);
+    local.set('b', 'y', 60, 20);
+    local.set('c', 'z', 60, 20);
+    local.set('d', 'w', 60, 20);
+    local.set('e', 'v', 60, 25);
+
+    expect(local.getStats().bytes).toBeLessThanOrEqual(100);
+    expect(local.get('a')).toBeUndefined();
+    expect(local.set('huge', 'h', 60, 60)).toBe(false);
+  });
+
+  it('should expire entries after their TTL', () => {
+    const local = new LocalCache();
+    local.set('a', 1, -1, 1);
+
+    expect(local.get('a')).toBeUndefined();
+    expect(local.getStats().entries).toBe(0);
+  });
+});
+
+describe('RedisCache L1 tier', () => {
+  beforeEach(() => {
+    cache.local = new LocalCache({ maxEntries: 100, maxBytes: 10000 });
+    cache.inflight.clear();
+  });
+
+  afterEach(() => {
+    cache.local = null;
+    cache.client = null;
+    cache.enabled = false;
+  });
+
+  it('should work as a local-only cache when Redis is disabled', async () => {
+    cache.enabled = false;
+    await cache.set('tags:user:1:v1', ['work'], 60);
+
+    await expect(cache.get('tags:user:1:v1')).resolves.toEqual(['work']);
+  });
+
+  it('should invalidate namespaces locally when Redis is disabled', async () => {
+    cache.enabled = false;
+    const before = await cache.versionedKey('notes:user:1', 'all');
+    expect(await cache.versionedKey('notes:user:1', 'all')).toBe(before);
+
+    await cache.invalidateNamespaces('notes:user:1');
+    expect(await cache.versionedKey('notes:user:1', 'all')).not.toBe(before);
+  });
+
+  it('should serve repeated reads from L1 without hitting Redis', async () => {
+    cache.client = createFakeClient();
+    cache.enabled = true;
+    cache.client.store.set('folders:user:1:v1', JSON.stringify({ total: 3 }));
+    const getSpy = jest.spyOn(cache.client, 'get');
+
+    await cache.get('folders:user:1:v1');
+    await cache.get('folders:user:1:v1');
+
+    expect(getSpy).toHaveBeenCalledTimes(1);
+  });
+
+  it('should drop L1 entries named in invalidation broadcasts from other instances', async () => {
+    cache.enabled = false;
+    await cache.set('tags:user:2:v1', ['a'], 60);
+
+    cache.handleInvalidationMessage(JSON.stringify({ origin: 'other', keys: ['tags:user:2:v1'] }));
+    await expect(cache.get('tags:user:2:v1')).resolves.toBeNull();
+  });
+
+  it('should ignore its own invalidation broadcasts', async () => {
+    cache.enabled = false;
+    await cache.set('tags:user:3:v1', ['a'], 60);
+
+    cache.handleInvalidationMessage(
+      JSON.stringify({ origin: cache.instanceId, keys: ['tags:user:3:v1'] }),
+    );
+    await expect(cache.get('tags:user:3:v1')).resolves.toEqual(['a']);
+  });
+});
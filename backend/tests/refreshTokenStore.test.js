@@ -0,0 +1,174 @@
+/**
+ * Refresh Token Store Tests
+ * Tests refresh token rotation, reuse detection and sessions with the Redis store,
+ * using an in-memory stand-in for the ioredis client and its scripts.
+ */
+
+import { afterEach, beforeEach, describe, expect, it, jest } from '@jest/globals';
+import { REFRESH_TOKENS } from '../src/config/constants.js';
+import db from '../src/config/database.js';
+import cache from '../src/config/redis.js';
+import jwtService from '../src/services/jwtService.js';
+
+function createFakeClient() {
+  const hashes = new Map();
+  const sets = new Map();
+  const members = (key) => sets.get(key) ?? new Set();
+
+  const client = {
+    hashes,
+    defineCommand: () => undefined,
+    refreshTokenClaim: async (key, userId, now) => {
+      const token = hashes.get(key);
+      if (!token) return 'missing';
+      if (token.user_id !== String(userId)) return 'invalid';
+      if (token.revoked === '1') return 'revoked';
+      Object.assign(token, { revoked: '1', revoked_at: now, last_used_at: now });
+      return 'claimed';
+    },
+    refreshTokenRevoke: async (key, revokedAt) => {
+      const token = hashes.get(key);
+      if (!token) return 0;
+      Object.assign(token, { revoked: '1', revoked_at: revokedAt });
+      return 1;
+    },
+    refreshTokenRevokeAll: async (key, prefix, revokedAt) => {
+      let revoked = 0;
+      for (const hash of members(key)) {
+        const token = hashes.get(`${prefix}${hash}`);
+        if (token && token.revoked !== '1') {
+          Object.assign(token, { revoked: '1', revoked_at: revokedAt });
+          revoked++;
+        }
+      }
+      return revoked;
+    },
+    multi: () => {
+      const commands = [];
+      const multi = {
+        hset: (key, fields) => {
+          commands.push(() => hashes.set(key, { ...fields }));
+          return multi;
+        },
+        pexpireat: () => multi,
+        sadd: (key, member) => {
+          commands.push(() => sets.set(key, members(key).add(member)));
+          return multi;
+        },
+        exec: async () => commands.map((command) => [null, command()]),
+      };
+      return multi;
+    },
+    pipeline: () => {
+      const keys = [];
+      const pipeline = {
+        hgetall: (key) => {
+          keys.push(key);
+          return pipeline;
+        },
+        exec: async () => keys.map((key) => [null, hashes.get(key) ?? {}]),
+      };
+      return pipeline;
+    },
+    smembers: async (key) => [...members(key)],
+    srem: async (key, ...removed) => {
+      for (const member of removed) members(key).delete(member);
+      return removed.length;
+    },
+  };
+  return client;
+}
+
+async function issueRefreshToken(userId, deviceInfo = null) {
+  const { token, tokenId } = jwtService.generateRefreshToken(userId);
+  const expiresAt = new Date(Date.now() + 7 * 24 * 3600 * 1000).toISOString();
+  await jwtService.storeRefreshToken(userId, tokenId, expiresAt, deviceInfo);
+  return { token, tokenId };
+}
+
+describe('Redis refresh token store', () => {
+  const originalRun = db.run;
+  const originalQueryOne = db.queryOne;
+  const originalStore = REFRESH_TOKENS.STORE;
+
+  beforeEach(() => {
+    REFRESH_TOKENS.STORE = 'redis';
+    cache.client = createFakeClient();
+    cache.enabled = true;
+    db.run = jest.fn(async () => ({ affectedRows: 1 }));
+    db.queryOne = jest.fn(async () => null);
+  });
+
+  afterEach(() => {
+    REFRESH_TOKENS.STORE = originalStore;
+    cache.client = null;
+    cache.enabled = false;
+    db.run = originalRun;
+    db.queryOne = originalQueryOne;
+  });
+
+  it('should rotate refresh tokens without reading the database', async () => {
+    const { token: refreshToken } = await issueRefreshToken(1);
+
+    const result = await jwtService.refreshAccessToken(refreshToken);
+
+    expect(result).toMatchObject({ success: true, rotated: true });
+    expect(result.refreshToken).not.toBe(refreshToken);
+    expect(db.queryOne).not.toHaveBeenCalled();
+    // Audit rows: both inserts and the revocation of the used token
+    expect(db.run).toHaveBeenCalledTimes(3);
+  });
+
+  it('should revoke all sessions when a rotated token is reused', async () => {
+    const { token: refreshToken } = await issueRefreshToken(1);
+    const { refreshToken: rotated } = await jwtService.refreshAccessToken(refreshToken);
+
+    const reuse = await jwtService.refreshAccessToken(refreshToken);
+    expect(reuse).toEqual({
+      success: false,
+      error: 'Token reuse detected. All sessions revoked.',
+    });
+
+    const next = await jwtService.refreshAccessToken(rotated);
+    expect(next.success).toBe(false);
+  });
+
+  it('should reject tokens presented for another user', async () => {
+    const { token: refreshToken } = await issueRefreshToken(1);
+    const [key] = cache.client.hashes.keys();
+    cache.client.hashes.get(key).user_id = '2';
+
+    await expect(jwtService.refreshAccessToken(refreshToken)).resolves.toMatchObject({
+      success: false,
+      error: 'Invalid refresh token',
+    });
+  });
+
+  it('should list active sessions from Redis', async () => {
+    await issueRefreshToken(1, 'laptop');
+    const { tokenId } = await issueRefreshToken(1, 'phone');
+    await jwtService.revokeRefreshToken(tokenId);
+
+    const { success, tokens } = await jwtService.getUserTokens(1);
+
+    expect(success).toBe(true);
+    expect(tokens).toHaveLength(1);
+    expect(tokens[0]).toMatchObject({ device_info: 'laptop' });
+  });
+
+  it('should fall back to the database for tokens Redis does not know', async () => {
+    const { token, tokenId } = jwtService.generateRefreshToken(1);
+    db.queryOne = jest.fn(async () => ({
+      user_id: 1,
+      token_hash: jwtService.hashToken(tokenId),
+      revoked: 0,
+      expires_at: new Date(Date.now() + 3600 * 1000).toISOString(),
+    }));
+
+    const result = await jwtService.refreshAccessToken(token);
+
+    expect(result).toMatchObject({ success: true, rotated: true });
+    expect(db.queryOne).toHaveBeenCalledTimes(1);
+    expect(cache.client.hashes.size).toBe(1);
+  });
+});
@@ -0,0 +1,166 @@
+/**
+ * Search Outbox Tests
+ * Tests that note writes are queued in search_outbox and drained into
+ * Elasticsearch in bulk, against a fake Elasticsearch client.
+ */
+
+import fs from 'node:fs';
+import path from 'node:path';
+import { afterAll, beforeAll, beforeEach, describe, expect, it } from '@jest/globals';
+import db from '../src/config/database.js';
+import elasticsearch from '../src/config/elasticsearch.js';
+import NoteService from '../src/services/noteService.js';
+import searchOutbox from '../src/services/searchOutbox.js';
+
+describe('SearchOutbox', () => {
+  const testDbPath = path.resolve('/tmp', 'test_search_outbox.db');
+  let bulkCalls;
+  let failBulk;
+  let userId;
+  const originalConnect = elasticsearch.connect;
+
+  beforeAll(async () => {
+    process.env.NOTES_DB_PATH = testDbPath;
+    process.env.ELASTICSEARCH_NODE = 'http://elasticsearch.test:9200';
+    await db.connect();
+    await db.initSchema();
+
+    const result = await db.run(
+      `INSERT INTO users (username, password_hash, email) VALUES (?, ?, ?)`,
+      ['outboxuser', 'x', 'outboxuser@example.com'],
+    );
+    userId = result.insertId;
+  });
+
+  beforeEach(async () => {
+    elasticsearch.enabled = true;
+    elasticsearch.client = {
+      bulk: async ({ body }) => {
+        bulkCalls.push(body);
+        if (failBulk) throw new Error('cluster unavailable');
+        return { errors: false, items: [] };
+      },
+    };
+    elasticsearch.connect = originalConnect;
+    bulkCalls = [];
+    failBulk = false;
+    await db.run(`DELETE FROM search_outbox`);
+  });
+
+  afterAll(async () => {
+    delete process.env.ELASTICSEARCH_NODE;
+    elasticsearch.connect = originalConnect;
+    elasticsearch.enabled = false;
+    elasticsearch.client = null;
+    await db.close();
+    for (const suffix of ['', '-wal', '-shm']) {
+      fs.rmSync(`${testDbPath}${suffix}`, { force: true });
+    }
+  });
+
+  it('should coalesce repeated edits into one bulk index request', async () => {
+    const note = await NoteService.createNote(userId, 'Draft', 'v1', 'alpha');
+    await NoteService.updateNote(note.id, undefined, 'v2');
+    await NoteService.updateNote(note.id, 'Final', 'v3');
+
+    const queued = await db.query(`SELECT note_id, operation, version FROM search_outbox`);
+    expect(queued).toHaveLength(1);
+    expect(queued[0].version).toBeGreaterThan(1);
+
+    await searchOutbox.drain();
+
+    expect(bulkCalls).toHaveLength(1);
+    expect(bulkCalls[0][1]).toMatchObject({ id: note.id, title: 'Final', tags: ['alpha'] });
+    expect(await db.query(`SELECT * FROM search_outbox`)).toEqual([]);
+  });
+
+  it('should queue a delete and remove it from the index', async () => {
+    const note = await NoteService.createNote(userId, 'Short-lived', 'body');
+    await NoteService.deleteNote(note.id, userId);
+
+    await searchOutbox.drain();
+
+    expect(bulkCalls).toHaveLength(1);
+    expect(bulkCalls[0]).toEqual([
+      { delete: { _index: elasticsearch.indexName, _id: note.id.toString() } },
+    ]);
+    expect(await db.query(`SELECT * FROM search_outbox`)).toEqual([]);
+  });
+
+  it('should back off and keep entries when Elasticsearch rejects them', async () => {
+    const note = await NoteService.createNote(userId, 'Retry me', 'body');
+    failBulk = true;
+
+    const before = Date.now();
+    await searchOutbox.drain();
+
+    const entry = await db.queryOne(`SELECT * FROM search_outbox WHERE note_id = ?`, [note.id]);
+    expect(entry.attempts).toBe(1);
+    expect(entry.available_at).toBeGreaterThan(before);
+    expect(entry.last_error).toContain('index');
+
+    // Not due yet, so a second drain leaves it alone
+    await searchOutbox.drain();
+    expect(bulkCalls).toHaveLength(1);
+  });
+
+  it('should leave entries claimed by another worker alone until the claim expires', async () => {
+    const note = await NoteService.createNote(userId, 'Claimed elsewhere', 'body');
+    await db.run(`UPDATE search_outbox SET claimed_by = ?, claimed_until = ? WHERE note_id = ?`, [
+      'other-worker',
+      Date.now() + 60_000,
+      note.id,
+    ]);
+
+    await searchOutbox.drain();
+    expect(bulkCalls).toHaveLength(0);
+
+    await db.run(`UPDATE search_outbox SET claimed_until = ? WHERE note_id = ?`, [
+      Date.now() - 1,
+      note.id,
+    ]);
+    await searchOutbox.drain();
+
+    expect(bulkCalls).toHaveLength(1);
+    expect(await db.query(`SELECT * FROM search_outbox`)).toEqual([]);
+  });
+
+  it('should release the claim on entries that failed', async () => {
+    const note = await NoteService.createNote(userId, 'Retry later', 'body');
+    failBulk = true;
+
+    await searchOutbox.drain();
+
+    const entry = await db.queryOne(`SELECT * FROM search_outbox WHERE note_id = ?`, [note.id]);
+    expect(entry).toMatchObject({ attempts: 1, claimed_by: null, claimed_until: null });
+  });
+
+  it('should queue while Elasticsearch is unreachable and index once it connects', async () => {
+    const client = elasticsearch.client;
+    elasticsearch.enabled = false;
+    elasticsearch.client = null;
+    let reachable = false;
+    let connectCalls = 0;
+    elasticsearch.connect = async () => {
+      connectCalls++;
+      elasticsearch.enabled = reachable;
+      elasticsearch.client = reachable ? client : null;
+    };
+
+    const note = await NoteService.createNote(userId, 'Queued offline', 'body');
+    await searchOutbox.drain();
+    expect(connectCalls).toBe(1);
+    expect(await db.query(`SELECT note_id FROM search_outbox`)).toEqual([{ note_id: note.id }]);
+
+    // Backing off, so the next drain does not try again yet
+    await searchOutbox.drain();
+    expect(connectCalls).toBe(1);
+
+    reachable = true;
+    searchOutbox.nextConnectAt = 0;
+    await searchOutbox.drain();
+
+    expect(bulkCalls).toHaveLength(1);
+    expect(await db.query(`SELECT * FROM search_outbox`)).toEqual([]);
+  });
+});
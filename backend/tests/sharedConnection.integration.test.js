@@ -0,0 +1,130 @@
+/**
+ * Shared Connection Integration Tests
+ * Runs real Sequelize queries through the Database wrapper's connections: the shared
+ * SQLite handle, and the MySQL dialect on a stand-in pool connection.
+ */
+
+import { EventEmitter } from 'node:events';
+import fs from 'node:fs';
+import path from 'node:path';
+import { fileURLToPath } from 'node:url';
+import { QueryTypes, Sequelize } from 'sequelize';
+import db from '../src/config/database.js';
+import { closeDatabase, getSequelize, initializeSequelize, User } from '../src/models/index.js';
+import { attachSharedPool } from '../src/models/sharedConnection.js';
+
+// ESM compatibility
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+
+describe('Sequelize on the shared SQLite handle', () => {
+  const testDbPath = path.join(__dirname, 'test-shared-connection.db');
+
+  beforeAll(async () => {
+    process.env.NOTES_DB_PATH = testDbPath;
+    await db.connect();
+    await db.initSchema();
+    await initializeSequelize();
+  });
+
+  afterAll(async () => {
+    await closeDatabase();
+    await db.close();
+    for (const suffix of ['', '-wal', '-shm']) {
+      fs.rmSync(`${testDbPath}${suffix}`, { force: true });
+    }
+  });
+
+  it('should see rows written through the wrapper and write rows it can read', async () => {
+    await db.run(`INSERT INTO users (username, password_hash, email) VALUES (?, ?, ?)`, [
+      'shareduser1',
+      'x',
+      'shareduser1@example.com',
+    ]);
+
+    const user = await User.findOne({ where: { username: 'shareduser1' } });
+    expect(user.email).toBe('shareduser1@example.com');
+
+    await User.update({ email: 'changed@example.com' }, { where: { id: user.id } });
+    const row = await db.queryOne(`SELECT email FROM users WHERE id = ?`, [user.id]);
+    expect(row.email).toBe('changed@example.com');
+  });
+
+  it('should keep wrapper writes out of a Sequelize transaction that rolls back', async () => {
+    const sequelize = getSequelize();
+    let outsideWrite;
+
+    await expect(
+      sequelize.transaction(async (transaction) => {
+        await User.create(
+          { username: 'rolledback', password_hash: 'x', email: 'rolledback@example.com' },
+          { transaction },
+        );
+        outsideWrite = db.run(
+          `INSERT INTO users (username, password_hash, email) VALUES (?, ?, ?)`,
+          ['outside', 'x', 'outside@example.com'],
+        );
+        throw new Error('roll back');
+      }),
+    ).rejects.toThrow('roll back');
+    await outsideWrite;
+
+    const names = await db.query(
+      `SELECT username FROM users WHERE username IN ('rolledback', 'outside')`,
+    );
+    expect(names).toEqual([{ username: 'outside' }]);
+  });
+});
+
+describe('Sequelize on the shared MySQL pool', () => {
+  /**
+   * Pool connection stand-in: answers every query with one row whose fields are
+   * decoded through the typeCast the query was given, as mysql2 does.
+   */
+  function createFakeDatabase(fields) {
+    const recorded = [];
+    const connection = {
+      query(options, callback) {
+        const row = {};
+        for (const field of fields) {
+          row[field.name] = options.typeCast(field, () => field.value);
+        }
+        setImmediate(() => callback(null, [row], []));
+        return new EventEmitter();
+      },
+    };
+    return {
+      recorded,
+      recordQuery: (sql) => recorded.push(sql),
+      db: { getConnection: async () => ({ connection, release: () => undefined }) },
+    };
+  }
+
+  function field(name, type, value) {
+    return { name, type, value, string: () => value };
+  }
+
+  it('should type-cast results like the mysql dialect and record the query', async () => {
+    const sequelize = new Sequelize({
+      dialect: 'mysql',
+      databaseVersion: '8.0.0',
+      timezone: '+02:00',
+      logging: false,
+    });
+    const database = createFakeDatabase([
+      field('created_at', 'DATETIME', '2024-01-02 03:04:05'),
+      field('due_date', 'DATE', '2024-01-02'),
+      field('title', 'VAR_STRING', 'Note'),
+    ]);
+    attachSharedPool(sequelize, database);
+
+    const [row] = await sequelize.query('SELECT created_at, due_date, title FROM notes', {
+      type: QueryTypes.SELECT,
+    });
+
+    expect(row.created_at).toEqual(new Date('2024-01-02T01:04:05Z'));
+    expect(row.due_date).toBe('2024-01-02');
+    expect(row.title).toBe('Note');
+    expect(database.recorded).toEqual(['SELECT created_at, due_date, title FROM notes']);
+  });
+});
@@ -0,0 +1,146 @@
+/**
+ * Shared Connection Tests
+ * Tests the node-sqlite3 API Sequelize uses, on top of a shared better-sqlite3 handle
+ */
+
+import { describe, expect, it } from '@jest/globals';
+import SQLiteLock from '../src/config/sqliteLock.js';
+import { sqliteDialectModule } from '../src/models/sharedConnection.js';
+
+/**
+ * better-sqlite3 stand-in: SELECTs return their arguments, other statements report a write
+ */
+function createFakeDatabase() {
+  const database = { isSQLite: true, recorded: [], sqliteLock: new SQLiteLock() };
+  database.db = {
+    name: 'notes.db',
+    inTransaction: false,
+    prepare: (sql) => {
+      if (sql.includes('FAIL')) {
+        throw Object.assign(new Error('UNIQUE constraint failed: users.email'), {
+          code: 'SQLITE_CONSTRAINT_UNIQUE',
+        });
+      }
+      return {
+        reader: sql.startsWith('SELECT'),
+        all: (...args) => [{ args }],
+        get: (...args) => ({ args }),
+        run: () => {
+          if (sql.startsWith('BEGIN')) database.db.inTransaction = true;
+          if (sql.startsWith('COMMIT')) database.db.inTransaction = false;
+          return { lastInsertRowid: 7, changes: 1 };
+        },
+      };
+    },
+    exec: () => undefined,
+  };
+  database.recordQuery = (sql, params, operation, duration, success) => {
+    database.recorded.push({ operation, success });
+  };
+  return database;
+}
+
+function open(database) {
+  const { Database, OPEN_READWRITE } = sqliteDialectModule(database);
+  return new Promise((resolve, reject) => {
+    const connection = new Database('notes.db', OPEN_READWRITE, (error) =>
+      error ? reject(error) : resolve(connection),
+    );
+  });
+}
+
+function call(connection, method, sql, params) {
+  return new Promise((resolve) => {
+    connection[method](sql, params, function (error, rows) {
+      resolve({ error, rows, lastID: this.lastID, changes: this.changes });
+    });
+  });
+}
+
+describe('sqliteDialectModule', () => {
+  it('should convert named parameters and values the way node-sqlite3 binds them', async () => {
+    const connection = await open(createFakeDatabase());
+    const createdAt = new Date(1000);
+
+    const { rows } = await call(connection, 'all', 'SELECT * FROM users WHERE id = $1', {
+      $1: 5,
+      $2: true,
+      $3: createdAt,
+    });
+
+    expect(rows).toEqual([{ args: [{ 1: 5, 2: 1, 3: 1000 }] }]);
+  });
+
+  it('should report lastID and changes for writes', async () => {
+    const connection = await open(createFakeDatabase());
+
+    const result = await call(connection, 'run', 'INSERT INTO users (email) VALUES ($1)', {
+      $1: 'a@example.com',
+    });
+
+    expect(result).toMatchObject({ error: null, lastID: 7, changes: 1 });
+  });
+
+  it('should return no rows for statements run through all()', async () => {
+    const connection = await open(createFakeDatabase());
+
+    const { rows } = await call(connection, 'all', 'CREATE TABLE IF NOT EXISTS t (id)', []);
+
+    expect(rows).toEqual([]);
+  });
+
+  it('should pass SQLite errors to the callback and record the query', async () => {
+    const database = createFakeDatabase();
+    const connection = await open(database);
+
+    const { error } = await call(connection, 'run', 'INSERT FAIL', []);
+
+    expect(error.code).toBe('SQLITE_CONSTRAINT_UNIQUE');
+    expect(database.recorded).toEqual([{ operation: 'INSERT', success: false }]);
+  });
+
+  it('should keep other statements out of an open transaction', async () => {
+    const database = createFakeDatabase();
+    const connection = await open(database);
+    const other = await open(database);
+
+    await call(connection, 'run', 'BEGIN DEFERRED TRANSACTION', []);
+    let otherDone = false;
+    const otherWrite = call(other, 'run', 'INSERT INTO users (email) VALUES (1)', []).then(
+      () => {
+        otherDone = true;
+      },
+    );
+    await call(connection, 'run', 'INSERT INTO users (email) VALUES (2)', []);
+    expect(otherDone).toBe(false);
+
+    await call(connection, 'run', 'COMMIT', []);
+    await otherWrite;
+    expect(otherDone).toBe(true);
+  });
+
+  it('should wait for transactions held by the database wrapper', async () => {
+    const database = createFakeDatabase();
+    const connection = await open(database);
+    let release;
+    const held = database.sqliteLock.hold(
+      Symbol('transaction'),
+      () => new Promise((resolve) => (release = resolve)),
+    );
+
+    let done = false;
+    const read = call(connection, 'all', 'SELECT 1', []).then(() => {
+      done = true;
+    });
+    await new Promise((resolve) => setImmediate(resolve));
+    expect(done).toBe(false);
+
+    release();
+    await Promise.all([held, read]);
+    expect(done).toBe(true);
+  });
+
+  it('should fail to open before the database is connected', async () => {
+    await expect(open({ isSQLite: true, db: null })).rejects.toThrow('not connected');
+  });
+});
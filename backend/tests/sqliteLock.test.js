@@ -0,0 +1,65 @@
+/**
+ * SQLite Lock Tests
+ * Tests that statements wait for open SQLite transactions unless they belong to them
+ */
+
+import { describe, expect, it } from '@jest/globals';
+import SQLiteLock from '../src/config/sqliteLock.js';
+
+function tick() {
+  return new Promise((resolve) => setImmediate(resolve));
+}
+
+describe('SQLiteLock', () => {
+  it('should run statements right away while no transaction is open', async () => {
+    const lock = new SQLiteLock();
+
+    await expect(lock.run(() => 'row')).resolves.toBe('row');
+    expect(lock.pending).toBe(0);
+  });
+
+  it('should hold statements from outside a transaction until it ends', async () => {
+    const lock = new SQLiteLock();
+    const order = [];
+    let finish;
+
+    const transaction = lock.hold(Symbol('transaction'), async () => {
+      order.push('begin');
+      await new Promise((resolve) => (finish = resolve));
+      order.push('commit');
+    });
+    await tick();
+    const statement = lock.run(() => order.push('statement'));
+    await tick();
+    expect(order).toEqual(['begin']);
+
+    finish();
+    await Promise.all([transaction, statement]);
+    expect(order).toEqual(['begin', 'commit', 'statement']);
+    expect(lock.pending).toBe(0);
+  });
+
+  it('should run statements of the transaction itself directly', async () => {
+    const lock = new SQLiteLock();
+
+    const result = await lock.hold(Symbol('transaction'), async () => {
+      await tick();
+      return lock.run(() => 'inside');
+    });
+
+    expect(result).toBe('inside');
+  });
+
+  it('should release the lock when the transaction throws', async () => {
+    const lock = new SQLiteLock();
+
+    await expect(
+      lock.hold(Symbol('transaction'), async () => {
+        throw new Error('rollback');
+      }),
+    ).rejects.toThrow('rollback');
+
+    await expect(lock.run(() => 'after')).resolves.toBe('after');
+    expect(lock.pending).toBe(0);
+  });
+});
@@ -0,0 +1,55 @@
+/**
+ * SQLite Read Pool Tests
+ * Tests that a pool whose workers keep crashing backs off, gives up and falls back to
+ * the main connection
+ */
+
+import { afterEach, describe, expect, it, jest } from '@jest/globals';
+import SqliteReadPool from '../src/config/sqliteReadPool.js';
+
+// A worker that fails the way one that cannot open the database does
+const CRASHING_WORKER = new URL('data:text/javascript,throw new Error("unable to open database")');
+
+describe('SqliteReadPool', () => {
+  let pool;
+
+  afterEach(async () => {
+    await pool.close();
+  });
+
+  it('should fall back to the main connection once every worker keeps crashing', async () => {
+    const fallback = jest.fn(async (sql, params, mode) => (mode === 'one' ? { sql } : [{ sql }]));
+    pool = new SqliteReadPool('notes.db', {
+      size: 2,
+      maxQueue: 10,
+      fallback,
+      workerUrl: CRASHING_WORKER,
+    });
+    pool.start();
+
+    // Crashes back off 100, 200, 400 and 800 ms before each worker is given up
+    while (!pool.workers.degraded) {
+      await new Promise((resolve) => setTimeout(resolve, 50));
+    }
+
+    await expect(pool.query('SELECT 1', [], 'all')).resolves.toEqual([{ sql: 'SELECT 1' }]);
+    await expect(pool.query('SELECT 2', [], 'one')).resolves.toEqual({ sql: 'SELECT 2' });
+    expect(pool.workers.crashes).toEqual([5, 5]);
+  });
+
+  it('should stop respawning workers when closed', async () => {
+    pool = new SqliteReadPool('notes.db', {
+      size: 1,
+      maxQueue: 10,
+      fallback: jest.fn(),
+      workerUrl: CRASHING_WORKER,
+    });
+    pool.start();
+    await new Promise((resolve) => setTimeout(resolve, 50));
+
+    await pool.close();
+
+    expect(pool.workers.respawnTimers.size).toBe(0);
+    await expect(pool.query('SELECT 1', [], 'all')).rejects.toThrow('closed');
+  });
+});
@@ -229,6 +229,23 @@ describe('API Client', () => {
       expect(notes[0].title).toBe('Test Note');
     });
 
+    it('fetches a page of notes with a cursor', async () => {
+      const mockNotes = [{ id: 3, title: 'Paged Note', body: 'Content', tags: [] }];
+
+      (global.fetch as ReturnType<typeof vi.fn>).mockResolvedValueOnce({
+        ok: true,
+        json: () => Promise.resolve({ notes: mockNotes, next_cursor: 'next' }),
+      });
+
+      const page = await notesApi.listPage('all', undefined, undefined, 'abc', 25);
+
+      const url = (global.fetch as ReturnType<typeof vi.fn>).mock.calls[0][0] as string;
+      expect(url).toContain('limit=25');
+      expect(url).toContain('cursor=abc');
+      expect(page.notes).toHaveLength(1);
+      expect(page.nextCursor).toBe('next');
+    });
+
     it('creates a new note', async () => {
       const mockNote = { id: 2, title: 'New Note', body: 'New content', tags: [] };
 
@@ -10,6 +10,7 @@ import type {
   Note,
   NoteFormData,
   NoteResponse,
+  NotesPageResult,
   NotesResponse,
   NoteViewType,
   Task,
@@ -337,6 +338,23 @@ export const notesApi = {
     return response.notes;
   },
 
+  // Fetch one page of notes; pass the previous page's nextCursor to continue
+  async listPage(
+    view: NoteViewType = 'all',
+    query?: string,
+    tag?: string,
+    cursor?: string | null,
+    limit = 50,
+  ): Promise<NotesPageResult> {
+    const params = new URLSearchParams({ view, limit: String(limit) });
+    if (query) params.append('q', query);
+    if (tag) params.append('tag', tag);
+    if (cursor) params.append('cursor', cursor);
+
+    const response = await apiRequest<NotesResponse>(`${API_VERSION}/notes?${params}`);
+    return { notes: response.notes, nextCursor: response.next_cursor ?? null };
+  },
+
   async get(id: number): Promise<Note> {
     const response = await apiRequest<NoteResponse>(`${API_VERSION}/notes/${id}`);
     return response.note;
@@ -20,6 +20,8 @@ export function NotesPage() {
   const [notes, setNotes] = useState<Note[]>([]);
   const [_allTags, setAllTags] = useState<Tag[]>([]);
   const [isLoading, setIsLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [error, setError] = useState('');
   const [isMarkdownImporting, setIsMarkdownImporting] = useState(false);
   const [markdownOverwrite, setMarkdownOverwrite] = useState(false);
@@ -95,36 +97,57 @@ export function NotesPage() {
 
   const view = (searchParams.get('view') || 'all') as NoteViewType;
 
+  // Extract unique tags with counts from the notes loaded so far
+  const summarizeTags = useCallback((loadedNotes: Note[]) => {
+    const tagMap = new Map<string, { id: number; name: string; count: number }>();
+    loadedNotes.forEach((note) => {
+      note.tags.forEach((tag) => {
+        const existing = tagMap.get(tag.name);
+        if (existing) {
+          existing.count++;
+        } else {
+          tagMap.set(tag.name, { id: tag.id, name: tag.name, count: 1 });
+        }
+      });
+    });
+    setAllTags(
+      Array.from(tagMap.values())
+        .map((t) => ({ id: t.id, name: t.name, note_count: t.count }))
+        .sort((a, b) => (b.note_count || 0) - (a.note_count || 0)),
+    );
+  }, []);
+
   const loadNotes = useCallback(async () => {
     setIsLoading(true);
     setError('');
     try {
-      const fetchedNotes = await offlineNotesApi.list(view, query, tagFilter);
-      setNotes(fetchedNotes);
-
-      // Extract unique tags with counts
-      const tagMap = new Map<string, { id: number; name: string; count: number }>();
-      fetchedNotes.forEach((note) => {
-        note.tags.forEach((tag) => {
-          const existing = tagMap.get(tag.name);
-          if (existing) {
-            existing.count++;
-          } else {
-            tagMap.set(tag.name, { id: tag.id, name: tag.name, count: 1 });
-          }
-        });
-      });
-      setAllTags(
-        Array.from(tagMap.values())
-          .map((t) => ({ id: t.id, name: t.name, note_count: t.count }))
-          .sort((a, b) => (b.note_count || 0) - (a.note_count || 0)),
-      );
+      const page = await offlineNotesApi.listPage(view, query, tagFilter);
+      setNotes(page.notes);
+      setNextCursor(page.nextCursor);
+      summarizeTags(page.notes);
     } catch (err) {
       setError(err instanceof Error ? err.message : t('notes.failedToLoadNote'));
     } finally {
       setIsLoading(false);
     }
-  }, [view, query, tagFilter, t]);
+  }, [view, query, tagFilter, t, summarizeTags]);
+
+  const loadMoreNotes = useCallback(async () => {
+    if (!nextCursor || isLoadingMore) return;
+    setIsLoadingMore(true);
+    try {
+      const page = await offlineNotesApi.listPage(view, query, tagFilter, nextCursor);
+      const loadedIds = new Set(notes.map((note) => note.id));
+      const combined = [...notes, ...page.notes.filter((note) => !loadedIds.has(note.id))];
+      setNotes(combined);
+      setNextCursor(page.nextCursor);
+      summarizeTags(combined);
+    } catch (err) {
+      setError(err instanceof Error ? err.message : t('notes.failedToLoadNote'));
+    } finally {
+      setIsLoadingMore(false);
+    }
+  }, [view, query, tagFilter, t, notes, nextCursor, isLoadingMore, summarizeTags]);
 
   const loadFolders = useCallback(async () => {
     try {
@@ -714,6 +737,23 @@ export function NotesPage() {
             );
           })()
         )}
+
+        {/* Load More */}
+        {!isLoading && nextCursor && (
+          <div className="flex justify-center py-6">
+            <button
+              type="button"
+              onClick={loadMoreNotes}
+              disabled={isLoadingMore}
+              className="btn-apple"
+            >
+              <i
+                className={`glass-i fas ${isLoadingMore ? 'fa-circle-notch fa-spin' : 'fa-chevron-down'} mr-2`}
+              ></i>
+              {isLoadingMore ? t('common.loading') : t('notes.loadMore')}
+            </button>
+          </div>
+        )}
       </div>
 
       {/* Folder Modal */}
@@ -4,6 +4,7 @@ import type {
   FolderFormData,
   Note,
   NoteFormData,
+  NotesPageResult,
   NoteViewType,
   Task,
   TaskFilterType,
@@ -28,6 +29,41 @@ const generateTempId = (): number => {
   return tempIdCounter--;
 };
 
+// Read notes from IndexedDB, applying the same filters as the server
+const getCachedNotes = async (
+  view: NoteViewType,
+  query?: string,
+  tagFilter?: string,
+): Promise<Note[]> => {
+  let notes = await secureNotesStorage.getNotes();
+
+  // Apply view filter
+  if (view === 'favorites') {
+    notes = notes.filter((note) => note.favorite);
+  } else if (view === 'archived') {
+    notes = notes.filter((note) => note.archived);
+  } else if (view === 'pinned') {
+    notes = notes.filter((note) => note.pinned);
+  }
+
+  // Apply search query
+  if (query) {
+    const lowerQuery = query.toLowerCase();
+    notes = notes.filter(
+      (note) =>
+        note.title.toLowerCase().includes(lowerQuery) ||
+        note.body.toLowerCase().includes(lowerQuery),
+    );
+  }
+
+  // Apply tag filter
+  if (tagFilter) {
+    notes = notes.filter((note) => note.tags.some((tag) => tag.name === tagFilter));
+  }
+
+  return notes;
+};
+
 // Notes API with offline support
 export const offlineNotesApi = {
   async list(view: NoteViewType = 'all', query?: string, tagFilter?: string): Promise<Note[]> {
@@ -43,33 +79,31 @@ export const offlineNotesApi = {
     }
 
     // Fallback to cached data
-    let notes = await secureNotesStorage.getNotes();
-
-    // Apply view filter
-    if (view === 'favorites') {
-      notes = notes.filter((note) => note.favorite);
-    } else if (view === 'archived') {
-      notes = notes.filter((note) => note.archived);
-    } else if (view === 'pinned') {
-      notes = notes.filter((note) => note.pinned);
-    }
+    return getCachedNotes(view, query, tagFilter);
+  },
 
-    // Apply search query
-    if (query) {
-      const lowerQuery = query.toLowerCase();
-      notes = notes.filter(
-        (note) =>
-          note.title.toLowerCase().includes(lowerQuery) ||
-          note.body.toLowerCase().includes(lowerQuery),
-      );
+  async listPage(
+    view: NoteViewType = 'all',
+    query?: string,
+    tagFilter?: string,
+    cursor?: string | null,
+  ): Promise<NotesPageResult> {
+    if (offlineDetector.isOnline) {
+      try {
+        const page = await notesApi.listPage(view, query, tagFilter, cursor);
+        // Cache in IndexedDB for offline access
+        await secureNotesStorage.saveNotes(page.notes);
+        return page;
+      } catch (error) {
+        console.warn('Failed to fetch notes from server, using cached data:', error);
+      }
     }
 
-    // Apply tag filter
-    if (tagFilter) {
-      notes = notes.filter((note) => note.tags.some((tag) => tag.name === tagFilter));
+    // Cached data is served as a single page; a follow-up page while offline is empty
+    if (cursor) {
+      return { notes: [], nextCursor: null };
     }
-
-    return notes;
+    return { notes: await getCachedNotes(view, query, tagFilter), nextCursor: null };
   },
 
   async get(id: number): Promise<Note> {
@@ -146,6 +146,12 @@ export interface ApiResponse<T> {
 
 export interface NotesResponse {
   notes: Note[];
+  next_cursor?: string | null;
+}
+
+export interface NotesPageResult {
+  notes: Note[];
+  nextCursor: string | null;
 }
 
 export interface NoteResponse {